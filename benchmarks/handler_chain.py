@@ -0,0 +1,69 @@
+"""Measures the cost of running an empty endpoint through the full handler
+chain, with and without compiling the chain.
+
+Run it with `python benchmarks/handler_chain.py`.
+"""
+
+from functools import partial
+import timeit
+
+from nanopie import (
+    CredentialValidator,
+    Handler,
+    HTTPAPIKeyAuthenticationHandler,
+    HTTPAPIKeyModes,
+    HTTPRequest,
+    WSGIService,
+)
+from nanopie.globals import svc_ctx_var
+
+NUMBER = 100000
+
+
+class NoopValidator(CredentialValidator):
+    def validate(self, credential):
+        pass
+
+
+svc = WSGIService(
+    authn_handler=HTTPAPIKeyAuthenticationHandler(
+        mode=HTTPAPIKeyModes.HEADER,
+        key_field_name="X-API-Key",
+        credential_validator=NoopValidator(),
+    ),
+    handlers=[Handler(), Handler()],
+)
+
+
+@svc.get(name="empty", rule="/empty")
+def empty():
+    return "OK"
+
+
+def main():
+    endpoint = svc.endpoints["empty"]
+    request = HTTPRequest(
+        url="http://localhost/empty",
+        headers={"X-Api-Key": "key"},
+        content_length=None,
+        mime_type="",
+        query_args={},
+        binary_data=b"",
+    )
+
+    def run(entrypoint):
+        # Each request has its own context.
+        svc_ctx_var.set({"svc": svc, "endpoint": endpoint, "request": request})
+        return entrypoint()
+
+    for label, entrypoint in (
+        ("route look-ups", endpoint.entrypoint),
+        ("compiled", endpoint.compiled_entrypoint),
+    ):
+        assert run(entrypoint) == "OK"
+        seconds = min(timeit.repeat(partial(run, entrypoint), number=NUMBER, repeat=5))
+        print("{:<16} {:.2f} us/request".format(label, seconds / NUMBER * 1e6))
+
+
+if __name__ == "__main__":
+    main()
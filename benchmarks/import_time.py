@@ -0,0 +1,55 @@
+"""Measures the time it takes to import nanopie, and some of its integrations,
+in a fresh interpreter (e.g. on the cold start of a serverless function).
+
+Run it with `python benchmarks/import_time.py`. For a breakdown by module,
+run `python -X importtime -c "import nanopie"`.
+"""
+
+import subprocess
+import sys
+
+REPEAT = 10
+
+STATEMENTS = (
+    ("python", "pass"),
+    ("nanopie", "import nanopie"),
+    ("WSGIService", "from nanopie import WSGIService"),
+    ("FlaskService", "from nanopie import FlaskService"),
+    (
+        "JWT auth",
+        "from nanopie import HTTPOAuth2BearerJWTAuthenticationHandler",
+    ),
+    ("tracing", "from nanopie import OpenTelemetryTracingHandler"),
+)
+
+CODE = """
+import time
+
+start = time.perf_counter()
+{}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(statement):
+    """Returns the lowest time (in seconds) the statement takes in a fresh
+    interpreter."""
+    timings = []
+    for _ in range(REPEAT):
+        output = subprocess.run(
+            [sys.executable, "-c", CODE.format(statement)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        timings.append(float(output))
+    return min(timings)
+
+
+def main():
+    for label, statement in STATEMENTS:
+        print("{:<14} {:.1f} ms".format(label, measure(statement) * 1e3))
+
+
+if __name__ == "__main__":
+    main()
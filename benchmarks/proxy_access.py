@@ -0,0 +1,50 @@
+"""Measures the cost of accessing the request being processed through the
+`request` global proxy, and through the request resolved once per request.
+
+Run it with `python benchmarks/proxy_access.py`.
+"""
+
+from functools import partial
+import timeit
+
+from nanopie import HTTPRequest, request, resolve
+from nanopie.globals import get_svc_ctx, svc_ctx_var
+
+NUMBER = 1000000
+
+
+def via_proxy():
+    return request.headers
+
+
+def via_ctx():
+    return get_svc_ctx()["request"].headers
+
+
+def via_resolved(resolved):
+    return resolved.headers
+
+
+def main():
+    http_request = HTTPRequest(
+        url="http://localhost/",
+        headers={"X-Api-Key": "key"},
+        content_length=None,
+        mime_type="",
+        query_args={},
+        binary_data=b"",
+    )
+    svc_ctx_var.set({"request": http_request})
+
+    for label, func in (
+        ("proxy", via_proxy),
+        ("get_svc_ctx", via_ctx),
+        ("resolved", partial(via_resolved, resolve(request))),
+    ):
+        assert func() is http_request.headers
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+        print("{:<12} {:.1f} ns/access".format(label, seconds / NUMBER * 1e9))
+
+
+if __name__ == "__main__":
+    main()
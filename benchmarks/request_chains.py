@@ -0,0 +1,201 @@
+"""Measures the cost of running requests through the handler chains of
+endpoints, in process (see `TestClient`): empty endpoints, the decoding and
+encoding of realistic (nested) models, each authentication handler, the
+logging handler, and the tracing handler.
+
+The benchmarks require pytest-benchmark
+(https://pypi.org/project/pytest-benchmark/). Save a baseline with
+
+    python -m pytest benchmarks/request_chains.py --benchmark-save=baseline
+
+and compare later runs against it, failing if any benchmark regresses by
+more than 10% on average, with
+
+    python -m pytest benchmarks/request_chains.py \
+        --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+
+Baselines are saved in `.benchmarks/`, one directory per machine (and
+Python version); compare runs on the same machine only.
+"""
+
+import base64
+import logging
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from nanopie import (  # pylint: disable=wrong-import-position
+    ArrayField,
+    BoolField,
+    CredentialValidator,
+    FloatField,
+    HTTPAPIKeyAuthenticationHandler,
+    HTTPAPIKeyModes,
+    HTTPBasicAuthenticationHandler,
+    IntField,
+    LoggingHandler,
+    Model,
+    ObjectField,
+    StringField,
+    TestClient,
+    WSGIService,
+    parsed_request,
+)
+
+
+class Address(Model):
+    street = StringField(required=True)
+    city = StringField(required=True)
+    postal_code = StringField(max_length=10)
+    country = StringField(min_length=2, max_length=2, required=True)
+
+
+class LineItem(Model):
+    sku = StringField(required=True)
+    name = StringField()
+    quantity = IntField(minimum=1, required=True)
+    unit_price = FloatField(minimum=0, required=True)
+    tags = ArrayField(item_field=StringField())
+
+
+class Order(Model):
+    uid = IntField()
+    customer = StringField(required=True)
+    email = StringField(required=True)
+    paid = BoolField(default=False)
+    shipping_address = ObjectField(model=Address, required=True)
+    billing_address = ObjectField(model=Address)
+    items = ArrayField(item_field=ObjectField(model=LineItem), max_items=100)
+
+
+ADDRESS = {
+    "street": "1600 Amphitheatre Parkway",
+    "city": "Mountain View",
+    "postal_code": "94043",
+    "country": "US",
+}
+ORDER = {
+    "uid": 1,
+    "customer": "Jill Valentine",
+    "email": "jill@example.com",
+    "paid": True,
+    "shipping_address": ADDRESS,
+    "billing_address": ADDRESS,
+    "items": [
+        {
+            "sku": "SKU-{:04d}".format(i),
+            "name": "Item {}".format(i),
+            "quantity": i % 3 + 1,
+            "unit_price": 9.99 + i,
+            "tags": ["new", "sale"],
+        }
+        for i in range(10)
+    ],
+}
+
+
+class NoopValidator(CredentialValidator):
+    def validate(self, credential):
+        pass
+
+
+def make_client(headers=None, **kwargs):
+    """Creates a service with an empty endpoint and JSON endpoints."""
+    svc = WSGIService(**kwargs)
+
+    @svc.get(name="empty", rule="/empty")
+    def empty():
+        return "OK"
+
+    @svc.create(name="create_order", rule="/orders", data_cls=Order)
+    def create_order():
+        return parsed_request.data
+
+    @svc.list(name="list_orders", rule="/orders")
+    def list_orders():
+        return [Order.from_dikt(ORDER) for _ in range(10)]
+
+    svc.warmup()
+    client = TestClient(svc, headers=headers)
+    assert client.call("empty").status_code == 200
+    return client
+
+
+def test_empty(benchmark):
+    benchmark(make_client().call, "empty")
+
+
+def test_json_decode_encode(benchmark):
+    client = make_client()
+    res = benchmark(client.call, "create_order", json=ORDER)
+    assert res.json()["items"] == ORDER["items"]
+
+
+def test_json_encode_list(benchmark):
+    client = make_client()
+    res = benchmark(client.call, "list_orders")
+    assert len(res.json()) == 10
+
+
+def test_api_key_authentication(benchmark):
+    client = make_client(
+        headers={"X-API-Key": "key"},
+        authn_handler=HTTPAPIKeyAuthenticationHandler(
+            mode=HTTPAPIKeyModes.HEADER,
+            key_field_name="X-API-Key",
+            credential_validator=NoopValidator(),
+        ),
+    )
+    benchmark(client.call, "empty")
+
+
+def test_basic_authentication(benchmark):
+    credential = base64.b64encode(b"user:password").decode("ascii")
+    client = make_client(
+        headers={"Authorization": "Basic {}".format(credential)},
+        authn_handler=HTTPBasicAuthenticationHandler(
+            credential_validator=NoopValidator()
+        ),
+    )
+    benchmark(client.call, "empty")
+
+
+def test_jwt_authentication(benchmark):
+    jwt = pytest.importorskip("jwt")
+    # pylint: disable=import-outside-toplevel
+    from nanopie import HTTPOAuth2BearerJWTAuthenticationHandler
+
+    token = jwt.encode({"sub": "user"}, "secret", algorithm="HS256")
+    if isinstance(token, bytes):
+        token = token.decode("ascii")
+    client = make_client(
+        headers={"Authorization": "Bearer {}".format(token)},
+        authn_handler=HTTPOAuth2BearerJWTAuthenticationHandler(
+            key_or_secret="secret", algorithm="HS256"
+        ),
+    )
+    benchmark(client.call, "empty")
+
+
+def test_logging(benchmark):
+    logging_handler = LoggingHandler(default_logger_name="nanopie.benchmarks")
+    client = make_client(logging_handler=logging_handler)
+    # Logs are formatted, but not written to the terminal.
+    with open(os.devnull, "w") as devnull:
+        for handler in logging_handler.default_logger.handlers:
+            if isinstance(handler, logging.StreamHandler):
+                handler.setStream(devnull)
+        benchmark(client.call, "empty")
+
+
+def test_tracing(benchmark):
+    pytest.importorskip("opentelemetry.sdk")
+    # pylint: disable=import-outside-toplevel
+    from nanopie import OpenTelemetryTracingHandler
+
+    client = make_client(
+        tracing_handler=OpenTelemetryTracingHandler(write_to_console=False)
+    )
+    benchmark(client.call, "empty")
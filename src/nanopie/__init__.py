@@ -8,39 +8,89 @@ from .fields import (
     ObjectField,
 )
 from .globals import svc, parsed_request, request, endpoint
+from .deadline import check_deadline, get_deadline, time_remaining
+from .proxy import resolve
 from .handler import Handler, SimpleHandler
 from .model import Model
-from .auth import (
-    JWT,
-    Key,
-    UserCredential,
-    Credential,
-    CredentialValidator,
-    HTTPAPIKeyModes,
-    HTTPAPIKeyAuthenticationHandler,
-    HTTPBasicAuthenticationHandler,
-    HTTPOAuth2BearerJWTModes,
-    HTTPOAuth2BearerJWTAuthenticationHandler,
-)
-from .logging import (
-    LogContext,
-    LogContextExtractor,
-    LoggingHandler,
-    LoggingHandlerModes,
-    FluentdLoggingHandler,
-    LogstashLoggingHandler,
-    StackdriverLoggingHandler,
-)
-from .serialization import JSONSerializationHelper, HTTPSerializationHandler
-from .services import HTTPRequest, HTTPResponse, HTTPMethods, FlaskService
-from .tracing import (
-    TraceContext,
-    TraceContextExtractor,
-    HTTPW3CTraceContext,
-    HTTPW3CTraceContextExtractor,
-    OpenTelemetryTracingHandler,
-    JaegerTracingHandler,
-    ZipkinTracingHandler,
-)
+from .upload import FileUpload
+from .misc.lazy import make_lazy_loader
+
+# The integrations (and the optional dependencies they use) are imported on
+# first access; see the module `nanopie.misc.lazy`.
+_LAZY_ATTRS = {
+    "add_background_task": ".background",
+    "BackgroundTaskRunner": ".background",
+    "JWT": ".auth",
+    "Key": ".auth",
+    "UserCredential": ".auth",
+    "Credential": ".auth",
+    "CredentialValidator": ".auth",
+    "HTTPAPIKeyModes": ".auth",
+    "HTTPAPIKeyAuthenticationHandler": ".auth",
+    "HTTPBasicAuthenticationHandler": ".auth",
+    "HTTPOAuth2BearerJWTModes": ".auth",
+    "HTTPOAuth2BearerJWTAuthenticationHandler": ".auth",
+    "HTTPETagHandler": ".caching",
+    "CachingHandler": ".caching",
+    "CoalescingHandler": ".caching",
+    "ConcurrencyLimitHandler": ".limiting",
+    "RateLimitHandler": ".limiting",
+    "SharedMemoryTokenBucketStore": ".limiting",
+    "LogContext": ".logging",
+    "LogContextExtractor": ".logging",
+    "LoggingHandler": ".logging",
+    "LoggingHandlerModes": ".logging",
+    "FluentdLoggingHandler": ".logging",
+    "LogstashLoggingHandler": ".logging",
+    "StackdriverLoggingHandler": ".logging",
+    "MemoryMetricsStore": ".metrics",
+    "MetricsHandler": ".metrics",
+    "SharedMemoryMetricsStore": ".metrics",
+    "MemoryTrackingHandler": ".profiling",
+    "ProfilingHandler": ".profiling",
+    "ProfilingHandlerModes": ".profiling",
+    "ArrowSerializationHelper": ".serialization",
+    "JSONSerializationHelper": ".serialization",
+    "HTTPSerializationHandler": ".serialization",
+    "HTTPRequest": ".services",
+    "HTTPResponse": ".services",
+    "HTTPMethods": ".services",
+    "AioHTTPService": ".services",
+    "ASGIService": ".services",
+    "FlaskService": ".services",
+    "QuartService": ".services",
+    "WSGIService": ".services",
+    "TestClient": ".testing",
+    "TraceContext": ".tracing",
+    "TraceContextExtractor": ".tracing",
+    "HTTPW3CTraceContext": ".tracing",
+    "HTTPW3CTraceContextExtractor": ".tracing",
+    "OpenTelemetryTracingHandler": ".tracing",
+    "JaegerTracingHandler": ".tracing",
+    "ZipkinTracingHandler": ".tracing",
+}
+
+__all__ = [
+    "Field",
+    "StringField",
+    "IntField",
+    "FloatField",
+    "BoolField",
+    "ArrayField",
+    "ObjectField",
+    "svc",
+    "parsed_request",
+    "request",
+    "endpoint",
+    "check_deadline",
+    "get_deadline",
+    "time_remaining",
+    "resolve",
+    "Handler",
+    "SimpleHandler",
+    "Model",
+    "FileUpload",
+] + list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
 
 __version__ = "0.1.0"
@@ -1,13 +1,20 @@
-from .creds import *
-from .base import (
-    Credential,
-    CredentialExtractor,
-    CredentialValidator,
-    AuthenticationHandler,
-)
-from .http_api_key import HTTPAPIKeyModes, HTTPAPIKeyAuthenticationHandler
-from .http_basic import HTTPBasicAuthenticationHandler
-from .http_oauth2_bearer_jwt import (
-    HTTPOAuth2BearerJWTModes,
-    HTTPOAuth2BearerJWTAuthenticationHandler,
-)
+from ..misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "JWT": ".creds",
+    "JWTValidator": ".creds",
+    "Key": ".creds",
+    "UserCredential": ".creds",
+    "Credential": ".base",
+    "CredentialExtractor": ".base",
+    "CredentialValidator": ".base",
+    "AuthenticationHandler": ".base",
+    "HTTPAPIKeyModes": ".http_api_key",
+    "HTTPAPIKeyAuthenticationHandler": ".http_api_key",
+    "HTTPBasicAuthenticationHandler": ".http_basic",
+    "HTTPOAuth2BearerJWTModes": ".http_oauth2_bearer_jwt",
+    "HTTPOAuth2BearerJWTAuthenticationHandler": ".http_oauth2_bearer_jwt",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
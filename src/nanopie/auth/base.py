@@ -9,9 +9,10 @@ to a chained handler; otherwise it will return an error response.
 
 from abc import ABC, abstractmethod
 from inspect import signature
+import time
 from typing import Any, Callable, Optional
 
-from ..globals import request as request_proxy
+from ..globals import get_svc_ctx
 from ..handler import Handler
 from ..services.base import Extractor
 
@@ -19,6 +20,13 @@ from ..services.base import Extractor
 class Credential(ABC):
     """The base class for all credentials."""
 
+    @property
+    def principal(self) -> Optional[str]:
+        """Returns the principal (e.g. the user) the credential identifies,
+        if any. Handlers such as the rate limiting handler use it to tell the
+        callers of a service apart."""
+        return None
+
 
 class CredentialExtractor(Extractor):
     """The base class for all credential extractors.
@@ -57,6 +65,10 @@ class CredentialValidator(ABC):
             credential (Credential): A credential.
         """
 
+    def warmup(self):
+        """Prepares the state the validator would otherwise initialize on the
+        first validation (e.g. key material). By default it does nothing."""
+
 
 class AuthenticationHandler(Handler):
     """The base class for all authentication handlers."""
@@ -81,7 +93,46 @@ class AuthenticationHandler(Handler):
         self._after_authentication = lambda auth_handler, credential: None
         super().__init__()
 
-    def __call__(self, *args, **kwargs) -> Any:
+    def warmup(self):
+        """Warms up the credential validator. See the method
+        `Handler.warmup`."""
+        self._credential_validator.warmup()
+
+    def _authenticate(self):
+        """Authenticates the request. See the method `handle`."""
+        ctx = get_svc_ctx()
+        authenticated = ctx.get("authenticated")
+        if authenticated and self in authenticated:
+            # The credential has been validated already (e.g. requests
+            # dispatched by a batch request); the hooks still run, so that
+            # the checks they make for each endpoint apply.
+            credential = ctx.get("credential")
+            self._before_authentication(auth_handler=self, credential=credential)
+            self._after_authentication(auth_handler=self, credential=credential)
+            return
+
+        # The time spent is recorded for the metrics handler (if any).
+        timings = ctx.get("timings")
+        start = time.perf_counter()
+        try:
+            credential = self._credential_extractor.extract(request=ctx.get("request"))
+
+            credential_validator = self._before_authentication(
+                auth_handler=self, credential=credential
+            )
+            if not credential_validator:
+                credential_validator = self._credential_validator
+
+            credential_validator.validate(credential=credential)
+
+            self._after_authentication(auth_handler=self, credential=credential)
+        finally:
+            if timings != None:
+                timings["authentication"] = time.perf_counter() - start
+        ctx["authenticated"] = (authenticated or frozenset()) | {self}
+        ctx["credential"] = credential
+
+    def handle(self, call_next: Callable, *args, **kwargs) -> Any:
         """Runs the handler.
 
         It performs the following tasks:
@@ -98,26 +149,36 @@ class AuthenticationHandler(Handler):
         4. If the after_authentication method is configured, run the method.
         5. Pass the baton to the chained handler.
 
+        Requests dispatched by a batch endpoint skip the extraction and the
+        validation of the credential if the authentication handler has
+        already authenticated the batch request; the before_authentication
+        and after_authentication methods still run, with the credential of
+        the batch request.
+
         Args:
+            call_next (Callable): The next chained handler.
             *args: Arbitrary positional arguments.
             **kwargs: Arbitrary named arguments.
 
         Returns:
             Any: Any object.
         """
-        credential = self._credential_extractor.extract(request=request_proxy)
+        self._authenticate()
+        return call_next(*args, **kwargs)
 
-        credential_validator = self._before_authentication(
-            auth_handler=self, credential=credential
-        )
-        if not credential_validator:
-            credential_validator = self._credential_validator
+    async def ahandle(self, call_next: Callable, *args, **kwargs) -> Any:
+        """Runs the handler asynchronously. See the method `handle`.
 
-        credential_validator.validate(credential=credential)
-
-        self._after_authentication(auth_handler=self, credential=credential)
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary named arguments.
 
-        return super().__call__(*args, **kwargs)
+        Returns:
+            Any: Any object.
+        """
+        self._authenticate()
+        return await call_next(*args, **kwargs)
 
     def before_authentication(self, func: Callable) -> Optional["CredentialValidator"]:
         """A decorator for setting up a before_authentication method.
@@ -1,3 +1,11 @@
-from .jwt import JWT, JWTValidator
-from .key import Key
-from .user_credential import UserCredential
+from ...misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "JWT": ".jwt",
+    "JWTValidator": ".jwt",
+    "Key": ".key",
+    "UserCredential": ".user_credential",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
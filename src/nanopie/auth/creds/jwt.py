@@ -49,6 +49,14 @@ class JWT(Credential):
             message = "The provided JWT is not valid ({})".format(str(ex))
             raise AuthenticationError(message)
 
+    @property
+    def principal(self) -> str:
+        """Returns the subject (the `sub` claim) of the JWT, or the token
+        itself if the JWT has no subject. See the method
+        `Credential.principal`."""
+        subject = self.payload.get("sub")
+        return str(subject) if subject != None else self.token
+
 
 class JWTValidator(CredentialValidator):
     """The class for validating JWTs."""
@@ -117,7 +125,9 @@ class JWTValidator(CredentialValidator):
             )
 
         self._key = key_or_secret
+        self._prepared_key = None
         self._algorithm = algorithm
+        self._algorithm_obj = None
 
         if use_pycrypto:
             if algorithm not in PYCRYPTO_SUPPORTED_ALGS:
@@ -135,10 +145,11 @@ class JWTValidator(CredentialValidator):
 
             from jwt.contrib.algorithms.pycrypto import RSAAlgorithm
 
-            jwt.unregister_algorithm(algorithm)
-            jwt.register_algorithm(
-                algorithm, RSAAlgorithm(getattr(RSAAlgorithm, "SHA" + algorithm[2:]))
+            self._algorithm_obj = RSAAlgorithm(
+                getattr(RSAAlgorithm, "SHA" + algorithm[2:])
             )
+            jwt.unregister_algorithm(algorithm)
+            jwt.register_algorithm(algorithm, self._algorithm_obj)
         elif use_ecdsa:
             if algorithm not in ECDSA_SUPPORTED_ALGS:
                 raise ValueError("ecdsa does not support the specified " "algorithm.")
@@ -152,10 +163,11 @@ class JWTValidator(CredentialValidator):
                 )
             from jwt.contrib.algorithms.py_ecdsa import ECAlgorithm
 
-            jwt.unregister_algorithm(algorithm)
-            jwt.register_algorithm(
-                algorithm, ECAlgorithm(getattr(ECAlgorithm, "SHA" + algorithm[2:]))
+            self._algorithm_obj = ECAlgorithm(
+                getattr(ECAlgorithm, "SHA" + algorithm[2:])
             )
+            jwt.unregister_algorithm(algorithm)
+            jwt.register_algorithm(algorithm, self._algorithm_obj)
         elif not pkgutil.find_loader("cryptography"):
             raise ImportError(
                 "The cryptography "
@@ -197,16 +209,33 @@ class JWTValidator(CredentialValidator):
         ):
             raise ValueError("No expected audience.")
 
+    def warmup(self):
+        """Loads the key (or secret), so that it is not parsed again on every
+        validation."""
+        if self._prepared_key != None:
+            return
+
+        if self._algorithm_obj == None:
+            self._algorithm_obj = jwt.algorithms.get_default_algorithms().get(
+                self._algorithm
+            )
+        if self._algorithm_obj != None:
+            self._prepared_key = self._algorithm_obj.prepare_key(self._key)
+        else:
+            self._prepared_key = self._key
+
     def validate(self, credential: "JWT"):
         """Validates a JWT.
 
         Args:
             credential (JWT): A JWT.
         """
+        self.warmup()
+
         try:
             jwt.decode(
                 credential.token,
-                self._key,
+                self._prepared_key,
                 algorithms=self._algorithm,
                 options=self._validation_options,
                 **self._canonical_info
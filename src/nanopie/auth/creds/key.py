@@ -16,3 +16,8 @@ class Key(Credential):
             key (str): The key.
         """
         self.key = key
+
+    @property
+    def principal(self) -> str:
+        """See the method `Credential.principal`."""
+        return self.key
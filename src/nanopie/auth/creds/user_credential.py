@@ -18,3 +18,8 @@ class UserCredential(Credential):
         """
         self.username = username
         self.password = password
+
+    @property
+    def principal(self) -> str:
+        """See the method `Credential.principal`."""
+        return self.username
@@ -4,7 +4,7 @@
 from .base import CredentialExtractor, AuthenticationHandler
 from .creds.key import Key
 from ..misc.errors import AuthenticationError
-from ..services.http.io import HTTPResponse
+from ..services.http.io import HTTPResponse, as_http_headers
 
 INVALID_HEADER_RESPONSE = HTTPResponse(
     status_code=401,
@@ -79,10 +79,7 @@ class HTTPAPIKeyExtractor(CredentialExtractor):
                     "The incoming request is not a valid " "HTTP request."
                 )
 
-            auth_header = None
-            for k in headers:
-                if k.lower() == self.key_field_name.lower():
-                    auth_header = headers[k]
+            auth_header = as_http_headers(headers).get(self.key_field_name)
 
             if not auth_header:
                 message = (
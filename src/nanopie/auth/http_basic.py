@@ -6,7 +6,7 @@ import base64
 from .base import CredentialExtractor, AuthenticationHandler
 from .creds.user_credential import UserCredential
 from ..misc.errors import AuthenticationError
-from ..services.http.io import HTTPResponse
+from ..services.http.io import HTTPResponse, as_http_headers
 
 INVALID_HEADER_RESPONSE = HTTPResponse(
     status_code=401,
@@ -42,10 +42,7 @@ class HTTPBasicUserCredentialExtractor(CredentialExtractor):
         except AttributeError:
             raise AttributeError("The incoming request is not a valid HTTP " "request.")
 
-        auth_header = None
-        for k in headers:
-            if k.lower() == "authorization":
-                auth_header = headers[k]
+        auth_header = as_http_headers(headers).get("Authorization")
 
         if not auth_header:
             message = (
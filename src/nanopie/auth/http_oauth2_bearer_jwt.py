@@ -8,7 +8,7 @@ from typing import Optional
 from .base import CredentialExtractor, AuthenticationHandler
 from .creds.jwt import JWT, JWTValidator
 from ..misc.errors import AuthenticationError
-from ..services.http.io import HTTPResponse
+from ..services.http.io import HTTPResponse, as_http_headers
 
 INVALID_HEADER_RESPONSE = HTTPResponse(
     status_code=401,
@@ -79,10 +79,7 @@ class HTTPOAuth2BearerJWTExtractor(CredentialExtractor):
                     "The incoming request is not a valid HTTP " "request."
                 )
 
-            auth_header = None
-            for k in headers:
-                if k.lower() == "authorization":
-                    auth_header = headers[k]
+            auth_header = as_http_headers(headers).get("Authorization")
 
             if not auth_header:
                 message = (
@@ -0,0 +1,253 @@
+"""This module includes the background task runner.
+
+Endpoints may schedule follow-up work, such as audit writes, cache warming
+and notifications, that the caller should not wait for, with the function
+`add_background_task`. The tasks of a request run after its response has
+been sent, on the bounded thread pool of the service (see
+`BackgroundTaskRunner`) or, for coroutine functions scheduled with
+asynchronous transports, on the event loop:
+
+```python
+@svc.create(name="create_user", rule="/users", data_cls=User)
+def create_user():
+    user = parsed_request.data
+    ...
+    add_background_task(send_welcome_email, user.email)
+    return user
+```
+
+Tasks run in a copy of the context of the request that schedules them, so
+that the context of the request (e.g. `nanopie.request`, and the log and
+trace contexts) remains available to them; the deadline of the request (see
+`nanopie.deadline`) does not apply to them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import inspect
+import threading
+from typing import Callable, Dict, List
+
+from .globals import bind_svc_ctx, get_svc_ctx
+from .logger import logger
+
+
+class BackgroundTask:
+    """A task scheduled by a request."""
+
+    __slots__ = ("context", "func", "args", "kwargs")
+
+    def __init__(
+        self, context: "contextvars.Context", func: Callable, args: tuple, kwargs: Dict
+    ):
+        """Initializes a background task.
+
+        Args:
+            context (contextvars.Context): The context to run the task in.
+            func (Callable): The function to run.
+            args (tuple): The positional arguments for the function.
+            kwargs (Dict): The keyword arguments for the function.
+        """
+        self.context = context
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def is_coroutine_func(self) -> bool:
+        """Checks if the function of the task is a coroutine function."""
+        return inspect.iscoroutinefunction(self.func) or (
+            inspect.iscoroutinefunction(getattr(self.func, "__call__", None))
+        )
+
+
+def add_background_task(func: Callable, *args, **kwargs):
+    """Schedules a task to run after the response of the request being
+    processed has been sent.
+
+    Args:
+        func (Callable): The function (or coroutine function) to run.
+        *args: Positional arguments to pass to the function.
+        **kwargs: Keyword arguments to pass to the function.
+    """
+    ctx = get_svc_ctx()
+    tasks = ctx.get("background_tasks")
+    if tasks == None:
+        raise RuntimeError("The transport does not support background tasks.")
+
+    task_ctx = dict(ctx)
+    task_ctx.pop("deadline", None)
+    task_ctx.pop("background_tasks")
+    context = contextvars.copy_context()
+    context.run(bind_svc_ctx, task_ctx)
+    tasks.append(BackgroundTask(context, func, args, kwargs))
+
+
+class BackgroundTaskRunner:
+    """The runner of background tasks.
+
+    Tasks run on a bounded thread pool; coroutine functions scheduled with
+    asynchronous transports run on the event loop instead. Tasks are
+    rejected (and logged) when `max_queue` tasks are already waiting.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 1000):
+        """Initializes a background task runner.
+
+        Args:
+            max_workers (int): The number of threads for running tasks.
+            max_queue (int): The maximum number of tasks waiting to run.
+        """
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._async_tasks = set()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of tasks waiting and running, and the number of
+        tasks completed, failed, and rejected.
+
+        Returns:
+            Dict[str, int]: The counters.
+        """
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+    def _get_executor(self) -> "ThreadPoolExecutor":
+        """Gets the thread pool of the runner. It is created on first use, so
+        that the worker processes of pre-forking servers get their own."""
+        if self._executor == None:
+            with self._lock:
+                if self._executor == None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers,
+                        thread_name_prefix="nanopie-background",
+                    )
+        return self._executor
+
+    def _enqueue(self, task: "BackgroundTask") -> bool:
+        """Counts a task as waiting, unless the queue is full."""
+        with self._lock:
+            if self.queued >= self._max_queue:
+                self.rejected += 1
+                rejected = True
+            else:
+                self.queued += 1
+                rejected = False
+
+        if rejected:
+            logger.error(
+                "The background task {} is rejected, as the queue is "
+                "full.".format(getattr(task.func, "__name__", task.func))
+            )
+        return not rejected
+
+    def _start(self):
+        """Counts a waiting task as running."""
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+
+    def _finish(self, failed: bool = False):
+        """Counts a running task as completed (or failed)."""
+        with self._lock:
+            self.running -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def _run(self, task: "BackgroundTask"):
+        """Runs a task in a thread of the pool."""
+        self._start()
+        try:
+            res = task.context.run(task.func, *task.args, **task.kwargs)
+            if inspect.isawaitable(res):
+                # asyncio is imported here, so that synchronous services do
+                # not pay for importing it.
+                import asyncio  # pylint: disable=import-outside-toplevel
+
+                task.context.run(asyncio.run, res)
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception(ex)
+            self._finish(failed=True)
+        else:
+            self._finish()
+
+    @staticmethod
+    def _create_task(
+        loop: "asyncio.AbstractEventLoop", task: "BackgroundTask"
+    ) -> "asyncio.Task":
+        """Creates an asyncio task for a task; asyncio tasks copy the current
+        context when created."""
+        return loop.create_task(task.func(*task.args, **task.kwargs))
+
+    def _on_async_done(self, async_task: "asyncio.Task"):
+        """Counts a task on the event loop as completed (or failed, or
+        cancelled)."""
+        self._async_tasks.discard(async_task)
+        if async_task.cancelled():
+            self._finish(failed=True)
+            return
+
+        ex = async_task.exception()
+        if ex != None:
+            logger.error(ex, exc_info=ex)
+        self._finish(failed=ex != None)
+
+    def submit(self, tasks: List["BackgroundTask"]):
+        """Runs tasks on the thread pool. Transports call this method once
+        the response of the request that schedules the tasks has been sent.
+
+        Args:
+            tasks (List[BackgroundTask]): The tasks.
+        """
+        for task in tasks:
+            if self._enqueue(task):
+                self._get_executor().submit(self._run, task)
+
+    def submit_async(self, tasks: List["BackgroundTask"]):
+        """Runs tasks on the running event loop (coroutine functions) or on
+        the thread pool (other functions). Asynchronous transports call this
+        method, from the event loop, once the response of the request that
+        schedules the tasks has been sent.
+
+        Args:
+            tasks (List[BackgroundTask]): The tasks.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        loop = asyncio.get_running_loop()
+        for task in tasks:
+            if not task.is_coroutine_func:
+                self.submit([task])
+            elif self._enqueue(task):
+                # Tasks on the event loop start right away.
+                self._start()
+                async_task = task.context.run(self._create_task, loop, task)
+                self._async_tasks.add(async_task)
+                async_task.add_done_callback(self._on_async_done)
+
+    def shutdown(self, wait: bool = True):
+        """Shuts down the thread pool of the runner.
+
+        Args:
+            wait (bool): If set to True, waits for the tasks on the thread
+                pool to finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor != None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,12 @@
+from ..misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "KeyedHandler": ".base",
+    "CoalescingHandler": ".coalescing",
+    "HTTPETagHandler": ".http_etag",
+    "LRUCache": ".lru",
+    "CachingHandler": ".response_cache",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
@@ -0,0 +1,140 @@
+"""This module includes the base class for handlers that identify identical
+requests, such as the response caching handler (`CachingHandler`) and the
+request coalescing handler (`CoalescingHandler`).
+
+Two requests to `GET` (or `HEAD`) endpoints are identical if they have the
+same endpoint, path parameters, query arguments (all the values of repeated
+arguments), values of some headers (by default `Authorization` and `Cookie`)
+and principal (by default the principal of the credential the request has
+been authenticated with; see `Credential.principal`).
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from ..globals import get_svc_ctx
+from ..handler import Handler
+from ..services.http.io import HTTPResponse, as_http_headers
+from ..services.http.methods import HTTPMethods
+
+KEYED_METHODS = (HTTPMethods.GET, HTTPMethods.HEAD)
+DEFAULT_VARY_HEADERS = ("Authorization", "Cookie")
+
+
+def get_principal() -> Any:
+    """Gets the principal of the credential the request being processed has
+    been authenticated with (see `Credential.principal`).
+
+    Returns:
+        Any: The principal, or `None` if the request has not been
+            authenticated.
+    """
+    return getattr(get_svc_ctx().get("credential"), "principal", None)
+
+
+class KeyedHandler(Handler):
+    """The base class for handlers that identify identical requests."""
+
+    def __init__(
+        self,
+        vary_headers: Optional[List[str]] = None,
+        principal_func: Optional[Callable] = None,
+    ):
+        """Initializes a keyed handler.
+
+        Args:
+            vary_headers (List[str], Optional): The headers whose values are
+                part of the request key, so that, for example, requests with
+                different credentials are told apart. Defaults to
+                `["Authorization", "Cookie"]`; specify the headers other
+                credentials (e.g. API keys) are sent in, if the requests are
+                not authenticated by an authentication handler.
+            principal_func (Callable, Optional): A function that returns the
+                principal (e.g. the ID of the authenticated user) the request
+                is made for, which is part of the request key. It is called
+                without arguments, and may read the request from the
+                context (e.g. `nanopie.request`). Defaults to the function
+                `get_principal`.
+        """
+        if vary_headers == None:
+            vary_headers = list(DEFAULT_VARY_HEADERS)
+        if principal_func == None:
+            principal_func = get_principal
+
+        self._vary_headers = vary_headers
+        self._principal_func = principal_func
+
+        super().__init__()
+
+    def make_key(
+        self,
+        endpoint: "HTTPEndpoint",
+        request: "HTTPRequest",
+        args: Tuple,
+        kwargs: Dict,
+    ) -> Optional[Hashable]:
+        """Makes the key for a request.
+
+        Args:
+            endpoint (HTTPEndpoint): The endpoint that processes the request.
+            request (HTTPRequest): The request.
+            args (Tuple): The positional arguments for the endpoint.
+            kwargs (Dict): The keyword arguments (path parameters) for the
+                endpoint.
+
+        Returns:
+            Hashable: The key, or `None` if the request cannot be keyed (e.g.
+                its query arguments are not hashable).
+        """
+        query_args = getattr(request, "query_args", None) or {}
+        # Multi-value maps (e.g. the query arguments of Flask requests) keep
+        # all the values of repeated arguments.
+        try:
+            query_args = query_args.items(multi=True)
+        except TypeError:
+            query_args = query_args.items()
+
+        vary = ()
+        if self._vary_headers:
+            headers = getattr(request, "headers", None)
+            headers = as_http_headers(headers) if headers else {}
+            vary = tuple(headers.get(header) for header in self._vary_headers)
+
+        principal = self._principal_func()
+
+        try:
+            key = (
+                endpoint.name,
+                args,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(query_args)),
+                vary,
+                principal,
+            )
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _get_key(self, args: Tuple, kwargs: Dict) -> Optional[Hashable]:
+        """Gets the key of the request being processed; requests to endpoints
+        other than `GET` (and `HEAD`) ones have no key."""
+        ctx = get_svc_ctx()
+        endpoint = ctx.get("endpoint")
+        if getattr(endpoint, "method", None) not in KEYED_METHODS:
+            return None
+
+        return self.make_key(endpoint, ctx.get("request"), args, kwargs)
+
+    @staticmethod
+    def _copy(res: Any) -> Any:
+        """Copies a response, so that handlers modifying a response (e.g. the
+        ETag handler) do not modify the one shared between requests."""
+        if not isinstance(res, HTTPResponse):
+            return res
+
+        return HTTPResponse(
+            status_code=res.status_code,
+            headers=dict(res.headers) if res.headers else None,
+            mime_type=res.mime_type,
+            data=res.data,
+        )
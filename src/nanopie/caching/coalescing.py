@@ -0,0 +1,237 @@
+"""This module includes the request coalescing (single-flight) handler for
+HTTP services.
+
+When identical requests (see `KeyedHandler`) to a `GET` endpoint arrive while
+one of them is being processed, the coalescing handler lets only the first
+request run the rest of the handler chain; the others wait for it to finish,
+and receive (copies of) the same response, or the same exception (unless the
+first request has failed because of its own deadline, or has been cancelled,
+or has returned a streamed response, which can only be sent once, in which
+case they are processed on their own). This
+prevents bursts of identical requests, e.g. for a popular resource that has
+just expired from a cache, from running the same expensive endpoint many
+times at once. For example:
+
+```python
+@svc.get(name="get_report",
+         rule="/reports/<int:report_id>",
+         handlers=[CoalescingHandler(), CachingHandler(ttl=5)])
+def get_report(report_id):
+    ...
+```
+
+The handler supports both threaded (WSGI) and asynchronous (ASGI)
+transports; requests are coalesced within a worker process only.
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from ..misc.errors import DeadlineExceededError
+from ..services.http.io import HTTPResponse
+from .base import KeyedHandler
+
+
+class _Flight:
+    """A request being processed, which identical requests wait for."""
+
+    __slots__ = ("done", "res", "exception", "shareable")
+
+    def __init__(self):
+        """Initializes a flight."""
+        self.done = threading.Event()
+        self.res = None
+        self.exception = None
+        self.shareable = False
+
+
+class CoalescingHandler(KeyedHandler):
+    """The request coalescing handler for HTTP services."""
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        vary_headers: Optional[List[str]] = None,
+        principal_func: Optional[Callable] = None,
+    ):
+        """Initializes a coalescing handler.
+
+        Args:
+            timeout (float, Optional): The maximum number of seconds a request
+                waits for an identical request to finish; once it passes, the
+                request is processed on its own. If not specified, requests
+                wait until the identical request finishes.
+            vary_headers (List[str], Optional): See `KeyedHandler`.
+            principal_func (Callable, Optional): See `KeyedHandler`.
+        """
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._flights = {}  # type: Dict[Hashable, _Flight]
+        self._async_flights = {}  # type: Dict[Tuple, asyncio.Future]
+        self.coalesced = 0
+
+        super().__init__(vary_headers=vary_headers, principal_func=principal_func)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of requests that have been coalesced (i.e. that
+        have received the response of an identical request), and the number
+        of requests being processed.
+
+        Returns:
+            Dict[str, int]: The counters.
+        """
+        with self._lock:
+            return {
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights) + len(self._async_flights),
+            }
+
+    @staticmethod
+    def _is_shareable(res: Any) -> bool:
+        """Checks if a response can be shared with identical requests;
+        streamed payloads (iterators) can only be consumed once."""
+        if isinstance(res, HTTPResponse):
+            return res.data == None or isinstance(res.data, (str, bytes))
+
+        return not isinstance(res, Iterator)
+
+    def _wait(self, flight: "_Flight") -> Tuple[bool, Any]:
+        """Waits for an identical request to finish. See the method `handle`.
+
+        Returns:
+            Tuple[bool, Any]: Whether the request has finished in time, and
+                its response.
+        """
+        if not flight.done.wait(self._timeout):
+            return False, None
+
+        if flight.exception != None:
+            # Requests waiting for a request that has run out of time are
+            # processed on their own; their deadlines may not have passed.
+            if isinstance(flight.exception, DeadlineExceededError):
+                return False, None
+            raise flight.exception
+        if not flight.shareable:
+            return False, None
+        return True, self._copy(flight.res)
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the coalescing handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        key = self._get_key(args, kwargs)
+        if key == None:
+            return call_next(*args, **kwargs)
+
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight == None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            finished, res = self._wait(flight)
+            if finished:
+                return res
+            return call_next(*args, **kwargs)
+
+        try:
+            res = call_next(*args, **kwargs)
+            if self._is_shareable(res):
+                flight.res = self._copy(res)
+                flight.shareable = True
+            return res
+        except BaseException as ex:
+            flight.exception = ex
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def _await(self, future: "asyncio.Future") -> Tuple[bool, Any]:
+        """Waits asynchronously for an identical request to finish. See the
+        method `ahandle`.
+
+        Returns:
+            Tuple[bool, Any]: Whether the request has finished in time (and
+                has not been cancelled), and its response.
+        """
+        try:
+            res = await asyncio.wait_for(asyncio.shield(future), self._timeout)
+        except asyncio.TimeoutError:
+            return False, None
+        except asyncio.CancelledError:
+            # Requests waiting for a cancelled request (or one that has run
+            # out of time, or has returned a streamed response) are processed
+            # on their own; they are not cancelled with it.
+            if not future.cancelled():
+                raise
+            return False, None
+
+        return True, self._copy(res)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the coalescing handler asynchronously. See the method
+        `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        key = self._get_key(args, kwargs)
+        if key == None:
+            return await call_next(*args, **kwargs)
+
+        # Futures belong to an event loop; requests are coalesced per loop.
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        with self._lock:
+            future = self._async_flights.get(flight_key)
+            if future == None:
+                future = self._async_flights[flight_key] = loop.create_future()
+                leader = True
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            finished, res = await self._await(future)
+            if finished:
+                return res
+            return await call_next(*args, **kwargs)
+
+        try:
+            res = await call_next(*args, **kwargs)
+            if self._is_shareable(res):
+                future.set_result(self._copy(res))
+            else:
+                future.cancel()
+            return res
+        except (asyncio.CancelledError, DeadlineExceededError):
+            future.cancel()
+            raise
+        except BaseException as ex:
+            future.set_exception(ex)
+            # The exception is re-raised below; without waiters, the future
+            # should not report it as never retrieved.
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_flights[flight_key]
@@ -0,0 +1,209 @@
+"""This module includes the ETag handler for HTTP services.
+
+The ETag handler adds support for conditional GET requests
+(https://tools.ietf.org/html/rfc7232). It tags each successful response to a
+GET (or HEAD) request with an entity tag, and returns a 304 Not Modified
+response without a body if the tag matches one of the tags the client
+specifies in the `If-None-Match` header.
+
+By default the entity tag is a hash of the serialized response, which saves
+egress for polling clients. Alternatively, developers may provide a function
+that returns a version key for the requested resource; the entity tag is then
+derived from the version key before the endpoint runs, so that unchanged
+resources need not be produced or serialized at all.
+"""
+
+import hashlib
+import inspect
+from typing import Any, Callable, List, Optional, Union
+
+from ..globals import get_svc_ctx
+from ..handler import Handler
+from ..services.http.io import HTTPResponse, as_http_headers
+from ..services.http.methods import HTTPMethods
+
+CONDITIONAL_METHODS = (HTTPMethods.GET, HTTPMethods.HEAD)
+
+
+class HTTPETagHandler(Handler):
+    """The ETag handler for HTTP services."""
+
+    def __init__(self, version_func: Optional[Callable] = None, weak: bool = False):
+        """Initializes an ETag handler.
+
+        Args:
+            version_func (Callable, Optional): A function that returns the
+                version key (e.g. a revision number or a last-modified
+                timestamp) of the requested resource. It is called with the
+                same arguments as the endpoint. If it returns `None`, the
+                entity tag is computed from the serialized response instead.
+                With asynchronous transports, it may also be a coroutine
+                function.
+            weak (bool): If set to True, the handler generates weak entity
+                tags (`W/"..."`).
+        """
+        self._version_func = version_func
+        self._weak = weak
+
+        super().__init__()
+
+    def make_etag(self, data: Union[str, bytes]) -> str:
+        """Makes an entity tag from some data.
+
+        Args:
+            data (Union[str, bytes]): The data to hash.
+
+        Returns:
+            str: The entity tag, quoted as required by the `ETag` header.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if self._weak:
+            return 'W/"{}"'.format(digest)
+        return '"{}"'.format(digest)
+
+    @staticmethod
+    def parse_if_none_match(value: str) -> List[str]:
+        """Parses the value of an `If-None-Match` header.
+
+        Args:
+            value (str): The value of the header.
+
+        Returns:
+            List[str]: The opaque tags (without the weakness indicator), or
+                `["*"]` if the header matches any tag.
+        """
+        tags = []
+        for tag in value.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag:
+                tags.append(tag)
+        return tags
+
+    @staticmethod
+    def _get_if_none_match(request: "HTTPRequest") -> Optional[str]:
+        """Gets the `If-None-Match` header of the incoming request (if any)."""
+        headers = getattr(request, "headers", None)
+        if not headers:
+            return None
+
+        return as_http_headers(headers).get("If-None-Match")
+
+    def _matches(self, etag: str, if_none_match: Optional[str]) -> bool:
+        """Checks (with weak comparison) if an entity tag matches the
+        `If-None-Match` header."""
+        if not if_none_match:
+            return False
+
+        tags = self.parse_if_none_match(if_none_match)
+        if "*" in tags:
+            return True
+
+        opaque_tag = etag[2:] if etag.startswith("W/") else etag
+        return opaque_tag in tags
+
+    @staticmethod
+    def _not_modified(etag: str) -> "HTTPResponse":
+        """Prepares a 304 Not Modified response."""
+        return HTTPResponse(status_code=304, headers={"ETag": etag}, data=b"")
+
+    async def _get_etag(
+        self, endpoint: "HTTPEndpoint", *args, **kwargs
+    ) -> Optional[str]:
+        """Gets the entity tag derived from the version key (if available).
+
+        `version_func` may be a coroutine function. See the method
+        `handle`.
+        """
+        version = self._version_func(*args, **kwargs)
+        if inspect.isawaitable(version):
+            version = await version
+        return self._make_version_etag(endpoint, version)
+
+    def _make_version_etag(
+        self, endpoint: "HTTPEndpoint", version: Any
+    ) -> Optional[str]:
+        """Makes an entity tag from a version key (if any)."""
+        if version == None:
+            return None
+        return self.make_etag("{}:{}".format(endpoint.name, version))
+
+    def _tag_response(
+        self, res: Any, etag: Optional[str], if_none_match: Optional[str]
+    ) -> Any:
+        """Tags a response with an entity tag. See the method `handle`."""
+        if not isinstance(res, HTTPResponse):
+            return res
+        if res.status_code < 200 or res.status_code >= 300:
+            return res
+        if type(res.headers) != dict:
+            return res
+        if not isinstance(res.data, (str, bytes)):
+            return res
+
+        if not etag:
+            etag = self.make_etag(res.data)
+            if self._matches(etag, if_none_match):
+                return self._not_modified(etag)
+
+        res.headers = dict(res.headers, ETag=etag)
+        return res
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the ETag handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        endpoint = ctx.get("endpoint")
+        if getattr(endpoint, "method", None) not in CONDITIONAL_METHODS:
+            return call_next(*args, **kwargs)
+
+        if_none_match = self._get_if_none_match(ctx.get("request"))
+
+        etag = None
+        if self._version_func:
+            etag = self._make_version_etag(
+                endpoint, self._version_func(*args, **kwargs)
+            )
+            if etag and self._matches(etag, if_none_match):
+                return self._not_modified(etag)
+
+        res = call_next(*args, **kwargs)
+        return self._tag_response(res, etag, if_none_match)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the ETag handler asynchronously. See the method `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        endpoint = ctx.get("endpoint")
+        if getattr(endpoint, "method", None) not in CONDITIONAL_METHODS:
+            return await call_next(*args, **kwargs)
+
+        if_none_match = self._get_if_none_match(ctx.get("request"))
+
+        etag = None
+        if self._version_func:
+            etag = await self._get_etag(endpoint, *args, **kwargs)
+            if etag and self._matches(etag, if_none_match):
+                return self._not_modified(etag)
+
+        res = await call_next(*args, **kwargs)
+        return self._tag_response(res, etag, if_none_match)
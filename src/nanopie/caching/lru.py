@@ -0,0 +1,133 @@
+"""This module includes a size-bounded, thread-safe LRU cache whose entries
+may expire after a time-to-live (TTL).
+
+The cache keeps counters of hits, misses, evictions (entries removed to keep
+the cache within its size bound) and expirations (entries removed because
+their TTL has passed), so that developers can tell whether a cache is
+effective and sized properly.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """A size-bounded LRU cache with optional TTL."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """Initializes an LRU cache.
+
+        Args:
+            max_size (int): The maximum number of entries in the cache. When
+                the cache is full, the least recently used entry is evicted.
+            ttl (float, Optional): The number of seconds after which entries
+                expire. If not specified, entries do not expire.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer.")
+        if ttl != None and ttl <= 0:
+            raise ValueError("ttl must be a positive number.")
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def max_size(self) -> int:
+        """Returns the maximum number of entries in the cache."""
+        return self._max_size
+
+    @property
+    def ttl(self) -> Optional[float]:
+        """Returns the number of seconds after which entries expire."""
+        return self._ttl
+
+    def __len__(self) -> int:
+        """Returns the number of entries (including expired ones that have
+        not been removed yet) in the cache."""
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Gets the value of an entry, and marks it as recently used.
+
+        Args:
+            key (Hashable): The key of the entry.
+            default (Any): The value to return if the entry does not exist
+                or has expired.
+
+        Returns:
+            Any: The value of the entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry == None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at != None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Sets the value of an entry; the least recently used entries are
+        evicted if the cache is full.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value of the entry.
+        """
+        expires_at = None
+        if self._ttl != None:
+            expires_at = time.monotonic() + self._ttl
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        """Deletes an entry (if it exists).
+
+        Args:
+            key (Hashable): The key of the entry.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Deletes all the entries; the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the counters and the size of the cache.
+
+        Returns:
+            Dict[str, int]: The number of hits, misses, evictions and
+                expirations, and the number of entries in the cache.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,138 @@
+"""This module includes the response caching handler for HTTP services.
+
+The caching handler keeps the (serialized) responses of `GET` endpoints in an
+in-process, size-bounded LRU cache (see `LRUCache`), so that identical
+requests within the TTL of an entry are answered without running the
+endpoint, or serializing and encoding its response, again.
+
+The handler is chained before the serialization handler (see the argument
+`handlers` of services and endpoints); it keys the responses on the name of
+the endpoint, the path parameters and the query arguments of the request,
+and, optionally, some headers (by default `Authorization`) and the principal
+(e.g. the user ID) the request is made for (see `KeyedHandler`). For example:
+
+```python
+svc = FlaskService(app=app)
+
+@svc.list(name="list_users",
+          rule="/users",
+          handlers=[CachingHandler(ttl=5, max_size=256)])
+def list_users():
+    ...
+```
+
+Only successful responses with a `str` or `bytes` payload are cached.
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .base import KeyedHandler
+from .lru import LRUCache
+from ..services.http.io import HTTPResponse
+
+
+class CachingHandler(KeyedHandler):
+    """The response caching handler for HTTP services."""
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 5.0,
+        max_size: int = 1024,
+        vary_headers: Optional[List[str]] = None,
+        principal_func: Optional[Callable] = None,
+    ):
+        """Initializes a caching handler.
+
+        Args:
+            ttl (float, Optional): The number of seconds responses are cached
+                for. If set to `None`, responses are cached until they are
+                evicted.
+            max_size (int): The maximum number of cached responses.
+            vary_headers (List[str], Optional): See `KeyedHandler`.
+            principal_func (Callable, Optional): See `KeyedHandler`.
+        """
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+
+        super().__init__(vary_headers=vary_headers, principal_func=principal_func)
+
+    @property
+    def cache(self) -> "LRUCache":
+        """Returns the cache of the handler."""
+        return self._cache
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit, miss, eviction and expiration counters and the
+        size of the cache. See the method `LRUCache.stats`."""
+        return self._cache.stats()
+
+    @staticmethod
+    def _is_cacheable(res: Any) -> bool:
+        """Checks if a response can be cached."""
+        if isinstance(res, HTTPResponse):
+            if res.status_code < 200 or res.status_code >= 300:
+                return False
+            if res.headers != None and type(res.headers) != dict:
+                return False
+            return isinstance(res.data, (str, bytes))
+
+        return isinstance(res, (str, bytes))
+
+    def _lookup(self, args: Tuple, kwargs: Dict) -> Tuple[Optional[Hashable], Any]:
+        """Looks up the cached response for the request being processed. See
+        the method `handle`.
+
+        Returns:
+            Tuple[Hashable, Any]: The cache key (`None` if the request is not
+                cached) and the cached response (`None` on misses).
+        """
+        key = self._get_key(args, kwargs)
+        if key == None:
+            return None, None
+
+        res = self._cache.get(key)
+        if res == None:
+            return key, None
+        return key, self._copy(res)
+
+    def _store(self, key: Optional[Hashable], res: Any):
+        """Caches a response (if it can be cached). See the method `handle`."""
+        if key != None and self._is_cacheable(res):
+            self._cache.set(key, self._copy(res))
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the caching handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        key, res = self._lookup(args, kwargs)
+        if res != None:
+            return res
+
+        res = call_next(*args, **kwargs)
+        self._store(key, res)
+        return res
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the caching handler asynchronously. See the method `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        key, res = self._lookup(args, kwargs)
+        if res != None:
+            return res
+
+        res = await call_next(*args, **kwargs)
+        self._store(key, res)
+        return res
@@ -0,0 +1,65 @@
+"""This module includes the helpers for request deadlines.
+
+A deadline is the point in time (on the monotonic clock, see
+`time.monotonic`) after which the caller of a service no longer waits for
+the response of a request, e.g. because the caller has timed out. The
+foundation handler of each endpoint sets the deadline of the request being
+processed in its context (`ctx["deadline"]`), from the timeout the caller
+specifies (e.g. with the `X-Request-Timeout` header) and the timeout of the
+endpoint, whichever is shorter.
+
+Handlers and endpoints may check how much time is left before calling slow
+dependencies, and pass it on as the timeouts of these calls:
+
+```python
+@svc.get(name="get_user", rule="/users/<int:user_id>", timeout=2)
+def get_user(user_id):
+    check_deadline()
+    return db.get_user(user_id, timeout=time_remaining())
+```
+"""
+
+import time
+from typing import Optional
+
+from .globals import svc_ctx_var
+from .misc.errors import DeadlineExceededError
+
+
+def get_deadline() -> Optional[float]:
+    """Gets the deadline of the request being processed.
+
+    Returns:
+        float: The deadline (see the function `time.monotonic`), or `None`
+            if the request has no deadline (or there is no request being
+            processed).
+    """
+    ctx = svc_ctx_var.get(None)
+    return ctx.get("deadline") if ctx != None else None
+
+
+def time_remaining() -> Optional[float]:
+    """Gets the number of seconds left before the deadline of the request
+    being processed.
+
+    Returns:
+        float: The number of seconds left (0 if the deadline has passed),
+            or `None` if the request has no deadline.
+    """
+    deadline = get_deadline()
+    if deadline == None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check_deadline():
+    """Checks if the deadline of the request being processed has passed.
+
+    Raises:
+        DeadlineExceededError: The deadline has passed. The foundation
+            handler answers the request with a `504 Gateway Timeout`
+            response.
+    """
+    deadline = get_deadline()
+    if deadline != None and time.monotonic() >= deadline:
+        raise DeadlineExceededError("The deadline of the request has passed.")
@@ -3,6 +3,7 @@
 See also `proxy.py`.
 """
 
+from contextvars import ContextVar, Token
 from functools import partial
 from typing import Any, Dict
 
@@ -42,10 +43,88 @@ def look_up_item(dikt: Dict, name: str) -> Any:
     return v
 
 
-svc_ctx = GenericProxy(partial(look_up_attr, ctx=None, name="_svc_ctx"))
+def look_up_ctx_var(var: ContextVar) -> Any:
+    """Looks up the value of a context variable.
+
+    nanopie uses this function to resolve a reference at runtime.
+
+    Args:
+        var (ContextVar): The context variable.
+    """
+    v = var.get(None)
+    if v == None:
+        raise RuntimeError(out_of_context_error)
+    return v
+
+
+def look_up_ctx_item(var: ContextVar, name: str) -> Any:
+    """Looks up an item in the Dict held by a context variable.
+
+    nanopie uses this function to resolve a reference at runtime; it costs
+    a single context variable look-up and a single Dict look-up.
+
+    Args:
+        var (ContextVar): The context variable.
+        name (str): The key associated with the item.
+    """
+    dikt = var.get(None)
+    if dikt == None:
+        raise RuntimeError(out_of_context_error)
+    v = dikt.get(name)
+    if v == None:
+        raise RuntimeError(not_set_error)
+    return v
+
+
+# The context of the request being processed. Transports set it once per
+# request (see `bind_svc_ctx`); as a context variable, it is local to the
+# current thread and to the current asyncio task.
+svc_ctx_var = ContextVar("svc_ctx")
+
+
+def bind_svc_ctx(ctx: Dict) -> Token:
+    """Binds a context to the request being processed.
+
+    Args:
+        ctx (Dict): The context.
+
+    Returns:
+        Token: The token for restoring the previous context (see the
+            function `unbind_svc_ctx`).
+    """
+    return svc_ctx_var.set(ctx)
+
+
+def unbind_svc_ctx(token: Token):
+    """Restores the context prior to the binding of a context.
+
+    Args:
+        token (Token): The token returned by the function `bind_svc_ctx`.
+    """
+    svc_ctx_var.reset(token)
+
+
+def get_svc_ctx() -> Dict:
+    """Gets the context of the request being processed.
+
+    The global proxies (e.g. `request`) resolve their wrapped objects on
+    every access; code on hot paths, such as the built-in handlers, calls
+    this function once per request instead and reads the items (e.g.
+    `ctx["request"]`) from the returned Dict directly.
+
+    Returns:
+        Dict: The context.
+    """
+    ctx = svc_ctx_var.get(None)
+    if ctx == None:
+        raise RuntimeError(out_of_context_error)
+    return ctx
+
+
+svc_ctx = GenericProxy(partial(look_up_ctx_var, var=svc_ctx_var))
 parsed_request = GenericProxy(
-    partial(look_up_item, dikt=svc_ctx, name="parsed_request")
+    partial(look_up_ctx_item, var=svc_ctx_var, name="parsed_request")
 )
-svc = GenericProxy(partial(look_up_item, dikt=svc_ctx, name="svc"))
-endpoint = GenericProxy(partial(look_up_item, dikt=svc_ctx, name="endpoint"))
-request = GenericProxy(partial(look_up_item, dikt=svc_ctx, name="request"))
+svc = GenericProxy(partial(look_up_ctx_item, var=svc_ctx_var, name="svc"))
+endpoint = GenericProxy(partial(look_up_ctx_item, var=svc_ctx_var, name="endpoint"))
+request = GenericProxy(partial(look_up_ctx_item, var=svc_ctx_var, name="request"))
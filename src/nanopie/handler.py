@@ -9,13 +9,149 @@ pass the baton to another handler, and wrap everything up when the chained
 handler(s) finishes processing.
 """
 
-from typing import Callable
+import contextvars
+from functools import lru_cache, partial
+import inspect
+import time
+from typing import Any, Callable, Iterator, Tuple
 
-from .globals import endpoint
+from .deadline import check_deadline
+from .globals import get_svc_ctx
+
+
+async def run_sync(func: Callable, *args, **kwargs) -> Any:
+    """Runs a (blocking) function in the default executor of the running
+    event loop, without blocking the event loop.
+
+    The function runs in a copy of the current context, so that context
+    variables (e.g. the request context) remain available to it.
+
+    Args:
+        func (Callable): The function to run.
+        *args: Positional arguments to pass to the function.
+        **kwargs: Keyword arguments to pass to the function.
+
+    Returns:
+        Any: The return value of the function.
+    """
+    # asyncio is imported here, so that synchronous services do not pay for
+    # importing it; it is always loaded when there is a running event loop.
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(None, partial(ctx.run, func, *args, **kwargs))
+
+
+def supports_async(handler: Callable) -> bool:
+    """Checks if a handler supports asynchronous calls.
+
+    Handlers that override `__call__` (or `handle`) but not `acall` (or
+    `ahandle`), e.g. custom handlers written before asynchronous calls were
+    supported, and plain callables do not; asynchronous transports run them
+    in an executor instead.
+
+    Args:
+        handler (Callable): A handler, or any other callable.
+
+    Returns:
+        bool: True if the handler supports asynchronous calls.
+    """
+    if not isinstance(handler, Handler):
+        return False
+
+    return _overrides_first(type(handler), ("acall", "ahandle"), ("__call__", "handle"))
+
+
+@lru_cache(maxsize=None)
+def _overrides_first(cls: type, methods: Tuple[str], other_methods: Tuple[str]) -> bool:
+    """Checks if a handler class overrides any of the given methods no later
+    than any of the other methods in its method resolution order."""
+    for klass in cls.__mro__:
+        if any(method in klass.__dict__ for method in methods):
+            return True
+        if any(method in klass.__dict__ for method in other_methods):
+            return False
+    return True
+
+
+def compile_chain(handler: Callable, name: str) -> Callable:
+    """Compiles the handler chain of an endpoint.
+
+    Each handler in the chain is bound (with `functools.partial`) to the
+    handler that follows it, so that passing the baton costs no route
+    look-up at all. Handlers that override `__call__` instead of `handle`
+    cannot be bound this way; they are called as they are, and route the
+    rest of the chain themselves.
+
+    Args:
+        handler (Callable): The first handler (entrypoint) of the chain.
+        name (str): The name of the endpoint.
+
+    Returns:
+        Callable: The compiled chain.
+    """
+    if not isinstance(handler, Handler) or not _overrides_first(
+        type(handler), ("handle",), ("__call__",)
+    ):
+        return handler
+
+    next_handler = handler._routes.get(name)  # pylint: disable=protected-access
+    if next_handler == None:
+        call_next = handler._call_next  # pylint: disable=protected-access
+    else:
+        call_next = compile_chain(next_handler, name)
+    return partial(handler.handle, call_next)
+
+
+def walk_chain(handler: Callable, name: str) -> Iterator["Handler"]:
+    """Iterates over the handlers in the handler chain of an endpoint.
+
+    Args:
+        handler (Callable): The first handler (entrypoint) of the chain.
+        name (str): The name of the endpoint.
+
+    Yields:
+        Handler: The handlers in the chain, in order.
+    """
+    while isinstance(handler, Handler):
+        yield handler
+        handler = handler._routes.get(name)  # pylint: disable=protected-access
+
+
+def compile_async_chain(handler: Callable, name: str) -> Callable:
+    """Compiles the handler chain of an endpoint for asynchronous calls.
+
+    See the function `compile_chain`. Handlers that do not support
+    asynchronous calls run in an executor.
+
+    Args:
+        handler (Callable): The first handler (entrypoint) of the chain.
+        name (str): The name of the endpoint.
+
+    Returns:
+        Callable: The compiled chain, which returns an awaitable.
+    """
+    if not supports_async(handler):
+        return partial(run_sync, handler)
+    if not _overrides_first(type(handler), ("ahandle",), ("acall",)):
+        return handler.acall
+
+    next_handler = handler._routes.get(name)  # pylint: disable=protected-access
+    if next_handler == None:
+        call_next = handler._acall_next  # pylint: disable=protected-access
+    else:
+        call_next = compile_async_chain(next_handler, name)
+    return partial(handler.ahandle, call_next)
 
 
 class Handler:
-    """The base class for all handlers."""
+    """The base class for all handlers.
+
+    Subclasses implement their logic in `handle` (and `ahandle`, for
+    asynchronous transports), and pass the baton to the next chained
+    handler by calling the `call_next` callable they receive.
+    """
 
     def __init__(self):
         """Initializes the handler."""
@@ -24,8 +160,10 @@ class Handler:
     def __call__(self, *args, **kwargs):
         """Runs the handler.
 
-        Handlers will look up current endpoint via the endpoint global proxy
-        (see globals.py) and routes to the next chained handler.
+        Handlers will look up current endpoint in the context of the request
+        (see globals.py) and routes to the next chained handler. Services
+        run compiled chains (see the function `compile_chain`) instead,
+        which skip the look-up.
 
         Handlers are transparent; it will pass any argument it receives to
         the next handler.
@@ -34,8 +172,64 @@ class Handler:
             *args: Positional arguments to pass to the next chained handler.
             **kwargs: Keyword arguments to pass to the next chained handler.
         """
+        return self.handle(self._call_next, *args, **kwargs)
+
+    async def acall(self, *args, **kwargs):
+        """Runs the handler asynchronously.
+
+        Asynchronous transports (e.g. `ASGIService`) call this method instead
+        of `__call__`.
+
+        Args:
+            *args: Positional arguments to pass to the next chained handler.
+            **kwargs: Keyword arguments to pass to the next chained handler.
+        """
+        return await self.ahandle(self._acall_next, *args, **kwargs)
+
+    def handle(self, call_next: Callable, *args, **kwargs) -> Any:
+        """Processes a request.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Positional arguments to pass to the next chained handler.
+            **kwargs: Keyword arguments to pass to the next chained handler.
+
+        Returns:
+            Any: Any object.
+        """
+        return call_next(*args, **kwargs)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs) -> Any:
+        """Processes a request asynchronously.
+
+        Subclasses that override `handle` should override this method as
+        well, with the same logic.
+
+        Args:
+            call_next (Callable): The next chained handler, which returns an
+                awaitable.
+            *args: Positional arguments to pass to the next chained handler.
+            **kwargs: Keyword arguments to pass to the next chained handler.
+
+        Returns:
+            Any: Any object.
+        """
+        return await call_next(*args, **kwargs)
+
+    def warmup(self):
+        """Prepares the state the handler would otherwise initialize on the
+        first request, such as loggers, tracer providers, and key material.
+
+        Services call this method on all of their handlers (see the method
+        `RPCService.warmup`) before accepting traffic. By default it does
+        nothing.
+        """
+
+    def _call_next(self, *args, **kwargs) -> Any:
+        """Looks up the route for the current endpoint and runs the next
+        chained handler (if any)."""
         if self._routes:
-            name = endpoint.name
+            name = get_svc_ctx().get("endpoint").name
             if self._routes.get(name):
                 return self._routes[name](
                     *args, **kwargs
@@ -43,6 +237,19 @@ class Handler:
             else:
                 raise RuntimeError("Route is not found.")
 
+    async def _acall_next(self, *args, **kwargs) -> Any:
+        """Looks up the route for the current endpoint and runs the next
+        chained handler (if any) asynchronously."""
+        if self._routes:
+            name = get_svc_ctx().get("endpoint").name
+            handler = self._routes.get(name)
+            if handler:
+                if supports_async(handler):
+                    return await handler.acall(*args, **kwargs)
+                return await run_sync(handler, *args, **kwargs)
+            else:
+                raise RuntimeError("Route is not found.")
+
     def add_route(self, name: str, handler: "Handler"):
         """Specifies a route to a handler.
 
@@ -68,17 +275,61 @@ class SimpleHandler(Handler):
             func (Callable): The function to run.
         """
         self.func = func
+        self._is_coroutine_func = inspect.iscoroutinefunction(func) or (
+            inspect.iscoroutinefunction(getattr(func, "__call__", None))
+        )
         super().__init__()
 
-    def __call__(self, *args, **kwargs):
-        """Runs the handler.
+    def handle(self, call_next: Callable, *args, **kwargs) -> Any:
+        """Runs the function, unless the deadline of the request has passed
+        (see the function `check_deadline`).
 
         Args:
+            call_next (Callable): The next chained handler.
             *args: Positional arguments to pass to the next chained handler.
             **kwargs: Keyword arguments to pass to the next chained handler.
         """
-        res = self.func(*args, **kwargs)
+        check_deadline()
+        # The time spent is recorded for the metrics handler (if any).
+        timings = get_svc_ctx().get("timings")
+        start = time.perf_counter()
+        try:
+            res = self.func(*args, **kwargs)
+        finally:
+            if timings != None:
+                timings["function"] = time.perf_counter() - start
+
+        if res != None:
+            return res
+        else:
+            return call_next(*args, **kwargs)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs) -> Any:
+        """Runs the function asynchronously.
+
+        Coroutine functions (`async def`) are awaited; other functions run in
+        an executor so that they do not block the event loop.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Positional arguments to pass to the next chained handler.
+            **kwargs: Keyword arguments to pass to the next chained handler.
+        """
+        check_deadline()
+        timings = get_svc_ctx().get("timings")
+        start = time.perf_counter()
+        try:
+            if self._is_coroutine_func:
+                res = await self.func(*args, **kwargs)
+            else:
+                res = await run_sync(self.func, *args, **kwargs)
+                if inspect.isawaitable(res):
+                    res = await res
+        finally:
+            if timings != None:
+                timings["function"] = time.perf_counter() - start
+
         if res != None:
             return res
         else:
-            return super().__call__(*args, **kwargs)
+            return await call_next(*args, **kwargs)
@@ -0,0 +1,12 @@
+from ..misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "ConcurrencyLimitHandler": ".concurrency",
+    "MemoryTokenBucketStore": ".rate",
+    "RateLimitHandler": ".rate",
+    "SharedMemoryTokenBucketStore": ".rate",
+    "TokenBucketStore": ".rate",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
@@ -0,0 +1,311 @@
+"""This module includes the concurrency limiting (load shedding) handler.
+
+The concurrency limiting handler caps the number of requests being processed
+at the same time, across all the endpoints it is chained to and, optionally,
+per endpoint. Requests over the limit wait briefly in a bounded queue for a
+slot; requests that do not get one are rejected right away with a
+precomputed `503 Service Unavailable` response and a `Retry-After` header,
+so that the requests admitted keep bounded latencies during spikes.
+
+Chain the handler as an admission handler (see the argument
+`admission_handlers` of services and endpoints), so that rejected requests
+are not authenticated or deserialized:
+
+```python
+limiter = ConcurrencyLimitHandler(limit=64, endpoint_limits={"export": 4})
+svc = WSGIService(admission_handlers=[limiter])
+```
+
+Optionally, with `target_latency`, the limits adapt to the observed latency
+of requests (AIMD): a limit shrinks multiplicatively whenever requests take
+longer than the target, and grows additively (by about one per limit-sized
+round of requests) back to the configured limit otherwise.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..globals import get_svc_ctx
+from ..handler import Handler
+from ..services.http.io import HTTPResponse
+
+# The factor a limit is multiplied by when requests are too slow.
+BACKOFF_RATIO = 0.9
+
+
+class _Limit:
+    """The state of a concurrency limit."""
+
+    __slots__ = ("max_limit", "limit", "in_flight", "decreased_at")
+
+    def __init__(self, limit: int):
+        """Initializes a limit."""
+        if limit < 1:
+            raise ValueError("Concurrency limits must be positive integers.")
+
+        self.max_limit = limit
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.decreased_at = float("-inf")
+
+
+def _wake(future: "asyncio.Future"):
+    """Wakes up a waiting coroutine."""
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimitHandler(Handler):
+    """The concurrency limiting handler."""
+
+    def __init__(
+        self,
+        limit: int = 100,
+        endpoint_limits: Optional[Dict[str, int]] = None,
+        queue_timeout: float = 0.05,
+        max_queue: Optional[int] = None,
+        retry_after: int = 1,
+        target_latency: Optional[float] = None,
+        min_limit: int = 1,
+    ):
+        """Initializes a concurrency limiting handler.
+
+        Args:
+            limit (int): The maximum number of requests processed at the same
+                time, across all the endpoints the handler is chained to.
+            endpoint_limits (Dict[str, int], Optional): The maximum number of
+                requests processed at the same time by specific endpoints,
+                keyed by the names of the endpoints.
+            queue_timeout (float): The maximum number of seconds a request
+                waits for a slot. If set to 0, requests over the limit are
+                rejected right away.
+            max_queue (int, Optional): The maximum number of requests waiting
+                for a slot; requests over it are rejected right away. If not
+                specified, it is the same as `limit`.
+            retry_after (int): The number of seconds clients are asked to wait
+                before retrying rejected requests (the `Retry-After` header).
+            target_latency (float, Optional): The target latency (in seconds)
+                of requests. If specified, the limits adapt to the observed
+                latency of requests (see above), between `min_limit` and the
+                configured limits.
+            min_limit (int): The minimum value of adaptive limits.
+        """
+        self._limit = _Limit(limit)
+        self._endpoint_limits = {
+            name: _Limit(endpoint_limit)
+            for name, endpoint_limit in (endpoint_limits or {}).items()
+        }
+        self._queue_timeout = queue_timeout
+        self._max_queue = limit if max_queue == None else max_queue
+        self._target_latency = target_latency
+        self._min_limit = min_limit
+
+        self._cond = threading.Condition()
+        self._async_waiters = []  # type: List[Tuple]
+        self._waiting = 0
+        self.shed = 0
+
+        self._overloaded_response = HTTPResponse(
+            status_code=503,
+            headers={"Retry-After": str(retry_after)},
+            mime_type="text/plain",
+            data="The service is overloaded. Please retry later.",
+        )
+
+        super().__init__()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of requests being processed and waiting, the
+        current (service-wide) limit, and the number of requests rejected.
+
+        Returns:
+            Dict[str, int]: The counters.
+        """
+        with self._cond:
+            return {
+                "in_flight": self._limit.in_flight,
+                "waiting": self._waiting,
+                "limit": int(self._limit.limit),
+                "shed": self.shed,
+            }
+
+    def _get_limits(self, ctx: Dict) -> Optional[Tuple["_Limit", ...]]:
+        """Gets the limits that apply to the request being processed, or
+        `None` if there are none. Requests admitted already (e.g. operations
+        dispatched by an admitted batch request) do not take another
+        service-wide slot, but are still subject to the limits of their
+        endpoints."""
+        admitted = ctx.get("admitted")
+        endpoint_limit = self._endpoint_limits.get(
+            getattr(ctx.get("endpoint"), "name", None)
+        )
+        if admitted and self in admitted:
+            return (endpoint_limit,) if endpoint_limit else None
+
+        if endpoint_limit:
+            return self._limit, endpoint_limit
+        return (self._limit,)
+
+    @staticmethod
+    def _try_acquire(limits: Tuple["_Limit", ...]) -> bool:
+        """Acquires a slot under all the limits, or none at all; the caller
+        holds the lock."""
+        for limit in limits:
+            if limit.in_flight >= int(limit.limit):
+                return False
+        for limit in limits:
+            limit.in_flight += 1
+        return True
+
+    def _enqueue(self) -> bool:
+        """Adds a request to the queue (if the queue is not full); the caller
+        holds the lock."""
+        if self._queue_timeout <= 0 or self._waiting >= self._max_queue:
+            self.shed += 1
+            return False
+
+        self._waiting += 1
+        return True
+
+    def _admit(self, limits: Tuple["_Limit", ...]) -> bool:
+        """Admits a request, waiting for a slot if necessary. See the method
+        `handle`."""
+        with self._cond:
+            if self._try_acquire(limits):
+                return True
+            if not self._enqueue():
+                return False
+
+            deadline = time.monotonic() + self._queue_timeout
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed += 1
+                        return False
+                    self._cond.wait(remaining)
+                    if self._try_acquire(limits):
+                        return True
+            finally:
+                self._waiting -= 1
+
+    async def _aadmit(self, limits: Tuple["_Limit", ...]) -> bool:
+        """Admits a request asynchronously, waiting for a slot if necessary.
+        See the method `ahandle`."""
+        with self._cond:
+            if self._try_acquire(limits):
+                return True
+            if not self._enqueue():
+                return False
+
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self._queue_timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._cond:
+                        self.shed += 1
+                    return False
+
+                future = loop.create_future()
+                waiter = (loop, future)
+                with self._cond:
+                    if self._try_acquire(limits):
+                        return True
+                    self._async_waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(future, remaining)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._cond:
+                        if waiter in self._async_waiters:
+                            self._async_waiters.remove(waiter)
+        finally:
+            with self._cond:
+                self._waiting -= 1
+
+    def _adapt(self, limit: "_Limit", latency: float):
+        """Adapts a limit to the latency of a request (AIMD); the caller holds
+        the lock."""
+        if self._target_latency == None:
+            return
+
+        if latency > self._target_latency:
+            # Requests finishing around the same time reflect the same
+            # overload; the limit is decreased at most once per target
+            # latency.
+            now = time.monotonic()
+            if now - limit.decreased_at >= self._target_latency:
+                limit.limit = max(self._min_limit, limit.limit * BACKOFF_RATIO)
+                limit.decreased_at = now
+        else:
+            limit.limit = min(limit.max_limit, limit.limit + 1 / limit.limit)
+
+    def _release(self, limits: Tuple["_Limit", ...], latency: float):
+        """Releases the slot of a request, and wakes up the waiting ones."""
+        with self._cond:
+            for limit in limits:
+                limit.in_flight -= 1
+                self._adapt(limit, latency)
+            self._cond.notify_all()
+            async_waiters, self._async_waiters = self._async_waiters, []
+
+        for loop, future in async_waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the concurrency limiting handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        limits = self._get_limits(ctx)
+        if limits == None:
+            return call_next(*args, **kwargs)
+
+        if not self._admit(limits):
+            return self._overloaded_response
+
+        ctx["admitted"] = (ctx.get("admitted") or frozenset()) | {self}
+        start = time.monotonic()
+        try:
+            return call_next(*args, **kwargs)
+        finally:
+            self._release(limits, time.monotonic() - start)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the concurrency limiting handler asynchronously. See the
+        method `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        limits = self._get_limits(ctx)
+        if limits == None:
+            return await call_next(*args, **kwargs)
+
+        if not await self._aadmit(limits):
+            return self._overloaded_response
+
+        ctx["admitted"] = (ctx.get("admitted") or frozenset()) | {self}
+        start = time.monotonic()
+        try:
+            return await call_next(*args, **kwargs)
+        finally:
+            self._release(limits, time.monotonic() - start)
@@ -0,0 +1,271 @@
+"""This module includes the rate limiting handler and the stores for its
+token buckets.
+
+The rate limiting handler limits the rate of requests from each caller of a
+service with a token bucket: every caller has a bucket of `burst` tokens,
+refilled at `rate` tokens per second, and each request takes a token;
+requests from callers whose buckets are empty are rejected with a
+`429 Too Many Requests` response and a `Retry-After` header.
+
+By default, callers are told apart by the principal of their credentials
+(see `Credential.principal`), or, for requests that are not authenticated,
+by their addresses. Chain the handler after the authentication handler,
+e.g. with the argument `handlers` of services and endpoints:
+
+```python
+limiter = RateLimitHandler(rate=10, burst=20)
+svc = WSGIService(authn_handler=authn_handler, handlers=[limiter])
+```
+
+Buckets are kept in the memory of the process (`MemoryTokenBucketStore`) by
+default. With `SharedMemoryTokenBucketStore`, they are kept in a shared
+memory segment instead, so that the worker processes of a pre-forking server
+(see `PreforkServer`) share them, as long as the store is created before the
+workers are forked (e.g. when the service is set up).
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import hashlib
+import math
+import mmap
+import struct
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from ..globals import get_svc_ctx
+from ..handler import Handler
+from ..services.http.io import HTTPResponse
+
+
+class TokenBucketStore(ABC):
+    """The base class for all token bucket stores."""
+
+    @staticmethod
+    def refill(
+        tokens: float, updated_at: float, now: float, rate: float, burst: float
+    ) -> Tuple[bool, float, float]:
+        """Refills a token bucket, and takes a token from it (if any).
+
+        Args:
+            tokens (float): The number of tokens in the bucket.
+            updated_at (float): The time the bucket was last updated at.
+            now (float): The current time.
+            rate (float): The number of tokens added per second.
+            burst (float): The capacity of the bucket.
+
+        Returns:
+            Tuple[bool, float, float]: Whether a token has been taken, the
+                number of tokens left, and the number of seconds until the
+                next token is available (0 if a token has been taken).
+        """
+        tokens = min(burst, max(0.0, tokens + (now - updated_at) * rate))
+        if tokens >= 1:
+            return True, tokens - 1, 0.0
+        return False, tokens, (1 - tokens) / rate
+
+    @abstractmethod
+    def consume(self, key: Hashable, rate: float, burst: float) -> Tuple[bool, float]:
+        """Takes a token from the bucket of a key.
+
+        Args:
+            key (Hashable): The key of the bucket (e.g. the caller).
+            rate (float): The number of tokens added to the bucket per second.
+            burst (float): The capacity of the bucket.
+
+        Returns:
+            Tuple[bool, float]: Whether a token has been taken, and the number
+                of seconds until the next token is available.
+        """
+
+
+class MemoryTokenBucketStore(TokenBucketStore):
+    """The store that keeps token buckets in the memory of the process.
+
+    The store keeps at most `max_keys` buckets; the least recently used
+    buckets are dropped first (and start full if their keys come back).
+    """
+
+    def __init__(self, max_keys: int = 65536):
+        """Initializes an in-process token bucket store.
+
+        Args:
+            max_keys (int): The maximum number of buckets in the store.
+        """
+        self._max_keys = max_keys
+        self._buckets = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+    def consume(self, key: Hashable, rate: float, burst: float) -> Tuple[bool, float]:
+        """See the method `TokenBucketStore.consume`."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            allowed, tokens, wait = self.refill(tokens, updated_at, now, rate, burst)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+class SharedMemoryTokenBucketStore(TokenBucketStore):
+    """The store that keeps token buckets in an (anonymous) shared memory
+    segment, which processes forked after the store is created share.
+
+    The segment is a fixed table of `slots` buckets; a key is hashed to a
+    slot, so that each check takes constant time. Buckets are updated
+    without locks: concurrent requests from the same caller in different
+    processes may occasionally be counted once, and keys sharing a slot
+    reset each other's bucket, so the limits are approximate (lenient) by
+    design.
+    """
+
+    # The layout of a slot: the hash of the key, the number of tokens, and
+    # the time the bucket was last updated at.
+    SLOT = struct.Struct("<Qdd")
+
+    def __init__(self, slots: int = 65536):
+        """Initializes a shared memory token bucket store.
+
+        Args:
+            slots (int): The number of buckets in the segment.
+        """
+        if slots < 1:
+            raise ValueError("slots must be a positive integer.")
+
+        self._slots = slots
+        self._mmap = mmap.mmap(-1, slots * self.SLOT.size)
+
+    @staticmethod
+    def hash_key(key: Hashable) -> int:
+        """Hashes a key; unlike `hash`, the result is the same in all
+        processes. It is never 0, which marks empty slots.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            int: The hash.
+        """
+        digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") | 1
+
+    def consume(self, key: Hashable, rate: float, burst: float) -> Tuple[bool, float]:
+        """See the method `TokenBucketStore.consume`."""
+        key_hash = self.hash_key(key)
+        offset = (key_hash % self._slots) * self.SLOT.size
+        now = time.monotonic()
+
+        stored_hash, tokens, updated_at = self.SLOT.unpack_from(self._mmap, offset)
+        if stored_hash != key_hash:
+            tokens, updated_at = burst, now
+
+        allowed, tokens, wait = self.refill(tokens, updated_at, now, rate, burst)
+        self.SLOT.pack_into(self._mmap, offset, key_hash, tokens, now)
+        return allowed, wait
+
+
+def get_caller() -> Any:
+    """Gets the caller of the request being processed: the principal of its
+    credential (see `Credential.principal`), if the request has been
+    authenticated, or the address of the client otherwise.
+
+    Returns:
+        Any: The caller.
+    """
+    ctx = get_svc_ctx()
+    principal = getattr(ctx.get("credential"), "principal", None)
+    if principal != None:
+        return ("principal", principal)
+    return ("addr", getattr(ctx.get("request"), "remote_addr", None))
+
+
+class RateLimitHandler(Handler):
+    """The rate limiting handler."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        key_func: Optional[Callable] = None,
+        store: Optional["TokenBucketStore"] = None,
+    ):
+        """Initializes a rate limiting handler.
+
+        Args:
+            rate (float): The number of requests per second each caller may
+                make (on average).
+            burst (float, Optional): The number of requests a caller may make
+                at once (the capacity of its bucket). If not specified, it is
+                the same as `rate` (or 1, if `rate` is lower).
+            key_func (Callable, Optional): A function that returns the key of
+                the caller of the request being processed; it is called
+                without arguments. Defaults to `get_caller`.
+            store (TokenBucketStore, Optional): The store for the token
+                buckets. Defaults to a new `MemoryTokenBucketStore`.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be a positive number.")
+
+        self._rate = rate
+        self._burst = burst if burst != None else max(rate, 1.0)
+        self._key_func = key_func or get_caller
+        self._store = store or MemoryTokenBucketStore()
+        self.limited = 0
+
+        super().__init__()
+
+    @property
+    def store(self) -> "TokenBucketStore":
+        """Returns the store for the token buckets."""
+        return self._store
+
+    def _check(self) -> Optional["HTTPResponse"]:
+        """Takes a token for the request being processed; returns a 429 Too
+        Many Requests response if there is none. See the method `handle`."""
+        allowed, wait = self._store.consume(self._key_func(), self._rate, self._burst)
+        if allowed:
+            return None
+
+        self.limited += 1
+        return HTTPResponse(
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            mime_type="text/plain",
+            data="Too many requests. Please retry later.",
+        )
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the rate limiting handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        res = self._check()
+        if res != None:
+            return res
+        return call_next(*args, **kwargs)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the rate limiting handler asynchronously. See the method
+        `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        res = self._check()
+        if res != None:
+            return res
+        return await call_next(*args, **kwargs)
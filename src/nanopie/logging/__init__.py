@@ -1,10 +1,15 @@
-from .base import (
-    LogContext,
-    LogContextExtractor,
-    LoggingHandler,
-    LoggingHandlerModes,
-)
-from .fluentd import FluentdLoggingHandler
-from .formatter import CustomLogRecordFormatter
-from .logstash import LogstashLoggingHandler
-from .stackdriver import StackdriverLoggingHandler
+from ..misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "LogContext": ".base",
+    "LogContextExtractor": ".base",
+    "LoggingHandler": ".base",
+    "LoggingHandlerModes": ".base",
+    "FluentdLoggingHandler": ".fluentd",
+    "CustomLogRecordFormatter": ".formatter",
+    "LogstashLoggingHandler": ".logstash",
+    "StackdriverLoggingHandler": ".stackdriver",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
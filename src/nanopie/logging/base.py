@@ -13,10 +13,10 @@ log the beginning and the end of the processing of a request.
 
 from abc import abstractmethod
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from .formatter import CustomLogRecordFormatter
-from ..globals import endpoint, request
+from ..globals import get_svc_ctx
 from ..handler import Handler
 from ..model import Model
 from ..services.base import Extractor
@@ -159,7 +159,7 @@ class LoggingHandler(Handler):
 
         super().__init__()
 
-    def __call__(self, *args, **kwargs) -> Any:
+    def handle(self, call_next: Callable, *args, **kwargs) -> Any:
         """Runs the handler.
 
         It performs the following tasks:
@@ -170,6 +170,7 @@ class LoggingHandler(Handler):
         4. Log the ending of the span.
 
         Args:
+            call_next (Callable): The next chained handler.
             *args: Arbitrary positional arguments.
             **kwargs: Arbitrary named arguments.
 
@@ -177,19 +178,47 @@ class LoggingHandler(Handler):
             Any: Any object.
         """
         logger = self.default_logger
+        entering, exiting = self._get_span_messages()
 
-        span_name = self._span_name
-        if not span_name:
-            span_name = endpoint.name
+        logger.info(entering)
+        res = call_next(*args, **kwargs)
+        logger.info(exiting)
+        return res
 
-        entering = "Entering span {}.".format(span_name)
-        exiting = "Exiting span {}.".format(span_name)
+    async def ahandle(self, call_next: Callable, *args, **kwargs) -> Any:
+        """Runs the handler asynchronously. See the method `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary named arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        logger = self.default_logger
+        entering, exiting = self._get_span_messages()
 
         logger.info(entering)
-        res = super().__call__(*args, **kwargs)
+        res = await call_next(*args, **kwargs)
         logger.info(exiting)
         return res
 
+    def warmup(self):
+        """Sets up the default logger. See the method `Handler.warmup`."""
+        self.default_logger  # pylint: disable=pointless-statement
+
+    def _get_span_messages(self) -> Tuple[str, str]:
+        """Gets the messages logged at the beginning and the ending of the
+        span."""
+        span_name = self._span_name
+        if not span_name:
+            span_name = get_svc_ctx().get("endpoint").name
+
+        entering = "Entering span {}.".format(span_name)
+        exiting = "Exiting span {}.".format(span_name)
+        return entering, exiting
+
     def get_log_ctx(self) -> "LogContext":
         """Gets the current log context.
 
@@ -197,7 +226,7 @@ class LoggingHandler(Handler):
             LogContext: The current log context.
         """
         if self._log_ctx_extractor:
-            return self._log_ctx_extractor.extract(request=request)
+            return self._log_ctx_extractor.extract(request=get_svc_ctx().get("request"))
         else:
             raise RuntimeError("log_ctx_extractor is not present.")
 
@@ -3,7 +3,7 @@ import logging
 import socket
 from typing import Dict, Optional
 
-from ..globals import request
+from ..globals import get_svc_ctx
 from ..logger import logger as package_logger
 
 
@@ -106,7 +106,9 @@ class CustomLogRecordFormatter(logging.Formatter):
 
         if self._log_ctx_extractor:
             try:
-                log_ctx = self._log_ctx_extractor.extract(request=request)
+                log_ctx = self._log_ctx_extractor.extract(
+                    request=get_svc_ctx().get("request")
+                )
                 log_ctx = log_ctx.to_dikt()
                 for k in log_ctx:
                     dikt[k] = log_ctx[k]
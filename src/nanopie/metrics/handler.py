@@ -0,0 +1,284 @@
+"""This module includes the metrics handler.
+
+The metrics handler records, per endpoint, the number of requests (by
+status), the number of failed requests (by status), and the latency of
+requests, along with the time spent in each stage of processing a request:
+
+* `authentication`: the authentication handler (if any);
+* `deserialization`: parsing and validating the request;
+* `function`: the function of the endpoint;
+* `serialization`: serializing the response.
+
+Chain the handler as the first admission handler (see the argument
+`admission_handlers` of services and endpoints), so that it sees all the
+requests, including those other admission handlers reject, and expose the
+metrics in the Prometheus text format with an endpoint of their own (see
+the method `HTTPService.add_metrics_endpoint`):
+
+```python
+metrics = MetricsHandler()
+svc = WSGIService(admission_handlers=[metrics, limiter])
+svc.add_metrics_endpoint(metrics)
+```
+
+Metrics are kept in the memory of the process (`MemoryMetricsStore`) by
+default; with pre-forking servers, use `SharedMemoryMetricsStore` (created
+before the workers are forked), so that each worker reports the metrics of
+all the workers.
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..deadline import get_deadline
+from ..globals import get_svc_ctx
+from ..handler import Handler
+from ..misc.errors import DeadlineExceededError, ServiceError
+from .store import MemoryMetricsStore, MetricsStore
+
+REQUESTS_METRIC = "nanopie_requests_total"
+ERRORS_METRIC = "nanopie_request_errors_total"
+DURATION_METRIC = "nanopie_request_duration_seconds"
+STAGE_DURATION_METRIC = "nanopie_stage_duration_seconds"
+MEMORY_PEAK_METRIC = "nanopie_request_memory_peak_bytes"
+MEMORY_NET_METRIC = "nanopie_request_memory_net_bytes"
+
+# The help texts and types of the metrics, in the order they are exposed.
+METRICS = (
+    (REQUESTS_METRIC, "The number of requests processed.", "counter"),
+    (ERRORS_METRIC, "The number of requests failed.", "counter"),
+    (DURATION_METRIC, "The latency of requests, in seconds.", "histogram"),
+    (
+        STAGE_DURATION_METRIC,
+        "The time spent in each stage of processing requests, in seconds.",
+        "histogram",
+    ),
+    # The memory metrics are recorded by `MemoryTrackingHandler`, for
+    # sampled requests only.
+    (
+        MEMORY_PEAK_METRIC,
+        "The peak memory allocated by sampled requests, in bytes.",
+        "summary",
+    ),
+    (
+        MEMORY_NET_METRIC,
+        "The memory sampled requests leave allocated, in bytes.",
+        "summary",
+    ),
+)
+
+# The content type of the Prometheus text format.
+METRICS_MIME_TYPE = "text/plain; version=0.0.4"
+
+# The status of requests cancelled before they are processed (e.g. when the
+# client disconnects).
+CANCELLED_STATUS = 499
+
+
+def escape_label_value(value: str) -> str:
+    """Escapes the value of a label for the Prometheus text format.
+
+    Args:
+        value (str): The value.
+
+    Returns:
+        str: The escaped value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(**labels: Any) -> str:
+    """Formats labels for the Prometheus text format.
+
+    Args:
+        **labels: The labels.
+
+    Returns:
+        str: The formatted labels (e.g. `endpoint="get_user",status="200"`).
+    """
+    return ",".join(
+        '{}="{}"'.format(name, escape_label_value(str(value)))
+        for name, value in labels.items()
+    )
+
+
+def format_value(value: float) -> str:
+    """Formats a value for the Prometheus text format."""
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsHandler(Handler):
+    """The metrics handler."""
+
+    def __init__(self, store: Optional["MetricsStore"] = None):
+        """Initializes a metrics handler.
+
+        Args:
+            store (MetricsStore, Optional): The store of the metrics. If not
+                specified, metrics are kept in the memory of the process.
+        """
+        self.store = store or MemoryMetricsStore()
+        # The labels of the series, formatted once.
+        self._labels = {}  # type: Dict[Tuple, str]
+
+        super().__init__()
+
+    def _format_labels(self, **labels: Any) -> str:
+        """Formats (and caches) the labels of a series."""
+        key = tuple(labels.items())
+        formatted = self._labels.get(key)
+        if formatted == None:
+            formatted = self._labels[key] = format_labels(**labels)
+        return formatted
+
+    @staticmethod
+    def get_status(res: Any = None, ex: Optional[BaseException] = None) -> int:
+        """Gets the status of a request from its response, or the exception
+        raised when processing it.
+
+        Args:
+            res (Any): The response.
+            ex (BaseException, Optional): The exception.
+
+        Returns:
+            int: The status code.
+        """
+        if ex == None:
+            return getattr(res, "status_code", 200)
+        if isinstance(ex, DeadlineExceededError):
+            return 504
+        if isinstance(ex, ServiceError) and ex.response:
+            return getattr(ex.response, "status_code", 500)
+        if not isinstance(ex, Exception):
+            # Requests cancelled as their deadlines pass are answered with a
+            # `504 Gateway Timeout` response by the foundation handler.
+            deadline = get_deadline()
+            if deadline != None and time.monotonic() >= deadline:
+                return 504
+            return CANCELLED_STATUS
+        return 500
+
+    def record(self, name: str, status: int, duration: float, timings: Dict):
+        """Records a request.
+
+        Args:
+            name (str): The name of the endpoint.
+            status (int): The status code of the response.
+            duration (float): The latency of the request, in seconds.
+            timings (Dict): The time spent in each stage, in seconds.
+        """
+        store = self.store
+        status_labels = self._format_labels(endpoint=name, status=status)
+        store.observe((REQUESTS_METRIC, status_labels))
+        if status >= 500:
+            store.observe((ERRORS_METRIC, status_labels))
+        store.observe((DURATION_METRIC, self._format_labels(endpoint=name)), duration)
+        for stage, stage_duration in timings.items():
+            labels = self._format_labels(endpoint=name, stage=stage)
+            store.observe((STAGE_DURATION_METRIC, labels), stage_duration)
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the metrics handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        timings = ctx["timings"] = {}
+        res = ex = None
+        start = time.perf_counter()
+        try:
+            res = call_next(*args, **kwargs)
+            return res
+        except BaseException as exc:
+            ex = exc
+            raise
+        finally:
+            self.record(
+                ctx["endpoint"].name,
+                self.get_status(res, ex),
+                time.perf_counter() - start,
+                timings,
+            )
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the metrics handler asynchronously. See the method `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        timings = ctx["timings"] = {}
+        res = ex = None
+        start = time.perf_counter()
+        try:
+            res = await call_next(*args, **kwargs)
+            return res
+        except BaseException as exc:
+            ex = exc
+            raise
+        finally:
+            self.record(
+                ctx["endpoint"].name,
+                self.get_status(res, ex),
+                time.perf_counter() - start,
+                timings,
+            )
+
+    def render(self) -> str:
+        """Renders the metrics in the Prometheus text format.
+
+        Returns:
+            str: The metrics.
+        """
+        series = {}  # type: Dict[str, List[Tuple[str, List[float]]]]
+        for (name, labels), cell in sorted(self.store.collect().items()):
+            series.setdefault(name, []).append((labels, cell))
+
+        buckets = self.store.buckets + (math.inf,)
+        lines = []
+        for name, help_text, metric_type in METRICS:
+            lines.append("# HELP {} {}".format(name, help_text))
+            lines.append("# TYPE {} {}".format(name, metric_type))
+            for labels, cell in series.get(name, ()):
+                if metric_type == "counter":
+                    lines.append(
+                        "{}{{{}}} {}".format(name, labels, format_value(cell[0]))
+                    )
+                    continue
+
+                if metric_type == "histogram":
+                    cumulative = 0.0
+                    for bound, count in zip(buckets, cell[2:]):
+                        cumulative += count
+                        lines.append(
+                            '{}_bucket{{{},le="{}"}} {}'.format(
+                                name,
+                                labels,
+                                format_value(bound),
+                                format_value(cumulative),
+                            )
+                        )
+                lines.append(
+                    "{}_sum{{{}}} {}".format(name, labels, format_value(cell[1]))
+                )
+                lines.append(
+                    "{}_count{{{}}} {}".format(name, labels, format_value(cell[0]))
+                )
+        lines.append("")
+        return "\n".join(lines)
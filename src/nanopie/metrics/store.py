@@ -0,0 +1,354 @@
+"""This module includes the stores for metrics.
+
+A store keeps a set of series, each identified by the name of a metric and
+its labels (e.g. `("nanopie_requests_total", 'endpoint="get_user"')`), and
+accumulates observations into them. Every series is kept as a histogram: an
+observation count, a sum, and a count per bucket; counters use the
+observation count only.
+
+Observations are accumulated per thread without locks, and added up when
+the metrics are collected (e.g. when the `/metrics` endpoint is scraped).
+`MemoryMetricsStore` keeps the series in the memory of the process;
+`SharedMemoryMetricsStore` keeps them in a shared memory segment, so that the
+worker processes of a pre-forking server (see `PreforkServer`) report the
+metrics of all the workers, as long as the store is created before the
+workers are forked (e.g. when the service is set up).
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import weakref
+
+from ..logger import logger
+
+# The default buckets (in seconds) of latency histograms.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsStore(ABC):
+    """The base class for all metrics stores."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initializes a metrics store.
+
+        Args:
+            buckets (Sequence[float]): The upper bounds of the buckets of
+                histograms, in ascending order. An additional bucket
+                (`+Inf`) holds the observations over the last bound.
+        """
+        self.buckets = tuple(sorted(buckets))
+        # The count, the sum, and the count per bucket (including +Inf).
+        self.width = len(self.buckets) + 3
+
+    @abstractmethod
+    def observe(self, key: Tuple[str, str], value: float = 1.0):
+        """Adds an observation to a series.
+
+        Args:
+            key (Tuple[str, str]): The name of the metric, and its labels in
+                the Prometheus text format (e.g. `endpoint="get_user"`).
+            value (float): The observed value (e.g. a latency).
+        """
+
+    @abstractmethod
+    def collect(self) -> Dict[Tuple[str, str], List[float]]:
+        """Collects all the series.
+
+        Returns:
+            Dict[Tuple[str, str], List[float]]: The count, the sum, and the
+                (non-cumulative) count per bucket of each series.
+        """
+
+
+class MemoryMetricsStore(MetricsStore):
+    """The store that keeps metrics in the memory of the process."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initializes an in-process metrics store.
+
+        Args:
+            buckets (Sequence[float]): See `MetricsStore`.
+        """
+        self._local = threading.local()
+        self._shards = []  # type: List[Tuple[threading.Thread, Dict]]
+        self._retired = {}  # type: Dict[Tuple[str, str], List[float]]
+        self._lock = threading.Lock()
+
+        super().__init__(buckets=buckets)
+
+    def _get_shard(self) -> Dict:
+        """Gets the series of the current thread."""
+        shard = getattr(self._local, "shard", None)
+        if shard == None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def observe(self, key: Tuple[str, str], value: float = 1.0):
+        """See the method `MetricsStore.observe`."""
+        shard = self._get_shard()
+        cell = shard.get(key)
+        if cell == None:
+            cell = shard[key] = [0.0] * self.width
+        cell[0] += 1
+        cell[1] += value
+        cell[2 + bisect_left(self.buckets, value)] += 1
+
+    @staticmethod
+    def _merge(series: Dict, shard: Dict):
+        """Adds up the series of a thread."""
+        for key, cell in shard.items():
+            total = series.get(key)
+            if total == None:
+                series[key] = list(cell)
+            else:
+                for i, v in enumerate(cell):
+                    total[i] += v
+
+    def collect(self) -> Dict[Tuple[str, str], List[float]]:
+        """See the method `MetricsStore.collect`."""
+        with self._lock:
+            # The series of threads that have exited are merged once, so that
+            # services that start a thread per request do not keep their
+            # shards.
+            shards = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    shards.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard.copy())
+            self._shards = shards
+
+            series = {key: list(cell) for key, cell in self._retired.items()}
+            for _, shard in shards:
+                self._merge(series, shard.copy())
+        return series
+
+
+class _Region:
+    """The region of a thread in a shared memory metrics store; it is
+    released when the thread exits."""
+
+    __slots__ = ("index", "pid", "__weakref__")
+
+    def __init__(self, index: int, pid: int):
+        """Initializes a region."""
+        self.index = index
+        self.pid = pid
+
+
+class SharedMemoryMetricsStore(MetricsStore):
+    """The store that keeps metrics in an (anonymous) shared memory segment,
+    which processes forked after the store is created share.
+
+    Each thread (of each process) writes to a region of its own, without
+    locks; regions are reused after their threads exit. The series (at most
+    `max_series`) are indexed in a table shared by all the regions, which is
+    only locked when a process sees a series for the first time. Threads
+    that find no free region (at most `max_threads`) write to an overflow
+    region, with a lock.
+    """
+
+    KEY_SIZE = 256
+    HEADER = struct.Struct("<q")
+    KEY_LENGTH = struct.Struct("<H")
+    OWNER = struct.Struct("<q")
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        max_series: int = 1024,
+        max_threads: int = 128,
+    ):
+        """Initializes a shared memory metrics store.
+
+        Args:
+            buckets (Sequence[float]): See `MetricsStore`.
+            max_series (int): The maximum number of series.
+            max_threads (int): The maximum number of regions (threads writing
+                at the same time across all processes).
+        """
+        # multiprocessing is imported here, so that services that do not use
+        # the store do not pay for importing it.
+        import multiprocessing  # pylint: disable=import-outside-toplevel
+
+        super().__init__(buckets=buckets)
+
+        self._max_series = max_series
+        self._max_threads = max_threads
+        self._lock = multiprocessing.Lock()
+
+        # The layout of the segment: the number of series, the keys of the
+        # series, the owners of the regions (0 if never used, the PID of the
+        # owner if used, and the negative PID of the last owner if released),
+        # and the regions, followed by the overflow region.
+        self._keys_offset = self.HEADER.size
+        self._owners_offset = self._keys_offset + max_series * self.KEY_SIZE
+        values_offset = self._owners_offset + max_threads * self.OWNER.size
+        self._region_size = max_series * self.width
+        size = values_offset + (max_threads + 1) * self._region_size * 8
+
+        self._mmap = mmap.mmap(-1, size)
+        self._values = memoryview(self._mmap)[values_offset:].cast("d")
+        self._index = {}  # type: Dict[Tuple[str, str], int]
+        self._local = threading.local()
+        self.dropped = 0
+
+    def _read_key(self, index: int) -> Tuple[str, str]:
+        """Reads the key of a series from the table."""
+        offset = self._keys_offset + index * self.KEY_SIZE
+        (length,) = self.KEY_LENGTH.unpack_from(self._mmap, offset)
+        start = offset + self.KEY_LENGTH.size
+        name, labels = self._mmap[start : start + length].decode("utf-8").split("\0")
+        return name, labels
+
+    def _load_index(self, count: int):
+        """Loads the series added (by any process) to the table; the caller
+        holds the lock."""
+        for index in range(len(self._index), count):
+            self._index[self._read_key(index)] = index
+
+    def _get_series(self, key: Tuple[str, str]) -> Optional[int]:
+        """Gets the index of a series, adding it to the table if necessary.
+
+        Returns:
+            int: The index, or `None` if the table is full (or the key is too
+                long).
+        """
+        index = self._index.get(key)
+        if index != None:
+            return index
+
+        encoded = "\0".join(key).encode("utf-8")
+        if len(encoded) > self.KEY_SIZE - self.KEY_LENGTH.size:
+            self.dropped += 1
+            return None
+
+        with self._lock:
+            (count,) = self.HEADER.unpack_from(self._mmap, 0)
+            self._load_index(count)
+            index = self._index.get(key)
+            if index != None:
+                return index
+            if count >= self._max_series:
+                # The error is logged once, so that it does not flood logs.
+                if not self.dropped:
+                    logger.error(
+                        "The metric series {} is dropped, as the store is "
+                        "full.".format(key)
+                    )
+                self.dropped += 1
+                return None
+
+            offset = self._keys_offset + count * self.KEY_SIZE
+            self.KEY_LENGTH.pack_into(self._mmap, offset, len(encoded))
+            start = offset + self.KEY_LENGTH.size
+            self._mmap[start : start + len(encoded)] = encoded
+            self.HEADER.pack_into(self._mmap, 0, count + 1)
+            self._index[key] = count
+            return count
+
+    def _read_owner(self, index: int) -> int:
+        """Reads the owner of a region."""
+        offset = self._owners_offset + index * self.OWNER.size
+        return self.OWNER.unpack_from(self._mmap, offset)[0]
+
+    def _write_owner(self, index: int, owner: int):
+        """Writes the owner of a region."""
+        offset = self._owners_offset + index * self.OWNER.size
+        self.OWNER.pack_into(self._mmap, offset, owner)
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        """Checks if a process is running."""
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _claim_region(self, pid: int) -> Optional[int]:
+        """Claims a free region for the current thread."""
+        with self._lock:
+            for index in range(self._max_threads):
+                owner = self._read_owner(index)
+                # Regions of processes that have exited are free as well.
+                if owner <= 0 or (owner != pid and not self._is_alive(owner)):
+                    self._write_owner(index, pid)
+                    return index
+        return None
+
+    def _release_region(self, index: int, pid: int):
+        """Releases a region, once its thread has exited."""
+        if os.getpid() != pid:
+            return
+        with self._lock:
+            if self._read_owner(index) == pid:
+                self._write_owner(index, -pid)
+
+    def _get_region(self) -> Optional[int]:
+        """Gets the region of the current thread, or `None` if the thread
+        writes to the overflow region."""
+        region = getattr(self._local, "region", None)
+        pid = os.getpid()
+        # Threads forking a process keep their regions in the parent only.
+        if region == None or region.pid != pid:
+            index = self._claim_region(pid)
+            region = self._local.region = _Region(index, pid)
+            if index != None:
+                weakref.finalize(region, self._release_region, index, pid)
+        return region.index
+
+    def observe(self, key: Tuple[str, str], value: float = 1.0):
+        """See the method `MetricsStore.observe`."""
+        series = self._get_series(key)
+        if series == None:
+            return
+
+        region = self._get_region()
+        if region == None:
+            with self._lock:
+                self._add(self._max_threads, series, value)
+        else:
+            self._add(region, series, value)
+
+    def _add(self, region: int, series: int, value: float):
+        """Adds an observation to a series in a region."""
+        values = self._values
+        base = region * self._region_size + series * self.width
+        values[base] += 1
+        values[base + 1] += value
+        values[base + 2 + bisect_left(self.buckets, value)] += 1
+
+    def collect(self) -> Dict[Tuple[str, str], List[float]]:
+        """See the method `MetricsStore.collect`."""
+        with self._lock:
+            (count,) = self.HEADER.unpack_from(self._mmap, 0)
+            self._load_index(count)
+
+        regions = [
+            index for index in range(self._max_threads) if self._read_owner(index) != 0
+        ]
+        regions.append(self._max_threads)
+
+        width = self.width
+        totals = [0.0] * (count * width)
+        for region in regions:
+            base = region * self._region_size
+            for i, v in enumerate(self._values[base : base + count * width]):
+                if v:
+                    totals[i] += v
+
+        return {
+            key: totals[index * width : (index + 1) * width]
+            for key, index in self._index.items()
+            if index < count and totals[index * width]
+        }
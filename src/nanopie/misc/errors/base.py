@@ -57,3 +57,8 @@ class ValidationError(ServiceError):
 
 class FoundationError(ServiceError):
     """The base class for all foundation handler related exceptions."""
+
+
+class DeadlineExceededError(ServiceError):
+    """The exception for requests whose deadlines have passed (see
+    `nanopie.deadline`)."""
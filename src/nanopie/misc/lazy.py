@@ -0,0 +1,48 @@
+"""This module includes the helper for lazily importing the attributes a
+package exports.
+
+Packages in nanopie export their classes with module-level `__getattr__`
+and `__dir__` functions (PEP 562) instead of importing all of their
+submodules eagerly; a submodule (and the optional dependencies it uses,
+such as the OpenTelemetry SDK or PyJWT) is imported only when one of its
+attributes is first accessed, e.g. with `from nanopie import FlaskService`.
+"""
+
+from importlib import import_module
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def make_lazy_loader(
+    package: str, attrs: Dict[str, str]
+) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """Makes the module-level `__getattr__` and `__dir__` functions for a
+    package.
+
+    Args:
+        package (str): The name of the package.
+        attrs (Dict[str, str]): The attributes the package exports, mapped to
+            the (relative) names of the submodules that define them.
+
+    Returns:
+        Tuple[Callable, Callable]: The `__getattr__` and `__dir__` functions.
+    """
+
+    def __getattr__(name: str) -> object:
+        """Imports an attribute from the submodule that defines it."""
+        module = attrs.get(name)
+        if module == None:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(package, name)
+            )
+
+        value = getattr(import_module(module, package), name)
+        # Later accesses no longer go through this function.
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        """Lists the attributes of the package."""
+        return sorted(set(vars(sys.modules[package])) | set(attrs))
+
+    return __getattr__, __dir__
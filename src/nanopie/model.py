@@ -43,12 +43,37 @@ user.validate() # Will raise an exception
 
 from abc import ABC, abstractmethod
 from functools import partialmethod
-import distutils
 from typing import Any, Dict, List, Optional, Union
 
 from .misc import format_error_message
 from .misc.errors import ModelTypeNotMatchedError, RequiredFieldMissingError
 
+TRUE_VALUES = ("y", "yes", "t", "true", "on", "1")
+FALSE_VALUES = ("n", "no", "f", "false", "off", "0")
+
+
+def str_to_bool(data: Union[str, int, float, bool]) -> bool:
+    """Converts data to a bool value.
+
+    The true values are y, yes, t, true, on and 1; the false values are n, no,
+    f, false, off and 0 (case-insensitive).
+
+    Args:
+        data (Union[str, int, float, bool]): The data to convert.
+
+    Returns:
+        bool: The bool value.
+    """
+    if type(data) == bool:
+        return data
+
+    value = str(data).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError("{} is not a valid bool value.".format(data))
+
 
 class Field(ABC):
     """The base class for all fields.
@@ -253,7 +278,7 @@ class Model(metaclass=ModelMetaCls):
                         if data_type != bool:
                             data = data_type(data)
                         else:
-                            data = distutils.util.strtobool(data)
+                            data = str_to_bool(data)
                     except:
                         pass
                 return data
@@ -274,6 +299,11 @@ class Model(metaclass=ModelMetaCls):
                 message = format_error_message(message=message, data=data, ref=ref)
                 raise RuntimeError(message)
 
+        if case_insensitive:
+            ks_mapping = {}
+            for it in dikt.keys():
+                ks_mapping[it.lower()] = it
+
         obj = cls(skip_validation=True)
         for k in cls._fields:  # pylint: disable=no-member
             mask = "_" + k
@@ -281,10 +311,6 @@ class Model(metaclass=ModelMetaCls):
             if altchar:
                 k = k.replace("_", altchar[0])
             if case_insensitive:
-                ks = list(dikt.keys())
-                ks_mapping = {}
-                for it in ks:
-                    ks_mapping[it.lower()] = it
                 true_k = ks_mapping.get(k.lower())
                 v = helper(dikt.get(true_k), field)
             else:
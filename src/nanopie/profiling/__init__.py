@@ -0,0 +1,11 @@
+from ..misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "EndpointSampler": ".handler",
+    "MemoryTrackingHandler": ".memory",
+    "ProfilingHandler": ".handler",
+    "ProfilingHandlerModes": ".handler",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
@@ -0,0 +1,462 @@
+"""This module includes the profiling handler.
+
+The profiling handler profiles one in every `sample_every` requests to
+selected endpoints (or all endpoints), and aggregates the profiles in memory,
+so that the time spent in production can be broken down without redeploying
+the service with instrumentation. Requests that are not sampled only pay for
+a counter increment.
+
+The handler supports two modes (see `ProfilingHandlerModes`): a statistical
+stack sampler, which exports the profiles as collapsed stacks (the input
+format of flame graph tools, such as `flamegraph.pl` and speedscope), and
+`cProfile`, which exports them in the `pstats` format. Chain it with the
+argument `handlers` of services and endpoints, and export the profiles with
+an endpoint of their own (see the method `HTTPService.add_profiling_endpoint`)
+or on a signal (see the method `ProfilingHandler.dump_on_signal`):
+
+```python
+profiler = ProfilingHandler(sample_every=100, endpoints=["get_user"])
+svc = WSGIService(handlers=[profiler])
+svc.add_profiling_endpoint(profiler, authn_handler=admin_authn_handler)
+```
+"""
+
+import io
+import itertools
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+from ..globals import get_svc_ctx
+from ..handler import Handler
+from ..logger import logger
+
+# The name of the collapsed stack that samples over `max_stacks` are
+# aggregated into.
+OTHER_STACKS = "[other]"
+
+
+class ProfilingHandlerModes:
+    """The modes which profiling handlers use.
+
+    nanopie profiling handlers support two modes:
+    - SAMPLING: Sample the stacks of the threads processing sampled requests
+        every `interval` seconds, with a background thread. The profiles are
+        exported as collapsed stacks. This mode works with both synchronous
+        and asynchronous transports.
+    - CPROFILE: Profile sampled requests with `cProfile`. The profiles are
+        exported in the `pstats` format. This mode only works with
+        synchronous transports, as `cProfile` cannot tell apart the requests
+        an event loop processes at the same time; with asynchronous
+        transports, requests are not profiled.
+    """
+
+    SAMPLING = 1
+    CPROFILE = 2
+    supported_modes = [SAMPLING, CPROFILE]
+
+
+class EndpointSampler:
+    """Samples one in every `sample_every` requests to each selected
+    endpoint; the profiling handlers use it to pick the requests to profile.
+    """
+
+    def __init__(self, sample_every: int, endpoints: Optional[Iterable[str]] = None):
+        """Initializes a sampler.
+
+        Args:
+            sample_every (int): One in every `sample_every` requests to each
+                endpoint is sampled.
+            endpoints (Iterable[str], Optional): The names of the endpoints
+                to sample. If not specified, all endpoints are sampled.
+        """
+        if sample_every < 1:
+            raise ValueError("sample_every must be a positive integer.")
+
+        self._sample_every = sample_every
+        self._endpoints = frozenset(endpoints) if endpoints != None else None
+        self._counters = {}  # type: Dict[str, itertools.count]
+
+    def should_sample(self, name: str) -> bool:
+        """Checks if a request to an endpoint should be sampled.
+
+        Args:
+            name (str): The name of the endpoint.
+
+        Returns:
+            bool: True if the request should be sampled.
+        """
+        if self._endpoints != None and name not in self._endpoints:
+            return False
+
+        counter = self._counters.get(name)
+        if counter == None:
+            counter = self._counters.setdefault(name, itertools.count())
+        return next(counter) % self._sample_every == 0
+
+
+class ProfilingHandler(Handler):
+    """The profiling handler."""
+
+    def __init__(
+        self,
+        sample_every: int = 100,
+        endpoints: Optional[Iterable[str]] = None,
+        mode: int = ProfilingHandlerModes.SAMPLING,
+        interval: float = 0.005,
+        max_stacks: int = 10000,
+    ):
+        """Initializes a profiling handler.
+
+        Args:
+            sample_every (int): The handler profiles one in every
+                `sample_every` requests to each endpoint.
+            endpoints (Iterable[str], Optional): The names of the endpoints
+                to profile. If not specified, all the endpoints the handler
+                is chained to are profiled.
+            mode (int): The mode of the handler. See `ProfilingHandlerModes`.
+            interval (float): The number of seconds between two samples of
+                the stacks, in the `SAMPLING` mode.
+            max_stacks (int): The maximum number of distinct stacks kept, in
+                the `SAMPLING` mode; samples of other stacks are counted as
+                `[other]`.
+        """
+        if mode not in ProfilingHandlerModes.supported_modes:
+            raise ValueError("The mode is not supported.")
+
+        self._sampler = EndpointSampler(sample_every, endpoints=endpoints)
+        self.mode = mode
+        self._interval = interval
+        self._max_stacks = max_stacks
+
+        self._lock = threading.Lock()
+        self.sampled = 0
+
+        # The state of the SAMPLING mode: the requests being profiled (keyed
+        # by a token), the counts of the collapsed stacks, and the sampler.
+        self._active = {}  # type: Dict[object, Tuple[int, str, object]]
+        self._stacks = {}  # type: Dict[str, int]
+        self._wakeup = threading.Event()
+        self._sampler_pid = None
+
+        # The state of the CPROFILE mode: the statistics of each endpoint.
+        self._stats = {}  # type: Dict[str, "pstats.Stats"]
+
+        # The pipe signal handlers request dumps through (see the method
+        # `dump_on_signal`), and the directory of the dumps.
+        self._dump_pipe = None  # type: Optional[Tuple[int, int]]
+        self._dump_directory = ""
+
+        super().__init__()
+
+    def _ensure_sampler(self):
+        """Starts the sampler thread on first use (in each process, so that
+        the worker processes of pre-forking servers get their own)."""
+        pid = os.getpid()
+        if self._sampler_pid == pid:
+            return
+        with self._lock:
+            if self._sampler_pid != pid:
+                self._wakeup = threading.Event()
+                thread = threading.Thread(
+                    target=self._sample_stacks, name="nanopie-profiler", daemon=True
+                )
+                thread.start()
+                self._sampler_pid = pid
+
+    def _start_sampling(self, name: str) -> object:
+        """Registers the request being processed with the sampler."""
+        self._ensure_sampler()
+        token = object()
+        # Stacks are collapsed up to the frame of the caller, i.e. the
+        # handler itself.
+        frame = sys._getframe(1)  # pylint: disable=protected-access
+        with self._lock:
+            self.sampled += 1
+            self._active[token] = (threading.get_ident(), name, frame)
+            self._wakeup.set()
+        return token
+
+    def _stop_sampling(self, token: object):
+        """Unregisters a request from the sampler."""
+        with self._lock:
+            self._active.pop(token, None)
+
+    def _sample_stacks(self):
+        """Samples the stacks of the threads processing sampled requests,
+        every `interval` seconds while there are any."""
+        while True:
+            self._wakeup.wait()
+            time.sleep(self._interval)
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._wakeup.clear()
+                    continue
+
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            for thread_id, name, stop in active:
+                stack = self._collapse(frames.get(thread_id), stop)
+                # The handler frame is not in the stack of the thread when
+                # another coroutine runs on the event loop.
+                if stack == None:
+                    continue
+                stack = ";".join([name] + stack)
+                with self._lock:
+                    if stack not in self._stacks and (
+                        len(self._stacks) >= self._max_stacks
+                    ):
+                        stack = "{};{}".format(name, OTHER_STACKS)
+                    self._stacks[stack] = self._stacks.get(stack, 0) + 1
+
+    @staticmethod
+    def _collapse(frame, stop) -> Optional[list]:
+        """Collapses a stack, from the frame after `stop` to `frame`."""
+        stack = []
+        while frame != None:
+            if frame is stop:
+                stack.reverse()
+                return stack
+            code = frame.f_code
+            stack.append("{}:{}".format(code.co_filename, code.co_name))
+            frame = frame.f_back
+        return None
+
+    def _record_profile(self, name: str, profile: "cProfile.Profile"):
+        """Adds the profile of a request to the statistics of its endpoint."""
+        import pstats  # pylint: disable=import-outside-toplevel
+
+        stats = pstats.Stats(profile)
+        with self._lock:
+            self.sampled += 1
+            if name in self._stats:
+                self._stats[name].add(stats)
+            else:
+                self._stats[name] = stats
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the profiling handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        name = get_svc_ctx()["endpoint"].name
+        if not self._sampler.should_sample(name):
+            return call_next(*args, **kwargs)
+
+        if self.mode == ProfilingHandlerModes.SAMPLING:
+            token = self._start_sampling(name)
+            try:
+                return call_next(*args, **kwargs)
+            finally:
+                self._stop_sampling(token)
+
+        # cProfile is imported here, so that services that do not use the
+        # mode do not pay for importing it.
+        import cProfile  # pylint: disable=import-outside-toplevel
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active in the thread.
+            return call_next(*args, **kwargs)
+        try:
+            return call_next(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._record_profile(name, profile)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the profiling handler asynchronously. See the method `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        if self.mode != ProfilingHandlerModes.SAMPLING:
+            return await call_next(*args, **kwargs)
+
+        name = get_svc_ctx()["endpoint"].name
+        if not self._sampler.should_sample(name):
+            return await call_next(*args, **kwargs)
+
+        token = self._start_sampling(name)
+        try:
+            return await call_next(*args, **kwargs)
+        finally:
+            self._stop_sampling(token)
+
+    def collapsed_stacks(self) -> str:
+        """Exports the profiles of the `SAMPLING` mode as collapsed stacks.
+
+        Returns:
+            str: One stack per line, starting with the name of the endpoint,
+                followed by the number of samples of the stack.
+        """
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return "".join("{} {}\n".format(stack, count) for stack, count in stacks)
+
+    def stats(self, endpoint: Optional[str] = None) -> Optional["pstats.Stats"]:
+        """Exports the profiles of the `CPROFILE` mode.
+
+        Args:
+            endpoint (str, Optional): The name of an endpoint. If not
+                specified, the profiles of all endpoints are merged.
+
+        Returns:
+            pstats.Stats: The statistics, or `None` if no request has been
+                profiled.
+        """
+        import pstats  # pylint: disable=import-outside-toplevel
+
+        with self._lock:
+            if endpoint != None:
+                profiles = [self._stats[endpoint]] if endpoint in self._stats else []
+            else:
+                profiles = list(self._stats.values())
+
+            if not profiles:
+                return None
+            # A new object is returned, so that callers may sort and print it
+            # without affecting the statistics kept.
+            stats = pstats.Stats(stream=io.StringIO())
+            stats.add(*profiles)
+        return stats
+
+    def dump(
+        self, output_format: str = "collapsed", endpoint: Optional[str] = None
+    ) -> Union[str, bytes]:
+        """Exports the profiles.
+
+        Args:
+            output_format (str): `collapsed` for collapsed stacks (in the
+                `SAMPLING` mode), or `pstats` (the format of the method
+                `pstats.Stats.dump_stats`) or `text` (the report of the method
+                `pstats.Stats.print_stats`, sorted by cumulative time) in the
+                `CPROFILE` mode.
+            endpoint (str, Optional): The name of an endpoint, in the
+                `CPROFILE` mode. See the method `stats`.
+
+        Returns:
+            Union[str, bytes]: The profiles.
+        """
+        if output_format == "collapsed":
+            return self.collapsed_stacks()
+        if output_format not in ("pstats", "text"):
+            raise ValueError("The format is not supported.")
+
+        stats = self.stats(endpoint=endpoint)
+        if output_format == "pstats":
+            return marshal.dumps(stats.stats if stats != None else {})
+        if stats == None:
+            return ""
+        stats.sort_stats("cumulative").print_stats()
+        return stats.stream.getvalue()
+
+    def reset(self):
+        """Discards all the profiles."""
+        with self._lock:
+            self._stacks = {}
+            self._stats = {}
+            self.sampled = 0
+
+    def dump_on_signal(self, signum: Optional[int] = None, directory: str = ""):
+        """Writes the profiles to a file whenever the process receives a
+        signal; each process (e.g. each worker process of a pre-forking
+        server) writes to a file of its own, `nanopie-profile-<PID>.txt`
+        (collapsed stacks) or `nanopie-profile-<PID>.pstats`.
+
+        The signal handler must be installed from the main thread, before
+        the workers of pre-forking servers are forked. It does not write the
+        profiles itself (the main thread may hold the lock of the handler
+        when the signal arrives); it wakes up a background thread of the
+        process, which does.
+
+        Args:
+            signum (int, Optional): The signal. Defaults to `SIGUSR2`.
+            directory (str): The directory of the files. Defaults to the
+                temporary directory (see the function `tempfile.gettempdir`).
+        """
+        # signal is imported here, so that services that do not dump profiles
+        # on signals do not pay for importing it.
+        import signal  # pylint: disable=import-outside-toplevel
+
+        self._dump_directory = directory
+        if self._dump_pipe == None:
+            self._start_dump_writer()
+            # Threads do not survive forks; each worker process of a
+            # pre-forking server starts a writer (and a pipe) of its own.
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=self._start_dump_writer)
+
+        # Signal handlers run on the main thread, between any two bytecode
+        # instructions, possibly while the thread holds the lock of the
+        # handler; they only wake up the writer thread, which writes the
+        # profiles.
+        def request_dump(signum, frame):  # pylint: disable=unused-argument
+            try:
+                os.write(self._dump_pipe[1], b"\0")
+            except OSError:
+                pass
+
+        signal.signal(signum or signal.SIGUSR2, request_dump)
+
+    def _start_dump_writer(self):
+        """Starts the thread that writes the profiles when the process
+        receives a signal. See the method `dump_on_signal`."""
+        if self._dump_pipe != None:
+            # The pipe of the parent process, inherited by a forked process.
+            for fd in self._dump_pipe:
+                os.close(fd)
+        self._dump_pipe = read_fd, _ = os.pipe()
+
+        def write_profiles():
+            while os.read(read_fd, 64):
+                try:
+                    self.write(directory=self._dump_directory)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("The profiles cannot be written.")
+
+        thread = threading.Thread(
+            target=write_profiles, name="nanopie-profile-writer", daemon=True
+        )
+        thread.start()
+
+    def write(self, directory: str = "") -> str:
+        """Writes the profiles of the process to a file. See the method
+        `dump_on_signal`.
+
+        Args:
+            directory (str): The directory of the file.
+
+        Returns:
+            str: The path to the file.
+        """
+        if self.mode == ProfilingHandlerModes.SAMPLING:
+            extension, data = "txt", self.dump("collapsed").encode("utf-8")
+        else:
+            extension, data = "pstats", self.dump("pstats")
+
+        path = os.path.join(
+            directory or tempfile.gettempdir(),
+            "nanopie-profile-{}.{}".format(os.getpid(), extension),
+        )
+        with open(path, "wb") as f:
+            f.write(data)
+        logger.info("The profiles are written to {}.".format(path))
+        return path
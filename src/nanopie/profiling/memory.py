@@ -0,0 +1,338 @@
+"""This module includes the memory tracking handler.
+
+The memory tracking handler traces the memory allocations (with
+`tracemalloc`) of one in every `sample_every` requests to selected endpoints
+(or all endpoints), and attributes to each endpoint the peak memory
+allocated while processing a request, the memory the request leaves
+allocated (e.g. the response), and the top allocation sites. Allocations are
+only traced while a sampled request is processed, so that requests that are
+not sampled only pay for a counter increment, and the handler can stay on at
+a low sampling rate:
+
+```python
+memory_tracker = MemoryTrackingHandler(sample_every=1000, metrics_handler=metrics)
+svc = WSGIService(admission_handlers=[metrics], handlers=[memory_tracker])
+svc.add_profiling_endpoint(memory_tracker, name="memory", rule="/memory")
+```
+
+The memory of each sampled request is also recorded as attributes of the
+current span (`memory.peak_bytes` and `memory.net_bytes`), when the handler
+is chained after a tracing handler, and as metrics, when a metrics handler
+is specified.
+
+`tracemalloc` traces the allocations of all the threads of a process; one
+request is sampled at a time, and the allocations other threads (or, with
+asynchronous transports, other coroutines) make while it is processed are
+attributed to it as well. The figures are most accurate at low concurrency.
+"""
+
+import json
+import sys
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+from ..globals import get_svc_ctx
+from ..handler import Handler
+from ..metrics.handler import MEMORY_NET_METRIC, MEMORY_PEAK_METRIC, format_labels
+from .handler import EndpointSampler
+
+
+class _EndpointMemory:
+    """The memory statistics of an endpoint."""
+
+    __slots__ = ("samples", "peak_bytes", "max_peak_bytes", "net_bytes", "sites")
+
+    def __init__(self):
+        """Initializes the statistics."""
+        self.samples = 0
+        self.peak_bytes = 0
+        self.max_peak_bytes = 0
+        self.net_bytes = 0
+        # The allocation sites, keyed by `<file>:<line>`, with the bytes
+        # (and number of blocks) they leave allocated, summed over samples.
+        self.sites = {}  # type: Dict[str, list]
+
+
+class MemoryTrackingHandler(Handler):
+    """The memory tracking handler."""
+
+    def __init__(
+        self,
+        sample_every: int = 1000,
+        endpoints: Optional[Iterable[str]] = None,
+        top: int = 10,
+        nframes: int = 1,
+        metrics_handler: Optional["MetricsHandler"] = None,
+    ):
+        """Initializes a memory tracking handler.
+
+        Args:
+            sample_every (int): The handler traces one in every
+                `sample_every` requests to each endpoint (unless another
+                request is being traced).
+            endpoints (Iterable[str], Optional): The names of the endpoints
+                to trace. If not specified, all the endpoints the handler is
+                chained to are traced.
+            top (int): The number of allocation sites of each sampled request
+                kept.
+            nframes (int): The number of frames `tracemalloc` keeps for each
+                allocation. Allocation sites are told apart by their last
+                frame only.
+            metrics_handler (MetricsHandler, Optional): The metrics handler to
+                record the memory of sampled requests with.
+        """
+        self._sampler = EndpointSampler(sample_every, endpoints=endpoints)
+        self._top = top
+        self._nframes = nframes
+        self._metrics_handler = metrics_handler
+
+        self._lock = threading.Lock()
+        self._tracking = False
+        self._memory = {}  # type: Dict[str, _EndpointMemory]
+        self.sampled = 0
+
+        super().__init__()
+
+    def _start_tracking(self, name: str) -> Optional[Tuple[bool, bool, int]]:
+        """Starts tracing allocations for the request being processed.
+
+        Returns:
+            Tuple[bool, bool, int]: Whether tracing has been started by the
+                handler, whether the peak memory has been reset, and the
+                memory allocated before the request; or `None` if another
+                request is being traced.
+        """
+        if not self._sampler.should_sample(name):
+            return None
+        with self._lock:
+            if self._tracking:
+                return None
+            self._tracking = True
+
+        started = False
+        try:
+            # tracemalloc is imported here, so that services that do not
+            # sample requests do not pay for importing it.
+            import tracemalloc  # pylint: disable=import-outside-toplevel
+
+            # Tracing may have been started by others (e.g. with the
+            # environment variable PYTHONTRACEMALLOC); it is then left on.
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(self._nframes)
+            # The peak is reset when tracing starts; otherwise, it can only be
+            # reset with Python 3.9 and later.
+            peak_reset = started
+            if not started and hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+                peak_reset = True
+            return started, peak_reset, tracemalloc.get_traced_memory()[0]
+        except BaseException:
+            self._reset(started)
+            raise
+
+    def _reset(self, started: bool):
+        """Stops tracing allocations (if tracing has been started by the
+        handler), so that other requests can be sampled."""
+        try:
+            if started:
+                import tracemalloc  # pylint: disable=import-outside-toplevel
+
+                tracemalloc.stop()
+        finally:
+            with self._lock:
+                self._tracking = False
+
+    def _stop_tracking(self, name: str, state: Tuple[bool, bool, int]):
+        """Stops tracing allocations, and records the memory of the request
+        being processed."""
+        import tracemalloc  # pylint: disable=import-outside-toplevel
+
+        started, peak_reset, baseline = state
+        try:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                ]
+            )
+        finally:
+            self._reset(started)
+
+        # Without a reset, the peak may predate the request; the memory the
+        # request leaves allocated is used instead, as a lower bound.
+        if not peak_reset:
+            peak = max(current, baseline)
+        peak_bytes = max(0, peak - baseline)
+        net_bytes = current - baseline
+        sites = [
+            (
+                "{}:{}".format(stat.traceback[-1].filename, stat.traceback[-1].lineno),
+                stat.size,
+                stat.count,
+            )
+            for stat in snapshot.statistics("lineno")[: self._top]
+        ]
+        self._record(name, peak_bytes, net_bytes, sites)
+
+    def _record(self, name: str, peak_bytes: int, net_bytes: int, sites: list):
+        """Records the memory of a sampled request."""
+        with self._lock:
+            self.sampled += 1
+            memory = self._memory.get(name)
+            if memory == None:
+                memory = self._memory[name] = _EndpointMemory()
+            memory.samples += 1
+            memory.peak_bytes += peak_bytes
+            memory.max_peak_bytes = max(memory.max_peak_bytes, peak_bytes)
+            memory.net_bytes += net_bytes
+            for site, size, count in sites:
+                totals = memory.sites.setdefault(site, [0, 0])
+                totals[0] += size
+                totals[1] += count
+
+        if self._metrics_handler != None:
+            labels = format_labels(endpoint=name)
+            store = self._metrics_handler.store
+            store.observe((MEMORY_PEAK_METRIC, labels), peak_bytes)
+            store.observe((MEMORY_NET_METRIC, labels), net_bytes)
+
+        # OpenTelemetry is only used if a tracing handler has imported it.
+        trace = sys.modules.get("opentelemetry.trace")
+        if trace != None:
+            span = trace.get_current_span()
+            if span != None:
+                span.set_attribute("memory.peak_bytes", peak_bytes)
+                span.set_attribute("memory.net_bytes", net_bytes)
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the memory tracking handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        name = get_svc_ctx()["endpoint"].name
+        state = self._start_tracking(name)
+        if state == None:
+            return call_next(*args, **kwargs)
+
+        # The response is kept until the allocations have been recorded, so
+        # that they include it.
+        try:
+            return call_next(*args, **kwargs)
+        finally:
+            self._stop_tracking(name, state)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the memory tracking handler asynchronously. See the method
+        `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        name = get_svc_ctx()["endpoint"].name
+        state = self._start_tracking(name)
+        if state == None:
+            return await call_next(*args, **kwargs)
+
+        try:
+            return await call_next(*args, **kwargs)
+        finally:
+            self._stop_tracking(name, state)
+
+    def report(self, endpoint: Optional[str] = None, limit: int = 10) -> Dict:
+        """Reports the memory of the sampled requests to each endpoint.
+
+        Args:
+            endpoint (str, Optional): The name of an endpoint. If not
+                specified, all the endpoints are reported.
+            limit (int): The number of allocation sites reported for each
+                endpoint.
+
+        Returns:
+            Dict: For each endpoint, the number of sampled requests, the
+                average and the maximum peak memory they allocated, the
+                average memory they left allocated, and the top allocation
+                sites (with the average memory, and number of blocks, they
+                left allocated).
+        """
+        report = {}
+        with self._lock:
+            for name, memory in sorted(self._memory.items()):
+                if endpoint != None and name != endpoint:
+                    continue
+                sites = sorted(
+                    memory.sites.items(), key=lambda site: site[1][0], reverse=True
+                )
+                report[name] = {
+                    "samples": memory.samples,
+                    "avg_peak_bytes": memory.peak_bytes // memory.samples,
+                    "max_peak_bytes": memory.max_peak_bytes,
+                    "avg_net_bytes": memory.net_bytes // memory.samples,
+                    "top_sites": [
+                        {
+                            "site": site,
+                            "avg_bytes": size // memory.samples,
+                            "avg_blocks": count // memory.samples,
+                        }
+                        for site, (size, count) in sites[:limit]
+                    ],
+                }
+        return report
+
+    def dump(
+        self, output_format: str = "text", endpoint: Optional[str] = None
+    ) -> Union[str, bytes]:
+        """Exports the report (see the method `report`); the handler can be
+        exposed with a profiling endpoint (see the method
+        `HTTPService.add_profiling_endpoint`).
+
+        Args:
+            output_format (str): `text` or `json`.
+            endpoint (str, Optional): The name of an endpoint.
+
+        Returns:
+            str: The report.
+        """
+        report = self.report(endpoint=endpoint)
+        if output_format == "json":
+            return json.dumps(report)
+        if output_format != "text":
+            raise ValueError("The format is not supported.")
+
+        lines = []
+        for name, memory in report.items():
+            lines.append(
+                "{}: {} samples, peak {} bytes on average ({} at most), "
+                "{} bytes left allocated on average".format(
+                    name,
+                    memory["samples"],
+                    memory["avg_peak_bytes"],
+                    memory["max_peak_bytes"],
+                    memory["avg_net_bytes"],
+                )
+            )
+            for site in memory["top_sites"]:
+                lines.append(
+                    "    {}: {} bytes in {} blocks on average".format(
+                        site["site"], site["avg_bytes"], site["avg_blocks"]
+                    )
+                )
+        return "".join(line + "\n" for line in lines)
+
+    def reset(self):
+        """Discards all the statistics."""
+        with self._lock:
+            self._memory = {}
+            self.sampled = 0
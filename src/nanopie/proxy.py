@@ -8,6 +8,10 @@ information, see `globals.py`.
 
 The proxies work in the same way as the proxies (request, g, etc.) in
 Flask and quart.
+
+A proxy resolves its wrapped object on every access. Code that accesses a
+proxy many times (e.g. in a loop) may resolve it once with the function
+`resolve` and use the wrapped object directly.
 """
 
 import copy
@@ -75,10 +79,11 @@ class GenericProxy:
 
     def __getattr__(self, name: str) -> Any:
         """Calls the __getattr__ magic method of the wrapped object."""
+        wrapped = object.__getattribute__(self, "_proxy_func")()
         if name == "__members":
-            return dir(self.wrapped)
+            return dir(wrapped)
 
-        return object.__getattribute__(self.wrapped, name)
+        return object.__getattribute__(wrapped, name)
 
     def __setitem__(self, key: Any, value: Any) -> Any:
         """Calls the __setitem__ magic method of the wrapped object."""
@@ -148,3 +153,17 @@ class GenericProxy:
     __copy__ = lambda x: copy.copy(x.wrapped)
     __deepcopy__ = lambda x, memo: copy.deepcopy(x.wrapped, memo)
     __await__ = lambda x: x.wrapped.__await__()
+
+
+def resolve(obj: Any) -> Any:
+    """Resolves a proxy into its wrapped object.
+
+    Args:
+        obj (Any): A proxy, or any other object.
+
+    Returns:
+        Any: The wrapped object if obj is a proxy; otherwise obj itself.
+    """
+    if isinstance(obj, GenericProxy):
+        return object.__getattribute__(obj, "_proxy_func")()
+    return obj
@@ -1,3 +1,11 @@
-from .helpers import JSONSerializationHelper
-from .base import SerializationHandler
-from .http import HTTPSerializationHandler
+from ..misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "ArrowSerializationHelper": ".helpers",
+    "JSONSerializationHelper": ".helpers",
+    "SerializationHandler": ".base",
+    "HTTPSerializationHandler": ".http",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
@@ -9,7 +9,7 @@ different serialization formats.
 """
 
 from abc import abstractmethod
-from typing import Any
+from typing import Any, Callable
 
 from ..handler import Handler
 
@@ -29,14 +29,15 @@ class SerializationHandler(Handler):
         super().__init__()
 
     @abstractmethod
-    def __call__(self, *args, **kwargs) -> Any:
+    def handle(self, call_next: Callable, *args, **kwargs) -> Any:
         """Runs the serialization handler.
 
         Args:
+            call_next (Callable): The next chained handler.
             *args: Arbitrary positional arguments.
             **kwargs: Arbitrary named arguments.
 
         Returns:
             Any: Any object.
         """
-        return super().__call__(*args, **kwargs)
+        return call_next(*args, **kwargs)
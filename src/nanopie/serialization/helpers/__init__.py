@@ -1,2 +1,10 @@
-from .base import SerializationHelper
-from .json import JSONSerializationHelper
+from ...misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "SerializationHelper": ".base",
+    "JSONSerializationHelper": ".json",
+    "ArrowSerializationHelper": ".arrow",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
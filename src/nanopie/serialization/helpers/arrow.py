@@ -0,0 +1,260 @@
+"""This module includes the Apache Arrow serialization helper.
+
+The helper uses the Arrow IPC streaming format
+(https://arrow.apache.org/docs/format/Columnar.html#ipc-streaming-format).
+Lists of models are converted column by column into record batches, using
+an Arrow schema derived from the fields of the model, so that clients
+(e.g. pandas, Polars) can load the results without parsing them row by row.
+The record batches are streamed: each is converted and written to the
+response only once the previous one has been sent.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import pyarrow as pa
+
+    PYARROW_INSTALLED = True
+except ImportError:
+    PYARROW_INSTALLED = False
+
+from .base import SerializationHelper
+from ...fields import (
+    ArrayField,
+    BoolField,
+    FloatField,
+    IntField,
+    ObjectField,
+    StringField,
+)
+from ...misc import format_error_message
+from ...model import Model
+
+
+class _ChunkSink:
+    """A write-only file-like object that keeps the chunks of an IPC stream
+    until they are taken (see the method `take`)."""
+
+    __slots__ = ("_chunks", "closed")
+
+    def __init__(self):
+        """Initializes a chunk sink."""
+        self._chunks = []
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        """Writes (copies) a chunk."""
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Does nothing; chunks are kept until they are taken."""
+
+    def close(self):
+        """Closes the sink."""
+        self.closed = True
+
+    def take(self) -> bytes:
+        """Takes the chunks written since the last call."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ArrowSerializationHelper(SerializationHelper):
+    """The Apache Arrow (IPC streaming format) serialization helper."""
+
+    def __init__(self, batch_size: int = 65536):
+        """Initializes an Arrow serialization helper.
+
+        Args:
+            batch_size (int): The maximum number of rows in each record batch
+                written to the IPC stream.
+        """
+        if not PYARROW_INSTALLED:
+            raise ImportError(
+                "The pyarrow (https://pypi.org/project/pyarrow/)"
+                "package is required to use the Arrow format. To "
+                "install this package, run `pip install pyarrow`."
+            )
+
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer.")
+
+        self._batch_size = batch_size
+        self._schemas = {}
+
+    @property
+    def mime_type(self) -> str:
+        """Returns the MIME type associated with the Arrow IPC streaming format."""
+        return "application/vnd.apache.arrow.stream"
+
+    @property
+    def binary(self) -> bool:
+        """Returns True as Arrow is a binary format."""
+        return True
+
+    def get_schema(self, model_cls: "ModelMetaCls") -> "pa.Schema":
+        """Gets the Arrow schema derived from the fields of a model.
+
+        Schemas are cached per model.
+
+        Args:
+            model_cls (ModelMetaCls): A model.
+
+        Returns:
+            pa.Schema: The Arrow schema.
+        """
+        schema = self._schemas.get(model_cls)
+        if schema == None:
+            schema = pa.schema(
+                [
+                    pa.field(
+                        name,
+                        self._get_arrow_type(field),
+                        nullable=not getattr(field, "required", False),
+                    )
+                    for name, field in model_cls._fields.items()
+                ]
+            )
+            self._schemas[model_cls] = schema
+
+        return schema
+
+    def warmup(self, model_cls: "ModelMetaCls"):
+        """Builds the Arrow schema of a model. See the method `get_schema`."""
+        self.get_schema(model_cls)
+
+    def _get_arrow_type(self, field: "Field") -> "pa.DataType":
+        """Maps a field to an Arrow data type.
+
+        Args:
+            field (Field): A field.
+
+        Returns:
+            pa.DataType: The Arrow data type.
+        """
+        if isinstance(field, StringField):
+            return pa.string()
+        elif isinstance(field, IntField):
+            return pa.int64()
+        elif isinstance(field, FloatField):
+            return pa.float64()
+        elif isinstance(field, BoolField):
+            return pa.bool_()
+        elif isinstance(field, ArrayField):
+            return pa.list_(self._get_arrow_type(field.item_field))
+        elif isinstance(field, ObjectField):
+            return pa.struct(list(self.get_schema(field.model)))
+        else:
+            message = "The field cannot be mapped to an Arrow data type."
+            message = format_error_message(message=message, field=field)
+            raise ValueError(message)
+
+    @staticmethod
+    def _contains_models(field: "Field") -> bool:
+        """Returns True if the values of a field may include models."""
+        if isinstance(field, ObjectField):
+            return True
+        if isinstance(field, ArrayField):
+            return ArrowSerializationHelper._contains_models(field.item_field)
+        return False
+
+    @staticmethod
+    def _to_arrow_value(v: Any) -> Any:
+        """Parses models (if any) in a value into Dicts."""
+        if isinstance(v, Model):
+            return v.to_dikt()
+        elif type(v) == list:
+            return [ArrowSerializationHelper._to_arrow_value(item) for item in v]
+        return v
+
+    def _iter_stream(self, schema: "pa.Schema", batches: Iterable) -> Iterator[bytes]:
+        """Writes record batches to an IPC stream, yielding the stream as
+        each batch is written.
+
+        Args:
+            schema (pa.Schema): The schema of the record batches.
+            batches (Iterable[pa.RecordBatch]): The record batches.
+
+        Yields:
+            bytes: The chunks of the IPC stream.
+        """
+        sink = _ChunkSink()
+        writer = pa.ipc.new_stream(sink, schema)
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.take()
+        writer.close()
+        yield sink.take()
+
+    def from_data(self, data: Union[bytes, memoryview]) -> Dict:
+        """Deserializes an Arrow IPC stream with exactly one row into a Dict."""
+        table = pa.ipc.open_stream(data).read_all()
+        if table.num_rows != 1:
+            message = "The Arrow IPC stream must include exactly one row."
+            message = format_error_message(message=message, num_rows=table.num_rows)
+            raise ValueError(message)
+
+        return table.to_pylist()[0]
+
+    def to_data(self, dikt: Union[Dict, List[Dict]]) -> bytes:
+        """Serializes a Dict (or a list of Dicts) to an Arrow IPC stream."""
+        rows = dikt if type(dikt) == list else [dikt]
+        table = pa.Table.from_pylist(rows)
+        return b"".join(
+            self._iter_stream(
+                table.schema, table.to_batches(max_chunksize=self._batch_size)
+            )
+        )
+
+    def _iter_batches(
+        self, models: List["Model"], model_cls: "ModelMetaCls"
+    ) -> Iterator["pa.RecordBatch"]:
+        """Converts models column by column into record batches of at most
+        `batch_size` rows."""
+        schema = self.get_schema(model_cls)
+        fields = model_cls._fields
+
+        for start in range(0, len(models), self._batch_size):
+            chunk = models[start : start + self._batch_size]
+            columns = []
+            for name, arrow_field in zip(fields, schema):
+                values = [getattr(model, name) for model in chunk]
+                if self._contains_models(fields[name]):
+                    values = [self._to_arrow_value(v) for v in values]
+                columns.append(pa.array(values, type=arrow_field.type))
+            yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    def models_to_data(
+        self, models: List["Model"], model_cls: Optional["ModelMetaCls"] = None
+    ) -> Iterator[bytes]:
+        """Serializes a list of models to an Arrow IPC stream.
+
+        The models are converted column by column, using the Arrow schema
+        derived from their fields, in record batches of at most `batch_size`
+        rows; the stream is returned as an iterator, which converts and
+        writes each batch only when the chunk before it has been consumed
+        (e.g. sent by the transport).
+
+        Args:
+            models (List[Model]): The models.
+            model_cls (ModelMetaCls, Optional): The model of the list, which
+                the schema of empty lists is derived from. Defaults to the
+                model of the first item.
+
+        Returns:
+            Iterator[bytes]: The chunks of the IPC stream.
+        """
+        if model_cls == None:
+            if not models:
+                return self._iter_stream(pa.schema([]), [])
+            model_cls = models[0].__class__
+
+        for model in models:
+            if model.__class__ != model_cls:
+                raise ValueError("All the models in the list must be of the same type.")
+
+        return self._iter_stream(
+            self.get_schema(model_cls), self._iter_batches(models, model_cls)
+        )
@@ -6,7 +6,7 @@ interchanging format.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Union
+from typing import Dict, Iterator, List, Optional, Union
 
 
 class SerializationHelper(ABC):
@@ -29,3 +29,32 @@ class SerializationHelper(ABC):
     @abstractmethod
     def to_data(self, dikt: Dict) -> Union[str, bytes]:
         """Serializes a Dict to a piece of data."""
+
+    def warmup(self, model_cls: "ModelMetaCls"):
+        """Prepares the state the helper keeps for a model (if any), such as
+        the schema of the model. By default it does nothing.
+
+        Args:
+            model_cls (ModelMetaCls): A model.
+        """
+
+    def models_to_data(
+        self, models: List["Model"], model_cls: Optional["ModelMetaCls"] = None
+    ) -> Union[str, bytes, Iterator[bytes]]:
+        """Serializes a list of models to a piece of data.
+
+        By default models are parsed into Dicts one by one and serialized
+        together as a list. Helpers for formats that can take advantage of
+        the schema of the models (e.g. columnar formats) may override this
+        method, and may return the data as an iterator of chunks, which
+        transports stream.
+
+        Args:
+            models (List[Model]): A list of model instances.
+            model_cls (ModelMetaCls, Optional): The model of the list, if
+                known; the default implementation does not use it.
+
+        Returns:
+            Union[str, bytes, Iterator[bytes]]: The serialized data.
+        """
+        return self.to_data([model.to_dikt() for model in models])
@@ -1,14 +1,18 @@
 """This module includes the serialization handler for HTTP services.
 """
 
-from typing import Optional
+import time
+from typing import Any, Callable, Optional, Tuple
 
 from .base import SerializationHandler
-from ..globals import request, svc_ctx
+from ..globals import get_svc_ctx
+from ..handler import run_sync
 from ..misc import format_error_message
 from ..misc.errors import SerializationError
 from ..model import Model
-from ..services.http.io import HTTPParsedRequest, HTTPResponse
+from ..services.http.foundation import REQUEST_TOO_LARGE_RESPONSE
+from ..services.http.io import HTTPHeaders, HTTPParsedRequest, HTTPResponse
+from ..upload import FileUpload, UploadTooLargeError
 
 INVALID_MIME_TYPE_RESPONSE = HTTPResponse(
     status_code=400,
@@ -44,6 +48,7 @@ class HTTPSerializationHandler(SerializationHandler):
         headers_cls: Optional["ModelMetaCls"] = None,
         query_args_cls: Optional["ModelMetaCls"] = None,
         data_cls: Optional["ModelMetaCls"] = None,
+        response_cls: Optional["ModelMetaCls"] = None,
         **kwargs
     ):
         """Initializes an HTTP serialization handler.
@@ -54,44 +59,109 @@ class HTTPSerializationHandler(SerializationHandler):
             query_args_cls (ModelMetaCls): The model for query arguments
                 in the URIs of HTTP requests.
             data_cls (ModelMetaCls): The model for payload (body) of
-                HTTP requests.
+                HTTP requests. It can also be `FileUpload` (or a subclass of
+                it), in which case the payload is streamed into a spooled
+                file instead of being deserialized.
+            response_cls (ModelMetaCls): The model of the items in list
+                responses, which the serialization helper uses to serialize
+                empty lists (see the method
+                `SerializationHelper.models_to_data`).
             **kwargs: Other keyword arguments for the HTTP serialization
                 handler. See `SerializationHandler`.
         """
         self._headers_cls = headers_cls
         self._query_args_cls = query_args_cls
         self._data_cls = data_cls
+        self._response_cls = response_cls
 
         super().__init__(**kwargs)
 
-    def __call__(self, *args, **kwargs):
-        """Runs the serialization handler.
+    @property
+    def accepts_upload(self) -> bool:
+        """Returns True if the handler streams the payload of requests into
+        file uploads."""
+        return isinstance(self._data_cls, type) and issubclass(
+            self._data_cls, FileUpload
+        )
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        """Returns the maximum content length of requests the handler
+        accepts, if it overrides the service-wide setting.
+
+        Returns:
+            Optional[int]: The maximum content length (exclusive), or None if
+                the service-wide setting applies.
+        """
+        if self.accepts_upload and self._data_cls.max_size != None:
+            return self._data_cls.max_size + 1
+        return None
+
+    def warmup(self):
+        """Prepares the state the serialization helper keeps for the data
+        models (if any). See the method `Handler.warmup`."""
+        if self._data_cls and not self.accepts_upload:
+            self._serialization_helper.warmup(self._data_cls)
+        if self._response_cls:
+            self._serialization_helper.warmup(self._response_cls)
+
+    def _parse_upload(
+        self, request: "HTTPRequest", mime_type: Optional[str]
+    ) -> "FileUpload":
+        """Streams the payload of the request into a file upload.
 
         Args:
-            *args: Arbitrary positional arguments.
-            **kwargs: Arbitrary keyword arguments.
+            request (HTTPRequest): The request.
+            mime_type (str, Optional): The mime type of the request.
 
         Returns:
-            Any: Any object.
+            FileUpload: The file upload.
         """
-        helper = self._serialization_helper
+        try:
+            stream = getattr(request, "stream")
+        except AttributeError:
+            raise AttributeError("The incoming request is not a valid HTTP " "request.")
 
+        try:
+            return self._data_cls.from_stream(stream, mime_type=mime_type)
+        except UploadTooLargeError as ex:
+            message = ("The incoming request is too large ({}).").format(str(ex))
+            raise SerializationError(message, response=REQUEST_TOO_LARGE_RESPONSE)
+        except Exception as ex:
+            message = (
+                "The incoming request does not have valid body data ({})."
+            ).format(str(ex))
+            raise SerializationError(message, response=INVALID_DATA_RESPONSE)
+
+    def _parse_metadata(
+        self, request: "HTTPRequest"
+    ) -> Tuple[Optional[str], Optional[Model], Optional[Model]]:
+        """Parses the mime type, the headers, and the query arguments of the
+        request.
+
+        Args:
+            request (HTTPRequest): The request.
+
+        Returns:
+            Tuple[Optional[str], Optional[Model], Optional[Model]]: The mime
+                type, the parsed headers, and the parsed query arguments.
+        """
         try:
             mime_type = getattr(request, "mime_type")
             headers_dikt = getattr(request, "headers")
             query_args_dikt = getattr(request, "query_args")
-            if self._serialization_helper.binary:
-                raw_data = getattr(request, "binary_data")
-            else:
-                raw_data = getattr(request, "text_data")
         except AttributeError:
             raise AttributeError("The incoming request is not a valid HTTP " "request.")
 
         headers = None
         if self._headers_cls:
             try:
+                # Headers of HTTPRequest are already case-insensitive.
                 headers = self._headers_cls.from_dikt(
-                    headers_dikt, altchar="-", case_insensitive=True, type_cast=True
+                    headers_dikt,
+                    altchar="-",
+                    case_insensitive=not isinstance(headers_dikt, HTTPHeaders),
+                    type_cast=True,
                 )
             except Exception as ex:
                 message = (
@@ -112,31 +182,61 @@ class HTTPSerializationHandler(SerializationHandler):
                 ).format(str(ex))
                 raise SerializationError(message, response=INVALID_QUERY_ARGS_RESPONSE)
 
-        data = None
-        if self._data_cls:
-            if mime_type and mime_type.lower() != helper.mime_type.lower():
-                message = "The incoming request does not have the expected mime type."
-                message = format_error_message(
-                    message=message,
-                    provided_mime_type=mime_type,
-                    expected_mime_type=helper.mime_type,
-                )
-                raise SerializationError(message, response=INVALID_MIME_TYPE_RESPONSE)
+        return mime_type, headers, query_args
 
-            try:
-                data = self._data_cls.from_dikt(helper.from_data(data=raw_data))
-            except Exception as ex:
-                message = (
-                    "The incoming request does not have valid body data ({})."
-                ).format(str(ex))
-                raise SerializationError(message, response=INVALID_DATA_RESPONSE)
+    def _parse_data(
+        self, request: "HTTPRequest", mime_type: Optional[str]
+    ) -> Optional[Model]:
+        """Parses the payload of the request (if the handler is configured
+        with a data model).
 
-        parsed_request = HTTPParsedRequest(
-            headers=headers, query_args=query_args, data=data
-        )
-        svc_ctx["parsed_request"] = parsed_request
+        Args:
+            request (HTTPRequest): The request.
+            mime_type (str, Optional): The mime type of the request.
+
+        Returns:
+            Optional[Model]: The parsed payload.
+        """
+        helper = self._serialization_helper
+
+        if not self._data_cls:
+            return None
+
+        if mime_type and mime_type.lower() != helper.mime_type.lower():
+            message = "The incoming request does not have the expected mime type."
+            message = format_error_message(
+                message=message,
+                provided_mime_type=mime_type,
+                expected_mime_type=helper.mime_type,
+            )
+            raise SerializationError(message, response=INVALID_MIME_TYPE_RESPONSE)
+
+        try:
+            if helper.binary:
+                raw_data = getattr(request, "buffer")
+            else:
+                raw_data = getattr(request, "text_data")
+        except AttributeError:
+            raise AttributeError("The incoming request is not a valid HTTP " "request.")
 
-        res = super().__call__(*args, **kwargs)
+        try:
+            return self._data_cls.from_dikt(helper.from_data(data=raw_data))
+        except Exception as ex:
+            message = (
+                "The incoming request does not have valid body data ({})."
+            ).format(str(ex))
+            raise SerializationError(message, response=INVALID_DATA_RESPONSE)
+
+    def _serialize_response(self, res: Any) -> Any:
+        """Serializes the response (if it includes models).
+
+        Args:
+            res (Any): The response from the chained handler.
+
+        Returns:
+            Any: The serialized response.
+        """
+        helper = self._serialization_helper
 
         if isinstance(res, HTTPResponse):
             if isinstance(res.headers, Model):
@@ -157,19 +257,108 @@ class HTTPSerializationHandler(SerializationHandler):
                     ).format(str(ex))
                     raise SerializationError(message)
         elif isinstance(res, list):
-            alt_res = []
             for elem in res:
-                if isinstance(elem, Model):
-                    alt_res.append(elem.to_dikt())
-                else:
+                if not isinstance(elem, Model):
                     raise ValueError(
                         "One or more of the items in the returned "
                         "list is not of the Model type."
                     )
-            res = HTTPResponse(mime_type=helper.mime_type, data=helper.to_data(alt_res))
+            # Custom helpers may not accept the model of the list.
+            if self._response_cls:
+                data = helper.models_to_data(res, model_cls=self._response_cls)
+            else:
+                data = helper.models_to_data(res)
+            res = HTTPResponse(mime_type=helper.mime_type, data=data)
         elif isinstance(res, Model):
             res = HTTPResponse(
                 mime_type=helper.mime_type, data=helper.to_data(res.to_dikt())
             )
 
         return res
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the serialization handler.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        # The time spent is recorded for the metrics handler (if any).
+        timings = ctx.get("timings")
+        start = time.perf_counter()
+        request = ctx.get("request")
+        mime_type, headers, query_args = self._parse_metadata(request)
+        if self.accepts_upload:
+            data = self._parse_upload(request, mime_type)
+        else:
+            data = self._parse_data(request, mime_type)
+
+        ctx["parsed_request"] = HTTPParsedRequest(
+            headers=headers, query_args=query_args, data=data
+        )
+        if timings != None:
+            timings["deserialization"] = time.perf_counter() - start
+
+        try:
+            res = call_next(*args, **kwargs)
+        finally:
+            if isinstance(data, FileUpload):
+                data.close()
+
+        if timings == None:
+            return self._serialize_response(res)
+
+        start = time.perf_counter()
+        res = self._serialize_response(res)
+        timings["serialization"] = time.perf_counter() - start
+        return res
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the serialization handler asynchronously.
+
+        Uploads are spooled in an executor, so that writing them to disk does
+        not block the event loop.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        # The time spent is recorded for the metrics handler (if any).
+        timings = ctx.get("timings")
+        start = time.perf_counter()
+        request = ctx.get("request")
+        mime_type, headers, query_args = self._parse_metadata(request)
+        if self.accepts_upload:
+            data = await run_sync(self._parse_upload, request, mime_type)
+        else:
+            data = self._parse_data(request, mime_type)
+
+        ctx["parsed_request"] = HTTPParsedRequest(
+            headers=headers, query_args=query_args, data=data
+        )
+        if timings != None:
+            timings["deserialization"] = time.perf_counter() - start
+
+        try:
+            res = await call_next(*args, **kwargs)
+        finally:
+            if isinstance(data, FileUpload):
+                data.close()
+
+        if timings == None:
+            return self._serialize_response(res)
+
+        start = time.perf_counter()
+        res = self._serialize_response(res)
+        timings["serialization"] = time.perf_counter() - start
+        return res
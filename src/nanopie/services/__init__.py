@@ -1,2 +1,20 @@
-from .base import Extractor, RPCEndpoint, RPCRequest, RPCResponse, RPCService
-from .http import HTTPRequest, HTTPResponse, HTTPMethods, FlaskService
+from ..misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "Extractor": ".base",
+    "RPCEndpoint": ".base",
+    "RPCRequest": ".base",
+    "RPCResponse": ".base",
+    "RPCService": ".base",
+    "HTTPRequest": ".http",
+    "HTTPResponse": ".http",
+    "HTTPMethods": ".http",
+    "AioHTTPService": ".http",
+    "ASGIService": ".http",
+    "FlaskService": ".http",
+    "QuartService": ".http",
+    "WSGIService": ".http",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
@@ -2,9 +2,10 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from ..handler import Handler
+from ..background import BackgroundTaskRunner
+from ..handler import Handler, compile_async_chain, compile_chain, walk_chain
 
 
 class RPCRequest(ABC):
@@ -45,6 +46,20 @@ class RPCEndpoint(ABC):
         self.rule = rule
         self.entrypoint = entrypoint
         self.extras = extras
+        self.compile()
+
+    def compile(self):
+        """Compiles the handler chain of the endpoint.
+
+        Services run the compiled chains (see the function `compile_chain`),
+        which pass the baton from handler to handler without looking up
+        routes. Call this method again if the chain is modified after the
+        endpoint is created.
+        """
+        self.compiled_entrypoint = compile_chain(self.entrypoint, self.name)
+        self.compiled_async_entrypoint = compile_async_chain(
+            self.entrypoint, self.name
+        )
 
 
 class RPCService(ABC):
@@ -57,6 +72,10 @@ class RPCService(ABC):
         tracing_handler: Optional["TracingHandler"] = None,
         serialization_helper: Optional["SerializationHelper"] = None,
         max_content_length: int = 6000,
+        handlers: Optional[List[Handler]] = None,
+        admission_handlers: Optional[List[Handler]] = None,
+        timeout: Optional[float] = None,
+        task_runner: Optional[BackgroundTaskRunner] = None,
     ):
         """Initializes a service.
 
@@ -70,6 +89,21 @@ class RPCService(ABC):
             serialization_helper (SerializationHelper, Optional): The
                 default serialization helper for endpoints.
             max_content_length (int): The maximum length of requests.
+            handlers (List[Handler], Optional): The default additional
+                handlers for endpoints. They are chained, in order, after
+                the tracing handler and before the serialization handler.
+            admission_handlers (List[Handler], Optional): The default
+                admission handlers for endpoints, which admit or reject
+                requests (e.g. concurrency limiters). They are chained, in
+                order, before the authentication handler, so that rejected
+                requests are not authenticated or deserialized.
+            timeout (float, Optional): The maximum number of seconds requests
+                may take (see `nanopie.deadline`). Callers may specify
+                shorter timeouts. If set to None, requests only have the
+                deadlines their callers specify (if any).
+            task_runner (BackgroundTaskRunner, Optional): The runner of the
+                background tasks requests schedule (see
+                `add_background_task`). Defaults to a runner with 4 threads.
         """
         self.endpoints = {}
         self.authn_handler = authn_handler
@@ -77,6 +111,10 @@ class RPCService(ABC):
         self.tracing_handler = tracing_handler
         self.serialization_helper = serialization_helper
         self.max_content_length = max_content_length
+        self.handlers = handlers
+        self.admission_handlers = admission_handlers
+        self.timeout = timeout
+        self.task_runner = task_runner or BackgroundTaskRunner()
 
     @abstractmethod
     def add_endpoint(self, endpoint: RPCEndpoint, **kwargs):
@@ -86,3 +124,24 @@ class RPCService(ABC):
             endpoint (RPCEndpoint): An endpoint.
             **kwrags: Arbitrary keyword arguments.
         """
+
+    def warmup(self):
+        """Warms up the service.
+
+        This method calls the `warmup` method on the default handlers of the
+        service and on all the handlers of its endpoints (once per handler),
+        so that they prepare the state they would otherwise initialize on
+        the first request. Call it after all the endpoints are added and
+        before the service accepts traffic.
+        """
+        handlers = [self.authn_handler, self.logging_handler, self.tracing_handler]
+        handlers.extend(self.handlers or [])
+        handlers.extend(self.admission_handlers or [])
+        for endpoint in self.endpoints.values():
+            handlers.extend(walk_chain(endpoint.entrypoint, endpoint.name))
+
+        warmed_up = set()
+        for handler in handlers:
+            if isinstance(handler, Handler) and handler not in warmed_up:
+                handler.warmup()
+                warmed_up.add(handler)
@@ -1,9 +1,22 @@
-from .base import HTTPService
-from .io import (
-    HTTPEndpoint,
-    HTTPRequest,
-    HTTPResponse,
-)
-from .flask_svc import FlaskService
-from .foundation import HTTPFoundationHandler
-from .methods import HTTPMethods
+from ...misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "AioHTTPService": ".aiohttp_svc",
+    "ASGIService": ".asgi_svc",
+    "AsyncHTTPService": ".base",
+    "HTTPService": ".base",
+    "HTTPBatchProcessor": ".batch",
+    "HTTPEndpoint": ".io",
+    "HTTPHeaders": ".io",
+    "HTTPRequest": ".io",
+    "HTTPResponse": ".io",
+    "FlaskService": ".flask_svc",
+    "HTTPFoundationHandler": ".foundation",
+    "HTTPMethods": ".methods",
+    "PreforkServer": ".prefork",
+    "QuartService": ".quart_svc",
+    "WSGIService": ".wsgi_svc",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
@@ -0,0 +1,215 @@
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    from aiohttp import web
+
+    AIOHTTP_INSTALLED = True
+except ImportError:
+    AIOHTTP_INSTALLED = False
+
+from .base import AsyncHTTPService, iter_chunks
+from .batch import INTERNAL_ERROR_RESPONSE
+from .io import HTTPRequest, HTTPResponse
+from ...logger import logger
+from .routing import CONVERTERS, VARIABLE_PATTERN
+
+
+def translate_rule(rule: str) -> Tuple[str, Dict[str, Callable]]:
+    """Translates a rule (in the Flask syntax) into an aiohttp resource path.
+
+    For example, `/users/<int:uid>` is translated into `/users/{uid:\\d+}`.
+
+    Args:
+        rule (str): A rule.
+
+    Returns:
+        Tuple[str, Dict[str, Callable]]: The resource path, and the
+            converters of the variable parts in the rule.
+    """
+    path = ""
+    converters = {}
+    pos = 0
+    for match in VARIABLE_PATTERN.finditer(rule):
+        converter = match.group("converter") or "string"
+        name = match.group("name")
+        if converter not in CONVERTERS:
+            raise ValueError(
+                "{} is not a supported converter ({}).".format(
+                    converter, list(CONVERTERS)
+                )
+            )
+
+        regex, convert = CONVERTERS[converter]
+        path += rule[pos : match.start()]
+        path += "{{{}:{}}}".format(name, regex)
+        converters[name] = convert
+        pos = match.end()
+
+    path += rule[pos:]
+    return path, converters
+
+
+def get_mime_type(aiohttp_request: "web.Request") -> str:
+    """Gets the mime type of the payload of a request.
+
+    aiohttp reports `application/octet-stream` for requests without a
+    Content-Type header; nanopie expects an empty string, as with other
+    transports.
+
+    Args:
+        aiohttp_request (web.Request): An aiohttp request.
+
+    Returns:
+        str: The mime type, or an empty string if it is not specified.
+    """
+    content_type = aiohttp_request.headers.get("Content-Type", "")
+    return content_type.split(";")[0].strip().lower()
+
+
+class AioHTTPService(AsyncHTTPService):
+    """The class for HTTP services with aiohttp apps as transport."""
+
+    def __init__(self, *args, app: "web.Application", **kwargs):
+        """Initializes an aiohttp based HTTP service.
+
+        Args:
+            app (web.Application): An aiohttp app.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        if not AIOHTTP_INSTALLED:
+            raise ImportError(
+                "The aiohttp (https://pypi.org/project/aiohttp/)"
+                "package is required to use aiohttp with nanopie. "
+                "To install this package, run "
+                "`pip install aiohttp`."
+            )
+
+        self._app = app
+
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _make_response(
+        res: Any,
+    ) -> Tuple["web.StreamResponse", Optional[Iterator[bytes]]]:
+        """Converts a response into an aiohttp response.
+
+        Args:
+            res (Any): The response of an endpoint.
+
+        Returns:
+            Tuple[web.StreamResponse, Optional[Iterator[bytes]]]: The aiohttp
+                response, and the streamed payload to write to it (if any).
+        """
+        if isinstance(res, web.StreamResponse):
+            return res, None
+
+        if not isinstance(res, HTTPResponse):
+            if isinstance(res, (str, bytes)):
+                res = HTTPResponse(mime_type="text/html", data=res)
+            else:
+                logger.error(
+                    "The endpoint returns a response that is not valid ({}).".format(
+                        type(res)
+                    )
+                )
+                res = INTERNAL_ERROR_RESPONSE
+
+        headers = {
+            k: str(v)
+            for k, v in (res.headers if type(res.headers) == dict else {}).items()
+            if k.lower() not in ("content-type", "content-length")
+        }
+        mime_type = res.mime_type or "text/html"
+        charset = "utf-8" if mime_type.startswith("text/") else None
+
+        data = res.data if res.data != None else b""
+        if isinstance(data, Iterator):
+            stream_res = web.StreamResponse(status=res.status_code, headers=headers)
+            stream_res.content_type = mime_type
+            if charset:
+                stream_res.charset = charset
+            return stream_res, data
+        if not isinstance(data, bytes):
+            data = str(data).encode("utf-8")
+
+        return (
+            web.Response(
+                body=data,
+                status=res.status_code,
+                headers=headers,
+                content_type=mime_type,
+                charset=charset,
+            ),
+            None,
+        )
+
+    def add_endpoint(self, endpoint: "HTTPEndpoint", **kwargs):
+        """Adds an HTTP endpoint.
+
+        Args:
+            endpoint (HTTPEndpoint): An HTTP endpoint.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        svc = self
+        path, converters = translate_rule(endpoint.rule)
+
+        async def handler(aiohttp_request: "web.Request") -> "web.StreamResponse":
+            try:
+                kwargs = {
+                    name: converters[name](value)
+                    for name, value in aiohttp_request.match_info.items()
+                }
+            except ValueError:
+                raise web.HTTPNotFound()
+
+            # The payload is read before the handler chain runs, as handlers
+            # access it synchronously.
+            if svc._exceeds_max_content_length(  # pylint: disable=protected-access
+                endpoint, aiohttp_request.content_length
+            ):
+                data = b""
+            else:
+                data = await aiohttp_request.read()
+
+            request = HTTPRequest(
+                url=partial(lambda x: str(x.url), aiohttp_request),
+                headers=partial(getattr, aiohttp_request, "headers"),
+                content_length=partial(getattr, aiohttp_request, "content_length"),
+                mime_type=partial(get_mime_type, aiohttp_request),
+                query_args=partial(lambda x: dict(x.query), aiohttp_request),
+                binary_data=data,
+                remote_addr=partial(getattr, aiohttp_request, "remote"),
+            )
+            tasks = []
+            res = await svc._arun(  # pylint: disable=protected-access
+                endpoint, request, kwargs, ctx={"background_tasks": tasks}
+            )
+            res, chunks = svc._make_response(res)  # pylint: disable=protected-access
+
+            if chunks != None:
+                # Streamed payloads are written as their chunks are produced
+                # (off the event loop).
+                await res.prepare(aiohttp_request)
+                async for chunk in iter_chunks(chunks):
+                    await res.write(chunk)
+                await res.write_eof()
+            elif tasks:
+                # Background tasks run once the response has been sent.
+                await res.prepare(aiohttp_request)
+                await res.write_eof()
+            if tasks:
+                svc.task_runner.submit_async(tasks)
+
+            return res
+
+        self._app.router.add_route(
+            endpoint.method, path, handler, name=endpoint.name, **kwargs
+        )
+
+        if self.endpoints.get(endpoint.name) == None:
+            self.endpoints[endpoint.name] = endpoint
+        else:
+            raise RuntimeError("An endpoint with the same name already exists.")
@@ -0,0 +1,355 @@
+"""This module includes the ASGI transport for HTTP services.
+
+`ASGIService` is an ASGI (https://asgi.readthedocs.io/) application itself
+and does not depend on any web framework; it can be served with any ASGI
+server, such as uvicorn or hypercorn:
+
+```python
+from nanopie import ASGIService
+
+svc = ASGIService()
+
+@svc.get(name="get_user", rule="/users/<int:uid>")
+async def get_user(uid):
+    ...
+```
+
+and then `uvicorn app:svc`.
+
+Requests run through the asynchronous handler chain (see the method
+`Handler.acall`). Endpoints may be coroutine functions (`async def`) or
+regular functions; the latter run in the default executor of the event loop.
+Payloads are read once the admission handlers of the endpoint admit the
+request (see `HTTPPayloadHandler`).
+"""
+
+import asyncio
+from functools import partial
+import io
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from .base import AsyncHTTPService, encode_response, iter_chunks
+from .batch import INTERNAL_ERROR_RESPONSE
+from .foundation import (
+    INVALID_CONTENT_LENGTH_RESPONSE,
+    REQUEST_TOO_LARGE_RESPONSE,
+    exceeds_max_content_length,
+    parse_content_length,
+)
+from .io import HTTPRequest
+from ...logger import logger
+from .routing import Router, RoutingError
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client disconnects before the request is read."""
+
+
+class DeferredPayload:
+    """The payload of a request, read once the admission handlers admit the
+    request (see the method `ASGIService._read_payload`)."""
+
+    __slots__ = ("body",)
+
+    def __init__(self):
+        """Initializes a deferred payload."""
+        self.body = None  # type: Optional[BinaryIO]
+
+    def read_all(self) -> bytes:
+        """Reads the whole payload from the spooled file."""
+        if self.body == None:
+            return b""
+        self.body.seek(0)
+        return self.body.read()
+
+    def get_stream(self) -> BinaryIO:
+        """Returns the spooled file."""
+        return self.body if self.body != None else io.BytesIO()
+
+
+class ASGIService(AsyncHTTPService):
+    """The class for HTTP services with ASGI as transport."""
+
+    _defers_payloads = True
+
+    def __init__(self, *args, max_memory_size: int = 1024 * 1024, **kwargs):
+        """Initializes an ASGI based HTTP service.
+
+        Args:
+            max_memory_size (int): The maximum number of bytes of a request
+                payload to keep in memory; larger payloads are spooled to a
+                temporary file on disk.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        self._router = Router()
+        self._max_memory_size = max_memory_size
+
+        super().__init__(*args, **kwargs)
+
+    @property
+    def router(self) -> "Router":
+        """Returns the router of the service."""
+        return self._router
+
+    def add_endpoint(self, endpoint: "HTTPEndpoint", **kwargs):
+        """Adds an HTTP endpoint.
+
+        Args:
+            endpoint (HTTPEndpoint): An HTTP endpoint.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        if self.endpoints.get(endpoint.name) != None:
+            raise RuntimeError("An endpoint with the same name already exists.")
+
+        self._router.add(rule=endpoint.rule, method=endpoint.method, target=endpoint)
+        self.endpoints[endpoint.name] = endpoint
+
+    @staticmethod
+    def _parse_headers(raw_headers: List[Tuple[bytes, bytes]]) -> Dict:
+        """Parses the headers in an ASGI scope.
+
+        Header names are title-cased (e.g. `Content-Type`); values of
+        repeated headers are joined with commas.
+        """
+        headers = {}
+        for k, v in raw_headers:
+            k = k.decode("latin-1").title()
+            v = v.decode("latin-1")
+            if k in headers:
+                headers[k] = "{}, {}".format(headers[k], v)
+            else:
+                headers[k] = v
+        return headers
+
+    @staticmethod
+    def _parse_query_args(query_string: bytes) -> Dict:
+        """Parses the query string in an ASGI scope; if an argument is
+        specified more than once, the first value is used."""
+        query_args = {}
+        for k, v in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+            query_args.setdefault(k, v)
+        return query_args
+
+    @staticmethod
+    def _get_url(scope: Dict, headers: Dict) -> str:
+        """Gets the URL of the request in an ASGI scope."""
+        host = headers.get("Host")
+        if host == None:
+            server = scope.get("server")
+            host = "{}:{}".format(*server) if server else "localhost"
+
+        url = "{}://{}{}{}".format(
+            scope.get("scheme", "http"),
+            host,
+            scope.get("root_path", ""),
+            scope["path"],
+        )
+        query_string = scope.get("query_string")
+        if query_string:
+            url = "{}?{}".format(url, query_string.decode("latin-1"))
+        return url
+
+    async def _read_body(
+        self, receive: Callable, max_content_length: Optional[int]
+    ) -> Optional[BinaryIO]:
+        """Reads the payload of the request into a spooled file.
+
+        Args:
+            receive (Callable): The ASGI receive callable.
+            max_content_length (int, Optional): The maximum length of the
+                payload (exclusive, as in `HTTPFoundationHandler`).
+
+        Returns:
+            BinaryIO: The spooled file, or None if the payload is too large.
+        """
+        body = tempfile.SpooledTemporaryFile(max_size=self._max_memory_size)
+        loop = asyncio.get_running_loop()
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                raise ClientDisconnectedError()
+
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if exceeds_max_content_length(size, max_content_length):
+                body.close()
+                return None
+
+            if chunk:
+                if size > self._max_memory_size:
+                    # The spooled file is (or is about to be rolled over) on
+                    # disk; the write does not block the event loop.
+                    await loop.run_in_executor(None, body.write, chunk)
+                else:
+                    body.write(chunk)
+            more_body = message.get("more_body", False)
+
+        body.seek(0)
+        return body
+
+    async def _read_payload(
+        self,
+        receive: Callable,
+        max_content_length: Optional[int],
+        payload: "DeferredPayload",
+    ) -> Optional["HTTPResponse"]:
+        """Reads the deferred payload of a request (see `HTTPPayloadHandler`).
+
+        Args:
+            receive (Callable): The ASGI receive callable.
+            max_content_length (int, Optional): The maximum length of the
+                payload.
+            payload (DeferredPayload): The deferred payload.
+
+        Returns:
+            HTTPResponse: The response rejecting the request, or None if the
+                payload is read.
+        """
+        payload.body = await self._read_body(receive, max_content_length)
+        if payload.body == None:
+            return REQUEST_TOO_LARGE_RESPONSE
+        return None
+
+    async def _handle(
+        self, scope: Dict, receive: Callable, tasks: List["BackgroundTask"]
+    ) -> Any:
+        """Handles an HTTP request.
+
+        Args:
+            scope (Dict): The ASGI connection scope.
+            receive (Callable): The ASGI receive callable.
+            tasks (List[BackgroundTask]): The list the background tasks of the
+                request are added to.
+
+        Returns:
+            Any: The response.
+        """
+        try:
+            endpoint, kwargs = self._router.match(scope["path"], scope["method"])
+        except RoutingError as ex:
+            return ex.response
+
+        headers = self._parse_headers(scope.get("headers", []))
+        try:
+            content_length = parse_content_length(headers.get("Content-Length"))
+        except ValueError:
+            return INVALID_CONTENT_LENGTH_RESPONSE
+        content_type = headers.get("Content-Type", "")
+        max_content_length = getattr(endpoint.entrypoint, "max_content_length", None)
+
+        ctx = {"background_tasks": tasks}
+        if self._exceeds_max_content_length(endpoint, content_length):
+            # The foundation handler rejects the request without reading the
+            # payload.
+            payload = None
+        else:
+            payload = DeferredPayload()
+            ctx["read_payload"] = partial(
+                self._read_payload, receive, max_content_length, payload
+            )
+
+        request = HTTPRequest(
+            url=self._get_url(scope, headers),
+            headers=headers,
+            content_length=content_length,
+            mime_type=content_type.split(";")[0].strip().lower(),
+            query_args=partial(self._parse_query_args, scope.get("query_string", b"")),
+            binary_data=payload.read_all if payload != None else b"",
+            stream=payload.get_stream if payload != None else None,
+            remote_addr=(scope.get("client") or (None,))[0],
+        )
+
+        try:
+            return await self._arun(endpoint, request, kwargs, ctx=ctx)
+        finally:
+            if payload != None and payload.body != None:
+                payload.body.close()
+
+    @staticmethod
+    async def _send_response(send: Callable, res: Any, method: str):
+        """Sends a response.
+
+        Args:
+            send (Callable): The ASGI send callable.
+            res (Any): The response.
+            method (str): The HTTP method of the request.
+        """
+        status_code, headers, data = encode_response(res)
+        headers = [
+            (k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers
+        ]
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": headers,
+            }
+        )
+        if method == "HEAD":
+            # Streamed payloads are not sent; they are closed right away, so
+            # that their cleanup (if any) runs.
+            close = getattr(data, "close", None)
+            if close != None:
+                close()
+            await send({"type": "http.response.body", "body": b""})
+        elif isinstance(data, bytes):
+            await send({"type": "http.response.body", "body": data})
+        else:
+            async for chunk in iter_chunks(data):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+
+    async def _lifespan(self, receive: Callable, send: Callable):
+        """Handles the ASGI lifespan protocol; the service is warmed up (see
+        the method `warmup`) on startup."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    self.warmup()
+                except Exception as ex:  # pylint: disable=broad-except
+                    logger.exception(ex)
+                    await send({"type": "lifespan.startup.failed", "message": str(ex)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable):
+        """Runs the service as an ASGI application.
+
+        Args:
+            scope (Dict): The ASGI connection scope.
+            receive (Callable): The ASGI receive callable.
+            send (Callable): The ASGI send callable.
+        """
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise RuntimeError(
+                "Connections of type {} are not supported.".format(scope["type"])
+            )
+
+        tasks = []
+        try:
+            res = await self._handle(scope, receive, tasks)
+        except ClientDisconnectedError:
+            return
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception(ex)
+            res = INTERNAL_ERROR_RESPONSE
+
+        await self._send_response(send, res, scope["method"])
+        if tasks:
+            self.task_runner.submit_async(tasks)
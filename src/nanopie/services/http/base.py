@@ -2,20 +2,110 @@
 """
 
 from abc import abstractmethod
-from typing import Callable, Dict, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from ..base import RPCService
-from .foundation import HTTPFoundationHandler
-from ...handler import SimpleHandler
-from .io import HTTPEndpoint
+from .batch import HTTPBatchProcessor, INTERNAL_ERROR_RESPONSE
+from .foundation import (
+    HTTPFoundationHandler,
+    HTTPPayloadHandler,
+    exceeds_max_content_length,
+)
+from ...globals import bind_svc_ctx, get_svc_ctx, unbind_svc_ctx
+from ...handler import SimpleHandler, run_sync
+from .io import HTTPEndpoint, HTTPResponse
+from ...logger import logger
 from .methods import HTTPMethods
+from ...misc.errors import ServiceError
 from ...serialization.http import HTTPSerializationHandler
 from ...serialization.helpers import JSONSerializationHelper
 
 
+def encode_response(
+    res: Any,
+) -> Tuple[int, List[Tuple[str, str]], Union[bytes, Iterator[bytes]]]:
+    """Encodes the response of an endpoint for framework-free transports.
+
+    Strings and bytes are sent as HTML (with the status code 200); other
+    objects that are not HTTP responses are replaced with an internal error
+    response. Text payloads are encoded in UTF-8. Streamed payloads
+    (iterators of bytes) are returned as they are, without a Content-Length
+    header.
+
+    Args:
+        res (Any): The response of an endpoint.
+
+    Returns:
+        Tuple[int, List[Tuple[str, str]], Union[bytes, Iterator[bytes]]]: The
+            status code, the headers, and the payload of the response.
+    """
+    if not isinstance(res, HTTPResponse):
+        if isinstance(res, (str, bytes)):
+            res = HTTPResponse(mime_type="text/html", data=res)
+        else:
+            logger.error(
+                "The endpoint returns a response that is not valid ({}).".format(
+                    type(res)
+                )
+            )
+            res = INTERNAL_ERROR_RESPONSE
+
+    data = res.data if res.data != None else b""
+    streamed = isinstance(data, Iterator)
+    if not streamed and not isinstance(data, bytes):
+        data = str(data).encode("utf-8")
+
+    mime_type = res.mime_type or "text/html"
+    if mime_type.startswith("text/") and "charset" not in mime_type:
+        mime_type = "{}; charset=utf-8".format(mime_type)
+
+    headers = [("Content-Type", mime_type)]
+    if not streamed:
+        headers.append(("Content-Length", str(len(data))))
+    for k, v in (res.headers if type(res.headers) == dict else {}).items():
+        if k.lower() not in ("content-type", "content-length"):
+            headers.append((k, str(v)))
+
+    return res.status_code, headers, data
+
+
+async def iter_chunks(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Iterates over a streamed payload asynchronously.
+
+    Chunks may be expensive to produce (e.g. Arrow record batches); they are
+    produced in the default executor of the event loop (see the function
+    `run_sync`), so that they do not block it.
+
+    Args:
+        chunks (Iterator[bytes]): The streamed payload.
+
+    Yields:
+        bytes: The chunks of the payload.
+    """
+    while True:
+        chunk = await run_sync(next, chunks, None)
+        if chunk == None:
+            return
+        yield chunk
+
+
 class HTTPService(RPCService):
     """The base class for all HTTP services."""
 
+    # Transports that read the payloads of requests only once the admission
+    # handlers admit them set this to True (see `HTTPPayloadHandler`).
+    _defers_payloads = False
+
     def __init__(
         self,
         serialization_helper: Optional[
@@ -39,6 +129,33 @@ class HTTPService(RPCService):
         """See the method `RPCService.add_endpoint`."""
         pass
 
+    def _dispatch(
+        self,
+        endpoint: "HTTPEndpoint",
+        request: "HTTPRequest",
+        kwargs: Dict,
+        ctx: Optional[Dict] = None,
+    ) -> Any:
+        """Runs an endpoint with a request in a new context.
+
+        Transports override this method to support batch endpoints, which
+        dispatch their operations (sub requests) to other endpoints while
+        processing a request.
+
+        Args:
+            endpoint (HTTPEndpoint): The endpoint to run.
+            request (HTTPRequest): The request.
+            kwargs (Dict): The keyword arguments (path parameters) for the
+                endpoint.
+            ctx (Dict, Optional): Additional items for the new context.
+
+        Returns:
+            Any: The response of the endpoint.
+        """
+        raise NotImplementedError(
+            "This transport does not support dispatching requests."
+        )
+
     def _rest_endpoint(
         self,
         name: str,
@@ -48,6 +165,10 @@ class HTTPService(RPCService):
         authn_handler: Optional["AuthenticationHandler"] = None,
         logging_handler: Optional["LoggingHandler"] = None,
         tracing_handler: Optional["TracingHandler"] = None,
+        handlers: Optional[List["Handler"]] = None,
+        admission_handlers: Optional[List["Handler"]] = None,
+        max_content_length: Optional[int] = None,
+        timeout: Optional[float] = None,
         extras: Optional[Dict] = None,
         **options
     ):
@@ -63,6 +184,17 @@ class HTTPService(RPCService):
                 for this endpoint.
             tracing_handler (TracingHandler, Optional): The tracing handler
                 for this endpoint.
+            handlers (List[Handler], Optional): The additional handlers for
+                this endpoint.
+            admission_handlers (List[Handler], Optional): The admission
+                handlers (e.g. concurrency limiters) for this endpoint. They
+                are chained, in order, before the authentication handler.
+            max_content_length (int, Optional): The maximum length of requests
+                to this endpoint. If not specified, the service-wide setting
+                applies.
+            timeout (float, Optional): The maximum number of seconds requests
+                to this endpoint may take (see `nanopie.deadline`). If not
+                specified, the service-wide setting applies.
             serialization_helper (SerializationHelper, Optional): The
                 serialization helper for this endpoint.
             extras (Dict, Optional): Additional information about the endpoint.
@@ -70,9 +202,26 @@ class HTTPService(RPCService):
                 They vary according to the transport used.
         """
 
-        entrypoint = HTTPFoundationHandler(max_content_length=self.max_content_length)
+        if max_content_length == None:
+            max_content_length = self.max_content_length
+            if getattr(serialization_handler, "accepts_upload", False):
+                max_content_length = serialization_handler.max_content_length
+
+        if timeout == None:
+            timeout = self.timeout
+
+        entrypoint = HTTPFoundationHandler(
+            max_content_length=max_content_length, timeout=timeout
+        )
         handler = entrypoint
 
+        if admission_handlers == None:
+            admission_handlers = self.admission_handlers
+        for admission_handler in admission_handlers if admission_handlers else []:
+            handler = handler.add_route(name=name, handler=admission_handler)
+        if self._defers_payloads:
+            handler = handler.add_route(name=name, handler=HTTPPayloadHandler())
+
         if authn_handler:
             handler = handler.add_route(name=name, handler=authn_handler)
         elif self.authn_handler:
@@ -88,6 +237,11 @@ class HTTPService(RPCService):
         elif self.tracing_handler:
             handler = handler.add_route(name=name, handler=self.tracing_handler)
 
+        if handlers == None:
+            handlers = self.handlers
+        for additional_handler in handlers if handlers else []:
+            handler = handler.add_route(name=name, handler=additional_handler)
+
         if serialization_handler:
             handler = handler.add_route(name=name, handler=serialization_handler)
 
@@ -116,6 +270,8 @@ class HTTPService(RPCService):
         authn_handler: Optional["AuthenticationHandler"] = None,
         logging_handler: Optional["LoggingHandler"] = None,
         tracing_handler: Optional["TracingHandler"] = None,
+        handlers: Optional[List["Handler"]] = None,
+        admission_handlers: Optional[List["Handler"]] = None,
         extras: Optional[Dict] = None,
         **options
     ):
@@ -136,6 +292,12 @@ class HTTPService(RPCService):
                 for this endpoint.
             tracing_handler (TracingHandler, Optional): The tracing handler
                 for this endpoint.
+            handlers (List[Handler], Optional): The additional handlers for
+                this endpoint. They are chained, in order, after the tracing
+                handler and before the serialization handler.
+            admission_handlers (List[Handler], Optional): The admission
+                handlers (e.g. concurrency limiters) for this endpoint. They
+                are chained, in order, before the authentication handler.
             extras (Dict, Optional): Additional information about the endpoint.
             **options: Other keyword arguments for configuring this endpoint.
                 They vary according to the transport used.
@@ -161,6 +323,8 @@ class HTTPService(RPCService):
             authn_handler=authn_handler,
             logging_handler=logging_handler,
             tracing_handler=tracing_handler,
+            handlers=handlers,
+            admission_handlers=admission_handlers,
             extras=extras,
             **options
         )
@@ -185,6 +349,8 @@ class HTTPService(RPCService):
         authn_handler: Optional["AuthenticationHandler"] = None,
         logging_handler: Optional["LoggingHandler"] = None,
         tracing_handler: Optional["TracingHandler"] = None,
+        handlers: Optional[List["Handler"]] = None,
+        admission_handlers: Optional[List["Handler"]] = None,
         extras: Optional[Dict] = None,
         **options
     ):
@@ -205,6 +371,12 @@ class HTTPService(RPCService):
                 for this endpoint.
             tracing_handler (TracingHandler, Optional): The tracing handler
                 for this endpoint.
+            handlers (List[Handler], Optional): The additional handlers for
+                this endpoint. They are chained, in order, after the tracing
+                handler and before the serialization handler.
+            admission_handlers (List[Handler], Optional): The admission
+                handlers (e.g. concurrency limiters) for this endpoint. They
+                are chained, in order, before the authentication handler.
             extras (Dict, Optional): Additional information about the endpoint.
             **options: Other keyword arguments for configuring this endpoint.
                 They vary according to the transport used.
@@ -230,6 +402,8 @@ class HTTPService(RPCService):
             authn_handler=authn_handler,
             logging_handler=logging_handler,
             tracing_handler=tracing_handler,
+            handlers=handlers,
+            admission_handlers=admission_handlers,
             extras=extras,
             **options
         )
@@ -254,6 +428,8 @@ class HTTPService(RPCService):
         authn_handler: Optional["AuthenticationHandler"] = None,
         logging_handler: Optional["LoggingHandler"] = None,
         tracing_handler: Optional["TracingHandler"] = None,
+        handlers: Optional[List["Handler"]] = None,
+        admission_handlers: Optional[List["Handler"]] = None,
         extras: Optional[Dict] = None,
         **options
     ):
@@ -274,6 +450,12 @@ class HTTPService(RPCService):
                 for this endpoint.
             tracing_handler (TracingHandler, Optional): The tracing handler
                 for this endpoint.
+            handlers (List[Handler], Optional): The additional handlers for
+                this endpoint. They are chained, in order, after the tracing
+                handler and before the serialization handler.
+            admission_handlers (List[Handler], Optional): The admission
+                handlers (e.g. concurrency limiters) for this endpoint. They
+                are chained, in order, before the authentication handler.
             extras (Dict, Optional): Additional information about the endpoint.
             **options: Other keyword arguments for configuring this endpoint.
                 They vary according to the transport used.
@@ -299,6 +481,8 @@ class HTTPService(RPCService):
             authn_handler=authn_handler,
             logging_handler=logging_handler,
             tracing_handler=tracing_handler,
+            handlers=handlers,
+            admission_handlers=admission_handlers,
             extras=extras,
             **options
         )
@@ -323,6 +507,8 @@ class HTTPService(RPCService):
         authn_handler: Optional["AuthenticationHandler"] = None,
         logging_handler: Optional["LoggingHandler"] = None,
         tracing_handler: Optional["TracingHandler"] = None,
+        handlers: Optional[List["Handler"]] = None,
+        admission_handlers: Optional[List["Handler"]] = None,
         extras: Optional[Dict] = None,
         **options
     ):
@@ -343,6 +529,12 @@ class HTTPService(RPCService):
                 for this endpoint.
             tracing_handler (TracingHandler, Optional): The tracing handler
                 for this endpoint.
+            handlers (List[Handler], Optional): The additional handlers for
+                this endpoint. They are chained, in order, after the tracing
+                handler and before the serialization handler.
+            admission_handlers (List[Handler], Optional): The admission
+                handlers (e.g. concurrency limiters) for this endpoint. They
+                are chained, in order, before the authentication handler.
             extras (Dict, Optional): Additional information about the endpoint.
             **options: Other keyword arguments for configuring this endpoint.
                 They vary according to the transport used.
@@ -368,6 +560,8 @@ class HTTPService(RPCService):
             authn_handler=authn_handler,
             logging_handler=logging_handler,
             tracing_handler=tracing_handler,
+            handlers=handlers,
+            admission_handlers=admission_handlers,
             extras=extras,
             **options
         )
@@ -389,9 +583,12 @@ class HTTPService(RPCService):
         data_cls: Optional["ModelMetaCls"] = None,
         headers_cls: Optional["ModelMetaCls"] = None,
         query_args_cls: Optional["ModelMetaCls"] = None,
+        response_cls: Optional["ModelMetaCls"] = None,
         authn_handler: Optional["AuthenticationHandler"] = None,
         logging_handler: Optional["LoggingHandler"] = None,
         tracing_handler: Optional["TracingHandler"] = None,
+        handlers: Optional[List["Handler"]] = None,
+        admission_handlers: Optional[List["Handler"]] = None,
         extras: Optional[Dict] = None,
         **options
     ):
@@ -406,12 +603,21 @@ class HTTPService(RPCService):
                 of the request.
             query_args_cls (ModelMetaCls, Optional): The data model for the
                 query arguments in the URI of the request.
+            response_cls (ModelMetaCls, Optional): The data model of the
+                items in the response, which schema-aware formats (e.g.
+                Arrow) use to serialize empty lists.
             authn_handler (AuthenticationHandler, Optional): The
                 authentication handler for this endpoint.
             logging_handler (LoggingHandler, Optional): The logging handler
                 for this endpoint.
             tracing_handler (TracingHandler, Optional): The tracing handler
                 for this endpoint.
+            handlers (List[Handler], Optional): The additional handlers for
+                this endpoint. They are chained, in order, after the tracing
+                handler and before the serialization handler.
+            admission_handlers (List[Handler], Optional): The admission
+                handlers (e.g. concurrency limiters) for this endpoint. They
+                are chained, in order, before the authentication handler.
             extras (Dict, Optional): Additional information about the endpoint.
             **options: Other keyword arguments for configuring this endpoint.
                 They vary according to the transport used.
@@ -427,6 +633,7 @@ class HTTPService(RPCService):
             headers_cls=headers_cls,
             query_args_cls=query_args_cls,
             data_cls=data_cls,
+            response_cls=response_cls,
             serialization_helper=self.serialization_helper,
         )
         return self._rest_endpoint(
@@ -437,6 +644,8 @@ class HTTPService(RPCService):
             authn_handler=authn_handler,
             logging_handler=logging_handler,
             tracing_handler=tracing_handler,
+            handlers=handlers,
+            admission_handlers=admission_handlers,
             extras=extras,
             **options
         )
@@ -463,6 +672,8 @@ class HTTPService(RPCService):
         authn_handler: Optional["AuthenticationHandler"] = None,
         logging_handler: Optional["LoggingHandler"] = None,
         tracing_handler: Optional["TracingHandler"] = None,
+        handlers: Optional[List["Handler"]] = None,
+        admission_handlers: Optional[List["Handler"]] = None,
         extras: Optional[Dict] = None,
         **options
     ):
@@ -484,6 +695,12 @@ class HTTPService(RPCService):
                 for this endpoint.
             tracing_handler (TracingHandler, Optional): The tracing handler
                 for this endpoint.
+            handlers (List[Handler], Optional): The additional handlers for
+                this endpoint. They are chained, in order, after the tracing
+                handler and before the serialization handler.
+            admission_handlers (List[Handler], Optional): The admission
+                handlers (e.g. concurrency limiters) for this endpoint. They
+                are chained, in order, before the authentication handler.
             extras (Dict, Optional): Additional information about the endpoint.
             **options: Other keyword arguments for configuring this endpoint.
                 They vary according to the transport used.
@@ -523,6 +740,8 @@ class HTTPService(RPCService):
             authn_handler=authn_handler,
             logging_handler=logging_handler,
             tracing_handler=tracing_handler,
+            handlers=handlers,
+            admission_handlers=admission_handlers,
             extras=extras,
             **options
         )
@@ -536,3 +755,306 @@ class HTTPService(RPCService):
            **kwargs: Other keyword arguments. See the method `custom`.
         """
         self.custom(*args, **kwargs)(func)
+
+    def add_batch_endpoint(
+        self,
+        name: str = "batch",
+        rule: str = "/batch",
+        max_operations: int = 100,
+        max_workers: Optional[int] = None,
+        max_content_length: Optional[int] = None,
+        timeout: Optional[float] = None,
+        authn_handler: Optional["AuthenticationHandler"] = None,
+        logging_handler: Optional["LoggingHandler"] = None,
+        tracing_handler: Optional["TracingHandler"] = None,
+        handlers: Optional[List["Handler"]] = None,
+        admission_handlers: Optional[List["Handler"]] = None,
+        extras: Optional[Dict] = None,
+        **options
+    ):
+        """Adds a batch endpoint.
+
+        A batch endpoint accepts (with the HTTP `POST` verb) a JSON array of
+        operations targeting other endpoints of the service, and returns the
+        results of all the operations in a multi-status (207) response. See
+        `HTTPBatchProcessor` for more information.
+
+        Args:
+            name (str): The name of the endpoint.
+            rule (str): The rule associated with the endpoint.
+            max_operations (int): The maximum number of operations in a batch
+                request.
+            max_workers (int, Optional): The number of threads for running
+                operations concurrently. If not specified, operations are run
+                one by one, in order.
+            max_content_length (int, Optional): The maximum length of batch
+                requests. If not specified, the service-wide setting applies.
+            timeout (float, Optional): The maximum number of seconds batch
+                requests may take, including all of their operations. If not
+                specified, the service-wide setting applies.
+            authn_handler (AuthenticationHandler, Optional): The
+                authentication handler for this endpoint. Operations skip
+                the authentication handler (if any) that has authenticated
+                the batch request.
+            logging_handler (LoggingHandler, Optional): The logging handler
+                for this endpoint.
+            tracing_handler (TracingHandler, Optional): The tracing handler
+                for this endpoint.
+            handlers (List[Handler], Optional): The additional handlers for
+                this endpoint.
+            admission_handlers (List[Handler], Optional): The admission
+                handlers (e.g. concurrency limiters) for this endpoint. They
+                are chained, in order, before the authentication handler.
+            extras (Dict, Optional): Additional information about the endpoint.
+            **options: Other keyword arguments for configuring this endpoint.
+                They vary according to the transport used.
+        """
+        extras = dict(extras) if extras else {}
+        extras["batch"] = True
+
+        batch_processor = HTTPBatchProcessor(
+            svc=self, max_operations=max_operations, max_workers=max_workers
+        )
+        return self._rest_endpoint(
+            name=name,
+            rule=rule,
+            method=HTTPMethods.POST,
+            authn_handler=authn_handler,
+            logging_handler=logging_handler,
+            tracing_handler=tracing_handler,
+            handlers=handlers,
+            admission_handlers=admission_handlers,
+            max_content_length=max_content_length,
+            timeout=timeout,
+            extras=extras,
+            **options
+        )(batch_processor)
+
+    def add_metrics_endpoint(
+        self,
+        metrics_handler: "MetricsHandler",
+        name: str = "metrics",
+        rule: str = "/metrics",
+        authn_handler: Optional["AuthenticationHandler"] = None,
+        logging_handler: Optional["LoggingHandler"] = None,
+        tracing_handler: Optional["TracingHandler"] = None,
+        extras: Optional[Dict] = None,
+        **options
+    ):
+        """Adds a metrics endpoint.
+
+        A metrics endpoint returns (with the HTTP `GET` verb) the metrics a
+        metrics handler has recorded, in the Prometheus text format. See
+        `MetricsHandler` for more information. The additional handlers and
+        the admission handlers of the service do not apply to it, so that
+        scraping the metrics is not recorded (or rejected) itself.
+
+        Args:
+            metrics_handler (MetricsHandler): The metrics handler.
+            name (str): The name of the endpoint.
+            rule (str): The rule associated with the endpoint.
+            authn_handler (AuthenticationHandler, Optional): The
+                authentication handler for this endpoint.
+            logging_handler (LoggingHandler, Optional): The logging handler
+                for this endpoint.
+            tracing_handler (TracingHandler, Optional): The tracing handler
+                for this endpoint.
+            extras (Dict, Optional): Additional information about the endpoint.
+            **options: Other keyword arguments for configuring this endpoint.
+                They vary according to the transport used.
+        """
+        # The metrics package is imported here, so that services that do not
+        # expose metrics do not pay for importing it.
+        from ...metrics.handler import (  # pylint: disable=import-outside-toplevel
+            METRICS_MIME_TYPE,
+        )
+
+        def render_metrics():
+            return HTTPResponse(
+                mime_type=METRICS_MIME_TYPE, data=metrics_handler.render()
+            )
+
+        return self._rest_endpoint(
+            name=name,
+            rule=rule,
+            method=HTTPMethods.GET,
+            authn_handler=authn_handler,
+            logging_handler=logging_handler,
+            tracing_handler=tracing_handler,
+            handlers=[],
+            admission_handlers=[],
+            extras=extras,
+            **options
+        )(render_metrics)
+
+    def add_profiling_endpoint(
+        self,
+        profiling_handler: Union["ProfilingHandler", "MemoryTrackingHandler"],
+        name: str = "profile",
+        rule: str = "/profile",
+        authn_handler: Optional["AuthenticationHandler"] = None,
+        logging_handler: Optional["LoggingHandler"] = None,
+        tracing_handler: Optional["TracingHandler"] = None,
+        extras: Optional[Dict] = None,
+        **options
+    ):
+        """Adds a profiling endpoint.
+
+        A profiling endpoint returns (with the HTTP `GET` verb) the profiles
+        a profiling handler (`ProfilingHandler`) or a memory tracking handler
+        (`MemoryTrackingHandler`) has aggregated. The query argument `format`
+        selects the format of the profiles (see the methods `dump` of the
+        handlers), `endpoint` selects the profiles of an endpoint, and
+        `reset` (if set to `true`) discards the profiles once they are
+        returned. The additional handlers and the admission handlers of the
+        service do not apply to it.
+
+        Profiles reveal the internals of the service; protect the endpoint
+        with an authentication handler.
+
+        Args:
+            profiling_handler (Union[ProfilingHandler, MemoryTrackingHandler]):
+                The profiling handler.
+            name (str): The name of the endpoint.
+            rule (str): The rule associated with the endpoint.
+            authn_handler (AuthenticationHandler, Optional): The
+                authentication handler for this endpoint.
+            logging_handler (LoggingHandler, Optional): The logging handler
+                for this endpoint.
+            tracing_handler (TracingHandler, Optional): The tracing handler
+                for this endpoint.
+            extras (Dict, Optional): Additional information about the endpoint.
+            **options: Other keyword arguments for configuring this endpoint.
+                They vary according to the transport used.
+        """
+
+        def dump_profiles():
+            query_args = get_svc_ctx()["request"].query_args
+            output_format = query_args.get("format")
+            kwargs = {"endpoint": query_args.get("endpoint")}
+            if output_format:
+                kwargs["output_format"] = output_format
+            try:
+                data = profiling_handler.dump(**kwargs)
+            except ValueError:
+                return HTTPResponse(
+                    status_code=400,
+                    mime_type="text/plain",
+                    data="The format {} is not supported.".format(output_format),
+                )
+            if query_args.get("reset") == "true":
+                profiling_handler.reset()
+
+            mime_type = "text/plain"
+            if output_format == "pstats":
+                mime_type = "application/octet-stream"
+            elif output_format == "json":
+                mime_type = "application/json"
+            return HTTPResponse(mime_type=mime_type, data=data)
+
+        return self._rest_endpoint(
+            name=name,
+            rule=rule,
+            method=HTTPMethods.GET,
+            authn_handler=authn_handler,
+            logging_handler=logging_handler,
+            tracing_handler=tracing_handler,
+            handlers=[],
+            admission_handlers=[],
+            extras=extras,
+            **options
+        )(dump_profiles)
+
+
+class AsyncHTTPService(HTTPService):
+    """The base class for HTTP services with asynchronous transports.
+
+    Requests run through the asynchronous handler chain (see the method
+    `Handler.acall`), and the context of each request is kept in a context
+    variable, which every asyncio task has its own copy of.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initializes an asynchronous HTTP service.
+
+        Args:
+            *args: Other positional arguments. See `HTTPService`.
+            **kwargs: Other keyword arguments. See `HTTPService`.
+        """
+        self._loop = None
+
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _exceeds_max_content_length(
+        endpoint: "HTTPEndpoint", content_length: Optional[int]
+    ) -> bool:
+        """Checks if the declared content length of a request exceeds the
+        limit of an endpoint, in which case transports should not read the
+        payload; the foundation handler rejects the request afterwards."""
+        max_content_length = getattr(endpoint.entrypoint, "max_content_length", None)
+        return exceeds_max_content_length(content_length, max_content_length)
+
+    async def _arun(
+        self,
+        endpoint: "HTTPEndpoint",
+        request: "HTTPRequest",
+        kwargs: Dict,
+        ctx: Optional[Dict] = None,
+    ) -> Any:
+        """Runs an endpoint with a request in a new context.
+
+        Args:
+            endpoint (HTTPEndpoint): The endpoint to run.
+            request (HTTPRequest): The request.
+            kwargs (Dict): The keyword arguments (path parameters) for the
+                endpoint.
+            ctx (Dict, Optional): Additional items for the context.
+
+        Returns:
+            Any: The response of the endpoint.
+        """
+        # asyncio is imported here, so that synchronous services do not pay
+        # for importing it.
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        self._loop = asyncio.get_running_loop()
+
+        ctx = dict(ctx) if ctx else {}
+        ctx["svc"] = self
+        ctx["endpoint"] = endpoint
+        ctx["request"] = request
+
+        token = bind_svc_ctx(ctx)
+        try:
+            res = await endpoint.compiled_async_entrypoint(**kwargs)
+        except ServiceError as ex:
+            if ex.response:
+                res = ex.response
+                logger.error(ex)
+            else:
+                raise ex
+        finally:
+            unbind_svc_ctx(token)
+
+        return res
+
+    def _dispatch(
+        self,
+        endpoint: "HTTPEndpoint",
+        request: "HTTPRequest",
+        kwargs: Dict,
+        ctx: Optional[Dict] = None,
+    ) -> Any:
+        """See the method `HTTPService._dispatch`.
+
+        Requests are dispatched from the threads where synchronous endpoints
+        (e.g. batch endpoints) run, and processed in the event loop of the
+        service.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._arun(endpoint, request, kwargs, ctx=ctx), self._loop
+        )
+        return future.result()
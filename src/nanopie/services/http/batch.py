@@ -0,0 +1,358 @@
+"""This module includes the batch processor for HTTP services.
+
+A batch endpoint accepts, in one HTTP request, a list of operations (sub
+requests) targeting other endpoints of the same service, and returns the
+results of all the operations in one multi-status (207) response. The batch
+request itself goes through the authentication, logging, and tracing handlers
+of the batch endpoint; sub requests then go through the handler chains of
+their target endpoints, except that authentication handlers which have
+already authenticated the batch request do not extract and validate the
+credential again (their before_authentication and after_authentication
+methods still run for each sub request). Sub requests share
+the deadline of the batch request (see `nanopie.deadline`).
+
+A batch request is a JSON array of operations, for example:
+
+```
+[
+    {"id": "1", "endpoint": "get_user", "args": {"uid": 1}},
+    {"id": "2", "endpoint": "list_users", "query_args": {"page_size": 10}},
+    {
+        "id": "3",
+        "endpoint": "update_user",
+        "args": {"uid": 1},
+        "headers": {"Content-Type": "application/json"},
+        "body": {"user": {"age": 35}, "masks": ["age"]}
+    }
+]
+```
+
+and the response is a JSON array of results, in the same order:
+
+```
+[
+    {"id": "1", "status_code": 200, "headers": {}, "mime_type": "application/json", "body": {...}},
+    ...
+]
+```
+"""
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ...globals import get_svc_ctx
+from ...logger import logger
+from ...misc import format_error_message
+from ...misc.errors import SerializationError
+from .io import HTTPRequest, HTTPResponse
+
+INVALID_BATCH_RESPONSE = HTTPResponse(
+    status_code=400,
+    headers={},
+    mime_type="text/html",
+    data=("<h2>400 Bad Request: Invalid batch request.</h2>"),
+)
+ENDPOINT_NOT_FOUND_RESPONSE = HTTPResponse(
+    status_code=404,
+    headers={},
+    mime_type="text/html",
+    data=("<h2>404 Not Found: Endpoint does not exist.</h2>"),
+)
+INVALID_OPERATION_RESPONSE = HTTPResponse(
+    status_code=400,
+    headers={},
+    mime_type="text/html",
+    data=("<h2>400 Bad Request: Invalid operation.</h2>"),
+)
+INTERNAL_ERROR_RESPONSE = HTTPResponse(
+    status_code=500,
+    headers={},
+    mime_type="text/html",
+    data=("<h2>500 Internal Server Error</h2>"),
+)
+
+EXCLUDED_HEADERS = ("content-type", "content-length")
+
+
+def _reject_constant(constant: str):
+    """Rejects the constants (`NaN`, `Infinity` and `-Infinity`) the JSON
+    decoder accepts but JSON does not allow."""
+    raise ValueError("{} is not valid JSON.".format(constant))
+
+
+class HTTPBatchProcessor:
+    """The batch processor for HTTP services."""
+
+    def __init__(
+        self,
+        svc: "HTTPService",
+        max_operations: int = 100,
+        max_workers: Optional[int] = None,
+    ):
+        """Initializes a batch processor.
+
+        Args:
+            svc (HTTPService): The service whose endpoints the operations
+                target.
+            max_operations (int): The maximum number of operations in a
+                batch request.
+            max_workers (int, Optional): The number of threads for running
+                operations concurrently. If not specified, operations are
+                run one by one, in order.
+        """
+        if max_operations < 1:
+            raise ValueError("max_operations must be a positive integer.")
+
+        self._svc = svc
+        self._max_operations = max_operations
+        self._max_workers = max_workers
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Gets (and creates, if necessary) the thread pool for running
+        operations concurrently."""
+        if self._executor == None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="nanopie-batch"
+            )
+        return self._executor
+
+    def _parse_operations(self, request: "HTTPRequest") -> List:
+        """Parses the operations in the batch request.
+
+        Args:
+            request (HTTPRequest): The batch request.
+        """
+        try:
+            operations = json.loads(getattr(request, "text_data"))
+        except AttributeError:
+            raise AttributeError("The incoming request is not a valid HTTP " "request.")
+        except Exception as ex:
+            message = (
+                "The incoming request is not a valid batch request ({})."
+            ).format(str(ex))
+            raise SerializationError(message, response=INVALID_BATCH_RESPONSE)
+
+        if type(operations) != list or len(operations) > self._max_operations:
+            message = "The incoming request is not a valid batch request."
+            message = format_error_message(
+                message=message, max_operations=self._max_operations
+            )
+            raise SerializationError(message, response=INVALID_BATCH_RESPONSE)
+
+        return operations
+
+    @staticmethod
+    def _prepare_request(
+        operation: Dict,
+        parent_headers: Dict,
+        url: str,
+        remote_addr: Optional[str] = None,
+    ) -> Tuple[HTTPRequest, Dict]:
+        """Prepares the sub request of an operation.
+
+        Headers of the batch request (except for the content type and the
+        content length) are inherited by all the sub requests.
+
+        Args:
+            operation (Dict): An operation.
+            parent_headers (Dict): The headers of the batch request.
+            url (str): The URL of the batch request.
+            remote_addr (str, Optional): The address of the client.
+
+        Returns:
+            Tuple[HTTPRequest, Dict]: The sub request and the path parameters
+                (keyword arguments) of the operation.
+        """
+        kwargs = operation.get("args") or {}
+        query_args = operation.get("query_args") or {}
+        headers = operation.get("headers") or {}
+        if type(kwargs) != dict or type(query_args) != dict or type(headers) != dict:
+            raise ValueError("args, query_args, and headers must be objects.")
+
+        merged_headers = dict(parent_headers)
+        merged_headers.update(headers)
+
+        mime_type = None
+        for k in headers:
+            if k.lower() == "content-type":
+                mime_type = headers[k].split(";")[0].strip()
+
+        body = operation.get("body")
+        if body == None:
+            data = b""
+        elif type(body) == str:
+            data = body.encode("utf-8")
+        else:
+            data = json.dumps(body).encode("utf-8")
+
+        sub_request = HTTPRequest(
+            url=url,
+            headers=merged_headers,
+            content_length=len(data),
+            mime_type=mime_type,
+            query_args=query_args,
+            binary_data=data,
+            remote_addr=remote_addr,
+        )
+        return sub_request, kwargs
+
+    @staticmethod
+    def _is_json(data: str) -> bool:
+        """Checks if a payload is exactly one (strictly) valid JSON value, so
+        that it can be embedded in the results as is."""
+        try:
+            json.loads(data, parse_constant=_reject_constant)
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def _format_result(op_id: Any, res: Any) -> str:
+        """Formats the result of an operation as a JSON object.
+
+        JSON payloads are validated, and embedded in the result as is,
+        without being serialized again; text payloads (and JSON payloads that
+        are not valid) are embedded as strings, and binary payloads are
+        encoded in Base64.
+
+        Args:
+            op_id (Any): The ID of the operation (if any).
+            res (Any): The response of the operation.
+
+        Returns:
+            str: The JSON object.
+        """
+        if not isinstance(res, HTTPResponse):
+            if isinstance(res, (str, bytes)):
+                res = HTTPResponse(data=res)
+            else:
+                res = INTERNAL_ERROR_RESPONSE
+
+        result = {}
+        if op_id != None:
+            result["id"] = op_id
+        result["status_code"] = res.status_code
+        result["headers"] = res.headers if type(res.headers) == dict else {}
+        result["mime_type"] = res.mime_type
+
+        data = res.data
+        if data == None:
+            data = ""
+        elif isinstance(data, Iterator):
+            # Streamed payloads are embedded as a whole.
+            data = b"".join(data)
+        if isinstance(data, bytes):
+            try:
+                data = data.decode("utf-8")
+            except UnicodeDecodeError:
+                result["body_encoding"] = "base64"
+                data = base64.b64encode(data).decode("ascii")
+
+        mime_type = res.mime_type.lower() if res.mime_type else ""
+        if data and (mime_type == "application/json" or mime_type.endswith("+json")):
+            if HTTPBatchProcessor._is_json(data):
+                return '{}, "body": {}}}'.format(json.dumps(result)[:-1], data)
+
+        result["body"] = data
+        return json.dumps(result)
+
+    def _run_operation(
+        self,
+        operation: Any,
+        parent_headers: Dict,
+        url: str,
+        ctx: Dict,
+        remote_addr: Optional[str] = None,
+    ) -> str:
+        """Runs an operation.
+
+        Args:
+            operation (Any): An operation.
+            parent_headers (Dict): The headers of the batch request.
+            url (str): The URL of the batch request.
+            ctx (Dict): The items to add to the context of the sub request.
+            remote_addr (str, Optional): The address of the client.
+
+        Returns:
+            str: The result of the operation, formatted as a JSON object.
+        """
+        if type(operation) != dict:
+            return self._format_result(None, INVALID_OPERATION_RESPONSE)
+
+        op_id = operation.get("id")
+        endpoint = self._svc.endpoints.get(operation.get("endpoint"))
+        if endpoint == None:
+            return self._format_result(op_id, ENDPOINT_NOT_FOUND_RESPONSE)
+        if (endpoint.extras or {}).get("batch"):
+            return self._format_result(op_id, INVALID_OPERATION_RESPONSE)
+
+        try:
+            sub_request, kwargs = self._prepare_request(
+                operation=operation,
+                parent_headers=parent_headers,
+                url=url,
+                remote_addr=remote_addr,
+            )
+        except Exception:
+            return self._format_result(op_id, INVALID_OPERATION_RESPONSE)
+
+        try:
+            res = self._svc._dispatch(  # pylint: disable=protected-access
+                endpoint, sub_request, kwargs, ctx=ctx
+            )
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception(ex)
+            res = INTERNAL_ERROR_RESPONSE
+
+        return self._format_result(op_id, res)
+
+    def __call__(self, *args, **kwargs) -> "HTTPResponse":
+        """Runs the batch processor.
+
+        Args:
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            HTTPResponse: The multi-status response.
+        """
+        parent_ctx = get_svc_ctx()
+        request = parent_ctx.get("request")
+        operations = self._parse_operations(request)
+
+        headers = getattr(request, "headers") or {}
+        parent_headers = {
+            k: v for k, v in headers.items() if k.lower() not in EXCLUDED_HEADERS
+        }
+        url = getattr(request, "url")
+        remote_addr = getattr(request, "remote_addr", None)
+        ctx = {}
+        for key in ("authenticated", "admitted", "credential", "deadline"):
+            if parent_ctx.get(key):
+                ctx[key] = parent_ctx.get(key)
+        # Operations add their background tasks to those of the batch request.
+        if parent_ctx.get("background_tasks") != None:
+            ctx["background_tasks"] = parent_ctx.get("background_tasks")
+
+        def run(operation):
+            return self._run_operation(
+                operation=operation,
+                parent_headers=parent_headers,
+                url=url,
+                ctx=ctx,
+                remote_addr=remote_addr,
+            )
+
+        if self._max_workers and len(operations) > 1:
+            results = list(self._get_executor().map(run, operations))
+        else:
+            results = [run(operation) for operation in operations]
+
+        return HTTPResponse(
+            status_code=207,
+            mime_type="application/json",
+            data="[{}]".format(", ".join(results)),
+        )
@@ -1,4 +1,5 @@
 from functools import partial
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 try:
     import flask
@@ -8,7 +9,7 @@ except ImportError:
     FLASK_INSTALLED = False
 
 from .base import HTTPService
-from ...globals import look_up_attr, svc_ctx, endpoint
+from ...globals import bind_svc_ctx, unbind_svc_ctx
 from .io import HTTPRequest, HTTPResponse
 from ...logger import logger
 from ...misc.errors import ServiceError
@@ -37,6 +38,109 @@ class FlaskService(HTTPService):
 
         super().__init__(*args, **kwargs)
 
+    def _run(
+        self,
+        endpoint: "HTTPEndpoint",
+        request: "HTTPRequest",
+        args: Tuple,
+        kwargs: Dict,
+        ctx: Optional[Dict] = None,
+    ) -> Any:
+        """Runs an endpoint with a request in the current Flask app context.
+
+        Args:
+            endpoint (HTTPEndpoint): The endpoint to run.
+            request (HTTPRequest): The request.
+            args (Tuple): The positional arguments for the endpoint.
+            kwargs (Dict): The keyword arguments (path parameters) for the
+                endpoint.
+            ctx (Dict, Optional): Additional items for the context.
+
+        Returns:
+            Any: The response of the endpoint.
+        """
+        ctx = dict(ctx) if ctx else {}
+        ctx["svc"] = self
+        ctx["endpoint"] = endpoint
+        ctx["request"] = request
+
+        token = bind_svc_ctx(ctx)
+        try:
+            res = endpoint.compiled_entrypoint(*args, **kwargs)
+        except ServiceError as ex:
+            if ex.response:
+                res = ex.response
+                logger.error(ex)
+            else:
+                raise ex
+        finally:
+            unbind_svc_ctx(token)
+
+        return res
+
+    def run(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: Optional[int] = None,
+        reuse_port: bool = False,
+        **kwargs
+    ):
+        """Runs the service with a pre-forking server (see `PreforkServer`).
+
+        The handler chains of all endpoints are compiled before the workers
+        are forked, so that the workers share them; each worker warms up the
+        service (see the method `warmup`) before accepting connections.
+
+        Args:
+            host (str): The host to bind to.
+            port (int): The port to bind to.
+            workers (int, Optional): The number of worker processes. If not
+                specified, the number of CPUs is used.
+            reuse_port (bool): If set to True, each worker creates its own
+                listening socket with the `SO_REUSEPORT` option.
+            **kwargs: Other keyword arguments. See `PreforkServer`.
+        """
+        # The server (and wsgiref) is imported here, so that services run with
+        # other WSGI servers do not pay for importing it.
+        from .prefork import PreforkServer  # pylint: disable=import-outside-toplevel
+
+        for endpoint in self.endpoints.values():
+            endpoint.compile()
+
+        on_worker_start = kwargs.pop("on_worker_start", None)
+
+        def start_worker():
+            self.warmup()
+            if on_worker_start:
+                on_worker_start()
+
+        server = PreforkServer(
+            self._app,
+            host=host,
+            port=port,
+            workers=workers,
+            reuse_port=reuse_port,
+            on_worker_start=start_worker,
+            **kwargs
+        )
+        server.serve_forever()
+
+    def _dispatch(
+        self,
+        endpoint: "HTTPEndpoint",
+        request: "HTTPRequest",
+        kwargs: Dict,
+        ctx: Optional[Dict] = None,
+    ) -> Any:
+        """See the method `HTTPService._dispatch`.
+
+        Each request is run in a new Flask app context, so that requests can
+        be dispatched from any thread.
+        """
+        with self._app.app_context():
+            return self._run(endpoint, request, (), kwargs, ctx=ctx)
+
     def add_endpoint(self, endpoint: "HTTPEndpoint", **kwargs):
         """Adds an HTTP endpoint.
 
@@ -49,40 +153,33 @@ class FlaskService(HTTPService):
         def view_func(*args, **kwargs):
             request = HTTPRequest(
                 url=partial(getattr, flask.request, "url"),
-                headers=partial(
-                    lambda x: dict(x()), partial(getattr, flask.request, "headers")
-                ),
+                headers=partial(getattr, flask.request, "headers"),
                 content_length=partial(getattr, flask.request, "content_length"),
                 mime_type=partial(getattr, flask.request, "mimetype"),
                 query_args=partial(getattr, flask.request, "args"),
-                binary_data=partial(flask.request.get_data),
-                text_data=partial(flask.request.get_data, as_text=True),
+                binary_data=partial(flask.request.get_data, cache=True),
+                stream=partial(getattr, flask.request, "stream"),
+                remote_addr=partial(getattr, flask.request, "remote_addr"),
             )
-            ctx = {}
-            flask.g._svc_ctx = ctx  # pylint: disable=protected-access
-            svc_ctx.update_proxy_func(
-                partial(look_up_attr, ctx=flask.g, name="_svc_ctx")
+            tasks = []
+            res = svc._run(  # pylint: disable=protected-access
+                endpoint, request, args, kwargs, ctx={"background_tasks": tasks}
             )
 
-            ctx["svc"] = svc
-            ctx["endpoint"] = endpoint
-            ctx["request"] = request
-
-            try:
-                res = endpoint.entrypoint(*args, **kwargs)
-            except ServiceError as ex:
-                if ex.response:
-                    res = ex.response
-                    logger.error(ex)
-                else:
-                    raise ex
-
             if isinstance(res, HTTPResponse):
-                flask_res = flask.make_response(
-                    (res.data, res.status_code, res.headers)
-                )
+                data = res.data
+                if isinstance(data, Iterator):
+                    # Streamed payloads are wrapped in a response object, as
+                    # older versions of Flask do not accept iterators here.
+                    data = flask.Response(data)
+                flask_res = flask.make_response((data, res.status_code, res.headers))
                 flask_res.mimetype = res.mime_type
-                return flask_res
+                res = flask_res
+
+            if tasks:
+                # Background tasks run once the response has been sent.
+                res = flask.make_response(res)
+                res.call_on_close(partial(svc.task_runner.submit, tasks))
 
             return res
 
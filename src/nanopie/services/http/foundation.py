@@ -2,15 +2,27 @@
 
 Foundation handlers server as entrypoint for handler chains in all endpoints.
 It performs a number of basic functionalities, such as checking the
-content length of the request, and pass the baton to other chained handlers.
+content length of the request, setting the deadline of the request, and pass
+the baton to other chained handlers.
+
+The deadline of a request (see `nanopie.deadline`) is set from the timeout
+the caller specifies, with the `X-Request-Timeout` header (in seconds) or the
+`grpc-timeout` header (e.g. `500m`), and the timeout of the endpoint,
+whichever is shorter. Requests whose deadlines pass are answered with a
+`504 Gateway Timeout` response: asynchronous transports cancel the rest of
+the handler chain, and synchronous ones skip the stages of the chain that
+have not started yet (e.g. the function of the endpoint).
 """
 
-from typing import Optional
+import re
+import time
+from typing import Callable, Dict, Optional
 
-from ...globals import request
+from ...deadline import check_deadline
+from ...globals import get_svc_ctx
 from ...handler import Handler
 from ...misc import format_error_message
-from ...misc.errors import FoundationError
+from ...misc.errors import DeadlineExceededError, FoundationError
 from .io import HTTPResponse
 
 REQUEST_TOO_LARGE_RESPONSE = HTTPResponse(
@@ -19,40 +31,287 @@ REQUEST_TOO_LARGE_RESPONSE = HTTPResponse(
     mime_type="text/html",
     data="<h2>400 Bad Request: request is too large.</h2>",
 )
+INVALID_CONTENT_LENGTH_RESPONSE = HTTPResponse(
+    status_code=400,
+    headers={},
+    mime_type="text/html",
+    data="<h2>400 Bad Request: the Content-Length header is invalid.</h2>",
+)
+DEADLINE_EXCEEDED_RESPONSE = HTTPResponse(
+    status_code=504,
+    headers={},
+    mime_type="text/html",
+    data="<h2>504 Gateway Timeout: the deadline of the request has passed.</h2>",
+)
+
+TIMEOUT_HEADER = "X-Request-Timeout"
+GRPC_TIMEOUT_HEADER = "grpc-timeout"
+GRPC_TIMEOUT_PATTERN = re.compile(r"^(\d{1,8})([HMSmun])$")
+GRPC_TIMEOUT_UNITS = {
+    "H": 3600.0,
+    "M": 60.0,
+    "S": 1.0,
+    "m": 1e-3,
+    "u": 1e-6,
+    "n": 1e-9,
+}
+
+
+def parse_timeout(headers: Optional["HTTPHeaders"]) -> Optional[float]:
+    """Parses the timeout the caller specifies for a request.
+
+    Args:
+        headers (HTTPHeaders, Optional): The headers of the request.
+
+    Returns:
+        float: The timeout (in seconds), or `None` if the caller does not
+            specify one (or specifies an invalid one).
+    """
+    if not headers:
+        return None
+
+    value = headers.get(TIMEOUT_HEADER)
+    if value != None:
+        try:
+            timeout = float(value)
+        except ValueError:
+            return None
+        return timeout if timeout >= 0 else None
+
+    value = headers.get(GRPC_TIMEOUT_HEADER)
+    if value != None:
+        match = GRPC_TIMEOUT_PATTERN.match(value)
+        if match:
+            return int(match.group(1)) * GRPC_TIMEOUT_UNITS[match.group(2)]
+
+    return None
+
+
+def exceeds_max_content_length(
+    content_length: Optional[int], max_content_length: Optional[int]
+) -> bool:
+    """Checks if the length of a payload reaches the maximum content length
+    (which is exclusive), whether the length is declared (Content-Length) or
+    counted as the payload is read.
+
+    Args:
+        content_length (int, Optional): The length of the payload.
+        max_content_length (int, Optional): The maximum content length, or
+            None if payloads of any length are accepted.
+
+    Returns:
+        bool: True if the payload is too large.
+    """
+    return bool(
+        content_length
+        and max_content_length != None
+        and content_length >= max_content_length
+    )
+
+
+def parse_content_length(value: Optional[str]) -> Optional[int]:
+    """Parses the Content-Length header of a request.
+
+    Args:
+        value (str, Optional): The value of the header.
+
+    Returns:
+        int: The length of the payload, or `None` if the header is absent.
+
+    Raises:
+        ValueError: The header is not a non-negative integer.
+    """
+    if not value:
+        return None
+
+    content_length = int(value)
+    if content_length < 0:
+        raise ValueError("The Content-Length header is negative.")
+    return content_length
 
 
 class HTTPFoundationHandler(Handler):
     """The foundation handler for HTTP services."""
 
-    def __init__(self, max_content_length: Optional[int] = 6000):
+    def __init__(
+        self, max_content_length: Optional[int] = 6000, timeout: Optional[float] = None
+    ):
         """Initializes an HTTP foundation handler.
 
         Args:
             max_content_length (int, Optional): The maximum content length of
-                the request.
+                the request. If set to None, requests of any length are
+                accepted.
+            timeout (float, Optional): The maximum number of seconds the
+                request may take. If set to None, requests only have the
+                deadlines their callers specify (if any).
         """
         self._max_content_length = max_content_length
+        self._timeout = timeout
 
         super().__init__()
 
-    def __call__(self, *args, **kwargs):
-        """Runs the foundation handler.
+    @property
+    def max_content_length(self) -> Optional[int]:
+        """Returns the maximum content length of the request."""
+        return self._max_content_length
 
-         Args:
-            *args: Arbitrary positional arguments.
-            **kwargs: Arbitrary named arguments.
+    @property
+    def timeout(self) -> Optional[float]:
+        """Returns the maximum number of seconds the request may take."""
+        return self._timeout
 
-        Returns:
-            Any: Any object.
+    def _check_request(self, request: "HTTPRequest"):
+        """Checks the content length of the request.
+
+        Args:
+            request (HTTPRequest): The request.
         """
         try:
             content_length = getattr(request, "content_length")
         except AttributeError:
             raise RuntimeError("The incoming request is not a valid HTTP " "request.")
 
-        if content_length and content_length >= self._max_content_length:
+        if exceeds_max_content_length(content_length, self._max_content_length):
             message = "Request is too large."
             message = format_error_message(message, provided_size=content_length)
             raise FoundationError(message, response=REQUEST_TOO_LARGE_RESPONSE)
 
-        return super().__call__(*args, **kwargs)
+    def _set_deadline(self, ctx: Dict, request: "HTTPRequest") -> Optional[float]:
+        """Sets the deadline of the request in its context. Requests that
+        already have a deadline (e.g. operations dispatched by a batch
+        request) keep it, unless the new one is earlier.
+
+        Returns:
+            float: The deadline, or `None` if the request has no deadline.
+        """
+        timeout = parse_timeout(getattr(request, "headers", None))
+        if self._timeout != None and (timeout == None or self._timeout < timeout):
+            timeout = self._timeout
+
+        deadline = ctx.get("deadline")
+        if timeout != None:
+            new_deadline = time.monotonic() + timeout
+            if deadline == None or new_deadline < deadline:
+                deadline = ctx["deadline"] = new_deadline
+        return deadline
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the foundation handler.
+
+         Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary named arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        request = ctx.get("request")
+        self._check_request(request)
+        if self._set_deadline(ctx, request) == None:
+            return call_next(*args, **kwargs)
+
+        # Synchronous handlers cannot be interrupted; the deadline is checked
+        # between stages instead (see the function `check_deadline`).
+        try:
+            check_deadline()
+            return call_next(*args, **kwargs)
+        except DeadlineExceededError:
+            return DEADLINE_EXCEEDED_RESPONSE
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the foundation handler asynchronously.
+
+         Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary named arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        request = ctx.get("request")
+        self._check_request(request)
+        deadline = self._set_deadline(ctx, request)
+        if deadline == None:
+            return await call_next(*args, **kwargs)
+
+        # asyncio is imported here, so that synchronous services do not pay
+        # for importing it.
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        try:
+            return await asyncio.wait_for(
+                call_next(*args, **kwargs), max(0.0, deadline - time.monotonic())
+            )
+        except DeadlineExceededError:
+            return DEADLINE_EXCEEDED_RESPONSE
+        except asyncio.TimeoutError:
+            # The handlers (or the function) of the endpoint may time out on
+            # their own before the deadline.
+            if time.monotonic() < deadline:
+                raise
+            return DEADLINE_EXCEEDED_RESPONSE
+
+
+class HTTPPayloadHandler(Handler):
+    """The handler that reads the payloads of requests which transports defer
+    (see `ASGIService`), so that the admission handlers chained before it
+    can reject requests before their payloads are read.
+
+    Transports defer a payload by adding a coroutine function, `read_payload`,
+    to the context of the request; it returns a response if the request
+    should be rejected instead (e.g. its payload is too large).
+    """
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the payload handler.
+
+        Asynchronous transports run the handler (and the rest of the chain)
+        synchronously, in an executor, if a handler chained before it does
+        not support asynchronous calls; the payload is then read on the
+        event loop of the service, as operations of batch requests are
+        dispatched (see the method `AsyncHTTPService._dispatch`).
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary named arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        ctx = get_svc_ctx()
+        read_payload = ctx.pop("read_payload", None)
+        if read_payload != None:
+            # asyncio is imported here, so that synchronous services do not
+            # pay for importing it.
+            import asyncio  # pylint: disable=import-outside-toplevel
+
+            loop = ctx["svc"]._loop  # pylint: disable=protected-access
+            future = asyncio.run_coroutine_threadsafe(read_payload(), loop)
+            res = future.result()
+            if res != None:
+                return res
+        return call_next(*args, **kwargs)
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the payload handler asynchronously.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary named arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        read_payload = get_svc_ctx().pop("read_payload", None)
+        if read_payload != None:
+            res = await read_payload()
+            if res != None:
+                return res
+        return await call_next(*args, **kwargs)
@@ -2,12 +2,82 @@
 in HTTP services.
 """
 
-from typing import Any, Callable, Dict, Optional, Union
+from collections.abc import Mapping
+import io
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Union
 
 from ..base import RPCEndpoint, RPCParsedRequest, RPCRequest, RPCResponse
 from ...model import Model
 
 
+class HTTPHeaders(Mapping):
+    """A read-only, case-insensitive map of HTTP headers.
+
+    Header names keep their original case when iterated over; look-ups
+    (e.g. `headers.get("content-type")`) ignore cases and cost a single
+    Dict look-up.
+    """
+
+    __slots__ = ("_dikt", "_lowered")
+
+    def __init__(self, headers: Optional[Any] = None):
+        """Initializes a map of HTTP headers.
+
+        Args:
+            headers (Any, Optional): The headers, as a Dict or any object with
+                an `items` method (e.g. the headers object of a web
+                framework). If a header is specified more than once, the last
+                value is used.
+        """
+        self._dikt = {}
+        self._lowered = {}
+        if headers:
+            for k, v in headers.items():
+                self._dikt[k] = v
+                self._lowered[k.lower()] = v
+
+    def __getitem__(self, key: str) -> Any:
+        """Gets the value of a header."""
+        return self._lowered[key.lower()]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Gets the value of a header, or the default value if the header is
+        not present."""
+        return self._lowered.get(key.lower(), default)
+
+    def __contains__(self, key: Any) -> bool:
+        """Checks if a header is present."""
+        return type(key) == str and key.lower() in self._lowered
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over the header names."""
+        return iter(self._dikt)
+
+    def __len__(self) -> int:
+        """Returns the number of headers."""
+        return len(self._dikt)
+
+    def __repr__(self) -> str:
+        """Returns the representation of the headers."""
+        return "HTTPHeaders({!r})".format(self._dikt)
+
+
+def as_http_headers(headers: Any) -> "HTTPHeaders":
+    """Converts headers into a case-insensitive map of HTTP headers.
+
+    Args:
+        headers (Any): The headers, as an `HTTPHeaders`, a Dict, or any
+            object with an `items` method.
+
+    Returns:
+        HTTPHeaders: The headers; `HTTPHeaders` objects are returned as they
+            are.
+    """
+    if isinstance(headers, HTTPHeaders):
+        return headers
+    return HTTPHeaders(headers)
+
+
 class HTTPRequest(RPCRequest):
     """The class for HTTP requests."""
 
@@ -19,6 +89,9 @@ class HTTPRequest(RPCRequest):
         "_query_args",
         "_binary_data",
         "_text_data",
+        "_buffer",
+        "_stream",
+        "_remote_addr",
     )
 
     def __init__(
@@ -28,11 +101,22 @@ class HTTPRequest(RPCRequest):
         content_length: Union[int, Callable],
         mime_type: Union[str, Callable],
         query_args: Union[Dict, Callable],
-        binary_data: Callable,
-        text_data: Callable,
+        binary_data: Union[bytes, Callable],
+        text_data: Optional[Union[str, Callable]] = None,
+        stream: Optional[Union[BinaryIO, Callable]] = None,
+        remote_addr: Optional[Union[str, Callable]] = None,
     ):
         """Initializes an HTTP request.
 
+        The payload of the request is resolved at most once per request. It
+        is kept as a buffer (`memoryview`) so that binary consumers can read
+        it without copying; the text payload is decoded (UTF-8) from the
+        same buffer only when it is first accessed.
+
+        Other attributes of the request are resolved on first access as well
+        and cached for the request. Headers are kept as a case-insensitive
+        map (see `HTTPHeaders`).
+
         Args:
             url (Union[str, Callable]): The URL of the request, or a callable
                 to get the URL of the request.
@@ -46,10 +130,20 @@ class HTTPRequest(RPCRequest):
             query_args (Union[Dict, Callable]): The query arguments in the URI
                 of the request, or a callable to get the query arguments in
                 the URI of the request.
-            binary_data (Callable): A callable to get the binary data payload
-                of the request.
-            text_data (Callable): A callable to get the text data payload of
+            binary_data (Union[bytes, Callable]): The binary data payload of
+                the request, or a callable to get the binary data payload of
                 the request.
+            text_data (Union[str, Callable], Optional): The text data payload
+                of the request, or a callable to get the text data payload of
+                the request. If not specified, the text data payload is
+                decoded from the binary data payload.
+            stream (Union[BinaryIO, Callable], Optional): A file-like object
+                for reading the payload of the request incrementally, or a
+                callable to get the file-like object. If not specified, the
+                payload is read from the binary data payload.
+            remote_addr (Union[str, Callable], Optional): The address (IP)
+                of the client, or a callable to get the address of the
+                client.
         """
         self._url = url
         self._headers = headers
@@ -58,6 +152,9 @@ class HTTPRequest(RPCRequest):
         self._query_args = query_args
         self._binary_data = binary_data
         self._text_data = text_data
+        self._buffer = None
+        self._stream = stream
+        self._remote_addr = remote_addr
 
     @staticmethod
     def _helper(v: Any) -> Any:
@@ -77,37 +174,94 @@ class HTTPRequest(RPCRequest):
     @property
     def url(self) -> str:
         """Returns the URL of the request."""
-        return self._helper(self._url)
+        if callable(self._url):
+            self._url = self._url()
+        return self._url
 
     @property
-    def headers(self) -> Dict:
-        """Returns the headers of the request."""
-        return self._helper(self._headers)
+    def headers(self) -> "HTTPHeaders":
+        """Returns the headers of the request, as a case-insensitive map."""
+        if not isinstance(self._headers, HTTPHeaders):
+            self._headers = as_http_headers(self._helper(self._headers))
+        return self._headers
 
     @property
     def content_length(self) -> int:
         """Returns the content length of the request."""
-        return self._helper(self._content_length)
+        if callable(self._content_length):
+            self._content_length = self._content_length()
+        return self._content_length
 
     @property
     def mime_type(self) -> str:
         """Returns the mime type of the request."""
-        return self._helper(self._mime_type)
+        if callable(self._mime_type):
+            self._mime_type = self._mime_type()
+        return self._mime_type
+
+    @property
+    def remote_addr(self) -> Optional[str]:
+        """Returns the address (IP) of the client, if known. Behind proxies,
+        it is the address of the nearest proxy."""
+        if callable(self._remote_addr):
+            self._remote_addr = self._remote_addr()
+        return self._remote_addr
 
     @property
     def query_args(self) -> Dict:
         """Returns the query arguments in the URI of the request."""
-        return self._helper(self._query_args)
+        if callable(self._query_args):
+            self._query_args = self._query_args()
+        return self._query_args
+
+    @property
+    def buffer(self) -> memoryview:
+        """Returns the payload of the request as a buffer.
+
+        The payload is resolved on first access and cached for the request.
+        """
+        if self._buffer == None:
+            data = self._helper(self._binary_data)
+            self._buffer = memoryview(data if data != None else b"")
+        return self._buffer
+
+    @property
+    def stream(self) -> BinaryIO:
+        """Returns a file-like object for reading the payload of the request
+        incrementally.
+
+        Streams provided by transports can only be consumed once; the
+        payload is no longer available as a buffer (or as binary/text data)
+        after it is read from the stream.
+        """
+        if self._stream == None:
+            return io.BytesIO(self.buffer)
+        return self._helper(self._stream)
 
     @property
     def binary_data(self) -> bytes:
-        """Returns the binary data payload of the request."""
-        return self._helper(self._binary_data)
+        """Returns the binary data payload of the request.
+
+        The underlying object of the buffer is returned as is (without
+        copying) if it is a bytes object.
+        """
+        buffer = self.buffer
+        if type(buffer.obj) == bytes:
+            return buffer.obj
+        return buffer.tobytes()
 
     @property
     def text_data(self) -> str:
-        """Returns the text data payload of the request."""
-        return self._helper(self._text_data)
+        """Returns the text data payload of the request.
+
+        The payload is decoded on first access and cached for the request.
+        """
+        if type(self._text_data) != str:
+            if self._text_data != None:
+                self._text_data = self._helper(self._text_data)
+            else:
+                self._text_data = str(self.buffer, "utf-8")
+        return self._text_data
 
 
 class HTTPParsedRequest(RPCParsedRequest):
@@ -238,20 +392,26 @@ class HTTPResponse(RPCResponse):
         self._mime_type = mime_type
 
     @property
-    def data(self) -> Optional[Union[str, bytes, "Model"]]:
+    def data(self) -> Optional[Union[str, bytes, "Model", Iterator[bytes]]]:
         """Returns the data payload of the HTTP response."""
         return self._data
 
     @data.setter
-    def data(self, data: Optional[Union[str, bytes, "Model"]]):
-        """Sets the data payload of the HTTP response."""
+    def data(self, data: Optional[Union[str, bytes, "Model", Iterator[bytes]]]):
+        """Sets the data payload of the HTTP response.
+
+        The payload may be an iterator of bytes (e.g. a generator), which
+        transports stream (without a Content-Length header) as it is
+        consumed.
+        """
         if (
             data != None
             and type(data) not in [str, bytes]
-            and not isinstance(data, Model)
+            and not isinstance(data, (Model, Iterator))
         ):
             raise RuntimeError(
-                "HTTP Response must have a str, a bytes or a Model as data."
+                "HTTP Response must have a str, a bytes, a Model or an "
+                "iterator of bytes as data."
             )
 
         self._data = data
@@ -259,7 +419,10 @@ class HTTPResponse(RPCResponse):
     @property
     def is_processed(self):
         """Returns True if the headers or data payload are not of the basic data types."""
-        if type(self._headers) != dict or type(self._data) not in [str, bytes]:
+        if type(self._headers) != dict or (
+            type(self._data) not in [str, bytes]
+            and not isinstance(self._data, Iterator)
+        ):
             return False
 
         return True
@@ -0,0 +1,349 @@
+"""This module includes a pre-forking server for WSGI based HTTP services.
+
+The server imports the application once in a master process, and then forks
+a number of worker processes, which share the imported code (copy-on-write)
+and serve requests in parallel. The master process supervises the workers,
+and restarts them if they exit unexpectedly. For example:
+
+```python
+svc = WSGIService()
+
+...
+
+if __name__ == "__main__":
+    svc.run(host="0.0.0.0", port=8080, workers=4)
+```
+
+By default, the workers accept connections from a listening socket the
+master process creates. With `reuse_port`, each worker creates its own
+listening socket with the `SO_REUSEPORT` option instead, and the kernel
+balances connections across the workers.
+
+Each worker serves requests one at a time with the WSGI server in the
+Python standard library (`wsgiref`); this server is best suited for
+deployments behind a reverse proxy.
+
+The server requires `os.fork`, which is not available on Windows.
+"""
+
+import os
+import signal
+import socket
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from ...logger import logger
+
+# Workers exiting within this many seconds after they start are restarted
+# after a delay, so that a worker that crashes on start does not keep the
+# master busy.
+MIN_WORKER_LIFETIME = 1.0
+# The interval (in seconds) at which the master checks the workers, and the
+# workers check if they should exit.
+POLL_INTERVAL = 0.1
+# The number of seconds the master waits for workers to exit before killing
+# them.
+GRACEFUL_TIMEOUT = 10.0
+# The signals workers handle on their own.
+WORKER_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class _RequestHandler(WSGIRequestHandler):
+    """The request handler for the WSGI server; requests are logged with the
+    nanopie logger."""
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Logs a message."""
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class _WSGIServer(WSGIServer):
+    """The WSGI server of workers.
+
+    Workers sharing a listening socket are all woken up when a connection
+    arrives; the socket is non-blocking, so that the workers that do not get
+    the connection go back to waiting (and checking if they should exit),
+    instead of blocking in `accept`.
+    """
+
+    def get_request(self) -> Tuple[socket.socket, Any]:
+        """Accepts a connection; connections are blocking."""
+        conn, addr = self.socket.accept()
+        conn.setblocking(True)
+        return conn, addr
+
+
+def create_listener(
+    host: str,
+    port: int,
+    reuse_port: bool = False,
+    backlog: int = 2048,
+    listen: bool = True,
+) -> socket.socket:
+    """Creates a listening socket.
+
+    Args:
+        host (str): The host to bind to.
+        port (int): The port to bind to. If set to 0, a free port is picked.
+        reuse_port (bool): If set to True, the socket is created with the
+            `SO_REUSEPORT` option.
+        backlog (int): The maximum number of pending connections.
+        listen (bool): If set to False, the socket is bound only.
+
+    Returns:
+        socket.socket: The socket.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            if not hasattr(socket, "SO_REUSEPORT"):
+                raise RuntimeError("SO_REUSEPORT is not supported on this platform.")
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        if listen:
+            sock.listen(backlog)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+class PreforkServer:
+    """A pre-forking server for WSGI applications."""
+
+    def __init__(
+        self,
+        app: Callable,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: Optional[int] = None,
+        reuse_port: bool = False,
+        backlog: int = 2048,
+        on_worker_start: Optional[Callable] = None,
+    ):
+        """Initializes a pre-forking server.
+
+        Args:
+            app (Callable): A WSGI application.
+            host (str): The host to bind to.
+            port (int): The port to bind to. If set to 0, a free port is
+                picked.
+            workers (int, Optional): The number of worker processes. If not
+                specified, the number of CPUs is used.
+            reuse_port (bool): If set to True, each worker creates its own
+                listening socket with the `SO_REUSEPORT` option.
+            backlog (int): The maximum number of pending connections.
+            on_worker_start (Callable, Optional): A function to run in each
+                worker process before the worker accepts connections.
+        """
+        if workers != None and workers < 1:
+            raise ValueError("workers must be a positive integer.")
+
+        self._app = app
+        self._host = host
+        self._port = port
+        self._workers_count = workers or os.cpu_count() or 1
+        self._reuse_port = reuse_port
+        self._backlog = backlog
+        self._on_worker_start = on_worker_start
+
+        self._socket = None
+        self._workers = {}  # type: Dict[int, float]
+        self._running = False
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Returns the address (host and port) the server binds to."""
+        if self._socket == None:
+            return self._host, self._port
+        return self._socket.getsockname()[:2]
+
+    @property
+    def workers(self) -> Dict[int, float]:
+        """Returns the process IDs of the running workers, and the time they
+        start at (see `time.monotonic`)."""
+        return dict(self._workers)
+
+    def bind(self):
+        """Binds the server.
+
+        In the `reuse_port` mode, the master process binds a socket without
+        listening on it, so that the port is reserved (and resolved, if the
+        port is 0) for the workers.
+        """
+        if self._socket == None:
+            self._socket = create_listener(
+                self._host,
+                self._port,
+                reuse_port=self._reuse_port,
+                backlog=self._backlog,
+                listen=not self._reuse_port,
+            )
+
+    def _make_server(self, sock: socket.socket) -> "WSGIServer":
+        """Makes a WSGI server that accepts connections from a socket."""
+        server = _WSGIServer(self.address, _RequestHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = sock
+        server.server_address = sock.getsockname()
+        host, port = server.server_address[:2]
+        server.server_name = socket.getfqdn(host)
+        server.server_port = port
+        server.setup_environ()
+        server.set_app(self._app)
+        return server
+
+    def _setup_worker_signals(self):
+        """Sets up the signal handlers of a worker process, and unblocks the
+        signals (see the method `_spawn_worker`).
+
+        On `SIGTERM`, the worker finishes the request in progress (if any)
+        and exits.
+        """
+        self._running = True
+
+        def exit_worker(signum, frame):  # pylint: disable=unused-argument
+            self._running = False
+
+        signal.signal(signal.SIGTERM, exit_worker)
+        # The master process stops the workers on interrupts.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, WORKER_SIGNALS)
+
+    def _run_worker(self):
+        """Runs a worker process."""
+        if self._reuse_port:
+            host, port = self.address
+            sock = create_listener(host, port, reuse_port=True, backlog=self._backlog)
+        else:
+            sock = self._socket
+        sock.setblocking(False)
+
+        if self._on_worker_start:
+            self._on_worker_start()
+
+        server = self._make_server(sock)
+        server.timeout = POLL_INTERVAL
+        logger.info("Worker {} is ready.".format(os.getpid()))
+        while self._running:
+            server.handle_request()
+
+    def _spawn_worker(self):
+        """Forks a worker process.
+
+        The signals workers handle are blocked until the worker has set up
+        its own handlers, so that a signal arriving right after the fork does
+        not run the handlers of the master process in the worker.
+        """
+        signal.pthread_sigmask(signal.SIG_BLOCK, WORKER_SIGNALS)
+        try:
+            pid = os.fork()
+        except BaseException:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, WORKER_SIGNALS)
+            raise
+
+        if pid == 0:
+            code = 0
+            try:
+                self._setup_worker_signals()
+                self._run_worker()
+            except SystemExit as ex:
+                code = ex.code if type(ex.code) == int else 0
+            except BaseException:  # pylint: disable=broad-except
+                logger.exception("Worker {} has failed.".format(os.getpid()))
+                code = 1
+            finally:
+                os._exit(code)  # pylint: disable=protected-access
+
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, WORKER_SIGNALS)
+        self._workers[pid] = time.monotonic()
+
+    def stop(self):
+        """Stops the server; the workers are asked to exit."""
+        self._running = False
+        for pid in self._workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _stop_workers(self):
+        """Stops the workers, and waits for them to exit."""
+        self.stop()
+
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while self._workers:
+            for pid in list(self._workers):
+                try:
+                    exited, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    exited = pid
+                if exited:
+                    del self._workers[pid]
+
+            if self._workers and time.monotonic() > deadline:
+                for pid in self._workers:
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                deadline = float("inf")
+            time.sleep(POLL_INTERVAL)
+
+    def serve_forever(self):
+        """Runs the server until it is stopped (e.g. with `SIGTERM` or
+        `SIGINT`)."""
+        if not hasattr(os, "fork"):
+            raise RuntimeError(
+                "The pre-forking server requires os.fork, which is not "
+                "available on this platform."
+            )
+
+        self.bind()
+        host, port = self.address
+        logger.info(
+            "Serving on http://{}:{} with {} worker(s).".format(
+                host, port, self._workers_count
+            )
+        )
+
+        def stop_server(signum, frame):  # pylint: disable=unused-argument
+            self.stop()
+
+        previous_handlers = {
+            signum: signal.signal(signum, stop_server)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        self._running = True
+        try:
+            while self._running:
+                while self._running and len(self._workers) < self._workers_count:
+                    self._spawn_worker()
+
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    pid = 0
+                if pid == 0:
+                    time.sleep(POLL_INTERVAL)
+                    continue
+
+                started_at = self._workers.pop(pid, None)
+                if started_at == None or not self._running:
+                    continue
+
+                logger.error(
+                    "Worker {} has exited unexpectedly (status {}); "
+                    "restarting.".format(pid, status)
+                )
+                if time.monotonic() - started_at < MIN_WORKER_LIFETIME:
+                    time.sleep(MIN_WORKER_LIFETIME)
+        finally:
+            self._stop_workers()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            self._socket.close()
+            self._socket = None
@@ -0,0 +1,106 @@
+from functools import partial
+from typing import Iterator
+
+try:
+    import quart
+
+    QUART_INSTALLED = True
+except ImportError:
+    QUART_INSTALLED = False
+
+from .base import AsyncHTTPService, iter_chunks
+from .io import HTTPRequest, HTTPResponse
+
+
+class QuartService(AsyncHTTPService):
+    """The class for HTTP services with Quart apps as transport."""
+
+    def __init__(self, *args, app: "quart.Quart", **kwargs):
+        """Initializes a Quart based HTTP service.
+
+        Args:
+            app (quart.Quart): A Quart app.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        if not QUART_INSTALLED:
+            raise ImportError(
+                "The quart (https://pypi.org/project/quart/)"
+                "package is required to use quart with nanopie. "
+                "To install this package, run "
+                "`pip install quart`."
+            )
+
+        self._app = app
+
+        super().__init__(*args, **kwargs)
+
+    def add_endpoint(self, endpoint: "HTTPEndpoint", **kwargs):
+        """Adds an HTTP endpoint.
+
+        Args:
+            endpoint (HTTPEndpoint): An HTTP endpoint.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        svc = self
+
+        async def view_func(**kwargs):
+            quart_request = (
+                quart.request._get_current_object()  # pylint: disable=protected-access
+            )
+
+            # The payload is read before the handler chain runs, as handlers
+            # access it synchronously.
+            if svc._exceeds_max_content_length(  # pylint: disable=protected-access
+                endpoint, quart_request.content_length
+            ):
+                data = b""
+            else:
+                data = await quart_request.get_data(cache=True)
+
+            request = HTTPRequest(
+                url=partial(getattr, quart_request, "url"),
+                headers=partial(getattr, quart_request, "headers"),
+                content_length=partial(getattr, quart_request, "content_length"),
+                mime_type=partial(getattr, quart_request, "mimetype"),
+                query_args=partial(getattr, quart_request, "args"),
+                binary_data=data,
+                remote_addr=partial(getattr, quart_request, "remote_addr"),
+            )
+            tasks = []
+            res = await svc._arun(  # pylint: disable=protected-access
+                endpoint, request, kwargs, ctx={"background_tasks": tasks}
+            )
+
+            if tasks:
+                # Background tasks are started once the response is returned
+                # to Quart; they run on the event loop (or the thread pool)
+                # while Quart sends it.
+                svc.task_runner.submit_async(tasks)
+
+            if isinstance(res, HTTPResponse):
+                data = res.data
+                if isinstance(data, Iterator):
+                    # Streamed payloads are wrapped in a response object; their
+                    # chunks are produced off the event loop.
+                    data = quart.Response(iter_chunks(data))
+                quart_res = await quart.make_response(
+                    (data, res.status_code, res.headers)
+                )
+                quart_res.mimetype = res.mime_type
+                return quart_res
+
+            return res
+
+        self._app.add_url_rule(
+            endpoint.rule,
+            endpoint=endpoint.name,
+            view_func=view_func,
+            methods=[endpoint.method],
+            **kwargs
+        )
+
+        if self.endpoints.get(endpoint.name) == None:
+            self.endpoints[endpoint.name] = endpoint
+        else:
+            raise RuntimeError("An endpoint with the same name already exists.")
@@ -0,0 +1,240 @@
+"""This module includes the router nanopie uses in framework-free HTTP
+services (e.g. `ASGIService`).
+
+The router matches the path and the method of an HTTP request against the
+rules of endpoints. Rules use the same syntax as Flask, i.e. a path with
+variable parts marked as `<converter:name>` (or simply `<name>`), such as
+`/users/<int:uid>`. Custom endpoints, whose rules end with a verb (e.g.
+`/users/<int:uid>:verify`), are supported as well.
+
+Supported converters are `string` (the default), `int`, `float`, `path`,
+and `uuid`. Note that, unlike in Flask, `string` and `path` values cannot
+include colons, which separate paths from verbs in custom endpoints.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+import uuid
+
+from .io import HTTPResponse
+
+NOT_FOUND_RESPONSE = HTTPResponse(
+    status_code=404,
+    headers={},
+    mime_type="text/html",
+    data="<h2>404 Not Found: The requested URL was not found on the server.</h2>",
+)
+METHOD_NOT_ALLOWED_RESPONSE = HTTPResponse(
+    status_code=405,
+    headers={},
+    mime_type="text/html",
+    data=(
+        "<h2>405 Method Not Allowed: The method is not allowed for the "
+        "requested URL.</h2>"
+    ),
+)
+
+CONVERTERS = {
+    "string": (r"[^/:]+", str),
+    "int": (r"\d+", int),
+    "float": (r"\d+\.\d+", float),
+    "path": (r"[^:]+?", str),
+    "uuid": (
+        r"[A-Fa-f0-9]{8}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{12}",
+        uuid.UUID,
+    ),
+}
+
+VARIABLE_PATTERN = re.compile(
+    r"<(?:(?P<converter>[a-zA-Z_]+):)?(?P<name>[a-zA-Z_]\w*)>"
+)
+
+
+class RoutingError(Exception):
+    """Raised when a request does not match any rule."""
+
+    def __init__(self, response: "HTTPResponse"):
+        """Initializes a routing error.
+
+        Args:
+            response (HTTPResponse): The response to return.
+        """
+        self.response = response
+        super().__init__(response.data)
+
+
+def compile_rule(rule: str) -> Tuple[Optional[Pattern], Dict[str, Callable]]:
+    """Compiles a rule.
+
+    Args:
+        rule (str): A rule.
+
+    Returns:
+        Tuple[Optional[Pattern], Dict[str, Callable]]: The regular expression
+            the rule compiles to, and the converters of its variable parts;
+            the regular expression is None if the rule has no variable parts.
+    """
+    pattern = ""
+    converters = {}
+    pos = 0
+    for match in VARIABLE_PATTERN.finditer(rule):
+        converter = match.group("converter") or "string"
+        name = match.group("name")
+        if converter not in CONVERTERS:
+            raise ValueError(
+                "{} is not a supported converter ({}).".format(
+                    converter, list(CONVERTERS)
+                )
+            )
+        if name in converters:
+            raise ValueError("Rule {} has duplicate variable names.".format(rule))
+
+        regex, convert = CONVERTERS[converter]
+        pattern += re.escape(rule[pos : match.start()])
+        pattern += "(?P<{}>{})".format(name, regex)
+        converters[name] = convert
+        pos = match.end()
+
+    if not converters:
+        return None, {}
+
+    pattern += re.escape(rule[pos:])
+    return re.compile("^{}$".format(pattern)), converters
+
+
+class Router:
+    """A router for HTTP endpoints.
+
+    Rules without variable parts are looked up in a dict. Rules with
+    variable parts are compiled, altogether, into one regular expression,
+    so that a path is matched against all of them in a single pass; if the
+    first rule the path matches does not accept the method of the request,
+    the rules are tried one by one, in the order they are added.
+    """
+
+    def __init__(self):
+        """Initializes a router."""
+        self._static_routes = {}
+        self._dynamic_routes = []
+        self._combined_pattern = None
+
+    def add(self, rule: str, method: str, target: Any):
+        """Adds a route.
+
+        Args:
+            rule (str): The rule of the route.
+            method (str): The HTTP method of the route.
+            target (Any): The target (usually an endpoint) of the route.
+        """
+        pattern, converters = compile_rule(rule)
+        if pattern == None:
+            methods = self._static_routes.setdefault(rule, {})
+        else:
+            for existing_rule, _, _, methods in self._dynamic_routes:
+                if existing_rule == rule:
+                    break
+            else:
+                methods = {}
+                self._dynamic_routes.append((rule, pattern, converters, methods))
+                self._combined_pattern = None
+
+        if method in methods:
+            raise RuntimeError("A route with the same rule and method already exists.")
+        methods[method] = target
+
+    @property
+    def rules(self) -> List[str]:
+        """Returns the rules of all the routes."""
+        return list(self._static_routes) + [route[0] for route in self._dynamic_routes]
+
+    def _get_combined_pattern(self) -> Pattern:
+        """Gets (and compiles, if necessary) the regular expression that
+        combines the rules with variable parts.
+
+        The pattern of the i-th rule is wrapped in a group named `_i`, and
+        its variable parts are renamed to `_i_<name>`.
+        """
+        if self._combined_pattern == None:
+            alternatives = []
+            for i, (_, pattern, _, _) in enumerate(self._dynamic_routes):
+                regex = pattern.pattern[1:-1].replace("(?P<", "(?P<_{}_".format(i))
+                alternatives.append("(?P<_{}>{})".format(i, regex))
+            self._combined_pattern = re.compile(
+                "^(?:{})$".format("|".join(alternatives))
+            )
+        return self._combined_pattern
+
+    def match(self, path: str, method: str) -> Tuple[Any, Dict]:
+        """Matches a request.
+
+        Args:
+            path (str): The path of the request.
+            method (str): The HTTP method of the request.
+
+        Returns:
+            Tuple[Any, Dict]: The target of the matched route and the values
+                of the variable parts in the rule.
+        """
+        methods = self._static_routes.get(path)
+        if methods != None:
+            target = self._get_target(methods, method)
+            if target == None:
+                raise RoutingError(METHOD_NOT_ALLOWED_RESPONSE)
+            return target, {}
+
+        if not self._dynamic_routes:
+            raise RoutingError(NOT_FOUND_RESPONSE)
+
+        match = self._get_combined_pattern().match(path)
+        if match == None:
+            raise RoutingError(NOT_FOUND_RESPONSE)
+
+        i = int(match.lastgroup[1:])
+        _, _, converters, methods = self._dynamic_routes[i]
+        target = self._get_target(methods, method)
+        if target != None:
+            try:
+                kwargs = {
+                    name: converters[name](match.group("_{}_{}".format(i, name)))
+                    for name in converters
+                }
+                return target, kwargs
+            except ValueError:
+                pass
+
+        return self._match_one_by_one(path, method, start=i + 1)
+
+    def _match_one_by_one(self, path: str, method: str, start: int) -> Tuple[Any, Dict]:
+        """Matches a request against the rules with variable parts one by
+        one, starting from the rule at a given index.
+
+        This is the slow path of the method `match`; at least one rule
+        (prior to the given index) has matched the path of the request.
+        """
+        for _, pattern, converters, methods in self._dynamic_routes[start:]:
+            match = pattern.match(path)
+            if match == None:
+                continue
+            target = self._get_target(methods, method)
+            if target == None:
+                continue
+
+            try:
+                kwargs = {
+                    name: converters[name](value)
+                    for name, value in match.groupdict().items()
+                }
+            except ValueError:
+                continue
+            return target, kwargs
+
+        raise RoutingError(METHOD_NOT_ALLOWED_RESPONSE)
+
+    @staticmethod
+    def _get_target(methods: Dict, method: str) -> Any:
+        """Gets the target of a route for a method; `HEAD` requests fall
+        back to `GET` routes."""
+        target = methods.get(method)
+        if target == None and method == "HEAD":
+            target = methods.get("GET")
+        return target
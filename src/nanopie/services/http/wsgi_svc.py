@@ -0,0 +1,357 @@
+"""This module includes the WSGI transport for HTTP services.
+
+`WSGIService` is a WSGI (PEP 3333) application itself and does not depend on
+any web framework; it parses the WSGI environ directly into `HTTPRequest`,
+and matches requests with its own compiled router (see `Router`). It can be
+served with any WSGI server, such as gunicorn:
+
+```python
+from nanopie import WSGIService
+
+svc = WSGIService()
+
+@svc.get(name="get_user", rule="/users/<int:uid>")
+def get_user(uid):
+    ...
+```
+
+and then `gunicorn app:svc`.
+"""
+
+from functools import partial
+from http import HTTPStatus
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl
+
+from .base import HTTPService, encode_response
+from .batch import INTERNAL_ERROR_RESPONSE
+from .foundation import INVALID_CONTENT_LENGTH_RESPONSE, parse_content_length
+from ...globals import bind_svc_ctx, unbind_svc_ctx
+from .io import HTTPRequest
+from ...logger import logger
+from ...misc.errors import ServiceError
+from .routing import Router, RoutingError
+
+
+class LimitedStream:
+    """A read-only stream that reads at most a given number of bytes from
+    the WSGI input stream."""
+
+    def __init__(self, stream: BinaryIO, limit: int):
+        """Initializes a limited stream.
+
+        Args:
+            stream (BinaryIO): The WSGI input stream.
+            limit (int): The maximum number of bytes to read.
+        """
+        self._stream = stream
+        self._remaining = limit
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads from the stream.
+
+        Args:
+            size (int): The maximum number of bytes to read. If negative, the
+                stream is read until the limit.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+
+        data = self._stream.read(size)
+        self._remaining -= len(data)
+        if not data:
+            self._remaining = 0
+        return data
+
+
+class ClosingIterable:
+    """The payload of a WSGI response, which runs a callback once the WSGI
+    server has sent it (and closes it)."""
+
+    __slots__ = ("_data", "_callback")
+
+    def __init__(self, data: Iterable[bytes], callback: Callable):
+        """Initializes a closing iterable.
+
+        Args:
+            data (Iterable[bytes]): The payload.
+            callback (Callable): The function to run when the payload is
+                closed.
+        """
+        self._data = data
+        self._callback = callback
+
+    def __iter__(self):
+        """Iterates over the payload."""
+        return iter(self._data)
+
+    def close(self):
+        """Closes the payload, and runs the callback."""
+        close = getattr(self._data, "close", None)
+        if close != None:
+            close()
+        self._callback()
+
+
+class WSGIService(HTTPService):
+    """The class for HTTP services with WSGI as transport."""
+
+    def __init__(self, *args, **kwargs):
+        """Initializes a WSGI based HTTP service.
+
+        Args:
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        self._router = Router()
+
+        super().__init__(*args, **kwargs)
+
+    @property
+    def router(self) -> "Router":
+        """Returns the router of the service."""
+        return self._router
+
+    def add_endpoint(self, endpoint: "HTTPEndpoint", **kwargs):
+        """Adds an HTTP endpoint.
+
+        Args:
+            endpoint (HTTPEndpoint): An HTTP endpoint.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        if self.endpoints.get(endpoint.name) != None:
+            raise RuntimeError("An endpoint with the same name already exists.")
+
+        self._router.add(rule=endpoint.rule, method=endpoint.method, target=endpoint)
+        self.endpoints[endpoint.name] = endpoint
+
+    def _run(
+        self,
+        endpoint: "HTTPEndpoint",
+        request: "HTTPRequest",
+        kwargs: Dict,
+        ctx: Optional[Dict] = None,
+    ) -> Any:
+        """Runs an endpoint with a request in a new context.
+
+        Args:
+            endpoint (HTTPEndpoint): The endpoint to run.
+            request (HTTPRequest): The request.
+            kwargs (Dict): The keyword arguments (path parameters) for the
+                endpoint.
+            ctx (Dict, Optional): Additional items for the context.
+
+        Returns:
+            Any: The response of the endpoint.
+        """
+        ctx = dict(ctx) if ctx else {}
+        ctx["svc"] = self
+        ctx["endpoint"] = endpoint
+        ctx["request"] = request
+
+        token = bind_svc_ctx(ctx)
+        try:
+            res = endpoint.compiled_entrypoint(**kwargs)
+        except ServiceError as ex:
+            if ex.response:
+                res = ex.response
+                logger.error(ex)
+            else:
+                raise ex
+        finally:
+            unbind_svc_ctx(token)
+
+        return res
+
+    def run(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: Optional[int] = None,
+        reuse_port: bool = False,
+        **kwargs
+    ):
+        """Runs the service with a pre-forking server (see `PreforkServer`).
+
+        The handler chains of all endpoints are compiled before the workers
+        are forked, so that the workers share them; each worker warms up the
+        service (see the method `warmup`) before accepting connections.
+
+        Args:
+            host (str): The host to bind to.
+            port (int): The port to bind to.
+            workers (int, Optional): The number of worker processes. If not
+                specified, the number of CPUs is used.
+            reuse_port (bool): If set to True, each worker creates its own
+                listening socket with the `SO_REUSEPORT` option.
+            **kwargs: Other keyword arguments. See `PreforkServer`.
+        """
+        # The server (and wsgiref) is imported here, so that services run with
+        # other WSGI servers do not pay for importing it.
+        from .prefork import PreforkServer  # pylint: disable=import-outside-toplevel
+
+        for endpoint in self.endpoints.values():
+            endpoint.compile()
+
+        on_worker_start = kwargs.pop("on_worker_start", None)
+
+        def start_worker():
+            self.warmup()
+            if on_worker_start:
+                on_worker_start()
+
+        server = PreforkServer(
+            self,
+            host=host,
+            port=port,
+            workers=workers,
+            reuse_port=reuse_port,
+            on_worker_start=start_worker,
+            **kwargs
+        )
+        server.serve_forever()
+
+    def _dispatch(
+        self,
+        endpoint: "HTTPEndpoint",
+        request: "HTTPRequest",
+        kwargs: Dict,
+        ctx: Optional[Dict] = None,
+    ) -> Any:
+        """See the method `HTTPService._dispatch`."""
+        return self._run(endpoint, request, kwargs, ctx=ctx)
+
+    @staticmethod
+    def _parse_headers(environ: Dict) -> Dict:
+        """Parses the headers in a WSGI environ."""
+        headers = {}
+        for k, v in environ.items():
+            if k.startswith("HTTP_"):
+                headers[k[5:].replace("_", "-").title()] = v
+            elif k in ("CONTENT_TYPE", "CONTENT_LENGTH") and v:
+                headers[k.replace("_", "-").title()] = v
+        return headers
+
+    @staticmethod
+    def _parse_query_args(query_string: str) -> Dict:
+        """Parses the query string in a WSGI environ; if an argument is
+        specified more than once, the first value is used."""
+        query_args = {}
+        query_string = query_string.encode("latin-1").decode("utf-8", "replace")
+        for k, v in parse_qsl(query_string, keep_blank_values=True):
+            query_args.setdefault(k, v)
+        return query_args
+
+    @staticmethod
+    def _get_url(environ: Dict) -> str:
+        """Gets the URL of the request in a WSGI environ."""
+        host = environ.get("HTTP_HOST")
+        if not host:
+            host = "{}:{}".format(environ["SERVER_NAME"], environ["SERVER_PORT"])
+
+        url = "{}://{}{}{}".format(
+            environ.get("wsgi.url_scheme", "http"),
+            host,
+            environ.get("SCRIPT_NAME", ""),
+            environ.get("PATH_INFO", ""),
+        )
+        query_string = environ.get("QUERY_STRING")
+        if query_string:
+            url = "{}?{}".format(url, query_string)
+        return url
+
+    @staticmethod
+    def _get_stream(environ: Dict, content_length: Optional[int]) -> BinaryIO:
+        """Gets the stream for reading the payload of the request in a WSGI
+        environ.
+
+        Requests without a content length have no payload, unless the WSGI
+        server marks the input stream as terminated (e.g. for chunked
+        requests).
+        """
+        stream = environ["wsgi.input"]
+        if content_length != None:
+            return LimitedStream(stream, content_length)
+        if environ.get("wsgi.input_terminated"):
+            return stream
+        return LimitedStream(stream, 0)
+
+    def _handle(self, environ: Dict, tasks: List["BackgroundTask"]) -> Any:
+        """Handles an HTTP request.
+
+        Args:
+            environ (Dict): The WSGI environ.
+            tasks (List[BackgroundTask]): The list the background tasks of the
+                request are added to.
+
+        Returns:
+            Any: The response.
+        """
+        path = environ.get("PATH_INFO", "").encode("latin-1").decode("utf-8", "replace")
+        try:
+            endpoint, kwargs = self._router.match(
+                path or "/", environ["REQUEST_METHOD"]
+            )
+        except RoutingError as ex:
+            return ex.response
+
+        try:
+            content_length = parse_content_length(environ.get("CONTENT_LENGTH"))
+        except ValueError:
+            return INVALID_CONTENT_LENGTH_RESPONSE
+        stream = self._get_stream(environ, content_length)
+
+        request = HTTPRequest(
+            url=partial(self._get_url, environ),
+            headers=partial(self._parse_headers, environ),
+            content_length=content_length,
+            mime_type=environ.get("CONTENT_TYPE", "").split(";")[0].strip().lower(),
+            query_args=partial(self._parse_query_args, environ.get("QUERY_STRING", "")),
+            binary_data=stream.read,
+            stream=stream,
+            remote_addr=environ.get("REMOTE_ADDR"),
+        )
+        return self._run(endpoint, request, kwargs, ctx={"background_tasks": tasks})
+
+    def __call__(self, environ: Dict, start_response: Callable) -> Iterable[bytes]:
+        """Runs the service as a WSGI application.
+
+        Args:
+            environ (Dict): The WSGI environ.
+            start_response (Callable): The WSGI start_response callable.
+
+        Returns:
+            Iterable[bytes]: The payload of the response.
+        """
+        tasks = []
+        try:
+            res = self._handle(environ, tasks)
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception(ex)
+            res = INTERNAL_ERROR_RESPONSE
+
+        status_code, headers, data = encode_response(res)
+        try:
+            status = "{} {}".format(status_code, HTTPStatus(status_code).phrase)
+        except ValueError:
+            status = "{} Unknown".format(status_code)
+
+        start_response(status, headers)
+        if environ["REQUEST_METHOD"] == "HEAD":
+            # Streamed payloads are not sent; they are closed right away, so
+            # that their cleanup (if any) runs.
+            close = getattr(data, "close", None)
+            if close != None:
+                close()
+            data = [b""]
+        elif isinstance(data, bytes):
+            data = [data]
+        if tasks:
+            # Background tasks run once the response has been sent.
+            return ClosingIterable(data, partial(self.task_runner.submit, tasks))
+        return data
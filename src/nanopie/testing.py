@@ -0,0 +1,258 @@
+"""This module includes the in-process test client.
+
+The test client runs the endpoints of an HTTP service in the current process,
+without a server or the test client of a web framework: it builds
+`HTTPRequest` objects directly, and runs them through the whole handler
+chains of the endpoints (see the method `HTTPService._dispatch`), so that it
+works with all transports, and adds little overhead of its own to tests and
+benchmarks:
+
+```python
+client = TestClient(svc)
+res = client.call("get_user", args={"user_id": 1})
+assert res.status_code == 200
+assert res.json()["name"] == "Albert Wesker"
+```
+
+Endpoints are called by their names, with their path parameters (`args`)
+already converted; rules and routing are not involved.
+"""
+
+import json as jsonlib
+from typing import Any, Dict, Iterator, List, Optional, Union
+from urllib.parse import quote, urlencode
+
+from .services.http.base import AsyncHTTPService, encode_response
+from .services.http.io import HTTPHeaders, HTTPRequest
+from .services.http.routing import VARIABLE_PATTERN
+
+
+class TestResponse:
+    """The response of an endpoint called with the test client."""
+
+    __slots__ = ("status_code", "headers", "data", "background_tasks")
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: "HTTPHeaders",
+        data: bytes,
+        background_tasks: List["BackgroundTask"],
+    ):
+        """Initializes a test response.
+
+        Args:
+            status_code (int): The status code of the response.
+            headers (HTTPHeaders): The headers of the response, including
+                `Content-Type` and `Content-Length`.
+            data (bytes): The payload of the response, encoded as transports
+                would send it.
+            background_tasks (List[BackgroundTask]): The background tasks the
+                request has scheduled and the client has not run.
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.data = data
+        self.background_tasks = background_tasks
+
+    @property
+    def text(self) -> str:
+        """Returns the payload of the response, decoded (UTF-8)."""
+        return self.data.decode("utf-8")
+
+    def json(self) -> Any:
+        """Returns the payload of the response, parsed as JSON."""
+        return jsonlib.loads(self.data)
+
+
+class TestClient:
+    """The in-process test client."""
+
+    # Tells pytest that the class is not a test class.
+    __test__ = False
+
+    def __init__(
+        self,
+        svc: "HTTPService",
+        base_url: str = "http://localhost",
+        headers: Optional[Dict] = None,
+        remote_addr: str = "127.0.0.1",
+        run_background_tasks: bool = True,
+    ):
+        """Initializes a test client.
+
+        Args:
+            svc (HTTPService): The service to call.
+            base_url (str): The URL (scheme and host) of the requests.
+            headers (Dict, Optional): The headers of all requests (e.g.
+                credentials).
+            remote_addr (str): The address of the client.
+            run_background_tasks (bool): If set to True, the background tasks
+                requests schedule (see `add_background_task`) run before the
+                client returns the responses; exceptions they raise are not
+                caught. Otherwise, they are left on the responses (see
+                `TestResponse.background_tasks`).
+        """
+        self.svc = svc
+        self._base_url = base_url.rstrip("/")
+        self._headers = dict(headers) if headers else {}
+        self._remote_addr = remote_addr
+        self._run_background_tasks = run_background_tasks
+
+    def build_request(
+        self,
+        endpoint: str,
+        args: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        query_args: Optional[Dict] = None,
+        data: Optional[Union[str, bytes]] = None,
+        json: Any = None,
+        mime_type: Optional[str] = None,
+    ) -> "HTTPRequest":
+        """Builds a request to an endpoint.
+
+        Args:
+            endpoint (str): The name of the endpoint.
+            args (Dict, Optional): The path parameters.
+            headers (Dict, Optional): The headers of the request, in addition
+                to those of the client.
+            query_args (Dict, Optional): The query arguments.
+            data (Union[str, bytes], Optional): The payload of the request.
+            json (Any): An object to send as the (JSON) payload of the
+                request, instead of `data`.
+            mime_type (str, Optional): The mime type of the payload. Defaults
+                to `application/json` if `json` is specified.
+
+        Returns:
+            HTTPRequest: The request.
+        """
+        rule = self.svc.endpoints[endpoint].rule
+        path = VARIABLE_PATTERN.sub(
+            lambda match: quote(str((args or {})[match.group("name")])), rule
+        )
+        url = self._base_url + path
+        if query_args:
+            url += "?" + urlencode(query_args)
+
+        if json != None:
+            data = jsonlib.dumps(json)
+            mime_type = mime_type or "application/json"
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        data = data or b""
+
+        request_headers = dict(self._headers)
+        request_headers.update(headers or {})
+        if mime_type:
+            request_headers["Content-Type"] = mime_type
+        if data:
+            request_headers["Content-Length"] = str(len(data))
+
+        return HTTPRequest(
+            url=url,
+            headers=request_headers,
+            content_length=len(data) if data else None,
+            mime_type=mime_type or "",
+            query_args={k: str(v) for k, v in (query_args or {}).items()},
+            binary_data=data,
+            remote_addr=self._remote_addr,
+        )
+
+    def _to_response(self, res: Any, tasks: List) -> "TestResponse":
+        """Encodes the response of an endpoint as transports would."""
+        status_code, headers, data = encode_response(res)
+        if isinstance(data, Iterator):
+            data = b"".join(data)
+        return TestResponse(
+            status_code=status_code,
+            headers=HTTPHeaders(dict(headers)),
+            data=data,
+            background_tasks=tasks,
+        )
+
+    def call(
+        self, endpoint: str, args: Optional[Dict] = None, **kwargs
+    ) -> "TestResponse":
+        """Calls an endpoint.
+
+        With asynchronous services (e.g. `ASGIService`), the endpoint runs in
+        a new event loop; call the method `acall` instead from a running
+        event loop.
+
+        Args:
+            endpoint (str): The name of the endpoint.
+            args (Dict, Optional): The path parameters.
+            **kwargs: Other keyword arguments. See the method
+                `build_request`.
+
+        Returns:
+            TestResponse: The response.
+        """
+        if isinstance(self.svc, AsyncHTTPService):
+            import asyncio  # pylint: disable=import-outside-toplevel
+
+            return asyncio.run(self.acall(endpoint, args=args, **kwargs))
+
+        request = self.build_request(endpoint, args=args, **kwargs)
+        tasks = []
+        res = self.svc._dispatch(  # pylint: disable=protected-access
+            self.svc.endpoints[endpoint],
+            request,
+            dict(args or {}),
+            ctx={"background_tasks": tasks},
+        )
+        response = self._to_response(res, tasks)
+
+        if self._run_background_tasks:
+            while tasks:
+                task = tasks.pop(0)
+                if task.is_coroutine_func:
+                    # asyncio is imported here, so that synchronous services
+                    # do not pay for importing it.
+                    import asyncio  # pylint: disable=import-outside-toplevel
+
+                    coro = task.context.run(task.func, *task.args, **task.kwargs)
+                    task.context.run(asyncio.run, coro)
+                else:
+                    task.context.run(task.func, *task.args, **task.kwargs)
+        return response
+
+    async def acall(
+        self, endpoint: str, args: Optional[Dict] = None, **kwargs
+    ) -> "TestResponse":
+        """Calls an endpoint asynchronously. See the method `call`.
+
+        Args:
+            endpoint (str): The name of the endpoint.
+            args (Dict, Optional): The path parameters.
+            **kwargs: Other keyword arguments. See the method
+                `build_request`.
+
+        Returns:
+            TestResponse: The response.
+        """
+        request = self.build_request(endpoint, args=args, **kwargs)
+        tasks = []
+        if isinstance(self.svc, AsyncHTTPService):
+            res = await self.svc._arun(  # pylint: disable=protected-access
+                self.svc.endpoints[endpoint],
+                request,
+                dict(args or {}),
+                ctx={"background_tasks": tasks},
+            )
+        else:
+            res = self.svc._dispatch(  # pylint: disable=protected-access
+                self.svc.endpoints[endpoint],
+                request,
+                dict(args or {}),
+                ctx={"background_tasks": tasks},
+            )
+        response = self._to_response(res, tasks)
+
+        if self._run_background_tasks:
+            while tasks:
+                task = tasks.pop(0)
+                res = task.context.run(task.func, *task.args, **task.kwargs)
+                if task.is_coroutine_func:
+                    await res
+        return response
@@ -1,4 +1,14 @@
-from .base import TraceContext, TraceContextExtractor, OpenTelemetryTracingHandler
-from .http_w3c_trace_ctx import HTTPW3CTraceContext, HTTPW3CTraceContextExtractor
-from .jaeger import JaegerTracingHandler
-from .zipkin import ZipkinTracingHandler
+from ..misc.lazy import make_lazy_loader
+
+_LAZY_ATTRS = {
+    "TraceContext": ".base",
+    "TraceContextExtractor": ".base",
+    "OpenTelemetryTracingHandler": ".base",
+    "HTTPW3CTraceContext": ".http_w3c_trace_ctx",
+    "HTTPW3CTraceContextExtractor": ".http_w3c_trace_ctx",
+    "JaegerTracingHandler": ".jaeger",
+    "ZipkinTracingHandler": ".zipkin",
+}
+
+__all__ = list(_LAZY_ATTRS)
+__getattr__, __dir__ = make_lazy_loader(__name__, _LAZY_ATTRS)
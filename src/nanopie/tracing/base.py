@@ -13,7 +13,7 @@ additional setup.
 from abc import abstractmethod
 import json
 import os
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Tuple
 
 try:
     from opentelemetry import trace
@@ -30,7 +30,7 @@ try:
 except ImportError:
     OPENTELEMETRY_INSTALLED = False
 
-from ..globals import endpoint, request as request_proxy
+from ..globals import get_svc_ctx
 from ..handler import Handler
 from ..logger import logger
 from ..misc import get_flattenable_dikt
@@ -248,10 +248,16 @@ class OpenTelemetryTracingHandler(Handler):
             tracer_provider.add_span_processor(processor)
         self._tracer_provider = tracer_provider
 
+    def warmup(self):
+        """Sets up the tracer provider. See the method `Handler.warmup`."""
+        self.get_tracer()
+
     def get_trace_ctx(self):
         """Gets the trace context."""
         if self._trace_ctx_extractor:
-            return self._trace_ctx_extractor.extract(request=request_proxy)
+            return self._trace_ctx_extractor.extract(
+                request=get_svc_ctx().get("request")
+            )
         else:
             raise RuntimeError("trace_ctx_extractor is not present.")
 
@@ -261,26 +267,8 @@ class OpenTelemetryTracingHandler(Handler):
             self._setup_tracer_provider()
         return self._tracer_provider.get_tracer(__name__)
 
-    def __call__(self, *args, **kwargs):
-        """Runs the handler.
-
-        It performs the following tasks:
-
-        1. Set up a tracer providers (if one has not been set up yet) and
-        get a tracer.
-        2. Set up trace propagation (if a trace context is available).
-        3. Perform additional setup.
-        4. Start a new span.
-        5. Pass the baton to the chained handler.
-        6. End the span.
-
-        Args:
-            *args: Arbitrary positional arguments.
-            **kwargs: Arbitrary named arguments.
-
-        Returns:
-            Any: Any object.
-        """
+    def _start_span(self) -> Tuple["Tracer", "Span"]:
+        """Gets a tracer and starts a new span. See the method `handle`."""
         tracer = self.get_tracer()
         current_span = trace.get_current_span()
         if self._propagated:
@@ -315,6 +303,7 @@ class OpenTelemetryTracingHandler(Handler):
         if self._with_span_attributes:
             span_attributes.update(get_flattenable_dikt(self._with_span_attributes))
 
+        endpoint = get_svc_ctx().get("endpoint")
         if self._with_endpoint_config:
             span_attributes.update(
                 get_flattenable_dikt(
@@ -336,9 +325,53 @@ class OpenTelemetryTracingHandler(Handler):
             kind=self._with_span_kind,
             attributes=span_attributes,
         )
+        return tracer, span
+
+    def handle(self, call_next: Callable, *args, **kwargs):
+        """Runs the handler.
+
+        It performs the following tasks:
+
+        1. Set up a tracer providers (if one has not been set up yet) and
+        get a tracer.
+        2. Set up trace propagation (if a trace context is available).
+        3. Perform additional setup.
+        4. Start a new span.
+        5. Pass the baton to the chained handler.
+        6. End the span.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary named arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        tracer, span = self._start_span()
+        try:
+            with tracer.use_span(span, end_on_exit=True):
+                res = call_next(*args, **kwargs)
+            return res
+        except:
+            span.end()
+            raise
+
+    async def ahandle(self, call_next: Callable, *args, **kwargs):
+        """Runs the handler asynchronously. See the method `handle`.
+
+        Args:
+            call_next (Callable): The next chained handler.
+            *args: Arbitrary positional arguments.
+            **kwargs: Arbitrary named arguments.
+
+        Returns:
+            Any: Any object.
+        """
+        tracer, span = self._start_span()
         try:
             with tracer.use_span(span, end_on_exit=True):
-                res = super().__call__(*args, **kwargs)
+                res = await call_next(*args, **kwargs)
             return res
         except:
             span.end()
@@ -12,6 +12,7 @@ except ImportError:
 
 from .base import TraceContext, TraceContextExtractor
 from ..fields import StringField
+from ..services.http.io import as_http_headers
 
 _KEY_WITHOUT_VENDOR_FORMAT = r"[a-z][_0-9a-z\-\*\/]{0,255}"
 _KEY_WITH_VENDOR_FORMAT = r"[a-z][_0-9a-z\-\*\/]{0,240}@[a-z][_0-9a-z\-\*\/]{0,13}"
@@ -143,6 +144,7 @@ class HTTPW3CTraceContextExtractor(TraceContextExtractor):
         if not headers:
             raise RuntimeError("The incoming request is not a valid HTTP " "request.")
 
+        headers = as_http_headers(headers)
         traceparent = headers.get("traceparent")
         tracestate = headers.get("tracestate")
 
@@ -0,0 +1,215 @@
+"""This module includes the class nanopie provides for accepting file uploads.
+
+Models are deserialized from payloads read into memory as a whole, which does
+not work well for large binary uploads. When an endpoint uses `FileUpload`
+(or a subclass of it) as its data model, nanopie instead streams the payload
+of the request, chunk by chunk, into a spooled file: the file is kept in
+memory up to a threshold (`max_memory_size`), and rolled over to a temporary
+file on disk afterwards. The upload is available as `parsed_request.data`
+and is closed (and removed from disk) automatically when the request
+finishes.
+
+For example, an endpoint accepting artifacts of up to 500 MB looks like this
+with nanopie:
+
+```python
+from nanopie import FileUpload
+
+class Artifact(FileUpload):
+    max_size = 500 * 1024 * 1024
+
+@svc.create(name="upload_artifact", rule="/artifacts", data_cls=Artifact)
+def upload_artifact():
+    artifact = parsed_request.data
+    checksum = hashlib.sha256(artifact.mmap()).hexdigest()
+```
+"""
+
+import io
+import mmap
+import tempfile
+from typing import BinaryIO, Optional, Union
+
+from .misc import format_error_message
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the maximum size."""
+
+
+class FileUpload:
+    """The base class for file uploads.
+
+    Subclasses may override the class attributes below to configure how
+    uploads are spooled.
+
+    Attributes:
+        max_memory_size (int): The maximum number of bytes to keep in memory
+            before the upload is rolled over to a temporary file on disk.
+        max_size (int, Optional): The maximum size of the upload. Set it to
+            None to accept uploads of any size.
+        chunk_size (int): The number of bytes to read from the request at a
+            time.
+        tmp_dir (str, Optional): The directory where temporary files are created.
+            If not specified, the default temporary directory is used.
+    """
+
+    max_memory_size = 1024 * 1024
+    max_size = 100 * 1024 * 1024
+    chunk_size = 64 * 1024
+    tmp_dir = None
+
+    def __init__(self, mime_type: Optional[str] = None):
+        """Initializes an (empty) file upload.
+
+        Args:
+            mime_type (str, Optional): The mime type of the upload.
+        """
+        self.mime_type = mime_type
+        self._file = io.BytesIO()
+        self._size = 0
+        self._rolled = False
+        self._views = []
+
+    @classmethod
+    def from_stream(
+        cls, stream: BinaryIO, mime_type: Optional[str] = None
+    ) -> "FileUpload":
+        """Spools a stream into a file upload.
+
+        Args:
+            stream (BinaryIO): A file-like object to read the upload from.
+            mime_type (str, Optional): The mime type of the upload.
+
+        Returns:
+            FileUpload: The file upload.
+        """
+        upload = cls(mime_type=mime_type)
+        try:
+            while True:
+                chunk = stream.read(cls.chunk_size)
+                if not chunk:
+                    break
+                upload.write(chunk)
+        except Exception:
+            upload.close()
+            raise
+
+        upload.seek(0)
+        return upload
+
+    @property
+    def size(self) -> int:
+        """Returns the size (in bytes) of the upload."""
+        return self._size
+
+    @property
+    def rolled(self) -> bool:
+        """Returns True if the upload has been rolled over to disk."""
+        return self._rolled
+
+    @property
+    def closed(self) -> bool:
+        """Returns True if the upload has been closed."""
+        return self._file.closed
+
+    @property
+    def file(self) -> BinaryIO:
+        """Returns the underlying file-like object of the upload."""
+        return self._file
+
+    def _rollover(self):
+        """Moves the upload from memory to a temporary file on disk."""
+        disk_file = tempfile.TemporaryFile(dir=self.tmp_dir)
+        disk_file.write(self._file.getbuffer())
+        self._file.close()
+        self._file = disk_file
+        self._rolled = True
+
+    def write(self, data: Union[bytes, memoryview]):
+        """Appends some data to the upload.
+
+        Args:
+            data (Union[bytes, memoryview]): The data to append.
+        """
+        size = self._size + len(data)
+        if self.max_size != None and size > self.max_size:
+            message = "The upload is too large."
+            message = format_error_message(
+                message=message, max_size=self.max_size, size=size
+            )
+            raise UploadTooLargeError(message)
+
+        if not self._rolled and size > self.max_memory_size:
+            self._rollover()
+
+        self._file.write(data)
+        self._size = size
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads from the upload.
+
+        Args:
+            size (int): The maximum number of bytes to read. If negative, the
+                upload is read until the end.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Changes the position in the upload.
+
+        Args:
+            offset (int): The offset.
+            whence (int): The reference point of the offset.
+
+        Returns:
+            int: The new position.
+        """
+        return self._file.seek(offset, whence)
+
+    def mmap(self) -> Union[mmap.mmap, memoryview]:
+        """Maps the upload into memory (read only).
+
+        Uploads rolled over to disk are memory-mapped; uploads kept in memory
+        are exposed as a memoryview of the in-memory buffer. In both cases no
+        copy of the upload is made. The mappings are released when the upload
+        is closed.
+
+        Returns:
+            Union[mmap.mmap, memoryview]: The mapping of the upload.
+        """
+        if self._rolled:
+            self._file.flush()
+            view = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # The value of a BytesIO object shares its buffer (until the object
+            # is written to again), and bytes are read only.
+            view = memoryview(self._file.getvalue())
+        self._views.append(view)
+        return view
+
+    def close(self):
+        """Closes the upload, releasing its memory or removing it from
+        disk."""
+        views = self._views
+        self._views = []
+        for view in views:
+            if isinstance(view, memoryview):
+                view.release()
+            else:
+                view.close()
+        self._file.close()
+
+    def __enter__(self) -> "FileUpload":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self) -> str:
+        return "{}(mime_type={!r}, size={})".format(
+            self.__class__.__name__, self.mime_type, self._size
+        )
@@ -0,0 +1,49 @@
+from aiohttp import web
+from nanopie import AioHTTPService, HTTPMethods, HTTPResponse, parsed_request
+from nanopie.misc.errors import ValidationError
+
+if __package__ == None or __package__ == "":
+    from models import User
+else:
+    from .models import User
+
+app = web.Application()
+micro_svc = AioHTTPService(app=app, max_content_length=1000)
+micro_svc.add_batch_endpoint()
+
+dummy_storage = [{"uid": 1, "first_name": "John", "last_name": "Smith", "age": 35}]
+
+INVALID_INPUT_RES = HTTPResponse(status_code=400, data="Input is not valid.")
+USER_NOT_EXIST_RES = HTTPResponse(status_code=404, data="User does not exist.")
+
+
+@micro_svc.get(name="get_user", rule="/users/<int:uid>")
+async def get_user(uid):
+    for user_data in dummy_storage:
+        if user_data["uid"] == uid:
+            return User.from_dikt(user_data)
+
+    return USER_NOT_EXIST_RES
+
+
+@micro_svc.create(name="create_user", rule="/users", data_cls=User)
+def create_user():
+    user = parsed_request.data
+    try:
+        user.validate()
+    except ValidationError:
+        return INVALID_INPUT_RES
+
+    user.uid = len(dummy_storage) + 1
+    return user
+
+
+@micro_svc.custom(
+    name="verify_user", rule="/users/<int:uid>", verb="verify", method=HTTPMethods.GET
+)
+async def verify_user(uid):
+    return await get_user(uid)
+
+
+if __name__ == "__main__":
+    web.run_app(app, port=8080)
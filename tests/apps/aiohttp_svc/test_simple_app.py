@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from aiohttp.test_utils import (
+    TestClient,
+    TestServer,
+)  # pylint: disable=wrong-import-position
+
+from .simple_app import app, dummy_storage  # pylint: disable=wrong-import-position
+
+
+def request(method, path, **kwargs):
+    async def run():
+        async with TestClient(TestServer(app)) as client:
+            res = await client.request(method, path, **kwargs)
+            return res.status, await res.read()
+
+    return asyncio.run(run())
+
+
+def test_get_user():
+    status_code, data = request("GET", "/users/1")
+    assert status_code == 200
+    assert json.loads(data) == dummy_storage[0]
+
+    status_code, _ = request("GET", "/users/2")
+    assert status_code == 404
+
+    status_code, _ = request("GET", "/users/abc")
+    assert status_code == 404
+
+
+def test_create_user():
+    data = json.dumps({"first_name": "Jane", "last_name": "Doe", "age": 24})
+    status_code, res_data = request("POST", "/users", data=data)
+    assert status_code == 200
+    assert json.loads(res_data)["first_name"] == "Jane"
+
+    status_code, _ = request("POST", "/users", data="x" * 1001)
+    assert status_code == 400
+
+    # Payloads without a Content-Type header are accepted.
+    status_code, res_data = request(
+        "POST", "/users", data=data.encode(), skip_auto_headers=["Content-Type"]
+    )
+    assert status_code == 200
+    assert json.loads(res_data)["first_name"] == "Jane"
+
+
+def test_verify_user():
+    status_code, data = request("GET", "/users/1:verify")
+    assert status_code == 200
+    assert json.loads(data) == dummy_storage[0]
+
+
+def test_batch():
+    data = json.dumps(
+        [
+            {"id": "1", "endpoint": "get_user", "args": {"uid": 1}},
+            {"id": "2", "endpoint": "verify_user", "args": {"uid": 2}},
+        ]
+    )
+    status_code, res_data = request("POST", "/batch", data=data)
+    assert status_code == 207
+
+    results = json.loads(res_data)
+    assert results[0]["body"] == dummy_storage[0]
+    assert results[1]["status_code"] == 404
@@ -0,0 +1,12 @@
+from nanopie import IntField, StringField, Model
+
+
+class User(Model):
+    uid = IntField()
+    first_name = StringField(min_length=1, required=True)
+    last_name = StringField(min_length=1, required=True)
+    age = IntField(minimum=0, maximum=150, required=True)
+
+
+class ListUsersQueryArgs(Model):
+    page_size = IntField(minimum=1, maximum=50, default=20)
@@ -0,0 +1,174 @@
+import asyncio
+import queue
+import threading
+
+from nanopie import (
+    add_background_task,
+    ASGIService,
+    FileUpload,
+    Handler,
+    HTTPMethods,
+    HTTPResponse,
+    parsed_request,
+    request,
+)
+from nanopie.misc.errors import ValidationError
+
+if __package__ == None or __package__ == "":
+    from models import User, ListUsersQueryArgs
+else:
+    from .models import User, ListUsersQueryArgs
+
+micro_svc = ASGIService(max_content_length=1000)
+micro_svc.add_batch_endpoint()
+
+UID = 1
+
+dummy_storage = [{"uid": UID, "first_name": "John", "last_name": "Smith", "age": 35}]
+
+INVALID_INPUT_RES = HTTPResponse(status_code=400, data="Input is not valid.")
+USER_NOT_EXIST_RES = HTTPResponse(status_code=404, data="User does not exist.")
+
+
+class Artifact(FileUpload):
+    max_memory_size = 16
+    max_size = 4096
+
+
+@micro_svc.get(name="get_user", rule="/users/<int:uid>")
+async def get_user(uid):
+    await asyncio.sleep(0)
+    for user_data in dummy_storage:
+        if user_data["uid"] == uid:
+            return User.from_dikt(user_data)
+
+    return USER_NOT_EXIST_RES
+
+
+@micro_svc.create(name="create_user", rule="/users", data_cls=User)
+async def create_user():
+    user = parsed_request.data
+    try:
+        user.validate()
+    except ValidationError:
+        return INVALID_INPUT_RES
+
+    user.uid = len(dummy_storage) + 1
+    return user
+
+
+@micro_svc.list(name="list_users", rule="/users", query_args_cls=ListUsersQueryArgs)
+def list_users():
+    list_users_query_args = parsed_request.query_args
+    try:
+        list_users_query_args.validate()
+    except ValidationError:
+        return INVALID_INPUT_RES
+
+    page_size = list_users_query_args.page_size
+    return [User.from_dikt(user_data) for user_data in dummy_storage[:page_size]]
+
+
+@micro_svc.custom(
+    name="whoami", rule="/threads", verb="current", method=HTTPMethods.GET
+)
+def whoami():
+    return HTTPResponse(
+        headers={"X-Thread": threading.current_thread().name},
+        mime_type="text/plain",
+        data=request.url,
+    )
+
+
+@micro_svc.custom(
+    name="wait", rule="/threads", verb="wait", method=HTTPMethods.GET, timeout=0.05
+)
+async def wait():
+    await asyncio.sleep(float(request.query_args.get("seconds", 0)))
+    return HTTPResponse(mime_type="text/plain", data="Done")
+
+
+notifications = queue.Queue()
+
+
+def notify(uid):
+    notifications.put((uid, request.url))
+
+
+@micro_svc.custom(
+    name="notify_user", rule="/users/<int:uid>", verb="notify", method=HTTPMethods.POST
+)
+async def notify_user(uid):
+    add_background_task(notify, uid)
+    return HTTPResponse(mime_type="text/plain", data="Scheduled")
+
+
+@micro_svc.create(name="upload_artifact", rule="/artifacts", data_cls=Artifact)
+def upload_artifact():
+    artifact = parsed_request.data
+    return HTTPResponse(
+        mime_type="text/plain", data="{} {}".format(artifact.size, artifact.rolled)
+    )
+
+
+class RejectingHandler(Handler):
+    async def ahandle(self, call_next, *args, **kwargs):
+        return HTTPResponse(status_code=429, data="Too many requests.")
+
+
+@micro_svc.create(
+    name="create_report",
+    rule="/reports",
+    data_cls=User,
+    admission_handlers=[RejectingHandler()],
+)
+def create_report():
+    return "Created"
+
+
+class UserStream:
+    def __init__(self):
+        self.closed = False
+        self._chunks = iter([user["first_name"].encode() for user in dummy_storage * 2])
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._chunks)
+
+    def close(self):
+        self.closed = True
+
+
+streams = []
+
+
+@micro_svc.custom(
+    name="stream_users", rule="/users", verb="stream", method=HTTPMethods.GET
+)
+def stream_users():
+    streams.append(UserStream())
+    return HTTPResponse(mime_type="text/plain", data=streams[-1])
+
+
+class LegacyHandler(Handler):
+    def handle(self, call_next, *args, **kwargs):
+        return call_next(*args, **kwargs)
+
+
+@micro_svc.custom(
+    name="echo",
+    rule="/echo",
+    verb="echo",
+    method=HTTPMethods.POST,
+    admission_handlers=[LegacyHandler()],
+)
+def echo():
+    return HTTPResponse(mime_type="text/plain", data=request.binary_data)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(micro_svc, port=8080)
@@ -0,0 +1,268 @@
+import asyncio
+import json
+
+from .simple_app import micro_svc, dummy_storage, notifications, streams
+
+
+def call(method, path, body=b"", headers=None, query_string=b"", chunk_size=None):
+    raw_headers = [
+        (k.lower().encode("latin-1"), v.encode("latin-1"))
+        for k, v in (headers or {}).items()
+    ]
+    chunk_size = chunk_size or max(len(body), 1)
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ] or [{"type": "http.request", "body": b"", "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query_string,
+        "headers": raw_headers,
+        "scheme": "http",
+        "server": ("testserver", 80),
+    }
+    asyncio.run(micro_svc(scope, receive, send))
+
+    assert sent[0]["type"] == "http.response.start"
+    headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in sent[0]["headers"]}
+    return sent[0]["status"], headers, sent[1]["body"]
+
+
+def test_get_user():
+    status, headers, body = call("GET", "/users/1")
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert json.loads(body) == dummy_storage[0]
+
+    status, _, _ = call("GET", "/users/2")
+    assert status == 404
+
+
+def test_head_user():
+    status, headers, body = call("HEAD", "/users/1")
+    assert status == 200
+    assert int(headers["content-length"]) > 0
+    assert body == b""
+
+
+def test_create_user():
+    data = json.dumps({"first_name": "Jane", "last_name": "Doe", "age": 24})
+    status, _, body = call(
+        "POST",
+        "/users",
+        body=data.encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        chunk_size=5,
+    )
+    assert status == 200
+    assert json.loads(body)["first_name"] == "Jane"
+
+    status, _, _ = call("POST", "/users", body=b"{}")
+    assert status == 400
+
+
+def test_list_users():
+    status, _, body = call("GET", "/users", query_string=b"page_size=1&page_size=2")
+    assert status == 200
+    assert len(json.loads(body)) == 1
+
+    status, _, _ = call("GET", "/users", query_string=b"page_size=100")
+    assert status == 400
+
+
+def test_sync_endpoint():
+    status, headers, body = call("GET", "/threads:current", query_string=b"a=1")
+    assert status == 200
+    assert headers["content-type"] == "text/plain; charset=utf-8"
+    assert headers["x-thread"] != "MainThread"
+    assert body == b"http://testserver:80/threads:current?a=1"
+
+
+def test_deadline():
+    status, _, body = call("GET", "/threads:wait")
+    assert status == 200
+    assert body == b"Done"
+
+    # The endpoint is cancelled once its timeout passes.
+    status, _, _ = call("GET", "/threads:wait", query_string=b"seconds=1")
+    assert status == 504
+
+    status, _, _ = call("GET", "/threads:wait", headers={"grpc-timeout": "0n"})
+    assert status == 504
+
+    status, _, _ = call("GET", "/users/1", headers={"X-Request-Timeout": "0"})
+    assert status == 504
+
+    status, _, _ = call("GET", "/users/1", headers={"X-Request-Timeout": "10"})
+    assert status == 200
+
+
+def test_background_tasks():
+    status, _, body = call("POST", "/users/1:notify")
+    assert status == 200
+    assert body == b"Scheduled"
+    assert notifications.get(timeout=5) == (1, "http://testserver:80/users/1:notify")
+
+
+def test_routing_errors():
+    status, _, _ = call("GET", "/groups")
+    assert status == 404
+
+    status, _, _ = call("DELETE", "/users/1")
+    assert status == 405
+
+
+def test_request_too_large():
+    body = b"x" * 1001
+    status, _, _ = call(
+        "POST", "/users", body=body, headers={"Content-Length": str(len(body))}
+    )
+    assert status == 400
+
+    status, _, _ = call("POST", "/users", body=body, chunk_size=100)
+    assert status == 400
+
+    # The limit is exclusive, whether the length is declared or not.
+    body = b"x" * 1000
+    status, _, _ = call(
+        "POST", "/users", body=body, headers={"Content-Length": str(len(body))}
+    )
+    assert status == 400
+
+    status, _, _ = call("POST", "/users", body=body, chunk_size=100)
+    assert status == 400
+
+
+def test_streamed_response():
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/users:stream", "headers": []}
+    asyncio.run(micro_svc(scope, receive, send))
+    assert sent[0]["status"] == 200
+    assert b"content-length" not in dict(sent[0]["headers"])
+    assert [message["body"] for message in sent[1:]] == [b"John", b"John", b""]
+    assert [message.get("more_body", False) for message in sent[1:]] == [
+        True,
+        True,
+        False,
+    ]
+
+    status, _, body = call("HEAD", "/users:stream")
+    assert status == 200
+    assert body == b""
+    assert streams[-1].closed
+
+
+def test_invalid_content_length():
+    for value in ("abc", "-1"):
+        status, _, _ = call(
+            "POST", "/users", body=b"{}", headers={"Content-Length": value}
+        )
+        assert status == 400
+
+
+def test_admission_before_payload():
+    received = []
+    sent = []
+
+    async def receive():
+        received.append(True)
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/reports", "headers": []}
+    asyncio.run(micro_svc(scope, receive, send))
+    assert sent[0]["status"] == 429
+    assert received == []
+
+
+def test_sync_admission_handler_payload():
+    # The payload is read by the payload handler, which runs synchronously
+    # after an admission handler without asynchronous support.
+    status, _, body = call("POST", "/echo:echo", body=b"hello", chunk_size=2)
+    assert status == 200
+    assert body == b"hello"
+
+
+def test_upload_artifact_spooled_to_disk(monkeypatch):
+    monkeypatch.setattr(micro_svc, "_max_memory_size", 16)
+    body = b"x" * 2048
+    status, _, res_body = call(
+        "POST",
+        "/artifacts",
+        body=body,
+        headers={"Content-Type": "application/octet-stream"},
+        chunk_size=512,
+    )
+    assert status == 200
+    assert res_body == b"2048 True"
+
+
+def test_upload_artifact():
+    body = b"x" * 2048
+    status, _, res_body = call(
+        "POST",
+        "/artifacts",
+        body=body,
+        headers={"Content-Type": "application/octet-stream"},
+        chunk_size=512,
+    )
+    assert status == 200
+    assert res_body == b"2048 True"
+
+
+def test_batch():
+    data = json.dumps(
+        [
+            {"id": "1", "endpoint": "get_user", "args": {"uid": 1}},
+            {"id": "2", "endpoint": "whoami"},
+        ]
+    )
+    status, _, body = call(
+        "POST",
+        "/batch",
+        body=data.encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    assert status == 207
+
+    results = json.loads(body)
+    assert results[0]["status_code"] == 200
+    assert results[0]["body"] == dummy_storage[0]
+    assert results[1]["status_code"] == 200
+
+
+def test_lifespan():
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(micro_svc({"type": "lifespan"}, receive, send))
+    assert [message["type"] for message in sent] == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
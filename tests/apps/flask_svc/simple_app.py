@@ -1,7 +1,15 @@
+import queue
 import uuid
 
 from flask import Flask
-from nanopie import FlaskService, parsed_request, HTTPMethods, HTTPResponse
+from nanopie import (
+    add_background_task,
+    FlaskService,
+    parsed_request,
+    HTTPMethods,
+    HTTPResponse,
+    request,
+)
 from nanopie.misc.errors import ValidationError
 
 if __package__ == None or __package__ == "":
@@ -128,5 +136,20 @@ def verify_user(uid):
     return user
 
 
+notifications = queue.Queue()
+
+
+def notify(uid):
+    notifications.put((uid, request.url))
+
+
+@micro_svc.custom(
+    name="notify_user", rule="/users/<int:uid>", verb="notify", method=HTTPMethods.POST
+)
+def notify_user(uid):
+    add_background_task(notify, uid)
+    return "Scheduled"
+
+
 if __name__ == "__main__":
     app.run(port=8080, debug=True)
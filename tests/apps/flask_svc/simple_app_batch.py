@@ -0,0 +1,99 @@
+from flask import Flask
+from nanopie import (
+    CredentialValidator,
+    endpoint,
+    FlaskService,
+    HTTPResponse,
+    HTTPAPIKeyModes,
+    HTTPAPIKeyAuthenticationHandler,
+)
+from nanopie.misc.errors import AuthenticationError
+
+if __name__ == "__main__" and __package__ is None:
+    from models import User, UpdateUserRequest, ListUsersQueryArgs
+    from simple_app import (
+        dummy_storage,
+        get_user,
+        create_user,
+        update_user,
+        list_users,
+    )
+else:
+    from .models import User, UpdateUserRequest, ListUsersQueryArgs
+    from .simple_app import (
+        dummy_storage,
+        get_user,
+        create_user,
+        update_user,
+        list_users,
+    )
+
+API_KEY = "api-key"
+UNAUTHENTICATED_RES = HTTPResponse(status_code=401, data="Invalid API key.")
+
+
+class CountingKeyValidator(CredentialValidator):
+    def __init__(self):
+        self.count = 0
+
+    def validate(self, credential):
+        self.count += 1
+        if credential.key != API_KEY:
+            raise AuthenticationError("Invalid API key.", response=UNAUTHENTICATED_RES)
+
+
+key_validator = CountingKeyValidator()
+auth_handler = HTTPAPIKeyAuthenticationHandler(
+    mode=HTTPAPIKeyModes.HEADER,
+    key_field_name="X-API-Key",
+    credential_validator=key_validator,
+)
+
+authorized = []
+
+
+@auth_handler.after_authentication
+def authorize(auth_handler, credential):
+    authorized.append(endpoint.name)
+
+
+app = Flask(__name__)
+micro_svc = FlaskService(app=app, authn_handler=auth_handler)
+
+micro_svc.add_get_endpoint(name="get_user", rule="/users/<int:uid>", func=get_user)
+
+micro_svc.add_create_endpoint(
+    name="create_user", rule="/users", data_cls=User, func=create_user
+)
+
+micro_svc.add_update_endpoint(
+    name="update_user",
+    rule="/users/<int:uid>",
+    data_cls=UpdateUserRequest,
+    func=update_user,
+)
+
+micro_svc.add_list_endpoint(
+    name="list_users", rule="/users", func=list_users, query_args_cls=ListUsersQueryArgs
+)
+
+micro_svc.add_get_endpoint(
+    name="get_raw_json",
+    rule="/raw",
+    func=lambda: HTTPResponse(
+        mime_type="application/json", data='{"a": 1}, "injected": {"b": 2}'
+    ),
+)
+
+micro_svc.add_batch_endpoint(max_operations=10, max_content_length=60000)
+
+micro_svc.add_batch_endpoint(
+    name="batch_concurrent",
+    rule="/batch:concurrent",
+    max_workers=4,
+    max_content_length=60000,
+)
+
+
+if __name__ == "__main__":
+    app.run(debug=True)
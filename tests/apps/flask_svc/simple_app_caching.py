@@ -0,0 +1,49 @@
+from flask import Flask
+from nanopie import FlaskService, HTTPETagHandler
+
+if __name__ == "__main__" and __package__ is None:
+    from models import User, UpdateUserRequest, ListUsersQueryArgs
+    from simple_app import (
+        dummy_storage,
+        get_user,
+        create_user,
+        update_user,
+        list_users,
+    )
+else:
+    from .models import User, UpdateUserRequest, ListUsersQueryArgs
+    from .simple_app import (
+        dummy_storage,
+        get_user,
+        create_user,
+        update_user,
+        list_users,
+    )
+
+app = Flask(__name__)
+micro_svc = FlaskService(app=app, handlers=[HTTPETagHandler()])
+
+micro_svc.add_get_endpoint(name="get_user", rule="/users/<int:uid>", func=get_user)
+
+micro_svc.add_create_endpoint(
+    name="create_user", rule="/users", data_cls=User, func=create_user
+)
+
+micro_svc.add_update_endpoint(
+    name="update_user",
+    rule="/users/<int:uid>",
+    data_cls=UpdateUserRequest,
+    func=update_user,
+)
+
+micro_svc.add_list_endpoint(
+    name="list_users",
+    rule="/users",
+    func=list_users,
+    query_args_cls=ListUsersQueryArgs,
+    handlers=[HTTPETagHandler(weak=True)],
+)
+
+
+if __name__ == "__main__":
+    app.run(debug=True)
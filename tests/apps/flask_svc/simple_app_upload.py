@@ -0,0 +1,27 @@
+import hashlib
+
+from flask import Flask
+from nanopie import FileUpload, FlaskService, HTTPResponse, parsed_request
+
+app = Flask(__name__)
+micro_svc = FlaskService(app=app)
+
+uploads = []
+
+
+class Artifact(FileUpload):
+    max_memory_size = 1024
+    max_size = 64 * 1024
+
+
+@micro_svc.create(name="upload_artifact", rule="/artifacts", data_cls=Artifact)
+def upload_artifact():
+    artifact = parsed_request.data
+    uploads.append(artifact)
+
+    checksum = hashlib.sha256(artifact.mmap()).hexdigest()
+    return HTTPResponse(data=checksum)
+
+
+if __name__ == "__main__":
+    app.run(debug=True)
@@ -2,7 +2,7 @@ import json
 
 import pytest
 
-from .simple_app import app, dummy_storage
+from .simple_app import app, dummy_storage, notifications
 
 
 @pytest.fixture
@@ -80,3 +80,13 @@ def test_verify_user(test_client):
 
     verified_user_data = res.json
     assert verified_user_data == user_data
+
+
+def test_background_tasks(test_client):
+    res = test_client.post("/users/1:notify")
+    assert res.status_code == 200
+    assert res.get_data() == b"Scheduled"
+    # Background tasks run once the WSGI server closes the response.
+    res.close()
+
+    assert notifications.get(timeout=5) == (1, "http://localhost/users/1:notify")
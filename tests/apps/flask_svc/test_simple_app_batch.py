@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from .simple_app_batch import API_KEY, app, authorized, dummy_storage, key_validator
+
+HEADERS = {"X-API-Key": API_KEY}
+
+
+@pytest.fixture
+def test_client():
+    app.testing = True
+    key_validator.count = 0
+    authorized.clear()
+    return app.test_client()
+
+
+@pytest.mark.parametrize("rule", ["/batch", "/batch:concurrent"])
+def test_batch(test_client, rule):
+    uid = dummy_storage[0].get("uid")
+    operations = [
+        {"id": "get", "endpoint": "get_user", "args": {"uid": uid}},
+        {"id": "list", "endpoint": "list_users", "query_args": {"page_size": "10"}},
+        {
+            "id": "create",
+            "endpoint": "create_user",
+            "body": {"first_name": "Jane", "last_name": "Doe", "age": 24},
+        },
+    ]
+
+    res = test_client.post(
+        rule, data=json.dumps(operations), headers=HEADERS, follow_redirects=True
+    )
+    assert res.status_code == 207
+    assert key_validator.count == 1
+    # The hooks of the authentication handler run for each operation.
+    assert sorted(authorized[1:]) == ["create_user", "get_user", "list_users"]
+
+    results = res.json
+    assert [result["id"] for result in results] == ["get", "list", "create"]
+    assert [result["status_code"] for result in results] == [200, 200, 200]
+    assert results[0]["mime_type"] == "application/json"
+    assert results[0]["body"]["uid"] == uid
+    assert uid in [user["uid"] for user in results[1]["body"]]
+    assert results[2]["body"]["first_name"] == "Jane"
+
+    created_uid = results[2]["body"]["uid"]
+    dummy_storage[:] = [
+        user_data for user_data in dummy_storage if user_data["uid"] != created_uid
+    ]
+
+
+def test_batch_operation_errors(test_client):
+    uid = dummy_storage[0].get("uid")
+    operations = [
+        {"id": "missing", "endpoint": "delete_user", "args": {"uid": uid}},
+        {"id": "nested", "endpoint": "batch"},
+        {"id": "args", "endpoint": "get_user", "args": [uid]},
+        {"id": "data", "endpoint": "create_user", "body": "not json"},
+        "not an operation",
+    ]
+
+    res = test_client.post(
+        "/batch", data=json.dumps(operations), headers=HEADERS, follow_redirects=True
+    )
+    assert res.status_code == 207
+
+    results = res.json
+    assert [result["status_code"] for result in results] == [404, 400, 400, 400, 400]
+    assert "id" not in results[4]
+
+
+def test_batch_invalid_json_body(test_client):
+    operations = [{"id": "raw", "endpoint": "get_raw_json"}]
+
+    res = test_client.post(
+        "/batch", data=json.dumps(operations), headers=HEADERS, follow_redirects=True
+    )
+    assert res.status_code == 207
+
+    # JSON payloads that are not valid are embedded as strings.
+    results = res.json
+    assert results == [
+        {
+            "id": "raw",
+            "status_code": 200,
+            "headers": {},
+            "mime_type": "application/json",
+            "body": '{"a": 1}, "injected": {"b": 2}',
+        }
+    ]
+
+
+def test_batch_unauthenticated(test_client):
+    operations = [{"endpoint": "list_users"}]
+
+    res = test_client.post(
+        "/batch",
+        data=json.dumps(operations),
+        headers={"X-API-Key": "invalid"},
+        follow_redirects=True,
+    )
+    assert res.status_code == 401
+
+
+@pytest.mark.parametrize("data", ["not json", "{}", json.dumps([{}] * 11)])
+def test_batch_invalid(test_client, data):
+    res = test_client.post("/batch", data=data, headers=HEADERS, follow_redirects=True)
+    assert res.status_code == 400
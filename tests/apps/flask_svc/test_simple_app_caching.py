@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from .simple_app_caching import app, dummy_storage
+
+
+@pytest.fixture
+def test_client():
+    app.testing = True
+    return app.test_client()
+
+
+def test_get_user_not_modified(test_client):
+    uid = dummy_storage[0].get("uid")
+
+    res = test_client.get("/users/{}".format(uid), follow_redirects=True)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+    assert etag.startswith('"')
+
+    res = test_client.get(
+        "/users/{}".format(uid), headers={"If-None-Match": etag}, follow_redirects=True
+    )
+    assert res.status_code == 304
+    assert res.headers["ETag"] == etag
+    assert res.data == b""
+
+
+def test_get_user_modified(test_client):
+    uid = dummy_storage[0].get("uid")
+
+    res = test_client.get("/users/{}".format(uid), follow_redirects=True)
+    etag = res.headers["ETag"]
+
+    user_data_to_update = {"user": {"age": 47}, "masks": ["age"]}
+    res = test_client.patch(
+        "/users/{}".format(uid),
+        data=json.dumps(user_data_to_update),
+        follow_redirects=True,
+    )
+    assert res.status_code == 200
+    assert "ETag" not in res.headers
+
+    res = test_client.get(
+        "/users/{}".format(uid), headers={"If-None-Match": etag}, follow_redirects=True
+    )
+    assert res.status_code == 200
+    assert res.json["age"] == 47
+    assert res.headers["ETag"] != etag
+
+
+def test_list_users_not_modified(test_client):
+    res = test_client.get("/users", follow_redirects=True)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    res = test_client.get(
+        "/users", headers={"If-None-Match": etag}, follow_redirects=True
+    )
+    assert res.status_code == 304
@@ -0,0 +1,41 @@
+import hashlib
+import os
+
+import pytest
+
+from .simple_app_upload import app, uploads
+
+
+@pytest.fixture
+def test_client():
+    app.testing = True
+    return app.test_client()
+
+
+@pytest.mark.parametrize("size", [16, 32 * 1024])
+def test_upload_artifact(test_client, size):
+    data = os.urandom(size)
+
+    res = test_client.post(
+        "/artifacts",
+        data=data,
+        content_type="application/octet-stream",
+        follow_redirects=True,
+    )
+    assert res.status_code == 200
+    assert res.data.decode("utf-8") == hashlib.sha256(data).hexdigest()
+
+    upload = uploads[-1]
+    assert upload.size == size
+    assert upload.rolled == (size > 1024)
+    assert upload.closed
+
+
+def test_upload_artifact_too_large(test_client):
+    res = test_client.post(
+        "/artifacts",
+        data=b"x" * (64 * 1024 + 1),
+        content_type="application/octet-stream",
+        follow_redirects=True,
+    )
+    assert res.status_code == 400
@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("quart")
+
+from .simple_app import app, dummy_storage  # pylint: disable=wrong-import-position
+
+
+def request(method, path, **kwargs):
+    async def run():
+        client = app.test_client()
+        res = await client.open(path, method=method, **kwargs)
+        return res.status_code, await res.get_data()
+
+    return asyncio.run(run())
+
+
+def test_get_user():
+    status_code, data = request("GET", "/users/1")
+    assert status_code == 200
+    assert json.loads(data) == dummy_storage[0]
+
+    status_code, _ = request("GET", "/users/2")
+    assert status_code == 404
+
+
+def test_create_user():
+    data = json.dumps({"first_name": "Jane", "last_name": "Doe", "age": 24})
+    status_code, res_data = request("POST", "/users", data=data)
+    assert status_code == 200
+    assert json.loads(res_data)["first_name"] == "Jane"
+
+    status_code, _ = request("POST", "/users", data="x" * 1001)
+    assert status_code == 400
+
+
+def test_verify_user():
+    status_code, data = request("GET", "/users/1:verify")
+    assert status_code == 200
+    assert json.loads(data) == dummy_storage[0]
+
+
+def test_batch():
+    data = json.dumps(
+        [
+            {"id": "1", "endpoint": "get_user", "args": {"uid": 1}},
+            {"id": "2", "endpoint": "verify_user", "args": {"uid": 2}},
+        ]
+    )
+    status_code, res_data = request("POST", "/batch", data=data)
+    assert status_code == 207
+
+    results = json.loads(res_data)
+    assert results[0]["body"] == dummy_storage[0]
+    assert results[1]["status_code"] == 404
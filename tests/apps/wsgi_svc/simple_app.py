@@ -0,0 +1,143 @@
+import queue
+import threading
+
+from nanopie import (
+    add_background_task,
+    FileUpload,
+    HTTPMethods,
+    HTTPResponse,
+    MetricsHandler,
+    ProfilingHandler,
+    WSGIService,
+    parsed_request,
+    request,
+)
+from nanopie.misc.errors import ValidationError
+
+if __package__ == None or __package__ == "":
+    from models import User, ListUsersQueryArgs
+else:
+    from .models import User, ListUsersQueryArgs
+
+metrics = MetricsHandler()
+profiler = ProfilingHandler(sample_every=1, endpoints=["get_user"], interval=0.001)
+micro_svc = WSGIService(
+    max_content_length=1000, admission_handlers=[metrics], handlers=[profiler]
+)
+micro_svc.add_batch_endpoint(max_workers=2)
+micro_svc.add_metrics_endpoint(metrics)
+micro_svc.add_profiling_endpoint(profiler)
+
+UID = 1
+
+dummy_storage = [{"uid": UID, "first_name": "John", "last_name": "Smith", "age": 35}]
+
+INVALID_INPUT_RES = HTTPResponse(status_code=400, data="Input is not valid.")
+USER_NOT_EXIST_RES = HTTPResponse(status_code=404, data="User does not exist.")
+
+
+class Artifact(FileUpload):
+    max_memory_size = 16
+    max_size = 4096
+
+
+@micro_svc.get(name="get_user", rule="/users/<int:uid>")
+def get_user(uid):
+    for user_data in dummy_storage:
+        if user_data["uid"] == uid:
+            return User.from_dikt(user_data)
+
+    return USER_NOT_EXIST_RES
+
+
+@micro_svc.create(name="create_user", rule="/users", data_cls=User)
+def create_user():
+    user = parsed_request.data
+    try:
+        user.validate()
+    except ValidationError:
+        return INVALID_INPUT_RES
+
+    user.uid = len(dummy_storage) + 1
+    return user
+
+
+@micro_svc.list(name="list_users", rule="/users", query_args_cls=ListUsersQueryArgs)
+def list_users():
+    list_users_query_args = parsed_request.query_args
+    try:
+        list_users_query_args.validate()
+    except ValidationError:
+        return INVALID_INPUT_RES
+
+    page_size = list_users_query_args.page_size
+    return [User.from_dikt(user_data) for user_data in dummy_storage[:page_size]]
+
+
+@micro_svc.custom(
+    name="verify_user", rule="/users/<int:uid>", verb="verify", method=HTTPMethods.GET
+)
+def verify_user(uid):
+    return HTTPResponse(
+        headers={
+            "X-Thread": threading.current_thread().name,
+            "X-Remote-Addr": request.remote_addr,
+        },
+        mime_type="text/plain",
+        data=request.url,
+    )
+
+
+notifications = queue.Queue()
+
+
+def notify(uid):
+    notifications.put((uid, request.url, threading.current_thread().name))
+
+
+@micro_svc.custom(
+    name="notify_user", rule="/users/<int:uid>", verb="notify", method=HTTPMethods.POST
+)
+def notify_user(uid):
+    add_background_task(notify, uid)
+    return HTTPResponse(mime_type="text/plain", data="Scheduled")
+
+
+@micro_svc.create(name="upload_artifact", rule="/artifacts", data_cls=Artifact)
+def upload_artifact():
+    artifact = parsed_request.data
+    return HTTPResponse(
+        mime_type="text/plain", data="{} {}".format(artifact.size, artifact.rolled)
+    )
+
+
+class UserStream:
+    def __init__(self):
+        self.closed = False
+        self._chunks = iter([user["first_name"].encode() for user in dummy_storage * 2])
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._chunks)
+
+    def close(self):
+        self.closed = True
+
+
+streams = []
+
+
+@micro_svc.custom(
+    name="stream_users", rule="/users", verb="stream", method=HTTPMethods.GET
+)
+def stream_users():
+    streams.append(UserStream())
+    return HTTPResponse(mime_type="text/plain", data=streams[-1])
+
+
+if __name__ == "__main__":
+    from wsgiref.simple_server import make_server
+
+    make_server("", 8080, micro_svc).serve_forever()
@@ -0,0 +1,190 @@
+import json
+
+import pytest
+from werkzeug.test import Client
+
+from .simple_app import micro_svc, dummy_storage, notifications, profiler, streams
+
+
+@pytest.fixture
+def test_client():
+    return Client(micro_svc)
+
+
+def test_get_user(test_client):
+    res = test_client.get("/users/1")
+    assert res.status_code == 200
+    assert res.headers["Content-Type"] == "application/json"
+    assert json.loads(res.get_data()) == dummy_storage[0]
+
+    res = test_client.get("/users/2")
+    assert res.status_code == 404
+
+
+def test_head_user(test_client):
+    res = test_client.head("/users/1")
+    assert res.status_code == 200
+    assert int(res.headers["Content-Length"]) > 0
+    assert res.get_data() == b""
+
+
+def test_create_user(test_client):
+    data = json.dumps({"first_name": "Jane", "last_name": "Doe", "age": 24})
+    res = test_client.post("/users", data=data, content_type="application/json")
+    assert res.status_code == 200
+    assert json.loads(res.get_data())["first_name"] == "Jane"
+
+    res = test_client.post("/users", data="{}")
+    assert res.status_code == 400
+
+    res = test_client.post("/users", data="x" * 1001)
+    assert res.status_code == 400
+
+
+def test_invalid_content_length(test_client):
+    for value in ("abc", "-1"):
+        res = test_client.post(
+            "/users",
+            data="{}",
+            content_type="application/json",
+            environ_overrides={"CONTENT_LENGTH": value},
+        )
+        assert res.status_code == 400
+
+
+def test_list_users(test_client):
+    res = test_client.get("/users?page_size=1&page_size=2")
+    assert res.status_code == 200
+    assert len(json.loads(res.get_data())) == 1
+
+    res = test_client.get("/users?page_size=100")
+    assert res.status_code == 400
+
+
+def test_custom_endpoint(test_client):
+    res = test_client.get(
+        "/users/1:verify?a=1", environ_overrides={"REMOTE_ADDR": "10.0.0.1"}
+    )
+    assert res.status_code == 200
+    assert res.headers["Content-Type"] == "text/plain; charset=utf-8"
+    assert res.get_data() == b"http://localhost/users/1:verify?a=1"
+    assert res.headers["X-Remote-Addr"] == "10.0.0.1"
+
+
+def test_routing_errors(test_client):
+    res = test_client.get("/groups")
+    assert res.status_code == 404
+
+    res = test_client.delete("/users/1")
+    assert res.status_code == 405
+
+
+def test_streamed_response(test_client):
+    res = test_client.get("/users:stream")
+    assert res.status_code == 200
+    assert "Content-Length" not in res.headers
+    assert res.get_data() == b"JohnJohn"
+
+    res = test_client.head("/users:stream")
+    assert res.status_code == 200
+    assert res.get_data() == b""
+    assert streams[-1].closed
+
+
+def test_upload_artifact(test_client):
+    res = test_client.post(
+        "/artifacts", data=b"x" * 2048, content_type="application/octet-stream"
+    )
+    assert res.status_code == 200
+    assert res.get_data() == b"2048 True"
+
+
+def test_background_tasks(test_client):
+    res = test_client.post("/users/1:notify")
+    assert res.status_code == 200
+    assert res.get_data() == b"Scheduled"
+    # Background tasks run once the WSGI server closes the response.
+    assert notifications.empty()
+    res.close()
+
+    uid, url, thread = notifications.get(timeout=5)
+    assert uid == 1
+    assert url == "http://localhost/users/1:notify"
+    assert thread.startswith("nanopie-background")
+
+    data = json.dumps([{"id": "1", "endpoint": "notify_user", "args": {"uid": 2}}])
+    res = test_client.post("/batch", data=data, content_type="application/json")
+    assert res.status_code == 207
+    res.close()
+    assert notifications.get(timeout=5)[0] == 2
+
+    stats = micro_svc.task_runner.stats()
+    assert stats["completed"] == 2
+    assert stats["queued"] == stats["running"] == stats["failed"] == 0
+
+
+def test_batch(test_client):
+    data = json.dumps(
+        [
+            {"id": "1", "endpoint": "get_user", "args": {"uid": 1}},
+            {"id": "2", "endpoint": "verify_user", "args": {"uid": 1}},
+        ]
+    )
+    res = test_client.post("/batch", data=data, content_type="application/json")
+    assert res.status_code == 207
+
+    results = json.loads(res.get_data())
+    assert results[0]["body"] == dummy_storage[0]
+    assert results[1]["body"] == "http://localhost/batch"
+    assert results[1]["headers"]["X-Thread"].startswith("nanopie-batch")
+
+
+def scrape(test_client):
+    res = test_client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+
+    samples = {}
+    for line in res.get_data(as_text=True).splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics(test_client):
+    before = scrape(test_client)
+    test_client.get("/users/1")
+    test_client.get("/users/2")
+    test_client.post("/users", data="{", content_type="application/json")
+    after = scrape(test_client)
+
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    assert delta('nanopie_requests_total{endpoint="get_user",status="200"}') == 1
+    assert delta('nanopie_requests_total{endpoint="get_user",status="404"}') == 1
+    assert delta('nanopie_requests_total{endpoint="create_user",status="400"}') == 1
+    assert delta('nanopie_request_duration_seconds_count{endpoint="get_user"}') == 2
+    for stage in ("deserialization", "function", "serialization"):
+        name = 'nanopie_stage_duration_seconds_count{{endpoint="get_user",stage="{}"}}'
+        assert delta(name.format(stage)) == 2
+    # Scraping the metrics is not recorded.
+    assert not any('endpoint="metrics"' in name for name in after)
+
+
+def test_profiling(test_client):
+    test_client.get("/profile?reset=true")
+    test_client.get("/users/1")
+    test_client.get("/users")
+
+    res = test_client.get("/profile")
+    assert res.status_code == 200
+    assert res.headers["Content-Type"].startswith("text/plain")
+    # Only the requests to the selected endpoints are profiled.
+    assert profiler.sampled == 1
+    for line in res.get_data(as_text=True).splitlines():
+        assert line.startswith("get_user;")
+
+    res = test_client.get("/profile?format=flamegraph")
+    assert res.status_code == 400
@@ -37,3 +37,7 @@ requests_installed = pytest.mark.skipif(
     pkgutil.find_loader("requests") == None,
     reason="requires that requests is installed",
 )
+pyarrow_installed = pytest.mark.skipif(
+    pkgutil.find_loader("pyarrow") == None,
+    reason="requires that pyarrow is installed",
+)
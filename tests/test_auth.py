@@ -13,7 +13,7 @@ from nanopie.auth import (
     HTTPOAuth2BearerJWTAuthenticationHandler,
     HTTPOAuth2BearerJWTModes,
 )
-from nanopie.globals import request
+from nanopie.globals import request, svc_ctx
 from nanopie.misc.errors import AuthenticationError
 from nanopie.services.http.io import HTTPResponse
 from .marks import jwt_installed, cryptography_installed
@@ -97,6 +97,26 @@ def test_authentication_handler(setup_ctx, authentication_handler):
     assert authentication_handler() == None
     credential_extractor.extract.assert_called_with(request=request)
     credential_validator.validate.assert_called_with(credential=credential)
+    assert authentication_handler in svc_ctx["authenticated"]
+    assert svc_ctx["credential"] == credential
+
+
+def test_authentication_handler_already_authenticated(
+    setup_ctx, authentication_handler
+):
+    extractor = MagicMock(name="credential_extractor")
+    other_authentication_handler = AuthenticationHandler(
+        credential_extractor=extractor, credential_validator=credential_validator
+    )
+    svc_ctx["authenticated"] = frozenset([other_authentication_handler])
+
+    assert authentication_handler() == None
+    assert svc_ctx["authenticated"] == frozenset(
+        [authentication_handler, other_authentication_handler]
+    )
+
+    assert other_authentication_handler() == None
+    extractor.extract.assert_not_called()
 
 
 def test_authentication_handler_before_authentication_failure_not_callable(
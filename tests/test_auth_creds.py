@@ -3,7 +3,7 @@ import pkgutil
 import pytest
 
 from nanopie.auth.creds.jwt import JWT_INSTALLED
-from nanopie.auth.creds import JWT, JWTValidator
+from nanopie.auth.creds import JWT, JWTValidator, Key, UserCredential
 from nanopie.misc.errors import AuthenticationError
 from .constants import (
     AUDIENCE,
@@ -41,6 +41,7 @@ def test_jwt():
     assert jwt.payload.get("sub") == "1234567890"
     assert jwt.payload.get("name") == "John Doe"
     assert jwt.payload.get("iat") == 1516239022
+    assert jwt.principal == "1234567890"
 
 
 @jwt_installed
@@ -174,6 +175,27 @@ def test_jwt_validator_valid_jwt():
     jwt_validator.validate(credential=jwt)
 
 
+@jwt_installed
+@cryptography_installed
+def test_jwt_validator_warmup():
+    jwt_validator = JWTValidator(
+        key_or_secret=RS256_PUBLIC_KEY,
+        algorithm="RS256",
+        verify_iss=True,
+        issuer=ISSUER,
+        verify_aud=True,
+        audience=AUDIENCE,
+    )
+
+    jwt_validator.warmup()
+    prepared_key = jwt_validator._prepared_key
+    assert not isinstance(prepared_key, str)
+
+    jwt = JWT(token=RS256_TOKEN)
+    jwt_validator.validate(credential=jwt)
+    assert jwt_validator._prepared_key is prepared_key
+
+
 @jwt_installed
 @cryptography_installed
 def test_jwt_validator_invalid_jwt():
@@ -227,3 +249,8 @@ def test_jwt_validator_ecdsa_valid_jwt():
 
     jwt = JWT(token=ES256_TOKEN)
     jwt_validator.validate(credential=jwt)
+
+
+def test_credential_principal():
+    assert Key(key="key").principal == "key"
+    assert UserCredential(username="user", password="password").principal == "user"
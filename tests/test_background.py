@@ -0,0 +1,144 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+from nanopie.background import (
+    BackgroundTaskRunner,
+    add_background_task,
+)
+from nanopie.deadline import get_deadline
+from nanopie.globals import request, svc_ctx_var
+
+
+def schedule(*tasks):
+    ctx = svc_ctx_var.get()
+    ctx["background_tasks"] = []
+    ctx["deadline"] = time.monotonic() + 10
+    for task in tasks:
+        add_background_task(*task)
+    return ctx.pop("background_tasks")
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_add_background_task_without_support(setup_ctx):
+    with pytest.raises(RuntimeError):
+        add_background_task(print)
+
+
+def test_background_task_runner(setup_ctx):
+    results = queue.Queue()
+
+    def task(x, y=0):
+        results.put((x + y, request, get_deadline(), threading.current_thread().name))
+        # Tasks cannot schedule other tasks.
+        with pytest.raises(RuntimeError):
+            add_background_task(print)
+
+    tasks = schedule((task, 1), (task, 2, 3))
+    runner = BackgroundTaskRunner(max_workers=2)
+    runner.submit(tasks)
+
+    received = sorted([results.get(timeout=5), results.get(timeout=5)])
+    assert [r[0] for r in received] == [1, 5]
+    for _, req, deadline, thread in received:
+        # Tasks run in the context of the request, without its deadline.
+        assert req == svc_ctx_var.get()["request"]
+        assert deadline == None
+        assert thread.startswith("nanopie-background")
+
+    wait_for(lambda: runner.stats()["completed"] == 2)
+    runner.shutdown()
+
+
+def test_background_task_runner_queue(setup_ctx):
+    release = threading.Event()
+    runner = BackgroundTaskRunner(max_workers=1, max_queue=1)
+
+    runner.submit(schedule((release.wait, 5)))
+    wait_for(lambda: runner.stats()["running"] == 1)
+    runner.submit(schedule((print,), (print,)))
+
+    assert runner.stats() == {
+        "queued": 1,
+        "running": 1,
+        "completed": 0,
+        "failed": 0,
+        "rejected": 1,
+    }
+
+    release.set()
+    wait_for(lambda: runner.stats()["completed"] == 2)
+    assert runner.stats()["queued"] == runner.stats()["running"] == 0
+    runner.shutdown()
+
+
+def test_background_task_runner_failure(setup_ctx):
+    def task():
+        raise ValueError()
+
+    runner = BackgroundTaskRunner()
+    runner.submit(schedule((task,)))
+    wait_for(lambda: runner.stats()["failed"] == 1)
+    runner.shutdown()
+
+
+def test_background_task_runner_coroutine_on_thread_pool(setup_ctx):
+    results = queue.Queue()
+
+    async def task(x):
+        await asyncio.sleep(0)
+        results.put((x, request))
+
+    runner = BackgroundTaskRunner()
+    runner.submit(schedule((task, 1)))
+    assert results.get(timeout=5) == (1, svc_ctx_var.get()["request"])
+    runner.shutdown()
+
+
+def test_background_task_runner_async(setup_ctx):
+    results = []
+
+    async def task(x):
+        await asyncio.sleep(0)
+        results.append((x, request, threading.current_thread().name))
+
+    def sync_task(x):
+        results.append((x, request, threading.current_thread().name))
+
+    async def main(runner):
+        runner.submit_async(schedule((task, 1), (sync_task, 2)))
+        while runner.stats()["completed"] < 2:
+            await asyncio.sleep(0.01)
+
+    runner = BackgroundTaskRunner()
+    asyncio.run(asyncio.wait_for(main(runner), 5))
+
+    results.sort()
+    assert results[0] == (1, svc_ctx_var.get()["request"], "MainThread")
+    assert results[1][:2] == (2, svc_ctx_var.get()["request"])
+    assert results[1][2].startswith("nanopie-background")
+    runner.shutdown()
+
+
+def test_background_task_runner_async_cancelled(setup_ctx):
+    async def task():
+        await asyncio.sleep(5)
+
+    async def main(runner):
+        runner.submit_async(schedule((task,), (task,)))
+        await asyncio.sleep(0)
+
+    # Tasks still running when the event loop stops are cancelled.
+    runner = BackgroundTaskRunner()
+    asyncio.run(main(runner))
+    assert runner.stats()["running"] == 0
+    assert runner.stats()["failed"] == 2
@@ -0,0 +1,564 @@
+import asyncio
+import contextvars
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from nanopie.caching import (
+    CachingHandler,
+    CoalescingHandler,
+    HTTPETagHandler,
+    LRUCache,
+)
+from nanopie.globals import endpoint, request, svc_ctx_var
+from nanopie.handler import SimpleHandler
+from nanopie.misc.errors import DeadlineExceededError
+from nanopie.services.http.io import HTTPResponse
+
+
+def make_response_func(data="Test Message"):
+    func = MagicMock(
+        return_value=HTTPResponse(status_code=200, mime_type="text/plain", data=data)
+    )
+    return func
+
+
+def setup_request(method="GET", if_none_match=None, query_args=None, headers=None):
+    endpoint.name = "get_user"  # pylint: disable=assigning-non-slot
+    endpoint.method = method  # pylint: disable=assigning-non-slot
+    headers = dict(headers or {})
+    if if_none_match:
+        headers["If-None-Match"] = if_none_match
+    request.headers = headers  # pylint: disable=assigning-non-slot
+    request.query_args = query_args or {}  # pylint: disable=assigning-non-slot
+
+
+def chain(handler, func):
+    handler.add_route(name="get_user", handler=SimpleHandler(func))
+    return handler
+
+
+def test_http_etag_handler_tags_response(setup_ctx):
+    setup_request()
+    handler = HTTPETagHandler()
+    chain(handler, make_response_func())
+
+    res = handler()
+    assert res.status_code == 200
+    assert res.data == "Test Message"
+    assert res.headers["ETag"] == handler.make_etag("Test Message")
+    assert res.headers["ETag"].startswith('"')
+
+
+def test_http_etag_handler_weak(setup_ctx):
+    setup_request()
+    handler = HTTPETagHandler(weak=True)
+    chain(handler, make_response_func())
+
+    res = handler()
+    assert res.headers["ETag"].startswith('W/"')
+
+
+def test_http_etag_handler_not_modified(setup_ctx):
+    handler = HTTPETagHandler()
+    etag = handler.make_etag("Test Message")
+    setup_request(if_none_match='"abc", W/{}'.format(etag))
+    chain(handler, make_response_func())
+
+    res = handler()
+    assert res.status_code == 304
+    assert res.data == b""
+    assert res.headers == {"ETag": etag}
+
+
+def test_http_etag_handler_modified(setup_ctx):
+    setup_request(if_none_match='"abc"')
+    handler = HTTPETagHandler()
+    chain(handler, make_response_func())
+
+    res = handler()
+    assert res.status_code == 200
+    assert res.data == "Test Message"
+
+
+def test_http_etag_handler_wildcard(setup_ctx):
+    setup_request(if_none_match="*")
+    handler = HTTPETagHandler()
+    chain(handler, make_response_func())
+
+    assert handler().status_code == 304
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "PATCH", "DELETE"])
+def test_http_etag_handler_skips_unsafe_methods(setup_ctx, method):
+    setup_request(method=method, if_none_match="*")
+    handler = HTTPETagHandler()
+    chain(handler, make_response_func())
+
+    res = handler()
+    assert res.status_code == 200
+    assert "ETag" not in res.headers
+
+
+def test_http_etag_handler_skips_error_responses(setup_ctx):
+    setup_request(if_none_match="*")
+    handler = HTTPETagHandler()
+    chain(handler, MagicMock(return_value=HTTPResponse(status_code=404, data="")))
+
+    res = handler()
+    assert res.status_code == 404
+    assert "ETag" not in res.headers
+
+
+def test_http_etag_handler_version_func(setup_ctx):
+    version_func = MagicMock(return_value=3)
+    handler = HTTPETagHandler(version_func=version_func)
+    func = make_response_func()
+    chain(handler, func)
+
+    setup_request()
+    res = handler("user-1", verbose=True)
+    version_func.assert_called_once_with("user-1", verbose=True)
+    func.assert_called_once()
+    etag = res.headers["ETag"]
+
+    setup_request(if_none_match=etag)
+    res = handler("user-1", verbose=True)
+    assert res.status_code == 304
+    assert res.headers == {"ETag": etag}
+    func.assert_called_once()
+
+    version_func.return_value = 4
+    res = handler("user-1", verbose=True)
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+    assert func.call_count == 2
+
+
+def test_http_etag_handler_version_func_fallback(setup_ctx):
+    handler = HTTPETagHandler(version_func=MagicMock(return_value=None))
+    chain(handler, make_response_func())
+
+    setup_request(if_none_match=handler.make_etag("Test Message"))
+    assert handler().status_code == 304
+
+
+def test_http_etag_handler_parse_if_none_match():
+    assert HTTPETagHandler.parse_if_none_match('"a", W/"b",  "c"') == [
+        '"a"',
+        '"b"',
+        '"c"',
+    ]
+    assert HTTPETagHandler.parse_if_none_match("*") == ["*"]
+
+
+def test_lru_cache():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") == None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "expirations": 0,
+        "size": 2,
+    }
+
+
+def test_lru_cache_ttl():
+    cache = LRUCache(ttl=10)
+    with patch("nanopie.caching.lru.time.monotonic", return_value=100):
+        cache.set("a", 1)
+    with patch("nanopie.caching.lru.time.monotonic", return_value=109):
+        assert cache.get("a") == 1
+    with patch("nanopie.caching.lru.time.monotonic", return_value=110):
+        assert cache.get("a", "expired") == "expired"
+
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_lru_cache_invalid_args():
+    with pytest.raises(ValueError):
+        LRUCache(max_size=0)
+    with pytest.raises(ValueError):
+        LRUCache(ttl=0)
+
+
+def test_caching_handler(setup_ctx):
+    setup_request(query_args={"page": "1"})
+    handler = CachingHandler()
+    func = make_response_func()
+    chain(handler, func)
+
+    res = handler(uid=1)
+    assert res.data == "Test Message"
+    res.headers = {"X-Modified": "true"}
+
+    res = handler(uid=1)
+    assert res.data == "Test Message"
+    assert "X-Modified" not in res.headers
+    func.assert_called_once()
+    assert handler.stats()["hits"] == 1
+    assert handler.stats()["misses"] == 1
+
+    handler(uid=2)
+    setup_request(query_args={"page": "2"})
+    handler(uid=1)
+    setup_request(query_args={"page": "1"}, headers={"Authorization": "Basic a"})
+    handler(uid=1)
+    assert func.call_count == 4
+
+
+def test_caching_handler_principal(setup_ctx):
+    setup_request(headers={"X-API-Key": "key-1"})
+    handler = CachingHandler()
+    func = make_response_func()
+    chain(handler, func)
+
+    credential = MagicMock(principal="user-1")
+    svc_ctx_var.get()["credential"] = credential
+    handler()
+    handler()
+    assert func.call_count == 1
+
+    # Requests authenticated as other principals are not answered from the
+    # cache, whichever header their credentials are sent in.
+    setup_request(headers={"X-API-Key": "key-2"})
+    credential.principal = "user-2"
+    handler()
+    assert func.call_count == 2
+
+
+def test_caching_handler_multi_value_query_args(setup_ctx):
+    setup_request(query_args=MultiDict([("id", "1"), ("id", "2")]))
+    handler = CachingHandler()
+    func = make_response_func()
+    chain(handler, func)
+
+    handler()
+    setup_request(query_args=MultiDict([("id", "1")]))
+    handler()
+    assert func.call_count == 2
+    handler()
+    assert func.call_count == 2
+
+
+def test_caching_handler_principal_func(setup_ctx):
+    setup_request()
+    principal_func = MagicMock(return_value="user-1")
+    handler = CachingHandler(principal_func=principal_func)
+    func = make_response_func()
+    chain(handler, func)
+
+    handler()
+    handler()
+    assert func.call_count == 1
+
+    principal_func.return_value = "user-2"
+    handler()
+    assert func.call_count == 2
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "PATCH", "DELETE"])
+def test_caching_handler_skips_unsafe_methods(setup_ctx, method):
+    setup_request(method=method)
+    handler = CachingHandler()
+    func = make_response_func()
+    chain(handler, func)
+
+    handler()
+    handler()
+    assert func.call_count == 2
+    assert len(handler.cache) == 0
+
+
+def test_caching_handler_skips_error_responses(setup_ctx):
+    setup_request()
+    handler = CachingHandler()
+    func = MagicMock(return_value=HTTPResponse(status_code=500, data=""))
+    chain(handler, func)
+
+    handler()
+    handler()
+    assert func.call_count == 2
+
+
+def test_caching_handler_skips_unhashable_query_args(setup_ctx):
+    setup_request(query_args={"ids": ["1", "2"]})
+    handler = CachingHandler()
+    func = make_response_func()
+    chain(handler, func)
+
+    handler()
+    handler()
+    assert func.call_count == 2
+
+
+def test_caching_handler_async(setup_ctx):
+    setup_request()
+    handler = CachingHandler()
+    func = make_response_func()
+    chain(handler, func)
+
+    assert asyncio.run(handler.acall()).data == "Test Message"
+    assert asyncio.run(handler.acall()).data == "Test Message"
+    func.assert_called_once()
+
+
+def run_in_threads(func, count):
+    results = []
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(lambda: results.append(func()),),
+        )
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_coalescing_handler(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler()
+    release = threading.Event()
+    func = MagicMock(
+        side_effect=lambda: release.wait(5) and HTTPResponse(data="Test Message")
+    )
+    chain(handler, func)
+
+    threads, results = run_in_threads(handler, 5)
+    wait_for(lambda: handler.stats() == {"coalesced": 4, "in_flight": 1})
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    func.assert_called_once()
+    assert [res.data for res in results] == ["Test Message"] * 5
+    assert len({id(res) for res in results}) == 5
+    assert handler.stats() == {"coalesced": 4, "in_flight": 0}
+
+    handler()
+    assert func.call_count == 2
+
+
+def test_coalescing_handler_exception(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler()
+    release = threading.Event()
+
+    def func():
+        release.wait(5)
+        raise RuntimeError("Test Error")
+
+    chain(handler, func)
+
+    errors = []
+
+    def call():
+        try:
+            handler()
+        except RuntimeError as ex:
+            errors.append(ex)
+
+    threads, _ = run_in_threads(call, 3)
+    wait_for(lambda: handler.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+
+
+def test_coalescing_handler_deadline_exceeded(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            raise DeadlineExceededError("The deadline of the request has passed.")
+        return "Test Message"
+
+    chain(handler, func)
+
+    errors = []
+
+    def call():
+        try:
+            return handler()
+        except DeadlineExceededError as ex:
+            errors.append(ex)
+
+    threads, results = run_in_threads(call, 1)
+    wait_for(lambda: calls)
+    more_threads, more_results = run_in_threads(call, 2)
+    wait_for(lambda: handler.coalesced == 2)
+    release.set()
+    for thread in threads + more_threads:
+        thread.join()
+
+    # Requests waiting for the one that has run out of time are processed on
+    # their own.
+    assert len(errors) == 1
+    assert results + more_results == [None, "Test Message", "Test Message"]
+
+
+def streamed_response():
+    return HTTPResponse(data=(chunk for chunk in [b"chunk0;", b"chunk1;"]))
+
+
+def test_coalescing_handler_streamed_response(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler()
+    release = threading.Event()
+    func = MagicMock(side_effect=lambda: release.wait(5) and streamed_response())
+    chain(handler, func)
+
+    threads, results = run_in_threads(handler, 3)
+    wait_for(lambda: handler.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    # Streamed payloads can only be consumed once; requests waiting for one
+    # are processed on their own.
+    assert func.call_count == 3
+    assert [b"".join(res.data) for res in results] == [b"chunk0;chunk1;"] * 3
+
+
+def test_coalescing_handler_timeout(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler(timeout=0.01)
+    release = threading.Event()
+    func = MagicMock(side_effect=lambda: release.wait(5) and "Test Message")
+    chain(handler, func)
+
+    threads, results = run_in_threads(handler, 2)
+    wait_for(lambda: func.call_count == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["Test Message"] * 2
+
+
+def test_coalescing_handler_skips_unsafe_methods(setup_ctx):
+    setup_request(method="POST")
+    handler = CoalescingHandler()
+    chain(handler, make_response_func())
+
+    handler()
+    assert handler.stats() == {"coalesced": 0, "in_flight": 0}
+
+
+def test_coalescing_handler_async(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return HTTPResponse(data="Test Message")
+
+    chain(handler, func)
+
+    async def main():
+        return await asyncio.gather(*[handler.acall() for _ in range(5)])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [res.data for res in results] == ["Test Message"] * 5
+    assert handler.stats() == {"coalesced": 4, "in_flight": 0}
+
+
+def test_coalescing_handler_async_streamed_response(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return streamed_response()
+
+    chain(handler, func)
+
+    async def main():
+        return await asyncio.gather(*[handler.acall() for _ in range(3)])
+
+    results = asyncio.run(main())
+    assert len(calls) == 3
+    assert [b"".join(res.data) for res in results] == [b"chunk0;chunk1;"] * 3
+
+
+def test_coalescing_handler_async_cancelled(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "Test Message"
+
+    chain(handler, func)
+
+    async def main():
+        leader = asyncio.ensure_future(handler.acall())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(handler.acall())
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await waiter
+
+    assert asyncio.run(main()) == "Test Message"
+    assert len(calls) == 2
+
+
+def test_coalescing_handler_async_deadline_exceeded(setup_ctx):
+    setup_request()
+    handler = CoalescingHandler()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        if len(calls) == 1:
+            raise DeadlineExceededError("The deadline of the request has passed.")
+        return "Test Message"
+
+    chain(handler, func)
+
+    async def main():
+        leader = asyncio.ensure_future(handler.acall())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(handler.acall())
+        with pytest.raises(DeadlineExceededError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == "Test Message"
+    assert len(calls) == 2
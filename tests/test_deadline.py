@@ -0,0 +1,187 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanopie.deadline import check_deadline, get_deadline, time_remaining
+from nanopie.globals import endpoint, svc_ctx_var
+from nanopie.handler import Handler, SimpleHandler
+from nanopie.misc.errors import DeadlineExceededError
+from nanopie.services.http.foundation import HTTPFoundationHandler, parse_timeout
+from nanopie.services.http.io import HTTPHeaders, HTTPRequest
+
+
+def setup_request(headers=None):
+    svc_ctx_var.get()["request"] = HTTPRequest(
+        url="http://example.com/users/1",
+        headers=headers or {},
+        content_length=0,
+        mime_type="application/json",
+        query_args={},
+        binary_data=b"",
+    )
+
+
+def chain(*handlers):
+    endpoint.name = "get_user"  # pylint: disable=assigning-non-slot
+    for handler, next_handler in zip(handlers, handlers[1:]):
+        handler.add_route(name="get_user", handler=next_handler)
+    return handlers[0]
+
+
+@pytest.mark.parametrize(
+    "headers,timeout",
+    [
+        ({}, None),
+        ({"X-Request-Timeout": "1.5"}, 1.5),
+        ({"x-request-timeout": "0"}, 0.0),
+        ({"X-Request-Timeout": "-1"}, None),
+        ({"X-Request-Timeout": "soon"}, None),
+        ({"grpc-timeout": "2S"}, 2.0),
+        ({"grpc-timeout": "1M"}, 60.0),
+        ({"grpc-timeout": "1H"}, 3600.0),
+        ({"grpc-timeout": "250m"}, 0.25),
+        ({"grpc-timeout": "100u"}, 1e-4),
+        ({"grpc-timeout": "5n"}, 5e-9),
+        ({"grpc-timeout": "123456789S"}, None),
+        ({"grpc-timeout": "2s"}, None),
+        ({"X-Request-Timeout": "1", "grpc-timeout": "2S"}, 1.0),
+    ],
+)
+def test_parse_timeout(headers, timeout):
+    assert parse_timeout(HTTPHeaders(headers)) == pytest.approx(timeout)
+
+
+def test_deadline_helpers(setup_ctx):
+    assert get_deadline() == None
+    assert time_remaining() == None
+    check_deadline()
+
+    svc_ctx_var.get()["deadline"] = time.monotonic() + 10
+    assert 9 < time_remaining() <= 10
+    check_deadline()
+
+    svc_ctx_var.get()["deadline"] = time.monotonic() - 1
+    assert time_remaining() == 0
+    with pytest.raises(DeadlineExceededError):
+        check_deadline()
+
+
+def test_deadline_helpers_out_of_context():
+    token = svc_ctx_var.set(None)
+    try:
+        assert get_deadline() == None
+        assert time_remaining() == None
+        check_deadline()
+    finally:
+        svc_ctx_var.reset(token)
+
+
+def test_foundation_handler_deadline(setup_ctx):
+    func = MagicMock(return_value="Test Message")
+    handler = chain(HTTPFoundationHandler(timeout=5), SimpleHandler(func))
+
+    setup_request()
+    assert handler() == "Test Message"
+    assert 4 < time_remaining() <= 5
+
+    # Callers may only shorten the timeout of the endpoint.
+    svc_ctx_var.get().pop("deadline")
+    setup_request(headers={"X-Request-Timeout": "60"})
+    assert handler() == "Test Message"
+    assert time_remaining() <= 5
+
+    svc_ctx_var.get().pop("deadline")
+    setup_request(headers={"X-Request-Timeout": "1"})
+    assert handler() == "Test Message"
+    assert time_remaining() <= 1
+
+    # Requests whose deadlines have passed are not processed.
+    func.reset_mock()
+    svc_ctx_var.get().pop("deadline")
+    setup_request(headers={"X-Request-Timeout": "0"})
+    res = handler()
+    assert res.status_code == 504
+    func.assert_not_called()
+
+
+def test_foundation_handler_inherited_deadline(setup_ctx):
+    handler = chain(HTTPFoundationHandler(timeout=5), SimpleHandler(lambda: "OK"))
+
+    # Requests that already have a deadline (e.g. operations of a batch
+    # request) keep it.
+    deadline = time.monotonic() + 1
+    svc_ctx_var.get()["deadline"] = deadline
+    setup_request()
+    assert handler() == "OK"
+    assert get_deadline() == deadline
+
+    svc_ctx_var.get()["deadline"] = time.monotonic() - 1
+    assert handler().status_code == 504
+
+
+def test_foundation_handler_skips_remaining_stages(setup_ctx):
+    func = MagicMock(return_value="Test Message")
+    handler = chain(
+        HTTPFoundationHandler(timeout=0.01),
+        SimpleHandler(lambda: time.sleep(0.02)),
+        SimpleHandler(func),
+    )
+
+    setup_request()
+    res = handler()
+    assert res.status_code == 504
+    func.assert_not_called()
+
+
+def test_foundation_handler_without_deadline(setup_ctx):
+    handler = chain(HTTPFoundationHandler(), SimpleHandler(lambda: "OK"))
+
+    setup_request()
+    assert handler() == "OK"
+    assert get_deadline() == None
+
+
+def test_foundation_handler_deadline_async(setup_ctx):
+    cancelled = []
+
+    async def func():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "Test Message"
+
+    handler = chain(HTTPFoundationHandler(timeout=0.01), SimpleHandler(func))
+    setup_request()
+    res = asyncio.run(handler.acall())
+    assert res.status_code == 504
+    assert cancelled == [True]
+
+
+def test_foundation_handler_deadline_async_own_timeout(setup_ctx):
+    async def func():
+        await asyncio.wait_for(asyncio.sleep(1), 0.01)
+
+    # Handlers timing out on their own before the deadline are not reported
+    # as requests past their deadlines.
+    handler = chain(HTTPFoundationHandler(timeout=5), SimpleHandler(func))
+    setup_request()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(handler.acall())
+
+
+def test_foundation_handler_deadline_custom_handler(setup_ctx):
+    class CheckingHandler(Handler):
+        def handle(self, call_next, *args, **kwargs):
+            check_deadline()
+            return call_next(*args, **kwargs)
+
+    svc_ctx_var.get()["deadline"] = time.monotonic() - 1
+    handler = chain(
+        HTTPFoundationHandler(), CheckingHandler(), SimpleHandler(lambda: "OK")
+    )
+    setup_request()
+    assert handler().status_code == 504
@@ -1,16 +1,24 @@
+from contextvars import ContextVar
 from functools import partial
+import threading
 
 import pytest
 
 from nanopie.globals import (
+    bind_svc_ctx,
+    get_svc_ctx,
     look_up_attr,
+    look_up_ctx_item,
     look_up_item,
+    svc_ctx_var,
+    unbind_svc_ctx,
     svc_ctx,
     parsed_request,
     svc,
     endpoint,
     request,
 )
+from nanopie.proxy import resolve
 
 
 class Object(object):
@@ -67,3 +75,67 @@ def test_endpoint(setup_ctx):
 
 def test_request(setup_ctx):
     assert request._extract_mock_name() == "request"
+
+
+def test_look_up_ctx_item():
+    var = ContextVar("test")
+
+    with pytest.raises(RuntimeError) as ex:
+        look_up_ctx_item(var=var, name="item")
+    assert "No context is available" in str(ex.value)
+
+    var.set({"item": 0})
+    assert look_up_ctx_item(var=var, name="item") == 0
+
+    with pytest.raises(RuntimeError) as ex:
+        look_up_ctx_item(var=var, name="other_item")
+    assert "Specified object is not available yet." in str(ex.value)
+
+
+def test_bind_svc_ctx():
+    ctx = {"request": Object()}
+    token = bind_svc_ctx(ctx)
+    try:
+        assert svc_ctx.wrapped is ctx
+        assert request.wrapped is ctx["request"]
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(bool(request)))
+        thread.start()
+        thread.join()
+        # Contexts are not shared across threads.
+        assert results == [False]
+    finally:
+        unbind_svc_ctx(token)
+
+    assert svc_ctx_var.get(None) is not ctx
+
+
+def test_get_svc_ctx():
+    token = svc_ctx_var.set(None)
+    try:
+        with pytest.raises(RuntimeError) as ex:
+            get_svc_ctx()
+        assert "No context is available" in str(ex.value)
+    finally:
+        svc_ctx_var.reset(token)
+
+    ctx = {"request": Object()}
+    token = bind_svc_ctx(ctx)
+    try:
+        assert get_svc_ctx() is ctx
+    finally:
+        unbind_svc_ctx(token)
+
+
+def test_resolve():
+    ctx = {"request": Object()}
+    token = bind_svc_ctx(ctx)
+    try:
+        assert resolve(request) is ctx["request"]
+        assert resolve(svc_ctx) is ctx
+    finally:
+        unbind_svc_ctx(token)
+
+    obj = Object()
+    assert resolve(obj) is obj
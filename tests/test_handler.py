@@ -1,8 +1,17 @@
+import asyncio
 from functools import partial
 from unittest.mock import MagicMock
 
-from nanopie import Handler, SimpleHandler
+import pytest
+
+from nanopie import Handler, SimpleHandler, WSGIService
 from nanopie.globals import endpoint
+from nanopie.handler import (
+    compile_async_chain,
+    compile_chain,
+    supports_async,
+    walk_chain,
+)
 from nanopie.services.base import RPCEndpoint
 
 
@@ -49,3 +58,152 @@ def test_simple_handler_routes(setup_ctx):
     endpoint.name = "dummy_handler"  # pylint: disable=assigning-non-slot
 
     assert simple_handler() == "This is a dummy handler."
+
+
+def test_handler_acall_routes(setup_ctx):
+    handler = Handler()
+    dummy_handler = DummyHandler()
+
+    handler.add_route(name="dummy_handler", handler=dummy_handler)
+
+    endpoint.name = "dummy_handler"  # pylint: disable=assigning-non-slot
+
+    assert asyncio.run(handler.acall()) == "This is a dummy handler."
+
+
+def test_simple_handler_acall():
+    async def func(x):
+        return "This is an async simple handler ({}).".format(x)
+
+    simple_handler = SimpleHandler(func=func)
+
+    assert asyncio.run(simple_handler.acall(1)) == (
+        "This is an async simple handler (1)."
+    )
+
+    simple_handler = SimpleHandler(func=lambda x: "Sync ({}).".format(x))
+
+    assert asyncio.run(simple_handler.acall(2)) == "Sync (2)."
+
+
+def test_supports_async():
+    class AsyncDummyHandler(DummyHandler):
+        async def acall(self, *args, **kwargs):
+            return "This is an async dummy handler."
+
+    assert supports_async(Handler())
+    assert supports_async(SimpleHandler(func=lambda: None))
+    assert not supports_async(DummyHandler())
+    assert supports_async(AsyncDummyHandler())
+    assert not supports_async(lambda: None)
+
+
+class RecordingHandler(Handler):
+    def __init__(self, records):
+        self.records = records
+        super().__init__()
+
+    def handle(self, call_next, *args, **kwargs):
+        self.records.append(self)
+        return call_next(*args, **kwargs)
+
+    async def ahandle(self, call_next, *args, **kwargs):
+        self.records.append(self)
+        return await call_next(*args, **kwargs)
+
+
+def make_chain(records):
+    entrypoint = RecordingHandler(records)
+    handler = entrypoint.add_route(name="test", handler=RecordingHandler(records))
+    handler.add_route(name="test", handler=SimpleHandler(func=lambda x: x * 2))
+    return entrypoint
+
+
+def test_compile_chain(setup_ctx):
+    records = []
+    entrypoint = make_chain(records)
+    compiled = compile_chain(entrypoint, "test")
+
+    # Compiled chains do not look up the current endpoint.
+    endpoint.name = "other"  # pylint: disable=assigning-non-slot
+
+    assert compiled(2) == 4
+    assert len(records) == 2
+
+    assert asyncio.run(compile_async_chain(entrypoint, "test")(3)) == 6
+    assert len(records) == 4
+
+    with pytest.raises(RuntimeError):
+        entrypoint(2)
+
+
+def test_compile_chain_legacy_handler(setup_ctx):
+    records = []
+    entrypoint = RecordingHandler(records)
+    entrypoint.add_route(name="test", handler=DummyHandler())
+
+    endpoint.name = "test"  # pylint: disable=assigning-non-slot
+
+    assert compile_chain(entrypoint, "test")() == "This is a dummy handler."
+    assert asyncio.run(compile_async_chain(entrypoint, "test")()) == (
+        "This is a dummy handler."
+    )
+    assert len(records) == 2
+
+
+def test_walk_chain():
+    records = []
+    entrypoint = make_chain(records)
+
+    handlers = list(walk_chain(entrypoint, "test"))
+    assert len(handlers) == 3
+    assert handlers[0] is entrypoint
+    assert isinstance(handlers[2], SimpleHandler)
+    assert list(walk_chain(entrypoint, "other")) == [entrypoint]
+
+
+class WarmupHandler(Handler):
+    def __init__(self):
+        self.warmups = 0
+        super().__init__()
+
+    def warmup(self):
+        self.warmups += 1
+
+
+def test_svc_warmup():
+    handler = WarmupHandler()
+    svc = WSGIService(handlers=[handler])
+
+    @svc.get(name="first", rule="/first")
+    def first():
+        pass
+
+    @svc.get(name="second", rule="/second")
+    def second():
+        pass
+
+    svc.warmup()
+    assert handler.warmups == 1
+
+
+def test_svc_admission_handlers():
+    admission_handler = WarmupHandler()
+    handler = WarmupHandler()
+    authn_handler = WarmupHandler()
+    svc = WSGIService(
+        authn_handler=authn_handler,
+        handlers=[handler],
+        admission_handlers=[admission_handler],
+    )
+
+    @svc.get(name="first", rule="/first")
+    def first():
+        pass
+
+    chain = list(walk_chain(svc.endpoints["first"].entrypoint, "first"))
+    assert chain.index(admission_handler) < chain.index(authn_handler)
+    assert chain.index(authn_handler) < chain.index(handler)
+
+    svc.warmup()
+    assert admission_handler.warmups == 1
@@ -0,0 +1,72 @@
+import subprocess
+import sys
+
+import pytest
+
+import nanopie
+
+CHECK_MODULES = """
+import sys
+
+import nanopie
+
+print(" ".join(sorted(sys.modules)))
+"""
+
+
+def get_imported_modules(code):
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return set(output.split())
+
+
+def test_import_is_lazy():
+    modules = get_imported_modules(CHECK_MODULES)
+
+    for name in (
+        "asyncio",
+        "distutils",
+        "flask",
+        "jwt",
+        "opentelemetry",
+        "pyarrow",
+        "nanopie.auth.creds.jwt",
+        "nanopie.logging.base",
+        "nanopie.services.http",
+        "nanopie.tracing.base",
+    ):
+        assert name not in modules
+
+
+@pytest.mark.parametrize("name", ["WSGIService", "FlaskService"])
+def test_import_sync_service_skips_asyncio(name):
+    modules = get_imported_modules(
+        "import sys\n"
+        "from nanopie import {}\n"
+        'print(" ".join(sorted(sys.modules)))'.format(name)
+    )
+
+    assert "asyncio" not in modules
+
+
+def test_import_lazy_attrs():
+    for name in nanopie.__all__:
+        getattr(nanopie, name)
+        assert name in vars(nanopie)
+        assert name in dir(nanopie)
+
+
+def test_import_lazy_attr_cached():
+    from nanopie.tracing.base import OpenTelemetryTracingHandler
+
+    assert nanopie.OpenTelemetryTracingHandler is OpenTelemetryTracingHandler
+    assert "OpenTelemetryTracingHandler" in vars(nanopie)
+
+
+def test_import_unknown_attr():
+    with pytest.raises(AttributeError):
+        nanopie.UnknownHandler  # pylint: disable=pointless-statement
+
+    with pytest.raises(ImportError):
+        from nanopie.services import UnknownService  # pylint: disable=unused-import
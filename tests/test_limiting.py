@@ -0,0 +1,337 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanopie.auth import Key
+from nanopie.globals import endpoint, request, svc_ctx_var
+from nanopie.handler import SimpleHandler
+from nanopie.limiting import (
+    ConcurrencyLimitHandler,
+    MemoryTokenBucketStore,
+    RateLimitHandler,
+    SharedMemoryTokenBucketStore,
+)
+from nanopie.limiting.rate import get_caller
+from nanopie.services.http.io import HTTPResponse
+
+
+def chain(handler, func):
+    endpoint.name = "get_user"  # pylint: disable=assigning-non-slot
+    for name in ("get_user", "export"):
+        handler.add_route(name=name, handler=SimpleHandler(func))
+    return handler
+
+
+def set_new_ctx():
+    # Each request is processed in a new context.
+    ctx = dict(svc_ctx_var.get())
+    ctx.pop("admitted", None)
+    svc_ctx_var.set(ctx)
+
+
+def new_ctx(func):
+    set_new_ctx()
+    return func()
+
+
+async def anew_ctx(handler):
+    set_new_ctx()
+    return await handler.acall()
+
+
+def run_in_thread(func):
+    results = []
+    thread = threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(lambda: results.append(new_ctx(func)),),
+    )
+    thread.start()
+    return thread, results
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_concurrency_limit_handler(setup_ctx):
+    handler = ConcurrencyLimitHandler(limit=1, queue_timeout=0, retry_after=3)
+    release = threading.Event()
+    chain(handler, lambda: release.wait(5) and "Test Message")
+
+    thread, results = run_in_thread(handler)
+    wait_for(lambda: handler.stats()["in_flight"] == 1)
+
+    res = handler()
+    assert res.status_code == 503
+    assert res.headers == {"Retry-After": "3"}
+    assert handler.stats()["shed"] == 1
+
+    release.set()
+    thread.join()
+    assert results == ["Test Message"]
+    assert handler() == "Test Message"
+    assert handler.stats() == {"in_flight": 0, "waiting": 0, "limit": 1, "shed": 1}
+
+
+def test_concurrency_limit_handler_queue(setup_ctx):
+    handler = ConcurrencyLimitHandler(limit=1, queue_timeout=5)
+    release = threading.Event()
+    chain(handler, lambda: release.wait(5) and "Test Message")
+
+    first, first_results = run_in_thread(handler)
+    wait_for(lambda: handler.stats()["in_flight"] == 1)
+    second, second_results = run_in_thread(handler)
+    wait_for(lambda: handler.stats()["waiting"] == 1)
+
+    release.set()
+    first.join()
+    second.join()
+    assert first_results == second_results == ["Test Message"]
+    assert handler.stats()["shed"] == 0
+
+
+def test_concurrency_limit_handler_queue_full(setup_ctx):
+    handler = ConcurrencyLimitHandler(limit=1, queue_timeout=5, max_queue=0)
+    release = threading.Event()
+    chain(handler, lambda: release.wait(5) and "Test Message")
+
+    thread, _ = run_in_thread(handler)
+    wait_for(lambda: handler.stats()["in_flight"] == 1)
+    assert handler().status_code == 503
+
+    release.set()
+    thread.join()
+
+
+def test_concurrency_limit_handler_queue_timeout(setup_ctx):
+    handler = ConcurrencyLimitHandler(limit=1, queue_timeout=0.01)
+    release = threading.Event()
+    chain(handler, lambda: release.wait(5) and "Test Message")
+
+    thread, _ = run_in_thread(handler)
+    wait_for(lambda: handler.stats()["in_flight"] == 1)
+    assert handler().status_code == 503
+
+    release.set()
+    thread.join()
+
+
+def test_concurrency_limit_handler_endpoint_limits(setup_ctx):
+    handler = ConcurrencyLimitHandler(
+        limit=10, endpoint_limits={"export": 1}, queue_timeout=0
+    )
+    release = threading.Event()
+    chain(handler, lambda: release.wait(5) and "Test Message")
+    endpoint.name = "export"  # pylint: disable=assigning-non-slot
+
+    thread, _ = run_in_thread(handler)
+    wait_for(lambda: handler.stats()["in_flight"] == 1)
+    assert handler().status_code == 503
+
+    endpoint.name = "get_user"  # pylint: disable=assigning-non-slot
+    release.set()
+    assert handler() == "Test Message"
+    thread.join()
+
+
+def test_concurrency_limit_handler_admitted(setup_ctx):
+    handler = ConcurrencyLimitHandler(limit=1, queue_timeout=0)
+    func = MagicMock(return_value="Test Message")
+    chain(handler, func)
+
+    svc_ctx_var.get()["admitted"] = frozenset([handler])
+    assert handler() == "Test Message"
+    assert handler.stats()["in_flight"] == 0
+
+
+def test_concurrency_limit_handler_admitted_endpoint_limits(setup_ctx):
+    handler = ConcurrencyLimitHandler(
+        limit=10, endpoint_limits={"export": 1}, queue_timeout=0
+    )
+    release = threading.Event()
+    entered = threading.Event()
+
+    def func():
+        entered.set()
+        release.wait(5)
+        return "Test Message"
+
+    chain(handler, func)
+    endpoint.name = "export"  # pylint: disable=assigning-non-slot
+    # Operations of an admitted batch request are still subject to the
+    # limits of their endpoints.
+    svc_ctx_var.get()["admitted"] = frozenset([handler])
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(handler,))
+    thread.start()
+    assert entered.wait(5)
+
+    assert handler().status_code == 503
+    assert handler.stats()["in_flight"] == 0
+    release.set()
+    thread.join()
+
+
+def test_concurrency_limit_handler_adaptive(setup_ctx, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("nanopie.limiting.concurrency.time.monotonic", lambda: clock[0])
+    handler = ConcurrencyLimitHandler(limit=10, target_latency=0.5, min_limit=2)
+
+    def func():
+        clock[0] += latency
+        return "Test Message"
+
+    chain(handler, func)
+
+    latency = 1.0
+    for _ in range(30):
+        new_ctx(handler)
+    assert handler.stats()["limit"] == 2
+
+    latency = 0.1
+    for _ in range(200):
+        new_ctx(handler)
+    assert handler.stats()["limit"] == 10
+
+
+def test_concurrency_limit_handler_async(setup_ctx):
+    handler = ConcurrencyLimitHandler(limit=1, queue_timeout=5, max_queue=2)
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "Test Message"
+
+    chain(handler, func)
+
+    async def main():
+        return await asyncio.gather(*[anew_ctx(handler) for _ in range(3)])
+
+    assert asyncio.run(main()) == ["Test Message"] * 3
+    assert handler.stats() == {"in_flight": 0, "waiting": 0, "limit": 1, "shed": 0}
+
+
+def test_concurrency_limit_handler_async_shed(setup_ctx):
+    handler = ConcurrencyLimitHandler(limit=1, queue_timeout=0.01)
+
+    async def func():
+        await asyncio.sleep(0.1)
+        return "Test Message"
+
+    chain(handler, func)
+
+    async def main():
+        return await asyncio.gather(*[anew_ctx(handler) for _ in range(2)])
+
+    first, second = asyncio.run(main())
+    assert first == "Test Message"
+    assert isinstance(second, HTTPResponse) and second.status_code == 503
+
+
+def test_concurrency_limit_handler_invalid_limit():
+    with pytest.raises(ValueError):
+        ConcurrencyLimitHandler(limit=0)
+
+
+@pytest.fixture(params=[MemoryTokenBucketStore, SharedMemoryTokenBucketStore])
+def store(request):
+    return request.param()
+
+
+def test_token_bucket_store(store, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("nanopie.limiting.rate.time.monotonic", lambda: clock[0])
+
+    assert [store.consume("a", 1, 2)[0] for _ in range(3)] == [True, True, False]
+    assert store.consume("b", 1, 2) == (True, 0.0)
+
+    allowed, wait = store.consume("a", 1, 2)
+    assert not allowed
+    assert wait == pytest.approx(1.0)
+
+    clock[0] += 1.5
+    assert store.consume("a", 1, 2)[0]
+    assert not store.consume("a", 1, 2)[0]
+
+
+def test_memory_token_bucket_store_max_keys():
+    store = MemoryTokenBucketStore(max_keys=1)
+    store.consume("a", 1, 1)
+    store.consume("b", 1, 1)
+    assert store.consume("a", 1, 1)[0]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_shared_memory_token_bucket_store_fork():
+    store = SharedMemoryTokenBucketStore()
+    pid = os.fork()
+    if pid == 0:
+        store.consume("a", 0.001, 2)
+        store.consume("a", 0.001, 2)
+        os._exit(0)  # pylint: disable=protected-access
+
+    os.waitpid(pid, 0)
+    assert not store.consume("a", 0.001, 2)[0]
+
+
+def test_get_caller(setup_ctx):
+    request.remote_addr = "10.0.0.1"  # pylint: disable=assigning-non-slot
+    assert get_caller() == ("addr", "10.0.0.1")
+
+    svc_ctx_var.get()["credential"] = Key(key="key")
+    assert get_caller() == ("principal", "key")
+
+
+def test_rate_limit_handler(setup_ctx):
+    request.remote_addr = "10.0.0.1"  # pylint: disable=assigning-non-slot
+    handler = RateLimitHandler(rate=0.001, burst=2)
+    func = MagicMock(return_value="Test Message")
+    chain(handler, func)
+
+    assert handler() == "Test Message"
+    assert handler() == "Test Message"
+    res = handler()
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) > 1
+    assert func.call_count == 2
+    assert handler.limited == 1
+
+    request.remote_addr = "10.0.0.2"  # pylint: disable=assigning-non-slot
+    assert handler() == "Test Message"
+
+
+def test_rate_limit_handler_key_func(setup_ctx):
+    key_func = MagicMock(return_value="tenant-1")
+    handler = RateLimitHandler(rate=0.001, key_func=key_func)
+    chain(handler, MagicMock(return_value="Test Message"))
+
+    assert handler() == "Test Message"
+    assert handler().status_code == 429
+    key_func.return_value = "tenant-2"
+    assert handler() == "Test Message"
+
+
+def test_rate_limit_handler_async(setup_ctx):
+    request.remote_addr = "10.0.0.1"  # pylint: disable=assigning-non-slot
+    handler = RateLimitHandler(rate=0.001)
+
+    async def func():
+        return "Test Message"
+
+    chain(handler, func)
+
+    assert asyncio.run(handler.acall()) == "Test Message"
+    assert asyncio.run(handler.acall()).status_code == 429
+
+
+def test_rate_limit_handler_invalid_rate():
+    with pytest.raises(ValueError):
+        RateLimitHandler(rate=0)
@@ -120,13 +120,13 @@ def test_logging_handler(caplog, capsys, simple_logging_handler):
     assert log_output_1["logger"] == "nanopie.logging.base"
     assert log_output_1["level"] == "INFO"
     assert log_output_1["module"] == "base"
-    assert log_output_1["func"] == "__call__"
+    assert log_output_1["func"] == "handle"
     assert log_output_1["message"] == "Entering span unspecified_span."
     assert log_output_2["host"] == socket.gethostname()
     assert log_output_2["logger"] == "nanopie.logging.base"
     assert log_output_2["level"] == "INFO"
     assert log_output_2["module"] == "base"
-    assert log_output_2["func"] == "__call__"
+    assert log_output_2["func"] == "handle"
     assert log_output_2["message"] == "Exiting span unspecified_span."
 
 
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from nanopie.globals import endpoint, svc_ctx_var
+from nanopie.handler import SimpleHandler
+from nanopie.metrics import (
+    MemoryMetricsStore,
+    MetricsHandler,
+    SharedMemoryMetricsStore,
+)
+from nanopie.metrics.handler import escape_label_value
+from nanopie.misc.errors import DeadlineExceededError, ServiceError
+from nanopie.services.http.io import HTTPResponse
+
+KEY = ("nanopie_requests_total", 'endpoint="get_user"')
+
+
+def chain(handler, func):
+    endpoint.name = "get_user"  # pylint: disable=assigning-non-slot
+    handler.add_route(name="get_user", handler=SimpleHandler(func))
+    return handler
+
+
+def run_in_threads(func, count=4):
+    threads = [threading.Thread(target=func) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@pytest.fixture(params=[MemoryMetricsStore, SharedMemoryMetricsStore])
+def store(request):
+    return request.param(buckets=(0.1, 1))
+
+
+def test_metrics_store(store):
+    assert store.collect() == {}
+
+    store.observe(KEY, 0.05)
+    store.observe(KEY, 0.5)
+    store.observe(KEY, 5)
+    store.observe(KEY[:1] + ('endpoint="list_users"',), 0.1)
+
+    series = store.collect()
+    assert series[KEY] == [3, 5.55, 1, 1, 1]
+    assert series[("nanopie_requests_total", 'endpoint="list_users"')] == [
+        1,
+        0.1,
+        1,
+        0,
+        0,
+    ]
+
+
+def test_metrics_store_threads(store):
+    def observe():
+        for _ in range(1000):
+            store.observe(KEY, 0.05)
+
+    run_in_threads(observe)
+    # The series of threads that have exited are kept.
+    assert store.collect()[KEY][0] == 4000
+    run_in_threads(observe)
+    assert store.collect()[KEY][0] == 8000
+
+
+def test_shared_memory_metrics_store_overflow():
+    store = SharedMemoryMetricsStore(max_threads=1)
+    store.observe(KEY)
+
+    # Threads that find no free region write to the overflow region.
+    run_in_threads(lambda: store.observe(KEY))
+    assert store.collect()[KEY][0] == 5
+
+
+def test_shared_memory_metrics_store_max_series():
+    store = SharedMemoryMetricsStore(max_series=1)
+    store.observe(KEY)
+    store.observe(("nanopie_requests_total", 'endpoint="list_users"'))
+    store.observe(("nanopie_requests_total", "x" * 300))
+
+    assert list(store.collect()) == [KEY]
+    assert store.dropped == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_shared_memory_metrics_store_fork():
+    store = SharedMemoryMetricsStore()
+    store.observe(KEY)
+    pid = os.fork()
+    if pid == 0:
+        store.observe(KEY)
+        store.observe(("nanopie_requests_total", 'endpoint="list_users"'))
+        os._exit(0)  # pylint: disable=protected-access
+
+    os.waitpid(pid, 0)
+    series = store.collect()
+    assert series[KEY][0] == 2
+    assert series[("nanopie_requests_total", 'endpoint="list_users"')][0] == 1
+
+
+def test_escape_label_value():
+    assert escape_label_value('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+
+
+def test_metrics_handler(setup_ctx):
+    handler = chain(MetricsHandler(), lambda: HTTPResponse(status_code=201))
+    assert handler().status_code == 201
+
+    # The stages before the function are timed by their own handlers.
+    assert list(svc_ctx_var.get()["timings"]) == ["function"]
+
+    lines = handler.render().splitlines()
+    assert "# TYPE nanopie_requests_total counter" in lines
+    assert 'nanopie_requests_total{endpoint="get_user",status="201"} 1' in lines
+    assert (
+        'nanopie_request_duration_seconds_bucket{endpoint="get_user",le="+Inf"} 1'
+        in lines
+    )
+    assert 'nanopie_request_duration_seconds_count{endpoint="get_user"} 1' in lines
+    assert (
+        'nanopie_stage_duration_seconds_count{endpoint="get_user",stage="function"} 1'
+        in lines
+    )
+    assert not any(line.startswith("nanopie_request_errors_total") for line in lines)
+
+
+def test_metrics_handler_buckets_are_cumulative(setup_ctx):
+    handler = MetricsHandler(MemoryMetricsStore(buckets=(0.1, 1)))
+    handler.store.observe(("nanopie_request_duration_seconds", 'endpoint="a"'), 0.5)
+    handler.store.observe(("nanopie_request_duration_seconds", 'endpoint="a"'), 0.05)
+
+    lines = handler.render().splitlines()
+    for bound, count in (("0.1", 1), ("1", 2), ("+Inf", 2)):
+        line = 'nanopie_request_duration_seconds_bucket{{endpoint="a",le="{}"}} {}'
+        assert line.format(bound, count) in lines
+    assert 'nanopie_request_duration_seconds_sum{endpoint="a"} 0.55' in lines
+
+
+@pytest.mark.parametrize(
+    "ex,status",
+    [
+        (ValueError(), 500),
+        (ServiceError(response=HTTPResponse(status_code=403)), 403),
+        (DeadlineExceededError(), 504),
+    ],
+)
+def test_metrics_handler_errors(setup_ctx, ex, status):
+    def func():
+        raise ex
+
+    handler = chain(MetricsHandler(), func)
+    with pytest.raises(type(ex)):
+        handler()
+
+    series = handler.store.collect()
+    labels = 'endpoint="get_user",status="{}"'.format(status)
+    assert series[("nanopie_requests_total", labels)][0] == 1
+    assert (("nanopie_request_errors_total", labels) in series) == (status >= 500)
+
+
+def test_metrics_handler_async(setup_ctx):
+    async def func():
+        await asyncio.sleep(0)
+        return "OK"
+
+    handler = chain(MetricsHandler(), func)
+    assert asyncio.run(handler.acall()) == "OK"
+
+    series = handler.store.collect()
+    labels = 'endpoint="get_user",status="200"'
+    assert series[("nanopie_requests_total", labels)][0] == 1
+    assert (
+        series[
+            ("nanopie_stage_duration_seconds", 'endpoint="get_user",stage="function"')
+        ][0]
+        == 1
+    )
+
+
+def test_metrics_handler_async_cancelled(setup_ctx):
+    async def func():
+        await asyncio.sleep(1)
+
+    async def main(handler):
+        task = asyncio.ensure_future(handler.acall())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    handler = chain(MetricsHandler(), func)
+    asyncio.run(main(handler))
+    series = handler.store.collect()
+    assert series[("nanopie_requests_total", 'endpoint="get_user",status="499"')]
@@ -9,6 +9,7 @@ from nanopie import (
     ObjectField,
     Model,
 )
+from nanopie.model import str_to_bool
 from nanopie.misc.errors import (
     ValidationError,
     StringMaxLengthExceededError,
@@ -167,6 +168,16 @@ def test_simple_model_from_dikt_type_cast():
     assert s.d_b == False
 
 
+def test_str_to_bool():
+    for data in ("y", "Yes", "t", "TRUE", "on", "1", 1, True):
+        assert str_to_bool(data) is True
+    for data in ("n", "No", "f", "FALSE", "off", "0", 0, False):
+        assert str_to_bool(data) is False
+
+    with pytest.raises(ValueError):
+        str_to_bool("maybe")
+
+
 def test_simple_model_from_dikt_case_insensitive():
     dikt = {
         "A_S": "Test",
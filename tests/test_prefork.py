@@ -0,0 +1,137 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from nanopie.services.http.prefork import PreforkServer, create_listener
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="requires that os.fork is available"
+)
+
+APP = """
+import os
+
+from nanopie import WSGIService
+
+svc = WSGIService()
+
+
+@svc.get(name="pid", rule="/pid")
+def pid():
+    return str(os.getpid())
+
+
+svc.run(host="127.0.0.1", port={port}, workers={workers}, reuse_port={reuse_port})
+"""
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_pid(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(
+                "http://127.0.0.1:{}/pid".format(port), timeout=1
+            ) as res:
+                return int(res.read())
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def start_app(tmp_path, workers, reuse_port=False):
+    port = get_free_port()
+    app = tmp_path / "app.py"
+    app.write_text(APP.format(port=port, workers=workers, reuse_port=reuse_port))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    proc = subprocess.Popen([sys.executable, str(app)], env=env)
+    return proc, port
+
+
+def stop_app(proc):
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(timeout=20) == 0
+
+
+def test_prefork_server(tmp_path):
+    proc, port = start_app(tmp_path, workers=2)
+    try:
+        pids = {get_pid(port) for _ in range(10)}
+        assert proc.pid not in pids
+    finally:
+        stop_app(proc)
+
+
+def test_prefork_server_graceful_stop(tmp_path):
+    proc, port = start_app(tmp_path, workers=4)
+    try:
+        for _ in range(20):
+            get_pid(port)
+    finally:
+        # Workers that do not get a connection do not block in accept, and
+        # exit without being killed.
+        start = time.monotonic()
+        stop_app(proc)
+        assert time.monotonic() - start < 5
+
+
+def test_prefork_server_reuse_port(tmp_path):
+    if not hasattr(socket, "SO_REUSEPORT"):
+        pytest.skip("requires that SO_REUSEPORT is available")
+
+    proc, port = start_app(tmp_path, workers=2, reuse_port=True)
+    try:
+        assert get_pid(port) != proc.pid
+    finally:
+        stop_app(proc)
+
+
+def test_prefork_server_restart_worker(tmp_path):
+    proc, port = start_app(tmp_path, workers=1)
+    try:
+        pid = get_pid(port)
+        os.kill(pid, signal.SIGKILL)
+
+        deadline = time.monotonic() + 10
+        new_pid = pid
+        while new_pid == pid and time.monotonic() < deadline:
+            new_pid = get_pid(port)
+        assert new_pid != pid
+    finally:
+        stop_app(proc)
+
+
+def test_prefork_server_invalid_workers():
+    with pytest.raises(ValueError):
+        PreforkServer(app=None, workers=0)
+
+
+def test_prefork_server_bind():
+    server = PreforkServer(app=None, port=0)
+    server.bind()
+    try:
+        host, port = server.address
+        assert host == "127.0.0.1"
+        assert port != 0
+    finally:
+        server._socket.close()
+
+
+def test_create_listener():
+    sock = create_listener("127.0.0.1", 0)
+    try:
+        assert sock.getsockname()[1] != 0
+    finally:
+        sock.close()
@@ -0,0 +1,265 @@
+import asyncio
+import json
+import marshal
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from nanopie.globals import endpoint
+from nanopie.handler import SimpleHandler
+from nanopie.metrics import MetricsHandler
+from nanopie.profiling import (
+    MemoryTrackingHandler,
+    ProfilingHandler,
+    ProfilingHandlerModes,
+)
+
+retained = None
+
+
+def chain(handler, func):
+    endpoint.name = "get_user"  # pylint: disable=assigning-non-slot
+    for name in ("get_user", "list_users"):
+        handler.add_route(name=name, handler=SimpleHandler(func))
+    return handler
+
+
+def busy_loop(seconds=0.05):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+    return "OK"
+
+
+def test_profiling_handler_sampling(setup_ctx):
+    handler = chain(ProfilingHandler(sample_every=1, interval=0.001), busy_loop)
+    assert handler() == "OK"
+    assert handler.sampled == 1
+
+    lines = handler.dump().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("get_user;")
+        assert int(count) > 0
+    assert any(line.split(" ")[0].endswith(":busy_loop") for line in lines)
+    # Stacks start below the profiling handler.
+    assert not any(":handle;" in line.split(";", 2)[1] for line in lines)
+
+    handler.reset()
+    assert handler.dump() == ""
+
+
+def test_profiling_handler_sample_every(setup_ctx):
+    handler = chain(ProfilingHandler(sample_every=3), lambda: "OK")
+    for _ in range(7):
+        handler()
+    assert handler.sampled == 3
+
+
+def test_profiling_handler_endpoints(setup_ctx):
+    handler = chain(
+        ProfilingHandler(sample_every=1, endpoints=["list_users"]), busy_loop
+    )
+    handler()
+    assert handler.sampled == 0
+
+    endpoint.name = "list_users"  # pylint: disable=assigning-non-slot
+    handler()
+    assert handler.sampled == 1
+
+
+def test_profiling_handler_async(setup_ctx):
+    async def func():
+        await asyncio.sleep(0)
+        return busy_loop()
+
+    handler = chain(ProfilingHandler(sample_every=1, interval=0.001), func)
+    assert asyncio.run(handler.acall()) == "OK"
+    assert ":busy_loop " in handler.dump()
+
+
+def test_profiling_handler_cprofile(setup_ctx, tmp_path):
+    handler = chain(
+        ProfilingHandler(sample_every=1, mode=ProfilingHandlerModes.CPROFILE),
+        lambda: busy_loop(0.001),
+    )
+    handler()
+    handler()
+    endpoint.name = "list_users"  # pylint: disable=assigning-non-slot
+    handler()
+    assert handler.sampled == 3
+
+    assert "busy_loop" in handler.dump("text")
+    assert handler.dump("text", endpoint="export") == ""
+
+    path = tmp_path / "profile.pstats"
+    path.write_bytes(handler.dump("pstats", endpoint="get_user"))
+    stats = pstats.Stats(str(path))
+    calls = [
+        value[1]
+        for func, value in stats.stats.items()
+        if func[2] == "busy_loop"  # pylint: disable=no-member
+    ]
+    assert calls == [2]
+    assert marshal.loads(handler.dump("pstats")) != {}
+
+    with pytest.raises(ValueError):
+        handler.dump("flamegraph")
+
+
+def test_profiling_handler_cprofile_async(setup_ctx):
+    async def func():
+        return "OK"
+
+    # Requests are not profiled with cProfile on event loops.
+    handler = chain(
+        ProfilingHandler(sample_every=1, mode=ProfilingHandlerModes.CPROFILE), func
+    )
+    assert asyncio.run(handler.acall()) == "OK"
+    assert handler.sampled == 0
+
+
+def test_profiling_handler_write(setup_ctx, tmp_path):
+    handler = chain(ProfilingHandler(sample_every=1, interval=0.001), busy_loop)
+    handler()
+
+    path = handler.write(directory=str(tmp_path))
+    assert path == str(tmp_path / "nanopie-profile-{}.txt".format(os.getpid()))
+    with open(path) as f:
+        assert f.read() == handler.dump()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR2"), reason="Requires SIGUSR2.")
+def test_profiling_handler_dump_on_signal(setup_ctx, tmp_path):
+    handler = chain(ProfilingHandler(sample_every=1, interval=0.001), busy_loop)
+    handler()
+
+    previous = signal.getsignal(signal.SIGUSR2)
+    path = tmp_path / "nanopie-profile-{}.txt".format(os.getpid())
+    try:
+        handler.dump_on_signal(directory=str(tmp_path))
+        # The signal arrives while the main thread holds the lock of the
+        # handler; the profiles are written once it is released.
+        with handler._lock:  # pylint: disable=protected-access
+            os.kill(os.getpid(), signal.SIGUSR2)
+            time.sleep(0.05)
+            assert not path.exists()
+        deadline = time.monotonic() + 5
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+    assert path.exists()
+
+
+def test_profiling_handler_invalid_args():
+    with pytest.raises(ValueError):
+        ProfilingHandler(sample_every=0)
+
+    with pytest.raises(ValueError):
+        ProfilingHandler(mode=3)
+
+
+def allocate():
+    global retained  # pylint: disable=global-statement
+    scratch = [bytes(1000) for _ in range(1000)]  # pylint: disable=unused-variable
+    retained = bytearray(200000)
+    return "OK"
+
+
+def test_memory_tracking_handler(setup_ctx):
+    metrics = MetricsHandler()
+    handler = chain(
+        MemoryTrackingHandler(sample_every=2, metrics_handler=metrics), allocate
+    )
+    for _ in range(3):
+        assert handler() == "OK"
+    assert handler.sampled == 2
+    # Allocations are only traced while sampled requests are processed.
+    assert not tracemalloc.is_tracing()
+
+    report = handler.report()["get_user"]
+    assert report["samples"] == 2
+    assert report["max_peak_bytes"] >= report["avg_peak_bytes"] > 1000000
+    top_site = report["top_sites"][0]
+    assert top_site["site"].startswith(__file__)
+    assert top_site["avg_bytes"] >= 200000
+
+    assert handler.dump().startswith("get_user: 2 samples")
+    assert json.loads(handler.dump("json")) == handler.report()
+    assert handler.report(endpoint="list_users") == {}
+
+    series = metrics.store.collect()
+    assert series[("nanopie_request_memory_peak_bytes", 'endpoint="get_user"')][0] == 2
+    assert 'nanopie_request_memory_net_bytes_count{endpoint="get_user"} 2' in (
+        metrics.render().splitlines()
+    )
+
+    handler.reset()
+    assert handler.report() == {}
+
+
+def test_memory_tracking_handler_tracing_started(setup_ctx):
+    handler = chain(MemoryTrackingHandler(sample_every=1), allocate)
+    tracemalloc.start()
+    try:
+        handler()
+        # Tracing started by others is left on.
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert handler.sampled == 1
+
+
+def test_memory_tracking_handler_without_reset_peak(setup_ctx, monkeypatch):
+    # tracemalloc.reset_peak is not available before Python 3.9.
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    handler = chain(MemoryTrackingHandler(sample_every=1), allocate)
+    assert handler() == "OK"
+    assert handler.report()["get_user"]["avg_peak_bytes"] > 1000000
+
+    tracemalloc.start()
+    try:
+        assert handler() == "OK"
+    finally:
+        tracemalloc.stop()
+    assert handler.sampled == 2
+
+
+def test_memory_tracking_handler_start_error(setup_ctx, monkeypatch):
+    handler = chain(MemoryTrackingHandler(sample_every=1), allocate)
+    with monkeypatch.context() as m:
+        m.setattr(tracemalloc, "get_traced_memory", MagicMock(side_effect=OSError))
+        with pytest.raises(OSError):
+            handler()
+    assert not tracemalloc.is_tracing()
+
+    # Requests are sampled again once tracing has been stopped.
+    assert handler() == "OK"
+    assert handler.sampled == 1
+
+
+def test_memory_tracking_handler_span_attributes(setup_ctx):
+    span = MagicMock()
+    with patch("opentelemetry.trace.get_current_span", return_value=span):
+        handler = chain(MemoryTrackingHandler(sample_every=1), allocate)
+        handler()
+
+    attributes = dict(call.args for call in span.set_attribute.call_args_list)
+    assert attributes["memory.peak_bytes"] > 1000000
+
+
+def test_memory_tracking_handler_async(setup_ctx):
+    async def func():
+        await asyncio.sleep(0)
+        return allocate()
+
+    handler = chain(MemoryTrackingHandler(sample_every=1), func)
+    assert asyncio.run(handler.acall()) == "OK"
+    assert handler.report()["get_user"]["avg_peak_bytes"] > 1000000
@@ -0,0 +1,107 @@
+import uuid
+
+import pytest
+
+from nanopie.services.http.aiohttp_svc import translate_rule
+from nanopie.services.http.routing import (
+    METHOD_NOT_ALLOWED_RESPONSE,
+    NOT_FOUND_RESPONSE,
+    Router,
+    RoutingError,
+    compile_rule,
+)
+
+
+def test_compile_rule():
+    pattern, converters = compile_rule("/users")
+    assert pattern == None
+    assert converters == {}
+
+    pattern, converters = compile_rule("/users/<int:uid>/files/<path:file_path>")
+    assert converters == {"uid": int, "file_path": str}
+    assert pattern.match("/users/1/files/a/b.txt").groupdict() == {
+        "uid": "1",
+        "file_path": "a/b.txt",
+    }
+    assert pattern.match("/users/a/files/b.txt") == None
+
+    with pytest.raises(ValueError):
+        compile_rule("/users/<unknown:uid>")
+
+    with pytest.raises(ValueError):
+        compile_rule("/users/<uid>/<uid>")
+
+
+def test_router():
+    router = Router()
+    router.add("/users", "GET", "list_users")
+    router.add("/users", "POST", "create_user")
+    router.add("/users/<int:uid>", "GET", "get_user")
+    router.add("/users/<int:uid>:verify", "GET", "verify_user")
+    router.add("/users/<name>", "GET", "get_user_by_name")
+    router.add("/sessions/<uuid:sid>", "DELETE", "delete_session")
+
+    assert router.rules == [
+        "/users",
+        "/users/<int:uid>",
+        "/users/<int:uid>:verify",
+        "/users/<name>",
+        "/sessions/<uuid:sid>",
+    ]
+
+    assert router.match("/users", "GET") == ("list_users", {})
+    assert router.match("/users", "HEAD") == ("list_users", {})
+    assert router.match("/users", "POST") == ("create_user", {})
+    assert router.match("/users/1", "GET") == ("get_user", {"uid": 1})
+    assert router.match("/users/1:verify", "GET") == ("verify_user", {"uid": 1})
+    assert router.match("/users/john", "GET") == ("get_user_by_name", {"name": "john"})
+
+    sid = uuid.uuid4()
+    assert router.match("/sessions/{}".format(sid), "DELETE") == (
+        "delete_session",
+        {"sid": sid},
+    )
+
+    with pytest.raises(RuntimeError):
+        router.add("/users", "GET", "list_users")
+
+    with pytest.raises(RoutingError) as ex:
+        router.match("/users", "DELETE")
+    assert ex.value.response == METHOD_NOT_ALLOWED_RESPONSE
+
+    with pytest.raises(RoutingError) as ex:
+        router.match("/users/1", "DELETE")
+    assert ex.value.response == METHOD_NOT_ALLOWED_RESPONSE
+
+    with pytest.raises(RoutingError) as ex:
+        router.match("/groups", "GET")
+    assert ex.value.response == NOT_FOUND_RESPONSE
+
+
+def test_translate_rule_for_aiohttp():
+    path, converters = translate_rule("/users/<int:uid>:verify")
+    assert path == r"/users/{uid:\d+}:verify"
+    assert converters == {"uid": int}
+
+    path, converters = translate_rule("/users")
+    assert path == "/users"
+    assert converters == {}
+
+
+def test_router_falls_back_to_later_rules():
+    router = Router()
+    router.add("/files/<name>", "GET", "get_file")
+    router.add("/files/<int:fid>", "DELETE", "delete_file")
+    router.add("/files/<path:file_path>", "DELETE", "delete_path")
+
+    assert router.match("/files/1", "GET") == ("get_file", {"name": "1"})
+    assert router.match("/files/1", "DELETE") == ("delete_file", {"fid": 1})
+    assert router.match("/files/a", "DELETE") == ("delete_path", {"file_path": "a"})
+    assert router.match("/files/a/b", "DELETE") == (
+        "delete_path",
+        {"file_path": "a/b"},
+    )
+
+    with pytest.raises(RoutingError) as ex:
+        router.match("/files/a/b", "GET")
+    assert ex.value.response == METHOD_NOT_ALLOWED_RESPONSE
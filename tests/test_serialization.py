@@ -1,7 +1,9 @@
+import io
 import json
 
 import pytest
 
+from .marks import pyarrow_installed
 from nanopie.model import Model
 from nanopie.fields import (
     StringField,
@@ -11,11 +13,16 @@ from nanopie.fields import (
     ArrayField,
     ObjectField,
 )
-from nanopie.serialization import HTTPSerializationHandler, JSONSerializationHelper
+from nanopie.serialization import (
+    ArrowSerializationHelper,
+    HTTPSerializationHandler,
+    JSONSerializationHelper,
+)
 from nanopie.globals import endpoint, request, parsed_request
 from nanopie.misc.errors import SerializationError
 from nanopie.handler import SimpleHandler
 from nanopie.services.http.io import HTTPResponse
+from nanopie.upload import FileUpload
 
 
 class SimpleModel(Model):
@@ -269,3 +276,131 @@ def test_http_serialization_handler_json_failure_payload_parsing(
         http_serialization_handler_json()
 
     assert "Cannot serialize the data" in str(ex.value)
+
+
+def test_http_serialization_handler_json_list_response(
+    setup_ctx, http_serialization_handler_json
+):
+    def response_func(*args, **kwargs):
+        return [simple_model, simple_model]
+
+    simple_handler = SimpleHandler(func=response_func)
+    http_serialization_handler_json.add_route(name="test", handler=simple_handler)
+
+    endpoint.name = "test"  # pylint: disable=assigning-non-slot
+    request.mime_type = ""  # pylint: disable=assigning-non-slot
+    request.headers = simple_model_data_altchar  # pylint: disable=assigning-non-slot
+    request.query_args = simple_model_data  # pylint: disable=assigning-non-slot
+    request.text_data = json.dumps(  # pylint: disable=assigning-non-slot
+        nested_model_data
+    )
+
+    res = http_serialization_handler_json()
+    assert isinstance(res, HTTPResponse)
+    assert res.mime_type == "application/json"
+    assert res.data == json.dumps([simple_model_data, simple_model_data])
+
+
+@pyarrow_installed
+def test_http_serialization_handler_arrow_list_response(setup_ctx):
+    import pyarrow as pa
+
+    def response_func(*args, **kwargs):
+        return [simple_model, simple_model]
+
+    http_serialization_handler_arrow = HTTPSerializationHandler(
+        serialization_helper=ArrowSerializationHelper()
+    )
+    simple_handler = SimpleHandler(func=response_func)
+    http_serialization_handler_arrow.add_route(name="test", handler=simple_handler)
+
+    endpoint.name = "test"  # pylint: disable=assigning-non-slot
+    request.mime_type = ""  # pylint: disable=assigning-non-slot
+    request.headers = {}  # pylint: disable=assigning-non-slot
+    request.query_args = {}  # pylint: disable=assigning-non-slot
+    request.buffer = memoryview(b"")  # pylint: disable=assigning-non-slot
+
+    res = http_serialization_handler_arrow()
+    assert isinstance(res, HTTPResponse)
+    assert res.mime_type == "application/vnd.apache.arrow.stream"
+    assert pa.ipc.open_stream(b"".join(res.data)).read_all().to_pylist() == [
+        simple_model_data,
+        simple_model_data,
+    ]
+
+
+@pyarrow_installed
+def test_http_serialization_handler_arrow_empty_list_response(setup_ctx):
+    import pyarrow as pa
+
+    helper = ArrowSerializationHelper()
+    http_serialization_handler_arrow = HTTPSerializationHandler(
+        response_cls=SimpleModel, serialization_helper=helper
+    )
+    simple_handler = SimpleHandler(func=lambda *args, **kwargs: [])
+    http_serialization_handler_arrow.add_route(name="test", handler=simple_handler)
+
+    endpoint.name = "test"  # pylint: disable=assigning-non-slot
+    request.mime_type = ""  # pylint: disable=assigning-non-slot
+    request.headers = {}  # pylint: disable=assigning-non-slot
+    request.query_args = {}  # pylint: disable=assigning-non-slot
+    request.buffer = memoryview(b"")  # pylint: disable=assigning-non-slot
+
+    res = http_serialization_handler_arrow()
+    table = pa.ipc.open_stream(b"".join(res.data)).read_all()
+    assert table.num_rows == 0
+    assert table.schema == helper.get_schema(SimpleModel)
+
+
+class SmallUpload(FileUpload):
+    max_memory_size = 4
+    max_size = 16
+
+
+def test_http_serialization_handler_upload(setup_ctx):
+    uploads = []
+
+    def upload_func(*args, **kwargs):
+        upload = parsed_request.data
+        uploads.append(upload)
+        assert upload.mime_type == "application/octet-stream"
+        assert upload.read() == b"0123456789"
+        return HTTPResponse(data="OK")
+
+    http_serialization_handler_upload = HTTPSerializationHandler(
+        data_cls=SmallUpload, serialization_helper=JSONSerializationHelper()
+    )
+    simple_handler = SimpleHandler(func=upload_func)
+    http_serialization_handler_upload.add_route(name="test", handler=simple_handler)
+
+    endpoint.name = "test"  # pylint: disable=assigning-non-slot
+    request.mime_type = "application/octet-stream"  # pylint: disable=assigning-non-slot
+    request.headers = {}  # pylint: disable=assigning-non-slot
+    request.query_args = {}  # pylint: disable=assigning-non-slot
+    request.stream = io.BytesIO(b"0123456789")  # pylint: disable=assigning-non-slot
+
+    assert http_serialization_handler_upload.accepts_upload
+    assert http_serialization_handler_upload.max_content_length == 17
+
+    res = http_serialization_handler_upload()
+    assert res.data == "OK"
+    assert uploads[0].rolled
+    assert uploads[0].closed
+
+
+def test_http_serialization_handler_upload_failure_too_large(setup_ctx):
+    http_serialization_handler_upload = HTTPSerializationHandler(
+        data_cls=SmallUpload, serialization_helper=JSONSerializationHelper()
+    )
+
+    endpoint.name = "test"  # pylint: disable=assigning-non-slot
+    request.mime_type = ""  # pylint: disable=assigning-non-slot
+    request.headers = {}  # pylint: disable=assigning-non-slot
+    request.query_args = {}  # pylint: disable=assigning-non-slot
+    request.stream = io.BytesIO(b"x" * 17)  # pylint: disable=assigning-non-slot
+
+    with pytest.raises(SerializationError) as ex:
+        http_serialization_handler_upload()
+
+    assert "too large" in str(ex.value)
+    assert ex.value.response.data == "<h2>400 Bad Request: request is too large.</h2>"
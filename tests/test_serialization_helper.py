@@ -2,17 +2,46 @@ import json
 
 import pytest
 
-from nanopie.serialization.helpers import JSONSerializationHelper
+from .marks import pyarrow_installed
+from nanopie.fields import ArrayField, IntField, ObjectField, StringField
+from nanopie.model import Model
+from nanopie.serialization.helpers import (
+    ArrowSerializationHelper,
+    JSONSerializationHelper,
+)
 
 dikt = {"test": "message"}
 data = json.dumps(dikt)
 
 
+class Address(Model):
+    city = StringField()
+
+
+class User(Model):
+    name = StringField(required=True)
+    age = IntField()
+    tags = ArrayField(item_field=StringField())
+    address = ObjectField(model=Address)
+
+
+users = [
+    User(name="John", age=35, tags=["a", "b"], address=Address(city="Seattle")),
+    User(name="Jane", age=None, tags=[], address=None),
+    User(name="Albert", age=49, tags=None, address=Address(city="Raccoon City")),
+]
+
+
 @pytest.fixture
 def json_serialization_helper():
     return JSONSerializationHelper()
 
 
+@pytest.fixture
+def arrow_serialization_helper():
+    return ArrowSerializationHelper(batch_size=2)
+
+
 def test_json_serialization_helper_mime_type(json_serialization_helper):
     assert json_serialization_helper.mime_type == "application/json"
 
@@ -27,3 +56,99 @@ def test_json_serialization_helper_to_data(json_serialization_helper):
 
 def test_json_serialization_helper_from_data(json_serialization_helper):
     assert json_serialization_helper.from_data(data) == dikt
+
+
+def test_json_serialization_helper_models_to_data(json_serialization_helper):
+    assert json_serialization_helper.models_to_data(users[:1]) == json.dumps(
+        [users[0].to_dikt()]
+    )
+
+
+@pyarrow_installed
+def test_arrow_serialization_helper_mime_type(arrow_serialization_helper):
+    assert arrow_serialization_helper.mime_type == "application/vnd.apache.arrow.stream"
+
+
+@pyarrow_installed
+def test_arrow_serialization_helper_binary(arrow_serialization_helper):
+    assert arrow_serialization_helper.binary == True
+
+
+@pyarrow_installed
+def test_arrow_serialization_helper_schema(arrow_serialization_helper):
+    import pyarrow as pa
+
+    schema = arrow_serialization_helper.get_schema(User)
+    assert schema.field("name").type == pa.string()
+    assert schema.field("name").nullable == False
+    assert schema.field("age").type == pa.int64()
+    assert schema.field("tags").type == pa.list_(pa.string())
+    assert schema.field("address").type == pa.struct([("city", pa.string())])
+    assert arrow_serialization_helper.get_schema(User) is schema
+
+
+@pyarrow_installed
+def test_arrow_serialization_helper_models_to_data(arrow_serialization_helper):
+    import pyarrow as pa
+
+    chunks = list(arrow_serialization_helper.models_to_data(users))
+    # The schema and the first batch, the second batch, and the end.
+    assert len(chunks) == 3
+    reader = pa.ipc.open_stream(b"".join(chunks))
+    batches = list(reader)
+
+    assert reader.schema == arrow_serialization_helper.get_schema(User)
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert pa.Table.from_batches(batches).to_pylist() == [
+        {"name": "John", "age": 35, "tags": ["a", "b"], "address": {"city": "Seattle"}},
+        {"name": "Jane", "age": None, "tags": [], "address": None},
+        {
+            "name": "Albert",
+            "age": 49,
+            "tags": None,
+            "address": {"city": "Raccoon City"},
+        },
+    ]
+
+
+@pyarrow_installed
+def test_arrow_serialization_helper_models_to_data_empty(arrow_serialization_helper):
+    import pyarrow as pa
+
+    data = b"".join(arrow_serialization_helper.models_to_data([]))
+    assert pa.ipc.open_stream(data).read_all().num_rows == 0
+
+    data = b"".join(arrow_serialization_helper.models_to_data([], model_cls=User))
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 0
+    assert table.schema == arrow_serialization_helper.get_schema(User)
+
+
+@pyarrow_installed
+def test_arrow_serialization_helper_models_to_data_failure_mixed_models(
+    arrow_serialization_helper,
+):
+    with pytest.raises(ValueError) as ex:
+        arrow_serialization_helper.models_to_data([users[0], Address(city="Seattle")])
+
+    assert "same type" in str(ex.value)
+
+
+@pyarrow_installed
+def test_arrow_serialization_helper_to_data_from_data(arrow_serialization_helper):
+    data = arrow_serialization_helper.to_data(dikt)
+    assert type(data) == bytes
+    assert arrow_serialization_helper.from_data(data) == dikt
+    assert arrow_serialization_helper.from_data(memoryview(data)) == dikt
+
+
+@pyarrow_installed
+def test_arrow_serialization_helper_from_data_failure_multiple_rows(
+    arrow_serialization_helper,
+):
+    data = arrow_serialization_helper.to_data([dikt, dikt])
+
+    with pytest.raises(ValueError) as ex:
+        arrow_serialization_helper.from_data(data)
+
+    assert "exactly one row" in str(ex.value)
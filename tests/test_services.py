@@ -0,0 +1,122 @@
+from unittest.mock import MagicMock
+
+from nanopie.services.http.io import HTTPHeaders, HTTPRequest, as_http_headers
+
+
+def make_request(binary_data, text_data=None):
+    return HTTPRequest(
+        url="http://localhost/",
+        headers={},
+        content_length=None,
+        mime_type="",
+        query_args={},
+        binary_data=binary_data,
+        text_data=text_data,
+    )
+
+
+def test_http_request_buffer():
+    data = b'{"test": "message"}'
+    get_data = MagicMock(return_value=data)
+    request = make_request(binary_data=get_data)
+
+    buffer = request.buffer
+    assert isinstance(buffer, memoryview)
+    assert buffer == data
+    assert request.buffer is buffer
+    assert request.binary_data is data
+    get_data.assert_called_once()
+
+
+def test_http_request_buffer_empty():
+    request = make_request(binary_data=lambda: None)
+
+    assert request.buffer == b""
+    assert request.binary_data == b""
+    assert request.text_data == ""
+
+
+def test_http_request_buffer_bytearray():
+    data = bytearray(b"test")
+    request = make_request(binary_data=data)
+
+    assert request.buffer.obj is data
+    assert request.binary_data == b"test"
+    assert type(request.binary_data) == bytes
+
+
+def test_http_request_text_data():
+    data = "tëst".encode("utf-8")
+    get_data = MagicMock(return_value=data)
+    request = make_request(binary_data=get_data)
+
+    assert request.text_data == "tëst"
+    assert request.text_data is request.text_data
+    get_data.assert_called_once()
+
+
+def test_http_request_text_data_not_decoded_for_binary_access():
+    request = make_request(binary_data=b"\xff\xfe")
+
+    assert request.binary_data == b"\xff\xfe"
+    assert request._text_data == None
+
+
+def test_http_request_text_data_provided():
+    get_text = MagicMock(return_value="test")
+    get_data = MagicMock(return_value=b"ignored")
+    request = make_request(binary_data=get_data, text_data=get_text)
+
+    assert request.text_data == "test"
+    assert request.text_data == "test"
+    get_text.assert_called_once()
+    get_data.assert_not_called()
+
+
+def test_http_headers():
+    headers = HTTPHeaders({"Content-Type": "application/json", "X-Api-Key": "key"})
+
+    assert headers["content-type"] == "application/json"
+    assert headers.get("X-API-KEY") == "key"
+    assert headers.get("Authorization") == None
+    assert "x-api-key" in headers
+    assert 1 not in headers
+    assert list(headers) == ["Content-Type", "X-Api-Key"]
+    assert len(headers) == 2
+    assert headers == {"Content-Type": "application/json", "X-Api-Key": "key"}
+
+
+def test_http_headers_items():
+    class Headers:
+        def items(self):
+            return [("X-Test", "1"), ("x-test", "2")]
+
+    headers = HTTPHeaders(Headers())
+    assert headers["X-TEST"] == "2"
+    assert as_http_headers(headers) is headers
+    assert as_http_headers(None) == {}
+
+
+def test_http_request_memoized():
+    get_headers = MagicMock(return_value={"X-Test": "test"})
+    get_url = MagicMock(return_value="http://localhost/")
+    get_query_args = MagicMock(return_value={"test": "test"})
+    request = HTTPRequest(
+        url=get_url,
+        headers=get_headers,
+        content_length=lambda: 1,
+        mime_type=lambda: "text/plain",
+        query_args=get_query_args,
+        binary_data=b"t",
+    )
+
+    assert isinstance(request.headers, HTTPHeaders)
+    assert request.headers is request.headers
+    assert request.headers.get("x-test") == "test"
+    assert request.url == request.url == "http://localhost/"
+    assert request.query_args is request.query_args
+    assert request.content_length == 1
+    assert request.mime_type == "text/plain"
+    get_headers.assert_called_once()
+    get_url.assert_called_once()
+    get_query_args.assert_called_once()
@@ -0,0 +1,133 @@
+import asyncio
+
+import flask
+import pytest
+
+from nanopie import (
+    add_background_task,
+    ASGIService,
+    FlaskService,
+    HTTPMethods,
+    HTTPResponse,
+    IntField,
+    Model,
+    StringField,
+    TestClient,
+    WSGIService,
+    parsed_request,
+    request,
+)
+
+
+class User(Model):
+    uid = IntField()
+    name = StringField(min_length=1, required=True)
+
+
+def make_svc(svc_cls):
+    if svc_cls == FlaskService:
+        svc = FlaskService(app=flask.Flask(__name__))
+    else:
+        svc = svc_cls()
+    notifications = []
+
+    @svc.get(name="get_user", rule="/users/<int:uid>")
+    def get_user(uid):
+        return User(uid=uid, name="John Smith")
+
+    @svc.create(name="create_user", rule="/users", data_cls=User)
+    def create_user():
+        user = parsed_request.data
+        user.uid = 2
+        return user
+
+    @svc.custom(name="echo", rule="/echo", verb="url", method=HTTPMethods.GET)
+    def echo():
+        return HTTPResponse(
+            headers={"X-Remote-Addr": request.remote_addr},
+            mime_type="text/plain",
+            data=request.url,
+        )
+
+    async def anotify(uid):
+        await asyncio.sleep(0)
+        notifications.append(uid)
+
+    @svc.custom(
+        name="notify_user",
+        rule="/users/<int:uid>",
+        verb="notify",
+        method=HTTPMethods.POST,
+    )
+    def notify_user(uid):
+        add_background_task(notifications.append, uid)
+        add_background_task(anotify, uid + 1)
+        return "Scheduled"
+
+    return svc, notifications
+
+
+@pytest.fixture(params=[WSGIService, FlaskService, ASGIService])
+def svc_cls(request):
+    return request.param
+
+
+def test_test_client(svc_cls):
+    svc, _ = make_svc(svc_cls)
+    client = TestClient(svc)
+
+    res = client.call("get_user", args={"uid": 1})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/json"
+    assert res.json() == {"uid": 1, "name": "John Smith"}
+
+    res = client.call("create_user", json={"name": "Jill Valentine"})
+    assert res.json() == {"uid": 2, "name": "Jill Valentine"}
+
+
+def test_test_client_request(svc_cls):
+    svc, _ = make_svc(svc_cls)
+    client = TestClient(svc, base_url="https://example.com/", remote_addr="10.0.0.1")
+
+    res = client.call("echo", query_args={"q": "a b"})
+    assert res.text == "https://example.com/echo:url?q=a+b"
+    assert res.headers["X-Remote-Addr"] == "10.0.0.1"
+
+
+def test_test_client_background_tasks(svc_cls):
+    svc, notifications = make_svc(svc_cls)
+
+    res = TestClient(svc).call("notify_user", args={"uid": 1})
+    assert res.text == "Scheduled"
+    assert notifications == [1, 2]
+    assert res.background_tasks == []
+
+    res = TestClient(svc, run_background_tasks=False).call(
+        "notify_user", args={"uid": 3}
+    )
+    assert notifications == [1, 2]
+    assert len(res.background_tasks) == 2
+
+
+def test_test_client_acall():
+    svc, _ = make_svc(ASGIService)
+
+    async def main():
+        return await TestClient(svc).acall("get_user", args={"uid": 1})
+
+    assert asyncio.run(main()).json() == {"uid": 1, "name": "John Smith"}
+
+
+def test_test_client_build_request():
+    svc, _ = make_svc(WSGIService)
+    client = TestClient(svc, headers={"Authorization": "Basic a2V5"})
+
+    req = client.build_request(
+        "create_user", data="name", mime_type="text/plain", headers={"X-A": "1"}
+    )
+    assert req.url == "http://localhost/users"
+    assert req.headers["authorization"] == "Basic a2V5"
+    assert req.headers["x-a"] == "1"
+    assert req.content_length == 4
+    assert req.mime_type == "text/plain"
+    assert req.binary_data == b"name"
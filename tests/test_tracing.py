@@ -68,6 +68,18 @@ def zipkin_container():
     zipkin_container.kill()
 
 
+@opentelemetry_installed
+def test_opentelemetry_tracing_handler_warmup():
+    tracing_handler = OpenTelemetryTracingHandler()
+
+    tracing_handler.warmup()
+    tracer_provider = tracing_handler._tracer_provider
+    assert tracer_provider != None
+
+    tracing_handler.warmup()
+    assert tracing_handler._tracer_provider is tracer_provider
+
+
 @opentelemetry_installed
 def test_opentelemetry_tracing_handler(capfd):
     tracing_handler = OpenTelemetryTracingHandler()
@@ -233,6 +245,19 @@ def test_http_w3c_trace_ctx_extractor(capfd, setup_ctx):
     assert http_w3c_trace_ctx.trace_state["rojo"] == "00f067aa0ba902b7"
 
 
+def test_http_w3c_trace_ctx_extractor_case_insensitive(setup_ctx):
+    http_w3c_trace_ctx_extractor = HTTPW3CTraceContextExtractor()
+
+    request.headers = {  # pylint: disable=assigning-non-slot
+        "Traceparent": "00-a02996b5f223b9d785d9ac361fedb5b8-f4477120b9837b93-01",
+        "Tracestate": "rojo=00f067aa0ba902b7",
+    }
+
+    http_w3c_trace_ctx = http_w3c_trace_ctx_extractor.extract(request=request)
+    assert http_w3c_trace_ctx.trace_id == 212892420273462992823733831323385443768
+    assert http_w3c_trace_ctx.trace_state["rojo"] == "00f067aa0ba902b7"
+
+
 @opentelemetry_installed
 def test_opentelemetry_tracing_handler_propagation(capfd):
     from opentelemetry import trace
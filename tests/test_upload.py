@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from nanopie.upload import FileUpload, UploadTooLargeError
+
+
+class SmallUpload(FileUpload):
+    max_memory_size = 8
+    max_size = 32
+    chunk_size = 4
+
+
+def test_file_upload_in_memory():
+    upload = SmallUpload.from_stream(io.BytesIO(b"abcdef"), mime_type="text/plain")
+
+    assert upload.size == 6
+    assert upload.mime_type == "text/plain"
+    assert not upload.rolled
+    assert upload.read() == b"abcdef"
+    view = upload.mmap()
+    assert bytes(view) == b"abcdef"
+    assert view.readonly
+
+    upload.close()
+    assert upload.closed
+
+
+def test_file_upload_rollover():
+    data = b"0123456789abcdef"
+    upload = SmallUpload.from_stream(io.BytesIO(data))
+
+    assert upload.size == len(data)
+    assert upload.rolled
+    assert upload.read(4) == b"0123"
+    upload.seek(0)
+    assert upload.read() == data
+
+    mapping = upload.mmap()
+    assert mapping[:] == data
+
+    upload.close()
+    assert upload.closed
+    assert mapping.closed
+
+
+def test_file_upload_empty():
+    upload = SmallUpload.from_stream(io.BytesIO(b""))
+
+    assert upload.size == 0
+    assert upload.read() == b""
+    upload.close()
+
+
+def test_file_upload_too_large():
+    stream = io.BytesIO(b"x" * 33)
+
+    with pytest.raises(UploadTooLargeError) as ex:
+        SmallUpload.from_stream(stream)
+
+    assert "too large" in str(ex.value)
+
+
+def test_file_upload_unlimited():
+    class UnlimitedUpload(SmallUpload):
+        max_size = None
+
+    upload = UnlimitedUpload.from_stream(io.BytesIO(b"x" * 64))
+    assert upload.size == 64
+    upload.close()
+
+
+def test_file_upload_context_manager():
+    with SmallUpload.from_stream(io.BytesIO(b"abc")) as upload:
+        assert upload.read() == b"abc"
+
+    assert upload.closed